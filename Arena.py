@@ -9,6 +9,19 @@ parser.add_argument("-g","--gui",help="Run GUI panel",dest="gui",action="store_t
 parser.add_argument("-p","--password",help="Change password",dest="password")
 parser.add_argument("-o","--port",help="Set up port",dest="port")
 parser.add_argument("-c","-console",help="Run with no GUI",dest="console",action="store_true")
+parser.add_argument("-z","--compression",help="permessage-deflate level (0-9), or 'off'",dest="compression")
+parser.add_argument("-t","--tick-rate",help="Game ticks per second, eg. 20, 30 or 60",dest="tickRate")
+parser.add_argument("-a","--asyncio",help="Run the server on a single asyncio event loop",dest="asyncio",action="store_true")
+parser.add_argument("-n","--capacity",help="Most players in a game",dest="capacity")
+parser.add_argument("-s","--size",help="Arena size in pixels, eg. 650 or 1200x800",dest="size")
+parser.add_argument("-i","--interest-radius",help="Only send players within this many pixels in full",dest="interestRadius")
+parser.add_argument("-d","--delta-history",help="Snapshots kept as delta baselines, or 0 to always send full snapshots",dest="deltaHistory")
+parser.add_argument("-b","--server-physics",help="Simulate bullets on the server (needs NumPy)",dest="serverPhysics",action="store_true")
+parser.add_argument("-f","--fixed-rate",help="Don't slow client updates and snapshots down when the server is under load",dest="fixedRate",action="store_true")
+parser.add_argument("-m","--map",help="JSON map file to play on, eg. maps/bunkers.json",dest="map")
+parser.add_argument("-r","--rooms",help="Host many games on the port, one per room",dest="rooms",action="store_true")
+parser.add_argument("-w","--workers",help="Host rooms across this many processes",dest="workers")
+parser.add_argument("-H","--http-port",help="Serve the web pages on this port, without a CGI web server",dest="httpPort")
 """/*
     Class: ArenaGUI
     Main GUI interface for graphical management of the Arena backend
@@ -196,18 +209,103 @@ if __name__ == '__main__':
                 print(s)
         except IOError:
             print("Error when attempting to open logfile")
-            log = print
+            consoleLog = print
+        log = consoleLog
         kwargs = {'log': consoleLog}
         if args.port:
             try:
                 kwargs['port'] = int(args.port)
-            except:
+            except ValueError:
                 log('Port was not an integer')
                 exit(1)
         if args.password:
             kwargs['password'] = args.password
-
-        server = ArenaServer.ArenaServer(**kwargs)
+        if args.compression:
+            if args.compression == 'off':
+                kwargs['compressionLevel'] = None
+            else:
+                try:
+                    kwargs['compressionLevel'] = int(args.compression)
+                    if not -1 <= kwargs['compressionLevel'] <= 9:
+                        raise ValueError()
+                except ValueError:
+                    log('Compression level was not an integer from -1 to 9')
+                    exit(1)
+
+        if args.tickRate:
+            try:
+                kwargs['tickRate'] = float(args.tickRate)
+            except ValueError:
+                log('Tick rate was not a number')
+                exit(1)
+        if args.capacity:
+            try:
+                kwargs['capacity'] = int(args.capacity)
+            except ValueError:
+                log('Capacity was not an integer')
+                exit(1)
+        if args.size:
+            try:
+                size = [int(side) for side in args.size.lower().split('x')]
+                kwargs['arenaWidth'], kwargs['arenaHeight'] = (
+                    size if len(size) == 2 else size * 2)
+            except ValueError:
+                log('Arena size was not WIDTH or WIDTHxHEIGHT')
+                exit(1)
+        if args.interestRadius:
+            try:
+                kwargs['interestRadius'] = float(args.interestRadius)
+            except ValueError:
+                log('Interest radius was not a number')
+                exit(1)
+        if args.deltaHistory:
+            try:
+                kwargs['deltaHistory'] = int(args.deltaHistory)
+            except ValueError:
+                log('Delta history was not an integer')
+                exit(1)
+        if args.serverPhysics:
+            try:
+                import numpy
+            except ImportError:
+                log('Server side physics needs NumPy')
+                exit(1)
+            kwargs['serverPhysics'] = True
+        if args.map:
+            from local.ArenaMap import ArenaMap
+            try:
+                ArenaMap.load(args.map)
+            except (OSError, ValueError) as e:
+                log('Could not load map: ' + str(e))
+                exit(1)
+            kwargs['arenaMap'] = args.map
+        if args.fixedRate:
+            kwargs['adaptiveRate'] = False
+        if args.httpPort:
+            if args.rooms or args.workers:
+                log('The HTTP front end needs a single game server')
+                exit(1)
+            try:
+                kwargs['httpPort'] = int(args.httpPort)
+            except ValueError:
+                log('HTTP port was not an integer')
+                exit(1)
+        if args.workers:
+            from local.RoomSupervisor import RoomSupervisor
+            try:
+                kwargs['workers'] = int(args.workers)
+            except ValueError:
+                log('Number of workers was not an integer')
+                exit(1)
+            server = RoomSupervisor(**kwargs)
+        elif args.rooms:
+            from local.RoomServer import RoomServer
+            server = RoomServer(**kwargs)
+        elif args.asyncio:
+            from local.AsyncArenaServer import AsyncArenaServer
+            server = AsyncArenaServer(**kwargs)
+        else:
+            server = ArenaServer.ArenaServer(**kwargs)
         try:
             server.listen()
         except KeyboardInterrupt:
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+from os.path import abspath, dirname
+from random import random, seed
+from sys import path
+from timeit import repeat
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+from local.ArenaMap import ArenaMap
+from local.BulletPhysics import BulletPhysics
+
+"""/*
+    Script: Bullet Physics Benchmark
+    Measures the time <BulletPhysics> takes to simulate a tick of a game
+    with every player's bullets in flight, for growing numbers of players.
+
+    Needs NumPy.
+
+    Usage:
+        (start code (bash))
+            python3 benchmarks/bullet_physics.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: fireAll
+    Fires all of every player's bullets in random directions
+
+    Parameters:
+        BulletPhysics physics - The physics to fire the bullets in
+        list tanks - (x, y) of each player's tank
+*/"""
+def fireAll(physics, tanks):
+    for owner, (x, y) in enumerate(tanks):
+        physics.report(owner, [None] * BulletPhysics.MAX_BULLETS, x, y)
+        physics.report(owner, [
+            {'xChange': random() - 0.5, 'yChange': random() - 0.5}
+            for i in range(BulletPhysics.MAX_BULLETS)], x, y)
+
+
+if __name__ == '__main__':
+    seed(1)
+    number = 100
+    width = height = 2000
+    print('%8s %8s %14s' % ('players', 'bullets', 'tick (us)'))
+    for capacity in (4, 32, 128, 255):
+        physics = BulletPhysics(capacity,
+                                ArenaMap.default(capacity, width, height))
+        tanks = [(random() * width, random() * height)
+                 for i in range(capacity)]
+
+        def tick():
+            if physics.active.sum() < capacity * 2:
+                fireAll(physics, tanks)
+            physics.advance(1 / 30, tanks)
+
+        time = min(repeat(tick, number=number, repeat=5)) / number
+        print('%8i %8i %14.1f' % (
+            capacity, capacity * BulletPhysics.MAX_BULLETS, time * 1e6))
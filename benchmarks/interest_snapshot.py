@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+from os.path import abspath, dirname
+from random import random, seed
+from sys import path
+from timeit import repeat
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+from local.ArenaServer import ArenaServer
+
+"""/*
+    Script: Interest Snapshot Benchmark
+    Compares the size and build cost of the snapshots sent to every client
+    of a large game, with and without an <ArenaServer.interestRadius>.
+
+    Usage:
+        (start code (bash))
+            python3 benchmarks/interest_snapshot.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: player
+    Builds a player dict like the ones sent by <Arena JS>, with three
+    bullets in flight near it
+
+    Parameters:
+        int index - The player's id
+        float x - x coordinate of the player
+        float y - y coordinate of the player
+
+    Returns:
+        dict player - The player data
+*/"""
+def player(index, x, y):
+    return {
+        'size': 20, 'x': x, 'y': y, 'xChange': 4, 'yChange': 0,
+        'health': 87.2, 'numBullets': 0, 'id': index, 'colour': '#3FA2C4',
+        'userName': 'Guest (%i)' % index, 'alive': True, 'local': False,
+        'ready': True, 'host': index == 0,
+        'bullets': [{'size': 5, 'x': x + 30 * i, 'y': y - 20, 'speed': 25,
+                     'xChange': 17.67, 'yChange': -17.67, 'bounces': 2,
+                     'owner': index, 'number': i} for i in range(3)],
+        'damagingBullets': []
+    }
+
+"""/*
+    Function: buildAll
+    Builds the snapshot of every client for a new state version, the way
+    <ArenaServer._gameBroadcast> does
+
+    Parameters:
+        ArenaServer server - The server holding the game state
+        boolean binary - True for the <BinaryProtocol> encoding
+
+    Returns:
+        list snapshots - The players section sent to each client
+*/"""
+def buildAll(server, binary):
+    server.snapshotRecords = {}
+    server.interestGrid = None
+    if server.interestRadius is None:
+        shared = server._gameSnapshot(binary)
+        return [shared] * server.capacity
+    return [server._gameSnapshot(binary, playerNum)
+            for playerNum in range(server.capacity)]
+
+
+if __name__ == '__main__':
+    seed(1)
+    number = 200
+    print('%8s %8s %7s %14s %14s' % (
+        'players', 'radius', 'format', 'bytes/client', 'build (us)'))
+    for capacity in (8, 32):
+        for radius in (None, 300):
+            server = ArenaServer(port=None, log=lambda msg: None,
+                                 capacity=capacity, arenaWidth=2000,
+                                 arenaHeight=2000, interestRadius=radius)
+            server.playerObjects = [player(i, random() * 2000, random() * 2000)
+                                    for i in range(capacity)]
+            for binary in (False, True):
+                snapshots = buildAll(server, binary)
+                size = sum(len(snapshot) for snapshot in snapshots)
+                time = min(repeat(lambda: buildAll(server, binary),
+                                  number=number, repeat=5)) / number
+                print('%8i %8s %7s %14i %14.1f' % (
+                    capacity, radius, 'binary' if binary else 'JSON',
+                    size // capacity, time * 1e6))
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+from json import dumps, loads
+from os.path import abspath, dirname
+from sys import path
+from timeit import repeat
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+from local.MessageCodec import MessageCodec
+
+"""/*
+    Script: Message Codec Benchmark
+    Compares parsing and dispatching messages with the <MessageCodec>
+    against the original substring dispatch and brace counting, for lobby
+    requests and for update= messages with growing numbers of bullets.
+
+    Usage:
+        (start code (bash))
+            python3 benchmarks/message_codec.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: legacyGame
+    The original dispatch of <ArenaServer._handleGameMessage> and parsing of
+    <ArenaServer._gameUpdate>, kept here as the baseline for comparison
+
+    Parameters:
+        string msg - The game message
+
+    Returns:
+        tuple message - The name of the handler and the parsed data
+*/"""
+def legacyGame(msg):
+    if 'update' in msg:
+        data = msg.split('update=')[1]
+        count = 1
+        i = 1
+        while count > 0:
+            if data[i] == '{':
+                count += 1
+            elif data[i] == '}':
+                count -= 1
+            i += 1
+        return '_gameUpdate', loads(data[:i])
+    elif 'gameOver' in msg:
+        return '_gameOver', None
+    elif 'quit' in msg:
+        return '_gameQuit', int(msg.split("=")[1].split()[0])
+
+"""/*
+    Function: legacyLobby
+    The original dispatch of <ArenaServer._handleLobbyMessage> and parsing
+    of the lobby handlers, kept here as the baseline for comparison
+
+    Parameters:
+        string msg - The lobby request
+
+    Returns:
+        tuple message - The name of the handler and the parsed arguments
+*/"""
+def legacyLobby(msg):
+    if 'join' in msg:
+        return '_lobbyJoin', tuple(msg.split('=')[1].split(';'))
+    elif 'query' in msg:
+        return '_lobbyQuery', int(msg.split('=')[1])
+    elif 'token' in msg:
+        return '_lobbyGetToken', int(msg.split('=')[1])
+    elif 'quit' in msg:
+        return '_lobbyQuit', int(msg.split("=")[1].split()[0])
+    elif 'start' in msg:
+        return '_lobbyStart', int(msg.split('=')[1])
+
+"""/*
+    Function: dispatch
+    Parses a message with the <MessageCodec> and looks its handler up by
+    type, the way <ArenaServer> does
+
+    Parameters:
+        func decode - <MessageCodec.decodeLobby> or <MessageCodec.decodeGame>
+        dict handlers - Map of message types to handler names
+        string msg - The message
+
+    Returns:
+        tuple message - The name of the handler and the typed message
+*/"""
+def dispatch(decode, handlers, msg):
+    message = decode(msg)
+    return handlers.get(type(message)), message
+
+"""/*
+    Function: updateMessage
+    Generates an update= message for a player with the given number of
+    bullets in flight
+
+    Parameters:
+        int bullets - The number of bullets in the player's bullets array
+
+    Returns:
+        string msg - The update message
+*/"""
+def updateMessage(bullets):
+    player = {
+        'x': 162.5, 'y': 487.5, 'id': 2, 'colour': '#3FA2C4',
+        'userName': 'Guest (1)', 'health': 87, 'alive': True,
+        'local': True, 'ready': True, 'host': False,
+        'bullets': [{'x': 100 + i, 'y': 200 + i, 'xChange': 17.67,
+                     'yChange': -17.67, 'owner': 2, 'number': i,
+                     'bounces': 1, 'hitPlayer': False}
+                    for i in range(bullets)],
+        'damagingBullets': []
+    }
+    return 'update=' + dumps({'player': player, 'damages': [],
+                              'ack': 41, 'sequence': 42})
+
+
+if __name__ == '__main__':
+    lobbyHandlers = {
+        MessageCodec.Join: '_lobbyJoin', MessageCodec.Query: '_lobbyQuery',
+        MessageCodec.Token: '_lobbyGetToken', MessageCodec.Quit: '_lobbyQuit',
+        MessageCodec.Start: '_lobbyStart'
+    }
+    gameHandlers = {
+        MessageCodec.Update: '_gameUpdate', MessageCodec.GameOver: '_gameOver',
+        MessageCodec.Quit: '_gameQuit'
+    }
+    cases = [('lobby ' + msg.partition('=')[0], legacyLobby,
+              MessageCodec.decodeLobby, lobbyHandlers, msg)
+             for msg in ('join=Guest;None', 'query=3', 'start=0')]
+    cases += [('update %i' % bullets, legacyGame, MessageCodec.decodeGame,
+               gameHandlers, updateMessage(bullets))
+              for bullets in (0, 3, 30)]
+    print('%12s %8s %12s %12s %8s' % (
+        'message', 'chars', 'legacy (us)', 'codec (us)', 'speedup'))
+    for name, legacy, decode, handlers, msg in cases:
+        assert legacy(msg)[0] == dispatch(decode, handlers, msg)[0]
+        number = 20000
+        legacyTime = min(repeat(
+            lambda: legacy(msg), number=number, repeat=5)) / number
+        codecTime = min(repeat(
+            lambda: dispatch(decode, handlers, msg), number=number,
+            repeat=5)) / number
+        print('%12s %8i %12.2f %12.2f %7.1fx' % (
+            name, len(msg), legacyTime * 1e6, codecTime * 1e6,
+            legacyTime / codecTime))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+from json import dumps, loads
+from os.path import abspath, dirname
+from sys import path
+from timeit import repeat
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+from local.BinaryProtocol import BinaryProtocol
+from local.MessageCodec import MessageCodec
+
+"""/*
+    Script: Snapshot Protocol Benchmark
+    Compares the size and parse cost of the update= JSON messages with the
+    <BinaryProtocol> encoding of the same data, and prints how many times
+    smaller and faster the binary encoding is. The binary messages are
+    decoded into the same dicts as the JSON ones, so decoding cannot get
+    much cheaper than building those dicts.
+
+    Usage:
+        (start code (bash))
+            python3 benchmarks/snapshot_protocol.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: jsonParse
+    Parses an update= message the way the server does, with the
+    <MessageCodec>
+
+    Parameters:
+        string msg - The update message
+
+    Returns:
+        dict data - The decoded update
+*/"""
+def jsonParse(msg):
+    return MessageCodec.decodeGame(msg).data
+
+"""/*
+    Function: player
+    Builds a player dict like the ones sent by <Arena JS>
+
+    Parameters:
+        int index - The player's id
+        int bullets - The number of bullets in flight
+
+    Returns:
+        dict player - The player data
+*/"""
+def player(index, bullets):
+    return {
+        'size': 20, 'x': 162.5 + index, 'y': 487.5, 'xChange': 4,
+        'yChange': 0, 'health': '87.20', 'numBullets': 3 - bullets,
+        'id': index, 'colour': '#3FA2C4', 'userName': 'Guest (%i)' % index,
+        'alive': True, 'local': False, 'ready': True, 'host': index == 0,
+        'bullets': [{'size': 5, 'x': 100.5 + i, 'y': 200.25, 'speed': 25,
+                     'xChange': 17.67, 'yChange': -17.67, 'bounces': 2,
+                     'owner': index, 'number': i}
+                    if i < bullets else None for i in range(3)],
+        'damagingBullets': []
+    }
+
+
+if __name__ == '__main__':
+    damages = [{'id': 1, 'damage': 8}]
+    update = player(0, 3)
+    text = 'update=' + dumps({'player': update, 'damages': damages})
+    binary = BinaryProtocol.encodeUpdate(update, damages, 1)
+    assert (BinaryProtocol.decodeUpdate(binary)[0]['player']['x'] ==
+            jsonParse(text)['player']['x'])
+
+    players = [player(i, 3) for i in range(4)]
+    snapshot = dumps({'players': players, 'damages': [8.0]})
+    binarySnapshot = (BinaryProtocol.encodeSnapshot(players, 1) +
+                      BinaryProtocol.encodeDamages([8.0]))
+
+    number = 5000
+    timings = [
+        ('update parse', text, binary,
+         lambda: jsonParse(text),
+         lambda: BinaryProtocol.decodeUpdate(binary)),
+        ('snapshot encode', snapshot, binarySnapshot,
+         lambda: dumps({'players': players, 'damages': [8.0]}),
+         lambda: BinaryProtocol.encodeSnapshot(players, 1)),
+        ('snapshot parse', snapshot, binarySnapshot,
+         lambda: loads(snapshot),
+         lambda: BinaryProtocol.decodeSnapshot(binarySnapshot))
+    ]
+    print('%16s %11s %11s %8s %11s %11s %8s' % (
+        '', 'JSON bytes', 'bin bytes', 'smaller', 'JSON (us)', 'bin (us)',
+        'faster'))
+    for name, jsonData, binaryData, jsonCall, binaryCall in timings:
+        jsonTime = min(repeat(jsonCall, number=number, repeat=5)) / number
+        binaryTime = min(repeat(binaryCall, number=number, repeat=5)) / number
+        jsonBytes = len(jsonData.encode())
+        print('%16s %11i %11i %7.1fx %11.2f %11.2f %7.1fx' % (
+            name, jsonBytes, len(binaryData), jsonBytes / len(binaryData),
+            jsonTime * 1e6, binaryTime * 1e6, jsonTime / binaryTime))
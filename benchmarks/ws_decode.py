@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+from json import dumps
+from os import urandom
+from os.path import abspath, dirname
+from sys import path
+from timeit import repeat
+
+path.insert(0, dirname(dirname(abspath(__file__))))
+from local.ArenaServer import ArenaServer
+
+"""/*
+    Script: WebSocket Decode Benchmark
+    Compares <ArenaServer._wsDecode> against the original byte by byte
+    decoder, using masked frames shaped like the update= messages sent by
+    <Arena JS>.
+
+    Usage:
+        (start code (bash))
+            python3 benchmarks/ws_decode.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: legacyDecode
+    The original implementation of <ArenaServer._wsDecode>, kept here as the
+    baseline for comparison
+
+    Parameters:
+        bytes frame - The websocket frame to be decoded
+
+    Returns:
+        string payload - The payload contained within the frame
+*/"""
+def legacyDecode(frame):
+    frame = bytearray(frame)
+    length = frame[1] & 127
+    maskStart = 2
+    if length == 126:
+        maskStart = 4
+    elif length == 127:
+        maskStart = 10
+    dataStart = maskStart + 4
+    mask = frame[maskStart:dataStart]
+    i = dataStart
+    j = 0
+    payload = []
+    while i < len(frame):
+        payload.append(frame[i] ^ mask[j % 4])
+        i += 1
+        j += 1
+    return "".join(chr(byte) for byte in payload)
+
+"""/*
+    Function: maskedFrame
+    Builds a masked client to server text frame, the way a browser would
+
+    Parameters:
+        string payload - The text to be framed
+
+    Returns:
+        bytes frame - The masked WebSocket frame
+*/"""
+def maskedFrame(payload):
+    data = payload.encode()
+    frame = bytearray([129])
+    dataLength = len(data)
+    if dataLength <= 125:
+        frame.append(128 | dataLength)
+    elif dataLength <= 65535:
+        frame.append(128 | 126)
+        frame.extend(dataLength.to_bytes(2, 'big'))
+    else:
+        frame.append(128 | 127)
+        frame.extend(dataLength.to_bytes(8, 'big'))
+    mask = urandom(4)
+    frame.extend(mask)
+    frame.extend(byte ^ mask[i % 4] for i, byte in enumerate(data))
+    return bytes(frame)
+
+"""/*
+    Function: updateMessage
+    Generates an update= message for a player with the given number of
+    bullets in flight
+
+    Parameters:
+        int bullets - The number of bullets in the player's bullets array
+
+    Returns:
+        string msg - The update message
+*/"""
+def updateMessage(bullets):
+    player = {
+        'x': 162.5, 'y': 487.5, 'id': 2, 'colour': '#3FA2C4',
+        'userName': 'Guest (1)', 'health': 87, 'alive': True,
+        'local': True, 'ready': True, 'host': False,
+        'bullets': [{'x': 100 + i, 'y': 200 + i, 'xChange': 17.67,
+                     'yChange': -17.67, 'owner': 2, 'number': i,
+                     'bounces': 1, 'hitPlayer': False}
+                    for i in range(bullets)],
+        'damagingBullets': []
+    }
+    return 'update=' + dumps({'player': player, 'damages': []})
+
+
+if __name__ == '__main__':
+    print('%8s %10s %12s %12s %8s' % (
+        'bullets', 'bytes', 'legacy (us)', 'current (us)', 'speedup'))
+    for bullets in (0, 3, 30, 300):
+        msg = updateMessage(bullets)
+        frame = maskedFrame(msg)
+        assert legacyDecode(frame) == ArenaServer._wsDecode(frame) == msg
+        number = max(10, 20000 // (bullets + 1))
+        legacy = min(repeat(
+            lambda: legacyDecode(frame), number=number, repeat=5)) / number
+        current = min(repeat(
+            lambda: ArenaServer._wsDecode(frame), number=number,
+            repeat=5)) / number
+        print('%8i %10i %12.2f %12.2f %7.1fx' % (
+            bullets, len(frame), legacy * 1e6, current * 1e6,
+            legacy / current))
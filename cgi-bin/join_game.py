@@ -1,22 +1,25 @@
 #!/usr/bin/env python3
 from cgitb import enable
 enable()
-from cgi import FieldStorage, escape
-from socket import *
-from os import environ
+from cgi import FieldStorage
+import os
+import sys
 from http.cookies import SimpleCookie
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'local'))
+from ArenaPages import ArenaPages
 
 """/*
     Script: Join Game
     Handles join requests from the form on the index page.
     Servers can only be joined if they are not full and have not started.
+    The lobby is joined by <ArenaPages.joinGame>
 */"""
 
 """/*
     Group: Variables
 */"""
 
-
 """/*
     var: data
     A <FieldStorage> instance containing the form-data passed to this page
@@ -24,22 +27,10 @@ from http.cookies import SimpleCookie
 data = FieldStorage()
 
 """/*
-    var: username
-    The username that the user inserts into the form
-*/"""
-username = ""
-
-"""/*
-    var: ipAddress
-    The ip address that the user inserts into the form
+    var: cookie
+    A <SimpleCookie> instance for reading and writing browser cookies
 */"""
-ipAddress = ""
-
-"""/*
-    var: port
-    The port number that the user inserts into the form; defaults to 44444
-*/"""
-port = "44444"
+cookie = SimpleCookie()
 
 """/*
     var: error
@@ -47,93 +38,24 @@ port = "44444"
 */"""
 error = ''
 
-"""/*
-    Group: Functions
-*/"""
-
-"""/*
-    Function: newGame
-    Set up the player in the lobby of the passed address, if they aren't
-    already connected to the server at the address
-*/"""
-def newGame():
-    error = ''
-    sock = socket(AF_INET, SOCK_STREAM)
-    try:
-        sock.connect((ipAddress, int(port)))
-        msg = 'join=' + username + ';' + password
-        sock.sendall(msg.encode())
-        # Receive the join status
-        response = sock.recv(1024).decode()
-        if 'joined' in response:
-            cookie['gameAddress'] = ipAddress + ':' + port
-            # joined=num;token
-            data = response.split('=')[1].split(';')
-            cookie['playerNum'] = data[0]
-            cookie['gameToken'] = data[1]
-        elif 'incorrect' in response:
-            error = 'Incorrect password for server'
-        else:
-            error = response # 'Lobby Full'
-        sock.close()
-    except OSError as e:
-        num = int(e.errno)
-        if num == 111:
-            error = ('Connection failed. '
-                     'Check that the server is open and the ip is correct.')
-        else:
-            error = str(e)
-    except Exception as e:
-        error = str(e)
-    finally:
-        return error
-
 if len(data) > 0:
-    # Check the passed address for connection
-    username = escape(data.getfirst('username', 'Guest'))
-    ipAddress = escape(data.getfirst('ipAddress', ''))
-    port = escape(data.getfirst('port', port))
-    password = escape(data.getfirst('password', 'None'))
-
-    cookie = SimpleCookie()
     try:
         # Try to load a cookie for this website
-        cookie.load(environ['HTTP_COOKIE'])
+        cookie.load(os.environ['HTTP_COOKIE'])
     except KeyError:
-        # No cookie, run the new game function
-        error += newGame()
-    else:
-        # Cookie exists, check if the address in the form is equal to the
-        # address in the cookie
-        cookieAddress = cookie.get('gameAddress', '')
-        if cookieAddress != '':
-            cookieAddress = cookieAddress.value
-        if cookieAddress != (ipAddress + ':' + port):
-            # The player has connected to a new game
-            error += newGame()
-        # Else, check if they are already in this game
-        else:
-            sock = socket(AF_INET, SOCK_STREAM)
-            try:
-                sock.connect((ipAddress, int(port)))
-                msg = 'token=' + cookie.get('playerNum').value
-                sock.sendall(msg.encode())
-                # Receive the token and compare it with cookie token
-                response = sock.recv(4096).decode()
-                sock.close()
-                cookieToken = cookie.get('gameToken').value
-                if 'rejoin' in response or response != cookieToken:
-                    # This player has to be join the game
-                    error += newGame()
-            except:
-                error += newGame()
-    finally:
-        print('Content-Type: text/html')
-        if error == '':
-            print('Status: 200')
-            print(cookie)
-            print()
-        else:
-            print('Status: 200')
-            print()
-            print(error)
+        pass
+    error = ArenaPages.joinGame(
+        cookie,
+        data.getfirst('username', 'Guest'),
+        data.getfirst('ipAddress', '') + ':' + data.getfirst('port', '44444'),
+        data.getfirst('password', 'None'),
+        data.getfirst('room', ''))
+
+print('Content-Type: text/html')
+print('Status: 200')
+if error == '':
+    print(cookie)
+    print()
+else:
+    print()
+    print(error)
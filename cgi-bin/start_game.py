@@ -2,9 +2,12 @@
 from cgitb import enable
 enable()
 from http.cookies import SimpleCookie
-from os import environ
-from socket import *
+import os
+import sys
 from json import dumps, loads
+sys.path.append(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), '..', 'local'))
+from ArenaPages import ArenaPages
 
 """/*
     Script: Start Game
@@ -20,36 +23,15 @@ try:
         A <SimpleCookie> instance for reading and writing browser cookies
     */"""
     cookie = SimpleCookie()
-    cookie.load(environ['HTTP_COOKIE'])
-
-    """/*
-        var: playerNum
-        The index of this player in <Server.players>
-    */"""
-    playerNum = cookie.get('playerNum').value
-
-    """/*
-        var: ipAddress, port
-        The ipAddress and port number of the server
-    */"""
-    ipAddress, port = cookie.get('gameAddress').value.split(':')
-
-    # Create the socket
-
-    """/*
-        var: sock
-        <Socket> object used to connect to the server
-    */"""
-    sock = socket(AF_INET, SOCK_STREAM)
-    sock.connect((ipAddress, int(port)))
-    msg = 'start=' + str(playerNum)
+    cookie.load(os.environ['HTTP_COOKIE'])
+    room = cookie['gameRoom'].value if 'gameRoom' in cookie else ''
     # Game will only start if the host clicks button
-    sock.sendall(msg.encode())
-    response = loads(sock.recv(4096).decode())
+    response = loads(ArenaPages.lobbyRequest(
+        cookie['gameAddress'].value, room,
+        'start=' + cookie['playerNum'].value))
     print('Content-Type: application/json')
     print()
     print(dumps(response))
-    sock.close()
 except Exception as e:
     print('Content-Type: text/plain')
     print()
@@ -0,0 +1,309 @@
+from json import load
+from math import ceil, sqrt
+import os
+
+"""/*
+    Class: ArenaMap
+    The layout of an arena: its size, the walls bullets bounce off and the
+    points players spawn at.
+
+    Maps are loaded from JSON files of the form
+    (start code (js))
+        {
+            "name": "Crossroads",
+            "width": 650,
+            "height": 650,
+            "walls": [[81.25, 325, 325, 325], [325, 0, 325, 243.75]],
+            "spawns": [[162.5, 162.5], [487.5, 162.5]]
+        }
+    (end code)
+    Each wall is an [x1, y1, x2, y2] line that is either horizontal or
+    vertical, and each spawn is the [x, y] of the centre of a tank. A map
+    needs a spawn for every player in the game.
+
+    When a map is created it builds a spatial index of its walls, listing
+    each wall in every grid cell a bullet hitting it could be in. Finding
+    the walls near a point is then a single lookup, however many walls the
+    map has. Loaded maps are cached, so the index is only built once for
+    every game played on a map.
+
+    Usage:
+        (start code (py))
+            arenaMap = ArenaMap.load('maps/default.json')
+            walls = arenaMap.wallsNear(x, y)
+        (end code)
+*/"""
+class ArenaMap:
+
+    """/*
+        Group: Constants
+    */"""
+
+    """/*
+        var: CELL_SIZE
+        Width and height of the cells of the wall index, in pixels
+    */"""
+    CELL_SIZE = 64
+
+    """/*
+        var: MARGIN
+        Distance from a wall within which it is listed in a cell, in
+        pixels. Covers the size of a bullet and the distance it moves in a
+        frame
+    */"""
+    MARGIN = 30
+
+    """/*
+        var: _cache
+        Dict of the paths of the maps loaded so far to the time their file
+        was modified and the map
+    */"""
+    _cache = {}
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Checks a map and builds its wall index
+
+        Parameters:
+            float width - Width of the arena in pixels
+            float height - Height of the arena in pixels
+            list walls - (x1, y1, x2, y2) of each wall
+            list spawns - (x, y) of each spawn point
+            string name - The name of the map. Defaults to 'Default'
+
+        Raises:
+            ValueError - If the map is not valid
+    */"""
+    def __init__(self, width, height, walls, spawns, name='Default'):
+        if not (width > 0 and height > 0):
+            raise ValueError("Map sides must be positive")
+
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: name
+            The name of the map
+        */"""
+        self.name = name
+
+        """/*
+            var: width
+            Width of the arena in pixels
+        */"""
+        self.width = width
+
+        """/*
+            var: height
+            Height of the arena in pixels
+        */"""
+        self.height = height
+
+        """/*
+            var: walls
+            List of (x1, y1, x2, y2) of each wall, with (x1, y1) the end
+            closer to (0, 0)
+        */"""
+        self.walls = []
+        for x1, y1, x2, y2 in walls:
+            if x1 != x2 and y1 != y2:
+                raise ValueError("Walls must be horizontal or vertical")
+            x1, x2 = sorted((x1, x2))
+            y1, y2 = sorted((y1, y2))
+            if not self._inside(x1, y1) or not self._inside(x2, y2):
+                raise ValueError("Walls must be inside the arena")
+            self.walls.append((x1, y1, x2, y2))
+
+        """/*
+            var: spawns
+            List of (x, y) of the centre of each spawn point
+        */"""
+        self.spawns = []
+        for x, y in spawns:
+            if not self._inside(x, y):
+                raise ValueError("Spawn points must be inside the arena")
+            self.spawns.append((x, y))
+
+        """/*
+            var: indices
+            Dict of (cell size, margin) to the wall index built with them
+        */"""
+        self.indices = {}
+        self.index(ArenaMap.CELL_SIZE, ArenaMap.MARGIN)
+
+    """/*
+        Group: Static Methods
+    */"""
+
+    """/*
+        Function: load
+        Loads a map from a JSON file, or returns the cached map if the file
+        has not changed since it was loaded
+
+        Parameters:
+            string path - The path of the map file
+
+        Returns:
+            ArenaMap arenaMap - The map
+
+        Raises:
+            OSError - If the file cannot be read
+            ValueError - If the file is not a valid map
+    */"""
+    def load(path):
+        path = os.path.abspath(path)
+        modified = os.path.getmtime(path)
+        cached = ArenaMap._cache.get(path)
+        if cached is not None and cached[0] == modified:
+            return cached[1]
+        with open(path) as mapFile:
+            data = load(mapFile)
+        try:
+            arenaMap = ArenaMap(
+                data['width'], data['height'], data.get('walls', []),
+                data['spawns'], data.get('name', os.path.basename(path)))
+        except (KeyError, TypeError) as e:
+            raise ValueError("Invalid map file %s: %s" % (path, e))
+        ArenaMap._cache[path] = (modified, arenaMap)
+        return arenaMap
+
+    """/*
+        Function: default
+        Generates the default map for an arena: a wall across the middle in
+        each direction, each with a gap, and spawn points spread evenly
+        across the four quarters the walls divide the arena into. With four
+        players, each spawns in the middle of a quarter
+
+        Parameters:
+            int capacity - The number of spawn points needed
+            int width - Width of the arena
+            int height - Height of the arena
+
+        Returns:
+            ArenaMap arenaMap - The map, with at least <capacity> spawn
+                                points, in an order that visits every
+                                quarter before reusing one
+    */"""
+    def default(capacity, width, height):
+        perQuarter = int(ceil(capacity / 4))
+        columns = int(ceil(sqrt(perQuarter)))
+        rows = int(ceil(perQuarter / columns))
+        cellWidth = width / 2 / columns
+        cellHeight = height / 2 / rows
+        quarters = [(0, 0), (width / 2, 0), (0, height / 2),
+                    (width / 2, height / 2)]
+        spawns = []
+        for i in range(perQuarter):
+            row, column = divmod(i, columns)
+            for left, top in quarters:
+                spawns.append((left + (column + 0.5) * cellWidth,
+                               top + (row + 0.5) * cellHeight))
+        walls = [(width / 8, height / 2, width / 2, height / 2),
+                 (width / 2, height / 2, 7 * width / 8, height / 2),
+                 (width / 2, 0, width / 2, 3 * height / 8),
+                 (width / 2, 5 * height / 8, width / 2, height)]
+        return ArenaMap(width, height, walls, spawns)
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: index
+        Finds the spatial index of the walls for a cell size and margin,
+        building it the first time it is asked for
+
+        Parameters:
+            float cellSize - Width and height of each cell, in pixels
+            float margin - Distance from a wall within which it is listed
+                           in a cell
+
+        Returns:
+            dict index - Map of (column, row) to a tuple of the indices in
+                         <walls> of the walls listed in that cell. Points
+                         outside the arena belong to the nearest cell
+    */"""
+    def index(self, cellSize, margin):
+        index = self.indices.get((cellSize, margin))
+        if index is not None:
+            return index
+        lastColumn, lastRow = self._cell(self.width, self.height, cellSize)
+        cells = {}
+        for i, (x1, y1, x2, y2) in enumerate(self.walls):
+            left, top = self._cell(x1 - margin, y1 - margin, cellSize)
+            right, bottom = self._cell(x2 + margin, y2 + margin, cellSize)
+            for column in range(max(left, 0), min(right, lastColumn) + 1):
+                for row in range(max(top, 0), min(bottom, lastRow) + 1):
+                    cells.setdefault((column, row), []).append(i)
+        index = {cell: tuple(walls) for cell, walls in cells.items()}
+        self.indices[(cellSize, margin)] = index
+        return index
+
+    """/*
+        Function: wallsNear
+        Finds the walls a bullet at a point could hit in the next frame
+
+        Parameters:
+            float x - x coordinate of the point
+            float y - y coordinate of the point
+
+        Returns:
+            tuple walls - (x1, y1, x2, y2) of each wall listed in the
+                          point's cell of the default index
+    */"""
+    def wallsNear(self, x, y):
+        index = self.index(ArenaMap.CELL_SIZE, ArenaMap.MARGIN)
+        column, row = self._cell(x, y, ArenaMap.CELL_SIZE)
+        lastColumn, lastRow = self._cell(
+            self.width, self.height, ArenaMap.CELL_SIZE)
+        cell = (min(max(column, 0), lastColumn), min(max(row, 0), lastRow))
+        return tuple(self.walls[i] for i in index.get(cell, ()))
+
+    """/*
+        Function: describe
+        Describes the map for the clients, who draw its walls
+
+        Returns:
+            dict arena - The width, height and walls of the map
+    */"""
+    def describe(self):
+        return {'width': self.width, 'height': self.height,
+                'walls': [list(wall) for wall in self.walls]}
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _inside
+        Checks whether a point is within the bounds of the arena
+
+        Parameters:
+            float x - x coordinate of the point
+            float y - y coordinate of the point
+
+        Returns:
+            boolean inside - True if the point is in the arena or on its edge
+    */"""
+    def _inside(self, x, y):
+        return 0 <= x <= self.width and 0 <= y <= self.height
+
+    """/*
+        Function: _cell
+        Finds the cell a point falls in
+
+        Parameters:
+            float x - x coordinate of the point
+            float y - y coordinate of the point
+            float cellSize - Width and height of each cell, in pixels
+
+        Returns:
+            tuple cell - The (column, row) of the cell
+    */"""
+    def _cell(self, x, y, cellSize):
+        return int(x // cellSize), int(y // cellSize)
@@ -0,0 +1,656 @@
+from datetime import datetime
+from html import escape, unescape
+from json import loads
+import os
+from socket import *
+
+"""/*
+    Class: ArenaPages
+    Builds the pages of the Arena web site and talks to the lobby of a
+    server for them. Shared by the cgi-bin scripts and the <WebFrontEnd>, so
+    every page is only written once.
+
+    Only the standard library is used, so the cgi-bin scripts can import this
+    module without the rest of the package:
+
+    Usage:
+        (start code (py))
+            sys.path.append(os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), '..', 'local'))
+            from ArenaPages import ArenaPages
+            print(ArenaPages.statsPage('../stats'))
+        (end code)
+*/"""
+class ArenaPages:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: BROADCAST_PORT
+        The port servers listen for broadcast requests on
+    */"""
+    BROADCAST_PORT = 44445
+
+    """/*
+        var: PAGE
+        Template of every page, with holes for the title, any extra head
+        elements and the body
+    */"""
+    PAGE = """
+<!DOCTYPE html>
+<html>
+    <head>
+        <meta charset="utf-8">
+        <meta http-equiv="X-UA-Compatible" content="IE=edge">
+        <meta name="viewport" content="width=device-width, initial-scale=1">
+        <!-- The above 3 meta tags *must* come first in the head; any other head content must come *after* these tags -->
+        <!-- Latest compiled and minified CSS -->
+        <link rel="stylesheet" href="https://maxcdn.bootstrapcdn.com/bootstrap/3.3.7/css/bootstrap.min.css" integrity="sha384-BVYiiSIFeK1dGmJRAkycuHAHRg32OmUcww7on3RYdg4Va+PmSTsz/K68vbdEjh4u" crossorigin="anonymous">
+
+        <!-- Optional theme -->
+        <link rel="stylesheet" href="https://maxcdn.bootstrapcdn.com/bootstrap/3.3.7/css/bootstrap-theme.min.css" integrity="sha384-rHyoN1iRsVXV4nD0JutlnGaslCJuC7uwjduW9SVrLvRYooPp2bWYgmgJQIXwl/Sp" crossorigin="anonymous">
+
+        <!--jQuery-->
+        <script src="https://code.jquery.com/jquery-3.1.0.min.js" integrity="sha256-cCueBR6CsyA4/9szpPfrX3s49M9vUU5BgtiJj06wt/s=" crossorigin="anonymous"></script>
+
+        <!-- Latest compiled and minified JavaScript -->
+        <script src="https://maxcdn.bootstrapcdn.com/bootstrap/3.3.7/js/bootstrap.min.js" integrity="sha384-Tc5IQib027qvyjSMfHjOMaLkfuWVxZxUPnCJA7l2mCWNIpG9mGCD8wGNIcPD7Txa" crossorigin="anonymous"></script>
+        <title>Arena - %s</title>
+        %s
+        <link rel='icon' href='../images/favicon.ico' type='image/x-icon' />
+        <!--Font Awesome-->
+        <script src="https://use.fontawesome.com/8ce091879b.js"></script>
+    </head>
+
+    <body>
+        %s
+    </body>
+</html>"""
+
+    """/*
+        var: LOBBY_BODY
+        Body of the lobby page, with a hole for the rows of the table of
+        players
+    */"""
+    LOBBY_BODY = """<div class="container">
+            <h1 class="page-heading">Your Lobby</h1>
+            <table class="table table-striped table-bordered">
+                <thead>
+                    <tr>
+                        <th class="text-center col-xs-2">
+                            Host
+                        </th>
+                        <th class="text-center col-xs-8">
+                            User Name
+                        </th>
+                        <th class="text-center col-xs-2">
+                            You
+                        </th>
+                    </tr>
+                </thead>
+                <tbody>%s</tbody>
+            </table>
+            <br />
+            <button class="btn btn-success" disabled id="startbtn"><span class="fa fa-check"></span> Start Game</button>
+            <a href="../" class="btn btn-danger"><span class="fa fa-home"></span> Home</a>
+        </div>"""
+
+    """/*
+        var: LOBBY_ROW
+        Row of the lobby table, with holes for the player's colour, their
+        host icon, their user name and their you icon
+    */"""
+    LOBBY_ROW = """<tr style="color: %s;">
+                        <td class="text-center">
+                            <span class="fa fa-%s"></span>
+                        </td>
+                        <td class="text-center">
+                            %s
+                        </td>
+                        <td class="text-center">
+                            <span class="fa fa-%s"></span>
+                        </td>
+                    </tr>"""
+
+    """/*
+        var: LIST_SCRIPT
+        Script of the server list page, which submits the join forms with
+        AJAX and moves to the lobby once joined
+    */"""
+    LIST_SCRIPT = """<script>
+            var joinStatus;
+            var modalShown = false;
+            $(document).ready(init);
+
+            function init(){
+            joinStatus = $('#joinStatus');
+            joinStatus.on('hide.bs.modal', function(){modalShown = false;});
+                $("form").submit(function(e){
+                    var target = $(e.target);
+                    var username = target.find('.username').val();
+                    if(username === ''){
+                        username = 'Guest';
+                    }
+                    // Password is now in the parent
+                    var password = target.parent().parent().find('.password');
+                    if(password.length === 0){
+                        password = 'None';
+                    }
+                    else{
+                        password = password.val();
+                        if(password === ''){
+                            password = 'None';
+                        }
+                    }
+                    var data = {
+                        username: username,
+                        ipAddress: target.find('.ip').val(),
+                        port: target.find('.port').val(),
+                        room: target.find('.room').val(),
+                        password: password
+                    }
+                    $.post('join_game.py', data);
+                    e.preventDefault();
+                });
+            }
+
+            $(document).ajaxSuccess(function(e, xhr){
+                //Redirect to lobby.py
+                window.location = 'lobby.py';
+            });
+
+            $(document).ajaxError(function(e, xhr){
+                message('Error - ' + xhr.responseText, 'danger');
+            });
+
+            function message(msg, level){
+                if(!modalShown){
+                    joinStatus.modal('show');
+                    modalShown = true;
+                }
+                $('.modal-title').html(msg);
+            }
+        </script>"""
+
+    """/*
+        var: LIST_BODY
+        Body of the server list page, with holes for any error and the table
+        of servers
+    */"""
+    LIST_BODY = """<div class="container">
+            <h1 class="page-heading">
+                Open Games
+            </h1>
+            %s
+            %s
+            <a href=".." class="btn btn-primary"><span
+            class="fa fa-home"></span> Home</a>
+        </div>
+
+        <div id="joinStatus" class="modal fade" role="dialog">
+            <div class="modal-dialog">
+                <!--Content-->
+                <div class="modal-content">
+                    <div class="modal-body">
+                        <button type="button" class="close" data-dismiss="modal">
+                            &times;
+                        </button>
+                        <h4 class="modal-title"></h4>
+                    </div>
+                </div>
+            </div>
+        </div>"""
+
+    """/*
+        var: LIST_TABLE
+        Table of the servers found, with a hole for the rows
+    */"""
+    LIST_TABLE = """<table class="table table-bordered table-striped">
+                <thead>
+                    <tr>
+                        <th class="text-center col-sm-4">
+                            Players
+                        </th>
+                        <th class="text-center col-sm-4">
+                            Password
+                        </th>
+                        <th class="text-center col-sm-4">
+                            Join
+                        </th>
+                    </tr>
+                </thead>
+                <tbody>%s</tbody>
+            </table>"""
+
+    """/*
+        var: LIST_ROW
+        Row of the server table, with holes for the players, the password
+        entry and the join form
+    */"""
+    LIST_ROW = """<tr>
+                        <td class="text-center">
+                            %s
+                        </td>
+                        <td class="text-center">
+                            %s
+                        </td>
+                        <td>
+                            %s
+                        </td>
+                    </tr>"""
+
+    """/*
+        var: NO_GAMES
+        Shown in place of the server table when no servers answered
+    */"""
+    NO_GAMES = """<div class="alert alert-info">
+                <strong>No Games Found</strong>
+            </div>"""
+
+    """/*
+        var: LIST_ERROR
+        Alert for an error while looking for servers, with a hole for the
+        error
+    */"""
+    LIST_ERROR = """<div class="alert alert-danger">
+                %s
+            </div>"""
+
+    """/*
+        var: JOIN_FORM
+        Form used to join a server, with holes for the room entry, the
+        address and the port
+    */"""
+    JOIN_FORM = """
+<form action="join_game.py" method="POST">
+    <div class="input-group">
+        <span class="input-group-addon">
+            Username
+        </span>
+        <input type="text" name="username" placeholder="Guest"
+        value="" class="form-control username" />
+        <span class="input-group-btn">
+            <button class="btn btn-primary" type="submit">
+                <span class="fa fa-share"></span>
+                 Join Game
+            </button>
+        </span>
+    </div>
+
+    %s
+    <input type="hidden" class="ip" name="ipAddress" value="%s" />
+    <input type="hidden" class="port" name="port" value="%s" />
+</form>"""
+
+    """/*
+        var: ROOM_FORM
+        Form entry for servers that host rooms. Prefilled with the room that
+        was listed, and can be changed to start a new room
+    */"""
+    ROOM_FORM = """
+<div class="input-group">
+    <span class="input-group-addon">
+        Room
+    </span>
+    <input type="text" name="room" placeholder="Default"
+    value="%s" class="form-control room" />
+</div>
+"""
+
+    """/*
+        var: NO_ROOM
+        Form entry for servers that do not host rooms
+    */"""
+    NO_ROOM = '<input type="hidden" class="room" name="room" value="" />'
+
+    """/*
+        var: PASSWORD_FORM
+        Form entry for servers that need a password
+    */"""
+    PASSWORD_FORM = """
+<div class="input-group">
+    <span class="input-group-addon">
+        Password
+    </span>
+    <input type="text" name="password"
+    value="" class="form-control password" />
+</div>
+"""
+
+    """/*
+        var: STATS_BODY
+        Body of the game stats page, with a hole for the table of games
+    */"""
+    STATS_BODY = """<div class="container">
+            <h1 class="page-heading">Results</h1>
+            %s
+            <a class="btn btn-primary" href="../">
+                <span class="fa fa-home"></span>
+                Home
+            </a>
+        </div>
+
+        <!--Modal-->
+        <div class="modal fade" role="dialog" id="modal">
+            <div class="modal-dialog">
+                <div class="modal-content">
+                    <div class="modal-header">
+                        <button type="button" class="close" data-dismiss="modal">
+                            &times;
+                        </button>
+                        <h4 class="modal-title"></h4>
+                    </div>
+                    <div class="modal-body">
+                        <div class="alert alert-info">
+                        </div>
+                        <table class="table table-striped">
+                            <thead>
+                                <tr>
+                                    <th class="text-center">
+                                        User Name
+                                    </th>
+                                    <th class="text-center">
+                                        Position
+                                    </th>
+                                </tr>
+                            </thead>
+                            <tbody>
+                            </tbody>
+                        </table>
+                    </div>
+                </div>
+            </div>
+        </div>"""
+
+    """/*
+        var: STATS_TABLE
+        Table of the saved games, with a hole for the rows
+    */"""
+    STATS_TABLE = """
+            <table class="table table-striped table-hover table-bordered">
+            <thead><tr><th class="text-center">Game Date</th><th></th></tr></thead>
+            <tbody>%s</tbody></table>"""
+
+    """/*
+        var: STATS_ROW
+        Row of the game stats table, with holes for the date of the game and
+        the name of its stats file. The button uses AJAX to request the data
+        from the file
+    */"""
+    STATS_ROW = """<tr><td class="text-center">%s</td>
+            <td class="text-center">
+            <button class="btn btn-primary btn-xs" data-id="%s">
+            <span class="fa fa-file-text-o"></span> View Stats
+            </button></td></tr>"""
+
+    """/*
+        var: NO_STATS
+        Shown in place of the stats table when no games have been saved
+    */"""
+    NO_STATS = '<div class="alert alert-info">There are no stats yet</div>'
+
+    """/*
+        Group: Page Methods
+    */"""
+
+    """/*
+        Function: text
+        Escapes a value for use in a page. Text that was already escaped,
+        like the user names escaped by <joinGame>, is not escaped twice
+        Static Method
+
+        Parameters:
+            value - The value to escape
+
+        Returns:
+            string text - The escaped value
+    */"""
+    def text(value):
+        return escape(unescape(str(value)))
+
+    """/*
+        Function: page
+        Builds a full page
+        Static Method
+
+        Parameters:
+            string title - The title of the page
+            string head - Extra elements for the head of the page
+            string body - The body of the page
+
+        Returns:
+            string page - The HTML of the page
+    */"""
+    def page(title, head, body):
+        return ArenaPages.PAGE % (title, head, body)
+
+    """/*
+        Function: lobbyPage
+        Builds the lobby page
+        Static Method
+
+        Parameters:
+            list players - The players of the lobby, as sent by the server
+            int playerNum - The number of the player viewing the page
+
+        Returns:
+            string page - The HTML of the page
+    */"""
+    def lobbyPage(players, playerNum):
+        rows = ''.join(ArenaPages.LOBBY_ROW % (
+            ArenaPages.text(player['colour']),
+            'check' if player['host'] else 'times',
+            ArenaPages.text(player['userName']),
+            'check' if i == playerNum else 'times')
+            for i, player in enumerate(players) if player is not None)
+        return ArenaPages.page(
+            'Lobby', '<script src="../scripts/lobby.js"></script>',
+            ArenaPages.LOBBY_BODY % (rows))
+
+    """/*
+        Function: serverListPage
+        Builds the page listing open servers
+        Static Method
+
+        Parameters:
+            dict servers - The servers as returned by <findServers>
+            string error - Any error met while looking for servers.
+                           Defaults to ''
+
+        Returns:
+            string page - The HTML of the page
+    */"""
+    def serverListPage(servers, error=''):
+        table = ArenaPages.NO_GAMES
+        if servers:
+            rows = ''
+            for (host, port, room), data in servers.items():
+                players = [player for player in data['players']
+                           if player is not None]
+                if players:
+                    players = '<ol class="list-inline">%s</ol>' % (''.join(
+                        '<li style="color: %s;">%s</li>' % (
+                            ArenaPages.text(player['colour']),
+                            ArenaPages.text(player['userName']))
+                        for player in players))
+                else:
+                    players = 'No Players in Lobby'
+                room = (ArenaPages.NO_ROOM if room is None else
+                        ArenaPages.ROOM_FORM % (ArenaPages.text(room)))
+                rows += ArenaPages.LIST_ROW % (
+                    players,
+                    ArenaPages.PASSWORD_FORM if data['password'] else 'None',
+                    ArenaPages.JOIN_FORM % (
+                        room, ArenaPages.text(host), ArenaPages.text(port)))
+            table = ArenaPages.LIST_TABLE % (rows)
+        if error:
+            error = ArenaPages.LIST_ERROR % (ArenaPages.text(error))
+        return ArenaPages.page('Server List', ArenaPages.LIST_SCRIPT,
+                               ArenaPages.LIST_BODY % (error, table))
+
+    """/*
+        Function: statsPage
+        Builds the page listing the saved game stats, latest first
+        Static Method
+
+        Parameters:
+            string directory - The directory the server saves stats in
+
+        Returns:
+            string page - The HTML of the page
+    */"""
+    def statsPage(directory):
+        try:
+            # File names are %d%m%Y%H%M%S.ast
+            dates = sorted([
+                datetime.strptime(filename[:-len('.ast')], '%d%m%Y%H%M%S')
+                for filename in os.listdir(directory)
+                if filename.endswith('.ast')], reverse=True)
+        except (OSError, ValueError):
+            dates = []
+        files = ArenaPages.NO_STATS
+        if dates:
+            files = ArenaPages.STATS_TABLE % (''.join(
+                ArenaPages.STATS_ROW % (
+                    date.strftime('%d/%m/%Y @ %H:%M:%S'),
+                    date.strftime('%d%m%Y%H%M%S'))
+                for date in dates))
+        return ArenaPages.page(
+            'Results', '<script src="../scripts/game_stats.js"></script>',
+            ArenaPages.STATS_BODY % (files))
+
+    """/*
+        Group: Lobby Methods
+    */"""
+
+    """/*
+        Function: lobbyRequest
+        Sends a request to the lobby of a server over a new connection
+        Static Method
+
+        Parameters:
+            string gameAddress - ip:port of the server
+            string room - The room on the server, or '' for the default room
+            string msg - The lobby request
+
+        Returns:
+            string response - The server's response
+
+        Raises:
+            OSError - If the server could not be reached
+            ValueError - If the address is malformed
+    */"""
+    def lobbyRequest(gameAddress, room, msg):
+        host, _, port = gameAddress.rpartition(':')
+        if room:
+            msg = 'room=' + room + ' ' + msg
+        sock = socket(AF_INET, SOCK_STREAM)
+        try:
+            sock.settimeout(5)
+            sock.connect((host, int(port)))
+            sock.sendall(msg.encode())
+            return sock.recv(4096).decode()
+        finally:
+            sock.close()
+
+    """/*
+        Function: joinGame
+        Joins the lobby of a server, unless the cookies show the player is
+        already in it. On success the game's address and room, and the
+        player's number and token, are stored in the cookies
+        Static Method
+
+        Parameters:
+            SimpleCookie cookie - The cookies sent by the browser
+            string username - The name the player chose
+            string gameAddress - ip:port of the server
+            string password - The password of the server, or 'None'
+            string room - The room to join, or '' for the default room
+            func request - Sends a lobby request, taking the same arguments
+                           as <lobbyRequest>. Defaults to <lobbyRequest>
+
+        Returns:
+            string error - Why the player could not join, or '' if they did
+    */"""
+    def joinGame(cookie, username, gameAddress, password, room,
+                 request=None):
+        request = request or ArenaPages.lobbyRequest
+        username = escape(username, False)
+        cookieAddress = cookie['gameAddress'].value \
+            if 'gameAddress' in cookie else ''
+        cookieRoom = cookie['gameRoom'].value if 'gameRoom' in cookie else ''
+        if cookieAddress == gameAddress and cookieRoom == room:
+            # Check if they are already in this game
+            try:
+                response = request(gameAddress, room,
+                                   'token=' + cookie['playerNum'].value)
+                if ('rejoin' not in response and
+                        response == cookie['gameToken'].value):
+                    return ''
+            except Exception:
+                pass
+
+        try:
+            response = request(gameAddress, room,
+                               'join=' + username + ';' + password)
+        except OSError as e:
+            if e.errno == 111:
+                return ('Connection failed. '
+                        'Check that the server is open and the ip is correct.')
+            return str(e)
+        except Exception as e:
+            return str(e)
+        if 'joined' in response:
+            cookie['gameAddress'] = gameAddress
+            cookie['gameRoom'] = room
+            if not room:
+                # Clear any room left over from a previous game
+                cookie['gameRoom']['max-age'] = 0
+            # joined=num;token
+            data = response.split('=')[1].split(';')
+            cookie['playerNum'] = data[0]
+            cookie['gameToken'] = data[1]
+            return ''
+        elif 'incorrect' in response:
+            return 'Incorrect password for server'
+        return response or 'No response from server'
+
+    """/*
+        Function: findServers
+        Broadcasts for open servers and collects their answers until no
+        answer has come for a number of one second timeouts
+        Static Method
+
+        Parameters:
+            int timeouts - The number of timeouts to wait for. Defaults to 3
+
+        Returns:
+            dict servers - Map of (address, port, room) to the state each
+                           server sent. Room is None for servers that do
+                           not host rooms
+            Exception error - Any error met while broadcasting, or None
+    */"""
+    def findServers(timeouts=3):
+        servers = {}
+        error = None
+        sock = socket(AF_INET, SOCK_DGRAM)
+        try:
+            sock.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
+            sock.sendto('arena_broadcast_req'.encode(),
+                        ('255.255.255.255', ArenaPages.BROADCAST_PORT))
+            sock.settimeout(1)
+            while timeouts > 0:
+                try:
+                    data, address = sock.recvfrom(1024)
+                    data = loads(data.decode())
+                    servers[address[0], data['port'], data.get('room')] = \
+                        data['data']
+                except timeout:
+                    timeouts -= 1
+        except Exception as e:
+            error = e
+        finally:
+            sock.close()
+        return servers, error
@@ -0,0 +1,83 @@
+from .AsyncArenaServer import AsyncArenaServer
+
+"""/*
+    Class: ArenaRoom
+    One lobby and game hosted by a <RoomServer>, alongside any number of
+    other rooms on the same port and event loop.
+
+    A room is an <AsyncArenaServer> without a socket of its own. The
+    <RoomServer> accepts every connection, works out which room it is for,
+    and passes it to that room's handlers. Each room keeps its own players,
+    commands, tick clock and timers, so the rooms never share any
+    state.
+
+    An idle room is a single coroutine waiting on an event, so open rooms
+    cost next to nothing until their game starts. A room closes itself once
+    every player has left its lobby.
+*/"""
+class ArenaRoom(AsyncArenaServer):
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Initialises an empty room
+
+        Parameters:
+            string roomId - The ID clients use to find the room. The empty
+                            string is the default room
+            EventLoop loop - The event loop of the <RoomServer>
+            func log - A function to log messages into the <LogPanel>.
+                       Messages are prefixed with the room ID
+            kwargs - Any other arguments taken by <ArenaServer.__init__>,
+                     other than port
+    */"""
+    def __init__(self, roomId, loop, log=print, **kwargs):
+        """/*
+            Group: Room Variables
+        */"""
+
+        """/*
+            var: roomId
+            The ID clients use to find the room
+        */"""
+        self.roomId = roomId
+
+        name = roomId or 'default'
+        super(ArenaRoom, self).__init__(
+            None, log=lambda msg: log('[%s] %s' % (name, msg)), **kwargs)
+        self.loop = loop
+        self._prepare()
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: run
+        Coroutine running the room until its game is over or it is closed
+    */"""
+    async def run(self):
+        self.log('Lobby Open')
+        try:
+            await self._run()
+        except Exception as e:
+            self.log(str(e))
+        finally:
+            self.callback("game")
+
+    """/*
+        Group: Lobby Handling Methods
+    */"""
+
+    """/*
+        Function: _lobbyPublish
+        Republishes the lobby, closing the room if the last player has left
+        before the game started
+    */"""
+    def _lobbyPublish(self):
+        super(ArenaRoom, self)._lobbyPublish()
+        if self.lobbySize == 0 and not self.started:
+            self.close()
@@ -1,18 +1,42 @@
+from .ArenaMap import ArenaMap
+from .BinaryProtocol import BinaryProtocol
+from .BulletPhysics import BulletPhysics
+from .CommandQueue import CommandQueue
+from .DamageRecord import DamageRecord
+from .FrameReader import FrameReader
+from .Heartbeat import Heartbeat
+from .MessageCodec import MessageCodec
+from .OutboundQueue import OutboundQueue
+from .RateController import RateController
+from .SpatialGrid import SpatialGrid
+from .TickClock import TickClock
+from .TimingWheel import TimingWheel
+from .WebFrontEnd import WebFrontEnd
+from .WebSocketHandshake import WebSocketHandshake
 from base64 import b64encode
+from collections import OrderedDict
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
 from datetime import datetime
 from hashlib import sha256, sha1
-from json import dumps, loads
+from json import dumps
+from math import isfinite
 import os
 from random import choice
 from select import select
 from socket import *
-from threading import Thread, Timer
+from threading import Thread
+from time import monotonic
+from types import SimpleNamespace
+from zlib import compressobj, DEFLATED, Z_SYNC_FLUSH
 
 """/*
     Class: ArenaServer
     A custom server written in Python3.4 for use as the backend for this game.
 
-    Multithreaded for increased speed, especially during the actual game.
+    Lobby requests are read and parsed by a thread per connection, and game
+    messages by the loop in <listen>. Every change to the server's state is
+    submitted to the <commands> queue and run by the thread in <listen>, so
+    the state only ever has a single writer.
 
     Uses a simple protocol for messages to / from the server.
 
@@ -62,6 +86,16 @@ from threading import Thread, Timer
                             clients to update themselves.
                             Handled by <_gameQuit>
         (end table)
+
+        Clients that offer the <BinaryProtocol.SUBPROTOCOL> in the
+        WebSocket handshake send their updates, and receive snapshots, as
+        binary frames encoded by <BinaryProtocol> instead of update= JSON.
+        Handled by <_gameBinaryUpdate>
+
+        While the server is in the lobby state, clients that offer the
+        <LOBBY_SUBPROTOCOL> instead are sent the players and started flag
+        returned by query= whenever they change, without having to ask.
+        Handled by <_lobbyPush>
 */"""
 class ArenaServer:
 
@@ -78,12 +112,35 @@ class ArenaServer:
 
     """/*
         var: WSHEADERS
-        The headers to be sent back to a handshaking WebSocket, with a hole for the auth key
+        The headers to be sent back to a handshaking WebSocket, with holes for the auth key,
+        the chosen subprotocol and any extension headers
     */"""
     WSHEADERS = ("HTTP/1.1 101 Switching Protocols\r\n"
                  "Upgrade: websocket\r\nConnection: upgrade\r\n"
                  "Sec-WebSocket-Accept: %s\r\n"
-                 "Sec-WebSocket-Protocol: exvo-arena\r\n\r\n")
+                 "Sec-WebSocket-Protocol: %s\r\n%s\r\n")
+
+    """/*
+        var: WSDEFLATEPARAMS
+        The permessage-deflate parameters the server understands (RFC 7692)
+    */"""
+    WSDEFLATEPARAMS = ('server_no_context_takeover',
+                       'client_no_context_takeover',
+                       'server_max_window_bits', 'client_max_window_bits')
+
+    """/*
+        var: LOBBY_SUBPROTOCOL
+        The WebSocket subprotocol of the lobby channel, offered by clients
+        that want the state of the lobby pushed to them
+    */"""
+    LOBBY_SUBPROTOCOL = 'exvo-arena-lobby'
+
+    """/*
+        var: LOBBY_HANDSHAKE_TIMEOUT
+        Seconds a lobby channel has to finish its WebSocket handshake before
+        it is dropped
+    */"""
+    LOBBY_HANDSHAKE_TIMEOUT = 5
 
     """/*
         Group: Constructors
@@ -98,8 +155,82 @@ class ArenaServer:
             str password - A password for the server. Defaults to None
             func log - A function to log messages into the <LogPanel>
             func callback - A function to be called when the server closes
+            int compressionLevel - zlib level (0-9, or -1 for zlib's
+                                   default) used for permessage-deflate
+                                   when a client offers it, or None to never
+                                   negotiate compression. Defaults to 6
+            float heartbeatInterval - Seconds between WebSocket pings sent
+                                      to each player. Defaults to 1
+            float heartbeatTimeout - Seconds a game socket may stay silent
+                                     before its player is removed from the
+                                     game. Defaults to 3
+            float handshakeTimeout - Seconds the server waits for every player
+                                     to complete their WebSocket handshake
+                                     before starting without the stragglers.
+                                     Defaults to 20
+            float playerTimeout - Seconds a player may go without querying
+                                  the lobby or sending a game update before
+                                  they are removed. Defaults to 10
+            float tickRate - Game ticks per second. Updates received between
+                             ticks are applied together, and at most one
+                             snapshot is sent per tick. Defaults to 30
+            int capacity - The most players the lobby can hold. Defaults
+                           to 4
+            int arenaWidth - Width of the arena in pixels. Defaults to 650
+            int arenaHeight - Height of the arena in pixels. Defaults to 650
+            float interestRadius - Distance in pixels around each player
+                                   within which other players and bullets
+                                   are sent in full. Players further away
+                                   are only sent as a summary. None sends
+                                   every player in full. Defaults to None
+            int deltaHistory - The number of sent snapshots kept as
+                               baselines for delta snapshots to JSON
+                               clients, or 0 to always send full snapshots.
+                               Defaults to 32
+            boolean serverPhysics - Simulate the bullets on the server with
+                                    <BulletPhysics>, which needs NumPy, and
+                                    ignore the hits reported by clients.
+                                    Defaults to False
+            string arenaMap - Path of a JSON map file setting the size,
+                              walls and spawn points of the arena, as read
+                              by <ArenaMap.load>. Overrides arenaWidth and
+                              arenaHeight. None uses <ArenaMap.default>.
+                              Defaults to None
+            boolean adaptiveRate - Adapt the rate clients send updates at,
+                                   and the rate snapshots are broadcast at,
+                                   to the load on the server with a
+                                   <RateController>. Defaults to True
+            int httpPort - Port to serve the web pages on with a
+                           <WebFrontEnd>, so no web server with CGI is
+                           needed. None serves no pages. Defaults to None
+
+        Raises:
+            ValueError - If the compression level, capacity, map or arena
+                         size is out of range
     */"""
-    def __init__(self, port=44444, password=None, log=print, callback=lambda x: x):
+    def __init__(self, port=44444, password=None, log=print, callback=lambda x: x,
+                 compressionLevel=6, heartbeatInterval=1.0, heartbeatTimeout=3.0,
+                 handshakeTimeout=20.0, playerTimeout=10.0, tickRate=30,
+                 capacity=4,
+                 arenaWidth=650, arenaHeight=650, interestRadius=None,
+                 deltaHistory=32, serverPhysics=False, arenaMap=None,
+                 adaptiveRate=True, httpPort=None):
+        if compressionLevel is not None and not -1 <= compressionLevel <= 9:
+            raise ValueError("Compression level must be between -1 and 9")
+        if not 1 <= capacity <= BinaryProtocol.MAX_PLAYERS:
+            raise ValueError("Capacity must be between 1 and %i" % (
+                BinaryProtocol.MAX_PLAYERS))
+        if arenaMap is not None:
+            arenaMap = ArenaMap.load(arenaMap)
+            arenaWidth, arenaHeight = arenaMap.width, arenaMap.height
+            if len(arenaMap.spawns) < capacity:
+                raise ValueError("The map only has %i spawn points" % (
+                    len(arenaMap.spawns)))
+        if not (0 < arenaWidth <= BinaryProtocol.MAX_COORDINATE and
+                0 < arenaHeight <= BinaryProtocol.MAX_COORDINATE):
+            raise ValueError("Arena sides must be between 1 and %i pixels" % (
+                BinaryProtocol.MAX_COORDINATE))
+
         """/*
             Group: Server Socket Variables
                 Variables maintaining the state of the socket the server
@@ -118,14 +249,17 @@ class ArenaServer:
         */"""
         self.port = port
 
-        sock = socket()
-        sock.setblocking(0)
-        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
-        sock.bind(('', self.port))
+        sock = None
+        if port is not None:
+            sock = socket()
+            sock.setblocking(0)
+            sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+            sock.bind(('', self.port))
 
         """/*
             var: sock
-            The <Socket> the server listens on
+            The <Socket> the server listens on, or None if the server is a
+            room hosted on another server's socket
         */"""
         self.sock = sock
 
@@ -212,11 +346,24 @@ class ArenaServer:
         */"""
         self.lobbySize = 0
 
+        """/*
+            var: capacity
+            The most players the lobby can hold
+        */"""
+        self.capacity = capacity
+
         """/*
             var: players
-            Array of player JSON objects in the lobby
+            Array of player JSON objects in the lobby, with a slot for each
+            of the <capacity> players
+        */"""
+        self.players = [None] * capacity
+
+        """/*
+            var: playerIndices
+            Dict of usernames against their index in <players>
         */"""
-        self.players = [None, None, None, None]
+        self.playerIndices = {}
 
         """/*
             var: tokens
@@ -225,30 +372,60 @@ class ArenaServer:
         self.tokens = {}
 
         """/*
-            var: playerStatus
-            Dict of indices against a flag indicating whether the player is
-            still in game.
-            The flags will be set to True in the gameUpdate and lobbyQuery
-            functions, and set to false in the checkTimeout function
+            var: lastSeen
+            Dict of indices against the time each player last queried the
+            lobby or sent a game update.
+            Set by <_playerSeen>, and checked by <_timeoutPlayer> when the
+            player's timer in <timers> runs out
 
             Note:
                 Uses the indices in self.players, meaning the indices in
                 self.playerObjects may not work
         */"""
-        self.playerStatus = {}
+        self.lastSeen = {}
+
+        """/*
+            var: lobbySnapshot
+            Tuple of copies of the <players>, republished by <_lobbyPublish>
+            whenever the lobby changes. Never modified once published, so
+            threads other than the state owner read this instead of
+            <players>
+        */"""
+        self.lobbySnapshot = tuple(self.players)
+
+        """/*
+            var: arenaWidth
+            Width of the arena in pixels
+        */"""
+        self.arenaWidth = arenaWidth
 
-        width = height = 650
+        """/*
+            var: arenaHeight
+            Height of the arena in pixels
+        */"""
+        self.arenaHeight = arenaHeight
+
+        """/*
+            var: arenaMap
+            The <ArenaMap> the game is played on
+        */"""
+        self.arenaMap = arenaMap or ArenaMap.default(
+            capacity, arenaWidth, arenaHeight)
 
         """/*
             var: coords
             Array of (x, y) coordinate pairs players can spawn in
         */"""
-        self.coords = [
-            (width / 4, height / 4),
-            ((3 * width) / 4, height / 4),
-            (width / 4, (3 * height) / 4),
-            ((3 * width) / 4, (3 * height) / 4)
-        ]
+        self.coords = list(self.arenaMap.spawns)
+
+        """/*
+            var: physics
+            The <BulletPhysics> simulating the bullets, or None if clients
+            simulate their own bullets and report their own hits
+        */"""
+        self.physics = None
+        if serverPhysics:
+            self.physics = BulletPhysics(capacity, self.arenaMap)
 
         """/*
             Group: Game Variables
@@ -264,7 +441,7 @@ class ArenaServer:
                 They are <Player> objects in JavaScript, but Python stores them
                 as dicts
         */"""
-        self.playerObjects = [None, None, None, None]
+        self.playerObjects = [None] * capacity
 
         """/*
             var: playerSockets
@@ -273,13 +450,239 @@ class ArenaServer:
         */"""
         self.playerSockets = {}
 
+        """/*
+            var: lobbySockets
+            Map of the lobby channel WebSockets to the id of the player
+            that opened them. They share <frameReaders>, <compressors>,
+            <heartbeats> and <outboundQueues> with the game sockets
+        */"""
+        self.lobbySockets = {}
+
+        """/*
+            var: lobbyHandshakes
+            Map of the sockets upgrading to a lobby channel to the state of
+            their <WebSocketHandshake>, read by the lobby loop in <listen>
+        */"""
+        self.lobbyHandshakes = {}
+
+        """/*
+            var: lobbyMessage
+            The last lobby state pushed to the <lobbySockets>, as JSON
+        */"""
+        self.lobbyMessage = None
+
+        """/*
+            var: frameReaders
+            Map of game sockets to the <FrameReader> that buffers and parses
+            the frames received on them
+        */"""
+        self.frameReaders = {}
+
+        """/*
+            var: compressionLevel
+            zlib compression level for permessage-deflate, or None if
+            compression is disabled
+        */"""
+        self.compressionLevel = compressionLevel
+
+        """/*
+            var: compressors
+            Map of game sockets that negotiated permessage-deflate to a dict
+            holding their zlib compressor and negotiated options. Sockets
+            that did not negotiate compression are not in the map
+        */"""
+        self.compressors = {}
+
+        """/*
+            var: binaryClients
+            Set of game sockets that negotiated the <BinaryProtocol>
+        */"""
+        self.binaryClients = set()
+
+        """/*
+            var: heartbeatInterval
+            Seconds between WebSocket pings sent to each player
+        */"""
+        self.heartbeatInterval = heartbeatInterval
+
+        """/*
+            var: heartbeatTimeout
+            Seconds of silence after which a player is removed from the game
+        */"""
+        self.heartbeatTimeout = heartbeatTimeout
+
+        """/*
+            var: heartbeats
+            Map of game sockets to the <Heartbeat> tracking their liveness
+            and round trip time
+        */"""
+        self.heartbeats = {}
+
+        """/*
+            var: outboundQueues
+            Map of game sockets to the <OutboundQueue> every message sent to
+            them goes through, so no send ever blocks
+        */"""
+        self.outboundQueues = {}
+
+        """/*
+            var: lobbyHandlers
+            Map of the <MessageCodec> lobby request types to their handlers
+        */"""
+        self.lobbyHandlers = {
+            MessageCodec.Join: self._lobbyJoin,
+            MessageCodec.Query: self._lobbyQuery,
+            MessageCodec.Token: self._lobbyGetToken,
+            MessageCodec.Quit: self._lobbyQuit,
+            MessageCodec.Start: self._lobbyStart
+        }
+
+        """/*
+            var: gameHandlers
+            Map of the <MessageCodec> game message types to their handlers
+        */"""
+        self.gameHandlers = {
+            MessageCodec.Update: self._gameUpdate,
+            MessageCodec.BinaryUpdate: self._gameBinaryUpdate,
+            MessageCodec.GameOver: self._gameOver,
+            MessageCodec.Quit: self._gameQuit
+        }
+
+        """/*
+            var: handshakeTimeout
+            Seconds the server waits for every player's WebSocket handshake
+        */"""
+        self.handshakeTimeout = handshakeTimeout
+
+        """/*
+            var: handshaking
+            True while the server is waiting for handshakes, until every
+            player has completed theirs or <handshakeTimeout> passes
+        */"""
+        self.handshaking = False
+
+        """/*
+            var: playerTimeout
+            Seconds a player may go unseen before they are removed
+        */"""
+        self.playerTimeout = playerTimeout
+
+        """/*
+            var: tickRate
+            Game ticks per second
+        */"""
+        self.tickRate = tickRate
+
+        """/*
+            var: tickClock
+            The <TickClock> scheduling the game ticks, created when the game
+            starts
+        */"""
+        self.tickClock = None
+
         """/*
             var: damages
-            Dict of player indices to damage objects they have received since
-            they last updated
+            Dict of player indices to the <DamageRecord> of the damage they
+            have received since their last snapshot
         */"""
         self.damages = {}
 
+        """/*
+            var: commands
+            The <CommandQueue> of state changes submitted by the handlers.
+            Drained by the thread running <listen> as soon as it is woken
+            while in the lobby, and once per <_gameTick> during the game
+        */"""
+        self.commands = CommandQueue()
+
+        """/*
+            var: stateVersion
+            Incremented every time <playerObjects> changes
+        */"""
+        self.stateVersion = 0
+
+        """/*
+            var: snapshotVersion
+            The <stateVersion> that <snapshots> were built from
+        */"""
+        self.snapshotVersion = -1
+
+        """/*
+            var: snapshots
+            The encoded players section of the latest game snapshot, shared
+            by every client it is sent to. Maps False to the JSON encoding
+            and True to the <BinaryProtocol> encoding, each built only when
+            a client needs it. With an <interestRadius>, each client has its
+            own snapshot, keyed by (binary, player index)
+        */"""
+        self.snapshots = {}
+
+        """/*
+            var: interestRadius
+            Distance around each player within which other players are sent
+            in full, or None to send every player in full
+        */"""
+        self.interestRadius = interestRadius
+
+        """/*
+            var: interestGrid
+            <SpatialGrid> of the players and bullets in the latest snapshot,
+            built the first time it is needed for each <snapshotVersion>
+        */"""
+        self.interestGrid = None
+
+        """/*
+            var: snapshotRecords
+            The encoded full and summary record of each player in the latest
+            snapshot, as (id, summary, full) tuples, keyed by whether they
+            are for the <BinaryProtocol>. Per client snapshots are joined
+            together from these
+        */"""
+        self.snapshotRecords = {}
+
+        """/*
+            var: deltaHistory
+            The number of sent snapshots kept in <snapshotHistory>
+        */"""
+        self.deltaHistory = deltaHistory
+
+        """/*
+            var: snapshotHistory
+            OrderedDict of the most recently sent <stateVersion>s, oldest
+            first, to a copy of <playerObjects> at that version. A client
+            that has acknowledged one of these is sent a delta against it
+        */"""
+        self.snapshotHistory = OrderedDict()
+
+        """/*
+            var: snapshotAcks
+            Dict of player indices to the sequence of the last snapshot
+            their client acknowledged
+        */"""
+        self.snapshotAcks = {}
+
+        """/*
+            var: updateSequences
+            Dict of player indices to the sequence number of the last update
+            applied from their client. Older updates are ignored
+        */"""
+        self.updateSequences = {}
+
+        """/*
+            var: broadcastVersion
+            The <stateVersion> that was last sent out by <_gameBroadcast>
+        */"""
+        self.broadcastVersion = 0
+
+        """/*
+            var: rateController
+            The <RateController> that steps the update and broadcast rates
+            down when the server is under pressure, or None for fixed rates
+        */"""
+        self.rateController = None
+        if adaptiveRate:
+            self.rateController = RateController(monotonic())
+
         """/*
             Group: External Methods
                 Methods passed into the constructor from the GUI elements
@@ -298,13 +701,24 @@ class ArenaServer:
         self.callback = callback
 
         """/*
-            var: timeoutTimer
-            Pointer to a Timer object that controls the periodic timeout
-            checking
+            var: timers
+            The <TimingWheel> running the player timeouts, the handshake
+            deadline and the heartbeats of the game sockets. Only used by
+            the state owner
+        */"""
+        self.timers = TimingWheel(monotonic())
+
+        """/*
+            var: frontEnd
+            The <WebFrontEnd> serving the web pages, or None if they are
+            served by another web server
         */"""
-        self.timeoutTimer = Timer(5, self._checkTimeouts)
+        self.frontEnd = None
+        if httpPort is not None:
+            self.frontEnd = WebFrontEnd(self, httpPort, log=log)
 
-        self.log("Localhost IP: " + str(gethostbyname(gethostname())))
+        if sock is not None:
+            self.log("Localhost IP: " + str(gethostbyname(gethostname())))
 
     """/*
         Group: Static Helper Methods
@@ -329,75 +743,283 @@ class ArenaServer:
 
     """/*
         Function: _wsHandshake
-        Performs the handshaking operation with the passed socket
+        Advances the handshake on a socket that is ready to be read. Run from
+        the handshake loop in <listen>, so it only ever does one
+        non-blocking read.
+
+        Once the upgrade request has been read it is validated, a subprotocol
+        and extensions are negotiated and the response is sent. Once the
+        client's exvo-arena-ready message arrives the socket joins
+        <playerSockets>.
 
         Parameters:
-            socket client - The socket object from which the handshaking request was received
+            WebSocketHandshake handshake - The state of the handshake on the
+                                           socket
+
+        Returns:
+            boolean finished - True if the handshake completed or failed, and
+                               the socket no longer needs to be watched
     */"""
-    def _wsHandshake(self, client):
-        clientHand = client.recv(4096).decode()
+    def _wsHandshake(self, handshake):
+        client = handshake.sock
         try:
-            protocol, playerNum = clientHand.split("Sec-WebSocket-Protocol: ")[-1].split('\r\n')[0].split(', ')
-            playerNum = int(playerNum)
-            if protocol == 'exvo-arena' and self.players[playerNum] is not None:
-                auth_key = clientHand.split("Sec-WebSocket-Key: ")[-1].split('\r\n')[0]
-                auth_key += ArenaServer.WSGUID
-                auth_key = b64encode(sha1(auth_key.encode()).digest()).decode()
-                hand_of_python = ArenaServer.WSHEADERS % (auth_key,)
-                client.sendall(hand_of_python.encode())
-
-                # Wait for a completion message before adding the socket to the list
-                iterations = 0
-                while iterations < 10:
-                    responses, wlist, xlist = select([client], [], [], 1)
-
-                    for response in responses:
-                        data = ArenaServer._wsDecode(response.recv(4096))
-                        if data == 'exvo-arena-ready':
-                            self.playerSockets[client] = playerNum
-                            break
-                    iterations += 1
+            if handshake.state == WebSocketHandshake.REQUEST:
+                request = handshake.readRequest()
+                if request is None:
+                    return False
+                handshake.accept(self._wsHandshakeResponse(handshake, request))
             else:
-                raise ValueError("Invalid Protocol from websocket")
-        except ValueError:
+                handshake.readMessages()
+        except (ValueError, OSError):
             self.log("Invalid WebSocket connection received")
+            try:
+                client.close()
+            except OSError:
+                pass
+            return True
+
+        if handshake.state != WebSocketHandshake.COMPLETE:
+            return False
+        # The socket stays non-blocking, as its sends are queued
+        self._wsRegister(handshake)
+        return True
+
+    """/*
+        Function: _wsRegister
+        Adds the socket of a completed handshake to the game, or to the
+        <lobbySockets> for the lobby channel, along with the state
+        negotiated for it
+
+        Parameters:
+            WebSocketHandshake handshake - The completed handshake
+    */"""
+    def _wsRegister(self, handshake):
+        client = handshake.sock
+        if handshake.protocol == ArenaServer.LOBBY_SUBPROTOCOL:
+            self._lobbyRegister(handshake)
+            return
+        self.frameReaders[client] = handshake.reader
+        if handshake.deflate:
+            self.compressors[client] = handshake.deflate
+        if handshake.protocol == BinaryProtocol.SUBPROTOCOL:
+            self.binaryClients.add(client)
+        self.heartbeats[client] = Heartbeat(
+            monotonic(), self.heartbeatInterval, self.heartbeatTimeout)
+        self.outboundQueues[client] = OutboundQueue(client)
+        self.playerSockets[client] = handshake.playerNum
+
+    """/*
+        Function: _wsHandshakeResponse
+        Validates a WebSocket upgrade request and builds the response to it
+
+        The client offers its subprotocols followed by its player number in
+        the Sec-WebSocket-Protocol header
+
+        Parameters:
+            WebSocketHandshake handshake - The handshake to store the
+                                           negotiated player, subprotocol
+                                           and extensions in
+            HttpRequest request - The client's upgrade request
+
+        Returns:
+            bytes response - The 101 Switching Protocols response
+
+        Raises:
+            ValueError - If the request is not a valid upgrade for a player
+                         in the game
+    */"""
+    def _wsHandshakeResponse(self, handshake, request):
+        key = request.header('sec-websocket-key')
+        if (request.method != 'GET' or not key or
+                'websocket' not in request.headerTokens('upgrade') or
+                'upgrade' not in request.headerTokens('connection')):
+            raise ValueError("Not a WebSocket upgrade request")
+        protocols = request.headerTokens('sec-websocket-protocol', False)
+        if not protocols:
+            raise ValueError("Invalid Protocol from websocket")
+        playerNum = int(protocols.pop())
+        if not 0 <= playerNum < len(self.players) or \
+                self.players[playerNum] is None:
+            raise ValueError("Unknown player in WebSocket handshake")
+        if ArenaServer.LOBBY_SUBPROTOCOL in protocols:
+            protocol = ArenaServer.LOBBY_SUBPROTOCOL
+        elif BinaryProtocol.SUBPROTOCOL in protocols:
+            protocol = BinaryProtocol.SUBPROTOCOL
+        elif 'exvo-arena' in protocols:
+            protocol = 'exvo-arena'
+        else:
+            raise ValueError("Invalid Protocol from websocket")
+        if self.started == (protocol == ArenaServer.LOBBY_SUBPROTOCOL):
+            raise ValueError("WebSocket for the wrong state of the server")
+
+        extensions, deflate = '', None
+        if self.compressionLevel is not None:
+            extensions, deflate = ArenaServer._wsNegotiateDeflate(request)
+        if deflate:
+            deflate['level'] = self.compressionLevel
+            deflate['compressor'] = None
+
+        handshake.playerNum = playerNum
+        handshake.protocol = protocol
+        handshake.deflate = deflate
+        auth_key = key + ArenaServer.WSGUID
+        auth_key = b64encode(sha1(auth_key.encode()).digest()).decode()
+        return (ArenaServer.WSHEADERS % (
+            auth_key, protocol, extensions)).encode()
+
+    """/*
+        Function: _wsNegotiateDeflate
+        Picks the first permessage-deflate offer in the client's
+        Sec-WebSocket-Extensions headers that the server can accept
+        Static Method
+
+        Parameters:
+            HttpRequest request - The client's handshake request
+
+        Returns:
+            string header - The Sec-WebSocket-Extensions response header line,
+                            or '' if no offer was accepted
+            dict options - The negotiated wbits, contextTakeover and
+                           clientContextTakeover, or None if no offer was
+                           accepted
+    */"""
+    def _wsNegotiateDeflate(request):
+        for offer in request.headerTokens('sec-websocket-extensions', False):
+            params = [param.strip() for param in offer.split(';')]
+            if params[0] != 'permessage-deflate':
+                continue
+            values = {}
+            for param in params[1:]:
+                key, _, value = param.partition('=')
+                key = key.strip()
+                if key not in ArenaServer.WSDEFLATEPARAMS or key in values:
+                    break
+                values[key] = value.strip().strip('"')
+            else:
+                wbits = 15
+                if 'server_max_window_bits' in values:
+                    try:
+                        wbits = int(values['server_max_window_bits'])
+                    except ValueError:
+                        continue
+                    # zlib cannot produce raw deflate streams with a window
+                    # of 256 bytes, so decline those offers
+                    if not 9 <= wbits <= 15:
+                        continue
+                response = ['permessage-deflate']
+                for key in ('server_no_context_takeover',
+                            'client_no_context_takeover'):
+                    if key in values:
+                        response.append(key)
+                if 'server_max_window_bits' in values:
+                    response.append('server_max_window_bits=%i' % (wbits,))
+                options = {
+                    'wbits': wbits,
+                    'contextTakeover':
+                        'server_no_context_takeover' not in values,
+                    'clientContextTakeover':
+                        'client_no_context_takeover' not in values
+                }
+                header = ('Sec-WebSocket-Extensions: %s\r\n' %
+                          ('; '.join(response),))
+                return header, options
+        return '', None
+
     """/*
         Function: _wsEncode
         Encodes the passed string into a WebSocket frame and returns the byte string generated
         Static Method
 
         Parameters:
-            string payload - The string to be sent to the client
+            string payload - The string to be sent to the client. Control
+                             frames may pass bytes instead
+            int opcode - The opcode of the frame. Defaults to
+                         <FrameReader.TEXT>
 
         Returns:
             bytes frame - The WebSocket Frame to be sent to the client
     */"""
-    def _wsEncode(payload):
-        frame = bytearray([129])
-        dataLength = len(payload)
+    def _wsEncode(payload, opcode=FrameReader.TEXT):
+        if isinstance(payload, str):
+            payload = payload.encode()
+        return ArenaServer._wsHeader(len(payload), opcode) + payload
+
+    """/*
+        Function: _wsHeader
+        Builds the header of an unmasked server to client WebSocket frame
+        Static Method
+
+        Parameters:
+            int dataLength - The length of the payload that will follow
+            int opcode - The opcode of the frame. Defaults to
+                         <FrameReader.TEXT>
+            boolean compressed - Sets the RSV1 bit to mark the payload as
+                                 compressed with permessage-deflate.
+                                 Defaults to False
 
+        Returns:
+            bytes header - The frame header
+    */"""
+    def _wsHeader(dataLength, opcode=FrameReader.TEXT, compressed=False):
+        header = bytearray([(192 if compressed else 128) | opcode])
         if dataLength <= 125:
-            frame.append(dataLength)
-        elif 126 <= dataLength <= 65535:
-            frame.extend([
-                126,
-                (dataLength >> 8) & 255,
-                dataLength & 255
-            ])
+            header.append(dataLength)
+        elif dataLength <= 65535:
+            header.append(126)
+            header.extend(dataLength.to_bytes(2, 'big'))
         else:
-            frame.extend([
-                127,
-                (dataLength >> 56) & 255,
-                (dataLength >> 48) & 255,
-                (dataLength >> 40) & 255,
-                (dataLength >> 32) & 255,
-                (dataLength >> 24) & 255,
-                (dataLength >> 16) & 255,
-                (dataLength >> 8) & 255,
-                dataLength & 255
-            ])
-        frame.extend(payload.encode())
-        return bytes(frame)
+            header.append(127)
+            header.extend(dataLength.to_bytes(8, 'big'))
+        return bytes(header)
+
+    """/*
+        Function: _wsFrame
+        Frames a message for a particular game socket, compressing it if the
+        socket negotiated permessage-deflate
+
+        Parameters:
+            Socket client - The <Socket> the message will be sent to
+            list buffers - The pieces of the encoded message payload
+            int opcode - The opcode of the frame. Defaults to
+                         <FrameReader.TEXT>
+
+        Returns:
+            list buffers - The frame header followed by the payload pieces,
+                           ready for <_gameSend>
+    */"""
+    def _wsFrame(self, client, buffers, opcode=FrameReader.TEXT):
+        options = self.compressors.get(client)
+        if options is None:
+            dataLength = sum(len(buffer) for buffer in buffers)
+            return [ArenaServer._wsHeader(dataLength, opcode)] + buffers
+        data = ArenaServer._wsCompress(options, buffers)
+        return [ArenaServer._wsHeader(len(data), opcode, True), data]
+
+    """/*
+        Function: _wsCompress
+        Compresses a message with a socket's permessage-deflate compressor.
+        Unless server_no_context_takeover was negotiated the compressor is
+        kept between messages, so repeated content in consecutive snapshots
+        compresses to almost nothing
+        Static Method
+
+        Parameters:
+            dict options - The socket's entry in <compressors>
+            list buffers - The pieces of the message payload
+
+        Returns:
+            bytes data - The compressed message, without the trailing empty
+                         block
+    */"""
+    def _wsCompress(options, buffers):
+        compressor = options['compressor']
+        if compressor is None or not options['contextTakeover']:
+            compressor = compressobj(
+                options['level'], DEFLATED, -options['wbits'])
+            options['compressor'] = compressor
+        data = b''.join([compressor.compress(buffer) for buffer in buffers])
+        data += compressor.flush(Z_SYNC_FLUSH)
+        return data[:-len(FrameReader.DEFLATE_TAIL)]
 
     """/*
         Function: _wsDecode
@@ -408,10 +1030,10 @@ class ArenaServer:
             bytes frame - The websocket frame to be decoded
 
         Returns:
-            string payload - The payload contained within the frame
+            string payload - The UTF-8 decoded payload contained within the
+                             frame
     */"""
     def _wsDecode(frame):
-        frame = bytearray(frame)
         length = frame[1] & 127
         maskStart = 2
         if length == 126:
@@ -420,14 +1042,8 @@ class ArenaServer:
             maskStart = 10
         dataStart = maskStart + 4
         mask = frame[maskStart:dataStart]
-        i = dataStart
-        j = 0
-        payload = []
-        while i < len(frame):
-            payload.append(frame[i] ^ mask[j % 4])
-            i += 1
-            j += 1
-        return "".join(chr(byte) for byte in payload)
+        payload = FrameReader.unmask(mask, frame[dataStart:])
+        return payload.decode('utf-8')
 
     """/*
         Group: Server Handler Methods
@@ -445,6 +1061,8 @@ class ArenaServer:
         self.closed = True
         self.closing = True
         self.started = True
+        if self.frontEnd is not None:
+            self.frontEnd.close()
         self.sock.close()
 
     """/*
@@ -457,6 +1075,45 @@ class ArenaServer:
     def inGame(self):
         return self.started and not self.gameOver
 
+    """/*
+        Function: getLatency
+        Reports the smoothed round trip time and jitter of each player's game
+        socket, as measured by WebSocket pings
+
+        Returns:
+            dict latency - Map of player numbers to dicts of 'rtt' and
+                           'jitter' in milliseconds. Players that have not
+                           answered a ping yet are left out
+    */"""
+    def getLatency(self):
+        latency = {}
+        for client, heartbeat in list(self.heartbeats.items()):
+            playerNum = self.playerSockets.get(client)
+            if playerNum is not None and heartbeat.rtt is not None:
+                latency[playerNum] = {
+                    'rtt': heartbeat.rtt * 1000,
+                    'jitter': heartbeat.jitter * 1000
+                }
+        return latency
+
+    """/*
+        Function: getOutboundStats
+        Reports how many snapshots have been written to each player's game
+        socket, and how many were dropped because the client had not taken
+        the one before
+
+        Returns:
+            dict stats - Map of player numbers to dicts of 'sent' and
+                         'dropped' snapshots
+    */"""
+    def getOutboundStats(self):
+        stats = {}
+        for client, queue in list(self.outboundQueues.items()):
+            playerNum = self.playerSockets.get(client)
+            if playerNum is not None:
+                stats[playerNum] = {'sent': queue.sent, 'dropped': queue.dropped}
+        return stats
+
     """/*
         Function: listen
         Listen for incoming connections and pass them off to the handler methods
@@ -467,82 +1124,108 @@ class ArenaServer:
             'Server starting up at %s on port %s' % (self.host, self.port))
         self.log('Password Protected: ' + str(self.password is not None))
         self.sock.listen(16)
+        if self.frontEnd is not None:
+            self.frontEnd.start()
         self.log('Lobby Open')
 
         # Run the broadcast
         self._broadcast()
 
-        # Start the timeout checking
-        self.timeoutTimer.start()
         # Lobby loop
         try:
             while not self.started:
-                connections, wlist, xlist = select([self.sock], [], [], 0.05)
+                connections, writable, xlist = select(
+                    [self.sock, self.commands] + list(self.lobbySockets) +
+                    list(self.lobbyHandshakes),
+                    [client for client, queue in
+                     self.outboundQueues.items() if queue.pending()], [],
+                    0.05)
+                self.timers.advance(monotonic())
 
                 for connection in connections:
-                    client, address = connection.accept()
-                    client.settimeout(5)
-                    Thread(
-                        target=self._handleLobbyConnection,
-                        args=(client, address),
-                        daemon=True
-                    ).start()
-
-            # End the broadcast as it's not needed
+                    if connection is self.commands:
+                        self.commands.drain()
+                    elif connection is self.sock:
+                        client, address = connection.accept()
+                        client.settimeout(5)
+                        Thread(
+                            target=self._handleLobbyConnection,
+                            args=(client, address),
+                            daemon=True
+                        ).start()
+                    elif connection in self.lobbyHandshakes:
+                        self._lobbyHandshakeRead(connection)
+                    else:
+                        self._handleGameConnection(connection)
+                for client in writable:
+                    self._gameFlush(client)
+
+            # End the broadcast and the lobby channels as they're not needed
             self._endBroadcast()
-
-            # Cancel the timer
-            self.timeoutTimer.cancel()
+            self._lobbyCloseSockets()
+            for client in list(self.lobbyHandshakes):
+                self._lobbyHandshakeExpire(client)
 
             if not self.closed:
                 # Handshake phase
                 self.log("Awaiting handshakes from all players")
-                playersInGame = len(list(filter(None, self.players)))
-                iterations = 0
-                while len(self.playerSockets) < playersInGame and iterations < 20:
-                    connections, wlist, xlist = select([self.sock], [], [], 1)
+                playersInGame = self._handshakeStart()
+                handshakes = {}
+                while (self.handshaking and not self.closed and
+                        len(self.playerSockets) < playersInGame):
+                    connections, wlist, xlist = select(
+                        [self.sock, self.commands] + list(handshakes), [], [],
+                        self.timers.timeout(monotonic()))
+                    self.timers.advance(monotonic())
 
                     for connection in connections:
-                        client, address = connection.accept()
-                        Thread(
-                            target=self._wsHandshake,
-                            args=(client,),
-                            daemon=True
-                        ).start()
+                        if connection is self.commands:
+                            self.commands.drain()
+                        elif connection is self.sock:
+                            client, address = connection.accept()
+                            client.setblocking(False)
+                            handshakes[client] = WebSocketHandshake(client)
+                        elif self._wsHandshake(handshakes[connection]):
+                            del handshakes[connection]
+
+                # Drop anyone who didn't finish in time
+                for client in handshakes:
+                    client.close()
 
-                    iterations += 1
-                
                 self.log('Informing players of game starting')
                 self.startTime = datetime.now()
                 # Run gameStart for each socket
-                for sock, playerNum in self.playerSockets.items():
-                    Thread(
-                        target=self._gameStartUp,
-                        args=(sock, playerNum),
-                        daemon=True
-                    ).start()
-
-                # Start a new timer
-                self.timeoutTimer = Timer(5, self._checkTimeouts)
-                self.timeoutTimer.start()
+                for sock, playerNum in list(self.playerSockets.items()):
+                    self._gameStartUp(sock, playerNum)
+
+                # Restart the player timeouts
+                self._handshakeEnd()
                 self.log('Beginning Game Loop')
+                self.tickClock = TickClock(self.tickRate, monotonic())
                 while not self.gameOver:
-                    clients, wlist, xlist = select(
-                        list(self.playerSockets.keys()), [], [], 0.05)
+                    clients, writable, xlist = select(
+                        list(self.playerSockets.keys()),
+                        [client for client, queue in
+                         self.outboundQueues.items() if queue.pending()], [],
+                        self.tickClock.timeout(monotonic()))
 
                     for client in clients:
-                        Thread(
-                            target=self._handleGameConnection,
-                            args=(client,),
-                            daemon=True
-                        ).start()
+                        self._handleGameConnection(client)
+                    for client in writable:
+                        self._gameFlush(client)
+
+                    if self.tickClock.due(monotonic()):
+                        self._gameTick()
+                self._logGameStats()
                 # Build the stats file. Name of the file will just be constant,
                 # server remembers only the latest game for now
                 self._generateStatsFile(datetime.now())
-            self.timeoutTimer.cancel()
         except Exception as e:
             self.log(str(e))
         finally:
+            if self.frontEnd is not None:
+                self.frontEnd.close()
+            self.commands.close()
             self.callback("game")
 
     """/*
@@ -583,25 +1266,50 @@ class ArenaServer:
         while not self.closing and not self.started:
             try:
                 data, address = broadcastSock.recvfrom(1024)
-                data = data.decode()
-                # Send back server data
-                # Only send response if data matches protocol, JIC
-                if data == 'arena_broadcast_req':
-                    data = {
-                        'players': self.players,
-                        # Only need to say if there is a password or not
-                        'password': self.password is not None
-                    }
-                    serverState = {
-                        'port': self.port,
-                        'data': data
-                    }
-                    broadcastSock.sendto(dumps(serverState).encode(), address)
+                response = self._broadcastResponse(data)
+                if response is not None:
+                    broadcastSock.sendto(response, address)
             except timeout:
                 pass
         self.log('Broadcast service closing')
         self.callback("broadcast")
 
+    """/*
+        Function: _broadcastResponse
+        Builds the reply to a datagram received by the broadcast service
+
+        Parameters:
+            bytes data - The datagram sent by the client
+
+        Returns:
+            bytes response - The JSON encoded state of this server, or None
+                             if the datagram was not a broadcast request
+    */"""
+    def _broadcastResponse(self, data):
+        # Only send response if data matches protocol, JIC
+        if data != b'arena_broadcast_req':
+            return None
+        return dumps(self._broadcastState()).encode()
+
+    """/*
+        Function: _broadcastState
+        Describes the lobby for the broadcast service
+
+        Returns:
+            dict serverState - The port of the server, and the players in its
+                               lobby
+    */"""
+    def _broadcastState(self):
+        data = {
+            'players': self.lobbySnapshot,
+            # Only need to say if there is a password or not
+            'password': self.password is not None
+        }
+        return {
+            'port': self.port,
+            'data': data
+        }
+
     """/*
         Group: Lobby Handling Methods
         Handlers for connections received while the server is in the lobby loop
@@ -610,85 +1318,304 @@ class ArenaServer:
     """/*
         Function: _handleLobbyConnection
         Method run in a separate thread to handle requests while the game is
-        still in the lobby state
+        still in the lobby state. The request is answered by the state owner
+        and the response sent from this thread, so a slow client only holds
+        up its own thread. WebSocket upgrades are handed over to the lobby
+        loop with <_lobbyHandshake>
 
         Parameters:
             Socket client - The <Socket> to send response through
             Tuple[string, int] address - <Tuple> containing address and port
                                          of the client
-
-        Returns:
-            The results of <_lobbyJoin>, <_lobbyQuery>, or <_lobbyStart>,
-            depending on the message from the client
     */"""
     def _handleLobbyConnection(self, client, address):
-        # Callback on client connection, pass off to correct function
-        msg = client.recv(256).decode()
-        callback = None
+        upgraded = False
         try:
-            if 'join' in msg:
-                callback = self._lobbyJoin
-            elif 'query' in msg:
-                callback = self._lobbyQuery
-            elif 'token' in msg:
-                callback = self._lobbyGetToken
-            elif 'quit' in msg:
-                callback = self._lobbyQuit
-            elif 'start' in msg:
-                callback = self._lobbyStart
-
-            if callback:
-                callback(client, address, msg)
-        except timeout:
-            self.log('Timeout during', msg)
-            # Check if the request was involving a player already in the lobby
-            # if so, run the (playerLeft) method from Greg's issue
+            msg = client.recv(256)
+            if msg.startswith(b'GET '):
+                self.commands.submit(self._lobbyHandshake, client, msg)
+                upgraded = True
+            else:
+                client.sendall(self.commands.submit(
+                    self._lobbyAnswer, msg.decode(), address).result(5))
+        except (timeout, FutureTimeout, CancelledError):
+            self.log('Timeout during lobby request')
+        except OSError:
+            self.log('Lobby client disconnected before the response')
         finally:
-            client.close()
+            if not upgraded:
+                client.close()
 
     """/*
-        Function: _lobbyJoin
-        Handler for player joining the lobby
+        Function: _lobbyAnswer
+        Passes a lobby request to <_handleLobbyMessage>, collecting the
+        response it sends instead of writing it to the client's socket.
+        Run by the state owner
 
         Parameters:
-            Socket client - The <Socket> to send response through
+            string msg - The lobby request
             Tuple[string, int] address - <Tuple> containing address and port
                                          of the client
-            string msg - The msg that was sent by the client
-                         Includes the username that the player has chosen
 
         Returns:
-            string response - Either 'lobby full' if the lobby is full, or
-                              'joined=' + the index of the player in the array
-                              <players>
+            bytes response - The results of <_lobbyJoin>, <_lobbyQuery>, or
+                             <_lobbyStart>, depending on the message from
+                             the client
     */"""
-    def _lobbyJoin(self, client, address, msg):
-        # Handles players joining the lobby
-        if self.lobbySize < 4 and not self.started:
-            data = msg.split('=')[1]
-            username, password = data.split(';')
-            # Check the passwords against eachother
-            if ((password == 'None' and not self.password) or
-                    sha256(password.encode()).hexdigest() == self.password):
-                # Add the player to the lobby
-                player_index = self._lobbyAddPlayer(username)
-                # Generate the token
-                token = sha256(
-                    str(datetime.now()).encode()).hexdigest()
-                self.tokens[username] = token
-                msg = 'joined=' + str(player_index) + ';' + token
-                client.sendall(msg.encode())
-            else:
-                client.sendall('incorrect'.encode())
-        else:
-            client.sendall('lobby full'.encode())
+    def _lobbyAnswer(self, msg, address):
+        chunks = []
+        self._handleLobbyMessage(
+            SimpleNamespace(sendall=chunks.append), address, msg)
+        return b''.join(chunks)
 
     """/*
-        Function: _lobbyAddPlayer
-        Adds a new player to the lobby
+        Function: _lobbyHandshake
+        Starts the WebSocket handshake of a lobby channel on a non-blocking
+        socket, leaving the rest of it to the lobby loop in <listen>, with
+        <LOBBY_HANDSHAKE_TIMEOUT> seconds to finish. Run by the state owner
 
         Parameters:
-            string username - The username of the player that has joined
+            Socket client - The <Socket> of the connection
+            bytes data - The start of the upgrade request, already read by
+                         <_handleLobbyConnection>
+    */"""
+    def _lobbyHandshake(self, client, data):
+        if self.started:
+            client.close()
+            return
+        client.setblocking(False)
+        handshake = WebSocketHandshake(client)
+        try:
+            request = handshake.feedRequest(data)
+            if request is not None:
+                handshake.accept(self._wsHandshakeResponse(handshake, request))
+        except (ValueError, OSError):
+            self.log("Invalid WebSocket connection received")
+            client.close()
+            return
+        self.lobbyHandshakes[client] = handshake
+        self.timers.schedule(
+            ('lobbyHandshake', client),
+            monotonic() + ArenaServer.LOBBY_HANDSHAKE_TIMEOUT,
+            self._lobbyHandshakeExpire, client)
+
+    """/*
+        Function: _lobbyHandshakeRead
+        Continues the handshake of a lobby channel once its socket is
+        readable, using <_wsHandshake>. Run by the state owner
+
+        Parameters:
+            Socket client - The readable <Socket>
+    */"""
+    def _lobbyHandshakeRead(self, client):
+        if self._wsHandshake(self.lobbyHandshakes[client]):
+            del self.lobbyHandshakes[client]
+            self.timers.cancel(('lobbyHandshake', client))
+
+    """/*
+        Function: _lobbyHandshakeExpire
+        Drops a lobby channel that did not finish its handshake in time.
+        Run by the state owner
+
+        Parameters:
+            Socket client - The <Socket> of the channel
+    */"""
+    def _lobbyHandshakeExpire(self, client):
+        self.timers.cancel(('lobbyHandshake', client))
+        if self.lobbyHandshakes.pop(client, None) is not None:
+            self.log('Timeout during lobby handshake')
+            client.close()
+
+    """/*
+        Function: _webRequest
+        Answers a lobby request for the <frontEnd> without a connection to
+        the server. Run in the front end's connection thread, with the
+        request handled by the state owner
+
+        Parameters:
+            string msg - The lobby request
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the web client
+
+        Returns:
+            bytes response - What the handler would have sent on a lobby
+                             connection
+
+        Raises:
+            TimeoutError - If the state owner did not answer in 5 seconds
+            CancelledError - If the server closed before answering
+    */"""
+    def _webRequest(self, msg, address):
+        return self.commands.submit(self._webLobby, msg, address).result(5)
+
+    """/*
+        Function: _webLobby
+        Passes a lobby request from the <frontEnd> to <_lobbyAnswer>. Run by
+        the state owner
+
+        Parameters:
+            string msg - The lobby request
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the web client
+
+        Returns:
+            bytes response - The response, or nothing once the game has
+                             started, as the lobby no longer answers then
+    */"""
+    def _webLobby(self, msg, address):
+        if self.started:
+            return b''
+        return self._lobbyAnswer(msg, address)
+
+    """/*
+        Function: _handleLobbyMessage
+        Parses a lobby request with the <MessageCodec> and passes it off to
+        its handler in <lobbyHandlers>, then publishes the new state of the
+        lobby. Run by the state owner
+
+        Parameters:
+            Socket client - The <Socket> to send response through
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the client
+            string msg - The request sent by the client
+    */"""
+    def _handleLobbyMessage(self, client, address, msg):
+        # Parse the request and pass it off to the handler for its type
+        try:
+            message = MessageCodec.decodeLobby(msg)
+            callback = self.lobbyHandlers.get(type(message))
+            if callback:
+                callback(client, address, message)
+        except ValueError as e:
+            self.log('Invalid lobby request: ' + str(e))
+        except timeout:
+            self.log('Timeout during ' + msg)
+            # Check if the request was involving a player already in the lobby
+            # if so, run the (playerLeft) method from Greg's issue
+        finally:
+            self._lobbyPublish()
+
+    """/*
+        Function: _lobbyPublish
+        Republishes <lobbySnapshot> from the current <players>. Run by the
+        state owner after it changes the lobby
+    */"""
+    def _lobbyPublish(self):
+        self.lobbySnapshot = tuple(
+            dict(player) if player is not None else None
+            for player in self.players)
+        self._lobbyPush()
+
+    """/*
+        Function: _lobbyPush
+        Sends the state of the lobby to every <lobbySockets> channel if it
+        has changed since it was last sent. A channel that has not taken
+        the last state yet only gets the newest one. Run by the state owner
+    */"""
+    def _lobbyPush(self):
+        if not self.lobbySockets:
+            return
+        message = dumps({'players': self.players, 'started': self.hostStart})
+        if message == self.lobbyMessage:
+            return
+        self.lobbyMessage = message
+        state = message.encode()
+        for client in list(self.lobbySockets):
+            self.outboundQueues[client].replace(state)
+            self._gameFlush(client)
+
+    """/*
+        Function: _lobbyRegister
+        Adds a completed lobby channel handshake to the <lobbySockets>,
+        sends it the state of the lobby and starts pinging it, so the
+        player is kept in the lobby for as long as the channel answers.
+        Run by the state owner
+
+        Parameters:
+            WebSocketHandshake handshake - The completed handshake
+    */"""
+    def _lobbyRegister(self, handshake):
+        client = handshake.sock
+        if self.started or self.players[handshake.playerNum] is None:
+            client.close()
+            return
+        self.frameReaders[client] = handshake.reader
+        if handshake.deflate:
+            self.compressors[client] = handshake.deflate
+        heartbeat = Heartbeat(
+            monotonic(), self.heartbeatInterval, self.heartbeatTimeout)
+        self.heartbeats[client] = heartbeat
+        self.outboundQueues[client] = OutboundQueue(client)
+        self.lobbySockets[client] = handshake.playerNum
+        self._playerSeen(handshake.playerNum)
+        # Every other channel has been sent the current state already
+        self.lobbyMessage = dumps(
+            {'players': self.players, 'started': self.hostStart})
+        self.outboundQueues[client].replace(self.lobbyMessage.encode())
+        self._gameFlush(client)
+        self.timers.schedule(
+            ('ping', client), heartbeat.nextPing, self._gamePing, client)
+
+    """/*
+        Function: _lobbyCloseSockets
+        Sends the last state of the lobby and a close frame to every lobby
+        channel still open, for <playerNum> or for everyone, and closes
+        them. Run by the state owner
+
+        Parameters:
+            int playerNum - The player whose channels to close, or None to
+                            close them all. Defaults to None
+    */"""
+    def _lobbyCloseSockets(self, playerNum=None):
+        for client, player in list(self.lobbySockets.items()):
+            if playerNum is None or player == playerNum:
+                self._gameFlush(client)
+                self._gameSend(client, [ArenaServer._wsEncode(
+                    (1000).to_bytes(2, 'big'), FrameReader.CLOSE)])
+                self._gameDisconnect(client)
+
+    """/*
+        Function: _lobbyJoin
+        Handler for player joining the lobby
+
+        Parameters:
+            Socket client - The <Socket> to send response through
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the client
+            MessageCodec.Join message - The request, with the username that
+                                        the player has chosen
+
+        Returns:
+            string response - Either 'lobby full' if the lobby is full, or
+                              'joined=' + the index of the player in the array
+                              <players>
+    */"""
+    def _lobbyJoin(self, client, address, message):
+        # Handles players joining the lobby
+        if self.lobbySize < self.capacity and not self.started:
+            username, password = message.userName, message.password
+            # Check the passwords against eachother
+            if ((password == 'None' and not self.password) or
+                    sha256(password.encode()).hexdigest() == self.password):
+                # Add the player to the lobby
+                player_index = self._lobbyAddPlayer(username)
+                # Generate the token
+                token = sha256(
+                    str(datetime.now()).encode()).hexdigest()
+                self.tokens[username] = token
+                msg = 'joined=' + str(player_index) + ';' + token
+                client.sendall(msg.encode())
+            else:
+                client.sendall('incorrect'.encode())
+        else:
+            client.sendall('lobby full'.encode())
+
+    """/*
+        Function: _lobbyAddPlayer
+        Adds a new player to the lobby
+
+        Parameters:
+            string username - The username of the player that has joined
 
         Returns:
             int player_index - The index of the player in the array of players
@@ -730,7 +1657,8 @@ class ArenaServer:
         }
         self.lobbySize += 1
         self.players[player_index] = player
-        self.playerStatus[player_index] = True
+        self.playerIndices[username] = player_index
+        self._playerSeen(player_index)
         self.canStartUp[username] = True
         return player_index
 
@@ -742,20 +1670,19 @@ class ArenaServer:
             Socket client - The <Socket> to send response through
             Tuple[string, int] address - <Tuple> containing address and port
                                          of the client
-            string msg - The msg that was sent by the client
-                         Includes the index of the player in the list of
-                         players
+            MessageCodec.Query message - The request, with the index of the
+                                         player in the list of players
 
         Returns:
             List players - <List> of player objects currently in the lobby
 
             boolean started - False if the game hasn't started, True otherwise
     */"""
-    def _lobbyQuery(self, client, address, msg):
+    def _lobbyQuery(self, client, address, message):
         # Handles queries against lobby
-        player_num = int(msg.split('=')[1])
+        player_num = message.playerNum
         if self.players[player_num] is not None:
-            self.playerStatus[player_num] = True
+            self._playerSeen(player_num)
             client.sendall(dumps(
                 {'players': self.players,
                  'started': self.hostStart}).encode())
@@ -770,15 +1697,14 @@ class ArenaServer:
             Socket client - The <Socket> to send response through
             Tuple[string, int] address - <Tuple> containing address and port
                                          of the client
-            string msg - The msg that was sent by the client
-                         Includes the index of the player in the list of
-                         players
+            MessageCodec.Token message - The request, with the index of the
+                                         player in the list of players
 
         Returns:
             string token - The token of the player who sent the request
     */"""
-    def _lobbyGetToken(self, client, address, msg):
-        player_num = int(msg.split('=')[1])
+    def _lobbyGetToken(self, client, address, message):
+        player_num = message.playerNum
         player = self.players[player_num]
         if player:
             username = player['userName']
@@ -796,13 +1722,12 @@ class ArenaServer:
             Socket client - The <Socket> to send response through
             Tuple[string, int] address - <Tuple> containing address and port
                                          of the client
-            string msg - The msg that was sent by the client
-                         Includes the index of the player in the list of
-                         players
+            MessageCodec.Quit message - The request, with the index of the
+                                        player in the list of players
     */"""
-    def _lobbyQuit(self, client, address, msg):
+    def _lobbyQuit(self, client, address, message):
         # Handles players leaving the lobby
-        playerNum = int(msg.split("=")[1].split()[0])
+        playerNum = message.playerNum
         if self.players[playerNum] is not None:
             if self.players[playerNum]["host"]:
                 for p in self.players:
@@ -815,9 +1740,10 @@ class ArenaServer:
             self.coords.append(
                 (self.players[playerNum]['x'], self.players[playerNum]['y']))
             self.tokens.pop(username, None)
+            self.playerIndices.pop(username, None)
 
-            # Remove the entry from the timeouts dict for this key
-            self.playerStatus.pop(playerNum, None)
+            # Stop the player's timeout
+            self._playerForget(playerNum)
 
             # Remove the entry from the canStartUp dict
             self.canStartUp.pop(username, None)
@@ -831,15 +1757,15 @@ class ArenaServer:
             Socket client - The <Socket> to send response through
             Tuple[string, int] address - <Tuple> containing address and port
                                          of the client
-            string msg - The msg that was sent by the client
-                         Includes the index of the player in the list of players
+            MessageCodec.Start message - The request, with the index of the
+                                         player in the list of players
 
         Returns:
             boolean ready - True if all players in the lobby are ready to
                             start, else False
     */"""
-    def _lobbyStart(self, client, address, msg):
-        player_num = int(msg.split('=')[1])
+    def _lobbyStart(self, client, address, message):
+        player_num = message.playerNum
         self.players[player_num]['ready'] = True
         # If the server says the host has started, we need to move
         self.hostStart = True
@@ -858,7 +1784,7 @@ class ArenaServer:
     """/*
         Function: _gameStartUp
         Handler for players arriving at the game.html page for syncing up
-        player data
+        player data. Also starts the socket's heartbeat
 
         Parameters:
             Socket socket - The client's socket to send data out through
@@ -877,102 +1803,871 @@ class ArenaServer:
 
                 # Prepare self.damages
                 if i not in self.damages:
-                    self.damages[i] = []
+                    self.damages[i] = DamageRecord()
         # Send the payload containing only the active players
-        data = {'players': self.players}
-        sock.sendall(ArenaServer._wsEncode(dumps(data)))
+        data = {
+            'players': self.players,
+            'arena': self.arenaMap.describe()
+        }
+        self._gameSend(sock, self._wsFrame(sock, [dumps(data).encode()]))
+        heartbeat = self.heartbeats.get(sock)
+        if heartbeat is not None:
+            self.timers.schedule(
+                ('ping', sock), heartbeat.nextPing, self._gamePing, sock)
+            self.timers.schedule(
+                ('silence', sock), heartbeat.lastSeen + heartbeat.timeout,
+                self._gameSilence, sock)
 
     """/*
         Function: _handleGameConnection
-        Method run in a separate thread to handle requests while the game is
-        running
+        Reads whatever has arrived on a game socket and passes the messages
+        to <_handleGameFrames>.
 
-        Parameters:
-            Socket client - The <Socket> to send response through
-            Tuple[string, int] address - <Tuple> containing address and port
-                                         of the client
-            boolean repeat - Due to issues with http sockets, allow one re-run
-                             of this handler to ensure message is received
+        Run in the game loop thread, so that only one thread ever reads from
+        each socket's <FrameReader>.
 
-        Returns:
-            The results of <_gameStartUp> or <_gameUpdate>, depending on the
-            message from the client
+        Parameters:
+            Socket client - The <Socket> that is ready to be read
     */"""
     def _handleGameConnection(self, client):
+        reader = self.frameReaders.get(client)
+        if reader is None:
+            return
         try:
-            msg = ArenaServer._wsDecode(client.recv(4096))
-            callback = None
+            messages = reader.read()
+        except BlockingIOError:
+            return
+        except (ValueError, OSError):
+            messages = None
+        if messages is None or reader.closed:
+            self._gameClose(client, reader.closeCode)
+            return
+        self._handleGameFrames(client, messages)
+
+    """/*
+        Function: _gameClose
+        Disconnects a game socket whose client closed the connection or
+        broke the protocol, telling it why first if it broke the protocol
+
+        Parameters:
+            Socket client - The <Socket> to disconnect
+            int closeCode - The <FrameReader.closeCode> of the socket's
+                            reader, or None to close without a close frame
+    */"""
+    def _gameClose(self, client, closeCode):
+        if closeCode is not None:
+            self._gameSend(client, [ArenaServer._wsEncode(
+                closeCode.to_bytes(2, 'big'), FrameReader.CLOSE)])
+        self._gameDisconnect(client)
+
+    """/*
+        Function: _handleGameFrames
+        Handles the messages read from a game socket. Control frames are
+        answered here, and data messages are passed to <_handleGameMessage>.
+        Anything received on a lobby channel, pongs included, counts as
+        its player being seen, and its data messages are ignored
+
+        Parameters:
+            Socket client - The <Socket> the messages were read from
+            list messages - (opcode, payload) tuples from the socket's
+                            <FrameReader>
+    */"""
+    def _handleGameFrames(self, client, messages):
+        heartbeat = self.heartbeats.get(client)
+        if heartbeat is not None:
+            heartbeat.seen(monotonic())
+        lobbyPlayer = self.lobbySockets.get(client)
+        if lobbyPlayer is not None:
+            self._playerSeen(lobbyPlayer)
+        for opcode, msg in messages:
+            if opcode in (FrameReader.TEXT, FrameReader.BINARY):
+                if lobbyPlayer is None:
+                    self._handleGameMessage(client, msg)
+            elif opcode == FrameReader.PING:
+                self._gameSend(
+                    client, [ArenaServer._wsEncode(msg, FrameReader.PONG)])
+            elif opcode == FrameReader.PONG and heartbeat is not None:
+                heartbeat.pong(msg, monotonic())
+            elif opcode == FrameReader.CLOSE:
+                self._gameSend(
+                    client, [ArenaServer._wsEncode(msg[:2], FrameReader.CLOSE)])
+                self._gameDisconnect(client)
+                return
+
+    """/*
+        Function: _handleGameMessage
+        Parses a game message with the <MessageCodec> and passes it off to
+        its handler in <gameHandlers>. Run by the loop reading the game
+        sockets; the handlers only submit <commands>, so nothing here blocks
+
+        Parameters:
+            Socket client - The <Socket> the message was received on
+            string msg - A complete message received from the client. Binary
+                         messages are passed as bytes
+    */"""
+    def _handleGameMessage(self, client, msg):
+        try:
+            message = MessageCodec.decodeGame(msg)
+            callback = self.gameHandlers.get(type(message))
+            if callback:
+                callback(client, message)
+        except (KeyError, ValueError) as e:
+            self.log('Invalid game message: ' + str(e))
+
+    """/*
+        Function: _gameDisconnect
+        Stops listening to a game socket that has closed or sent invalid data.
+        The player's timeout will remove them from the game if they don't
+        reconnect
+
+        Parameters:
+            Socket client - The <Socket> to stop listening to
+    */"""
+    def _gameDisconnect(self, client):
+        playerNum = self.playerSockets.pop(client, None)
+        self.lobbySockets.pop(client, None)
+        self.snapshotAcks.pop(playerNum, None)
+        self.updateSequences.pop(playerNum, None)
+        self.frameReaders.pop(client, None)
+        self.compressors.pop(client, None)
+        self.binaryClients.discard(client)
+        self.heartbeats.pop(client, None)
+        self.timers.cancel(('ping', client))
+        self.timers.cancel(('silence', client))
+        queue = self.outboundQueues.pop(client, None)
+        if queue is not None:
+            # Give any reliable frames, such as a close, a last chance to go
+            queue.latest = None
             try:
-                if 'update' in msg:
-                    callback = self._gameUpdate
-                elif 'gameOver' in msg:
-                    callback = self._gameOver
-                elif 'quit' in msg:
-                    callback = self._gameQuit
-
-                if callback:
-                    callback(client, msg)
-            except timeout:
-                self.log('Timeout during ' + msg)
-            finally:
-                # Update after the client is closed to keep speed
-                self._updateStats()
-        except:
+                queue.flush(None)
+            except OSError:
+                pass
+        try:
+            client.close()
+        except OSError:
             pass
 
+    """/*
+        Function: _gameSend
+        Queues a frame that must be delivered to a game socket, and writes
+        as much of the socket's queue as it will take. A client that has
+        fallen so far behind that its queue is full is disconnected
+
+        Parameters:
+            Socket client - The <Socket> to send the frame to
+            list buffers - The frame header followed by the payload pieces
+    */"""
+    def _gameSend(self, client, buffers):
+        queue = self.outboundQueues.get(client)
+        if queue is None:
+            return
+        if not queue.send(buffers):
+            playerNum = self.playerSockets.get(client)
+            self.log('Disconnecting %s, who is not keeping up' % (
+                self.players[playerNum]['userName']
+                if playerNum is not None else 'a client'))
+            self._gameDisconnect(client)
+            return
+        self._gameFlush(client)
+
+    """/*
+        Function: _gameFlush
+        Writes as much of a game socket's <OutboundQueue> as the socket will
+        take without blocking
+
+        Parameters:
+            Socket client - The <Socket> to write to
+    */"""
+    def _gameFlush(self, client):
+        queue = self.outboundQueues.get(client)
+        if queue is None:
+            return
+        if client in self.lobbySockets:
+            frame = lambda state: self._wsFrame(client, [state])
+        else:
+            frame = lambda snapshot: self._gameFrameSnapshot(client, snapshot)
+        try:
+            queue.flush(frame)
+        except OSError:
+            self._gameDisconnect(client)
+
+    """/*
+        Function: _gameFlushAll
+        Flushes every game socket that has something waiting to be written.
+        Run by <_gameTick>, so queues are emptied even where the server
+        cannot wait for its sockets to become writable
+    */"""
+    def _gameFlushAll(self):
+        for client, queue in list(self.outboundQueues.items()):
+            if queue.pending():
+                self._gameFlush(client)
+
+    """/*
+        Function: _gamePing
+        Pings a game socket, and schedules its next ping.
+
+        Run by <timers> when the ping is due
+
+        Parameters:
+            Socket client - The <Socket> to ping
+    */"""
+    def _gamePing(self, client):
+        heartbeat = self.heartbeats.get(client)
+        if heartbeat is None:
+            return
+        self._gameSend(client, [ArenaServer._wsEncode(
+            heartbeat.ping(monotonic()), FrameReader.PING)])
+        if client in self.heartbeats:
+            self.timers.schedule(
+                ('ping', client), heartbeat.nextPing, self._gamePing, client)
+
+    """/*
+        Function: _gameSilence
+        Removes the player of a game socket that has been silent for longer
+        than <heartbeatTimeout>. If anything has been received since the
+        timer was set, it is set again from the time that was last seen, so
+        the socket's timer is not moved on every message.
+
+        Run by <timers> when the socket's timeout runs out
+
+        Parameters:
+            Socket client - The <Socket> to check
+    */"""
+    def _gameSilence(self, client):
+        heartbeat = self.heartbeats.get(client)
+        if heartbeat is None:
+            return
+        now = monotonic()
+        if not heartbeat.expired(now):
+            self.timers.schedule(
+                ('silence', client), heartbeat.lastSeen + heartbeat.timeout,
+                self._gameSilence, client)
+            return
+        playerNum = self.playerSockets.get(client)
+        if playerNum is not None:
+            self.log('%s timed out after %.1fs without a heartbeat' % (
+                self.players[playerNum]['userName'],
+                now - heartbeat.lastSeen))
+            self._gameKillPlayer(playerNum)
+            self._playerForget(playerNum)
+        self._gameDisconnect(client)
+
+    """/*
+        Function: _gameKillPlayer
+        Kills a player who has left or timed out of the game, so the other
+        clients see them die on the next snapshot
+
+        Parameters:
+            int playerNum - The index of the player in <playerObjects>
+    */"""
+    def _gameKillPlayer(self, playerNum):
+        player = self.playerObjects[playerNum]
+        if player is not None:
+            player["health"] = 0
+            player["bullets"] = []
+            player["alive"] = False
+            if self.physics is not None:
+                self.physics.clear(playerNum)
+            self.stateVersion += 1
+
     """/*
         Function: _gameUpdate
         Handler for the AJAX updating player data for all players connected
 
         Parameters:
             Socket client - The <Socket> to send response through
-            string msg - The msg that was sent by the client
-                         Includes a JSON string of the local players data,
-                         and the damages done by the local player
+            MessageCodec.Update message - The update, with the local
+                                          player's data and the damages
+                                          done by the local player
+
+        Note:
+            The new state is sent out to every player by <_gameBroadcast>
+    */"""
+    def _gameUpdate(self, client, message):
+        self._gameQueueUpdate(client, message.data)
+
+    """/*
+        Function: _gameBinaryUpdate
+        Handler for updates sent by clients using the <BinaryProtocol>
+
+        Parameters:
+            Socket client - The <Socket> the update was received on
+            MessageCodec.BinaryUpdate message - The decoded update
+    */"""
+    def _gameBinaryUpdate(self, client, message):
+        data = message.data
+        data['sequence'] = message.sequence
+        self._gameQueueUpdate(client, data)
+
+    """/*
+        Function: _gameQueueUpdate
+        Queues a client's decoded update, whichever encoding it arrived in,
+        to be applied on the next tick. Updates from a socket that is not a
+        player's game socket are dropped
+
+        Parameters:
+            Socket client - The <Socket> the update was received on
+            dict data - The 'player' and 'damages' sent by the client
+    */"""
+    def _gameQueueUpdate(self, client, data):
+        playerNum = self.playerSockets.get(client)
+        if playerNum is None:
+            return
+        self.commands.submit(self._gameApplyUpdate, playerNum, data)
+
+    """/*
+        Function: _gameTick
+        Runs a single game tick: drains the <commands> submitted since the
+        last tick, which applies every update received in that time, moves
+        the bullets if they are simulated by <physics>, updates the stats,
+        and broadcasts the new state if it changed, unless the
+        <rateController> is shedding load on this tick. Also runs any
+        <timers> that are due, and flushes any output still waiting.
+
+        Run in the game loop whenever <tickClock> says a tick is due
+    */"""
+    def _gameTick(self):
+        self.tickClock.advance(monotonic())
+        commands = self.commands.drain()
+        if self.physics is not None:
+            self._gameSimulate()
+        self._updateStats()
+        if self.stateVersion != self.broadcastVersion and (
+                self.rateController is None or
+                self.rateController.shouldBroadcast(self.tickClock.ticks)):
+            self._gameBroadcast()
+        self.timers.advance(monotonic())
+        self._gameFlushAll()
+        self.tickClock.finish(monotonic())
+        if self.rateController is not None:
+            self._gameAdaptRate(commands)
+
+    """/*
+        Function: _gameAdaptRate
+        Reports how a tick went to the <rateController>, and logs any change
+        in the rates it asks for. The tick's load is measured from its
+        deadline rather than its start, so time lost waiting for other work
+        sharing the host, such as other rooms, counts against it
+
+        Parameters:
+            int commands - The number of commands drained in the tick
+    */"""
+    def _gameAdaptRate(self, commands):
+        controller = self.rateController
+        now = monotonic()
+        load = (now - self.tickClock.deadline) / self.tickClock.period
+        backlog = commands / max(len(self.playerSockets), 1)
+        if controller.sample(load, backlog, now):
+            self.log('Server load %.0f%%, asking clients to send every %ims' % (
+                controller.load * 100, controller.sendInterval()))
+
+    """/*
+        Function: _gameSendInterval
+        Finds the interval a client is asked to send its updates at
+
+        Parameters:
+            Socket client - The client's game socket
 
         Returns:
-            array players - The current status of all players in the game
+            int interval - Milliseconds between the client's updates, or 0
+                           if the rate is not adapted
+    */"""
+    def _gameSendInterval(self, client):
+        if self.rateController is None:
+            return 0
+        heartbeat = self.heartbeats.get(client)
+        return self.rateController.sendInterval(
+            heartbeat.rtt if heartbeat is not None else None)
+
+    """/*
+        Function: _gameApplyUpdate
+        Stores a client's decoded update. Run by <_gameTick> as it drains
+        the <commands>
+
+        Parameters:
+            int playerNum - The index of the player whose socket sent the
+                            update
+            dict data - The 'player' and 'damages' sent by the client, the
+                        'ack' of the last snapshot it received and the
+                        'sequence' number of the update. The update is
+                        dropped if <_gameCheckPlayer> rejects the player
     */"""
-    def _gameUpdate(self, client, msg):
-        # Handles game updates on the server
-        # Set the ability to start up to False to prevent reload respawns
+    def _gameApplyUpdate(self, playerNum, data):
         try:
-            data = msg.split('update=')[1]
-            count = 1
-            i = 1
-            while count > 0:
-                if data[i] == '{':
-                    count += 1
-                elif data[i] == '}':
-                    count -= 1
-                i += 1
-            data = loads(data[:i])
-        except ValueError:
-            self.log('JSON error loading ' + msg.split('update=')[1])
-        else:
-            player = data['player']
+            player = self._gameCheckPlayer(data['player'], playerNum)
             damages = data['damages']
-            try:
-                self.playerObjects[player['id']] = player
-                # Try this here but if it slows down too much pass it to
-                # another Thread
+            sequence = data.get('sequence')
+            if isinstance(sequence, int):
+                if sequence <= self.updateSequences.get(player['id'], -1):
+                    return  # Older than an update already applied
+                self.updateSequences[player['id']] = sequence
+            if self.physics is not None:
+                self._gameReportBullets(player)
+            self.playerObjects[player['id']] = player
+            if self.physics is None:
                 for damage in damages:
-                    self.damages[damage['id']].append(damage['damage'])
-            except IndexError:
-                return  # This shouldn't happen
-            data = {'players': self.playerObjects,
-                    'damages': self.damages[player['id']]}
-            client.sendall(ArenaServer._wsEncode(dumps(data)))
-            self.damages[player['id']] = []
-            # Set the player's startUp value to False
-            self.canStartUp[player['userName']] = False
-            # Update the player's status
-            # Get the index of this player in the players list
-            for i, lobbyPlayer in enumerate(self.players):
-                if (lobbyPlayer is not None and
-                        player['userName'] == lobbyPlayer['userName']):
-                    self.playerStatus[i] = True
-                    break
+                    self.damages[damage['id']].add(
+                        player['id'], damage['damage'])
+            self.stateVersion += 1
+        except (IndexError, KeyError, TypeError, ValueError):
+            return  # This shouldn't happen
+        # Set the player's startUp value to False
+        self.canStartUp[player['userName']] = False
+        # Update the player's status
+        self._playerSeen(playerNum)
+        ack = data.get('ack')
+        if isinstance(ack, int):
+            self.snapshotAcks[playerNum] = ack
+
+    """/*
+        Function: _gameCheckPlayer
+        Normalises the player sent in an update before it is stored in
+        <playerObjects>, so the snapshots and <physics> only ever see the
+        types they expect.
+
+        The binary player record only carries the fields that change during
+        the game, and a JSON client could send anything, so the player's
+        userName and colour are always filled in from <lobbySnapshot>
+
+        Parameters:
+            dict player - The player sent by the client
+            int playerNum - The index of the player whose socket sent it
+
+        Returns:
+            dict player - The player, with its position, health and bullet
+                          positions as floats
+
+        Raises:
+            ValueError - If the player's id is not playerNum, the player has
+                         left the lobby, a position is not a finite number,
+                         the health is not a finite number or numeric string,
+                         or the bullets are not a list of dicts and None
+    */"""
+    def _gameCheckPlayer(self, player, playerNum):
+        if (not isinstance(player, dict) or
+                type(player.get('id')) is not int or
+                player['id'] != playerNum or
+                not 0 <= playerNum < min(self.capacity,
+                                         len(self.lobbySnapshot))):
+            raise ValueError("Update for another player")
+        lobbyPlayer = self.lobbySnapshot[playerNum]
+        if lobbyPlayer is None:
+            raise ValueError("Update for a player not in the lobby")
+        player['userName'] = lobbyPlayer['userName']
+        player['colour'] = lobbyPlayer['colour']
+        player['x'] = ArenaServer._gameCoordinate(player.get('x'))
+        player['y'] = ArenaServer._gameCoordinate(player.get('y'))
+        # The browser sends health as the string toFixed(2) gives
+        health = player.get('health', 0)
+        if isinstance(health, bool) or not isinstance(
+                health, (int, float, str)):
+            raise ValueError("Health is not a number")
+        player['health'] = float(health)
+        if not isfinite(player['health']):
+            raise ValueError("Health is not finite")
+        bullets = player.get('bullets')
+        if bullets is None:
+            return player
+        if not isinstance(bullets, list):
+            raise ValueError("Bullets are not a list")
+        for bullet in bullets:
+            if bullet is None:
+                continue
+            if not isinstance(bullet, dict):
+                raise ValueError("Bullet is not a dict")
+            bullet['x'] = ArenaServer._gameCoordinate(bullet.get('x'))
+            bullet['y'] = ArenaServer._gameCoordinate(bullet.get('y'))
+        return player
+
+    """/*
+        Function: _gameCoordinate
+        Checks a coordinate sent by a client
+        Static Method
+
+        Parameters:
+            value - The coordinate
+
+        Returns:
+            float coordinate - The coordinate
+
+        Raises:
+            ValueError - If the coordinate is not a finite number
+    */"""
+    def _gameCoordinate(value):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError("Coordinate is not a number")
+        if not isfinite(value):
+            raise ValueError("Coordinate is not finite")
+        return float(value)
+
+    """/*
+        Function: _gameReportBullets
+        Passes the bullets in a client's update on to <physics>, which fires
+        any new ones, and replaces them with the bullets it simulates. The
+        player's position is stored as the floats passed on, as
+        <_gameSimulate> reads the tanks from the stored players
+
+        Parameters:
+            dict player - The player sent by the client
+    */"""
+    def _gameReportBullets(self, player):
+        playerNum = player['id']
+        x = player['x'] = float(player['x'])
+        y = player['y'] = float(player['y'])
+        bullets = player.get('bullets') or []
+        if not player.get('alive') or not isinstance(bullets, list):
+            bullets = []
+        self.physics.report(playerNum, bullets, x, y)
+        player['bullets'] = self.physics.bullets(playerNum)
+        player['numBullets'] = player['bullets'].count(None)
+
+    """/*
+        Function: _gameSimulate
+        Advances <physics> by a tick, adding each hit to the damages of the
+        player hit, and puts the new bullets into <playerObjects>.
+
+        Run by <_gameTick> after the updates have been applied
+    */"""
+    def _gameSimulate(self):
+        if not self.physics.active.any():
+            return
+        tanks = [(player['x'], player['y'])
+                 if player is not None and player.get('alive') else None
+                 for player in self.playerObjects]
+        hits = self.physics.advance(self.tickClock.period, tanks)
+        for owner, target, damage in hits:
+            if target in self.damages:
+                self.damages[target].add(owner, damage)
+        for playerNum, player in enumerate(self.playerObjects):
+            if player is not None:
+                player['bullets'] = self.physics.bullets(playerNum)
+                player['numBullets'] = player['bullets'].count(None)
+        self.stateVersion += 1
+
+    """/*
+        Function: _gameBroadcast
+        Sends the current state of the game to every connected client.
+
+        The players section of the snapshot is serialised and framed once per
+        <stateVersion> and the same bytes are sent to every socket. Only the
+        damages each client has received since its last snapshot are encoded
+        per client, as the total of their <DamageRecord>, and they are sent as
+        a separate buffer so the shared section is never copied, along with
+        the interval the client is asked to send its updates at. JSON clients
+        are also sent the ids of the attackers. Clients that negotiated
+        permessage-deflate have the snapshot run through their own
+        compressor instead.
+        Clients using the <BinaryProtocol> are sent the binary encoding,
+        which is likewise built at most once per version. With an
+        <interestRadius>, each client's players section is instead joined
+        from records encoded once per version by <_gameRecords>. JSON clients
+        that have acknowledged a snapshot still in <snapshotHistory> are sent
+        a delta against it by <_gameDelta>, built once per baseline.
+
+        Snapshots are handed to each client's <OutboundQueue>, which keeps
+        only the newest for a client that has not taken the last one yet.
+        The per client section is added by <_gameFrameSnapshot> once the
+        snapshot is actually written. A client whose snapshot cannot be
+        encoded is skipped this tick rather than ending the game.
+
+        Run by <_gameTick> whenever <stateVersion> has changed
+
+        Returns:
+            array players - The current status of all players in the game
+
+            array damages - The total damage dealt to the receiving player
+                            since the last snapshot, or an empty array if
+                            there was none
+
+            array attackers - The ids of the players that dealt the damage.
+                              Only sent to JSON clients, along with damage
+
+            int sendInterval - Milliseconds the client should leave between
+                               its updates. Only sent with a <rateController>
+    */"""
+    def _gameBroadcast(self):
+        version = self.stateVersion
+        if self.snapshotVersion != version:
+            self.snapshots = {}
+            self.snapshotRecords = {}
+            self.interestGrid = None
+            self.snapshotVersion = version
+            self._gameRemember(version)
+        snapshots = self.snapshots
+        self.broadcastVersion = version
+        for client, playerNum in list(self.playerSockets.items()):
+            queue = self.outboundQueues.get(client)
+            if queue is None:
+                continue
+            binary = client in self.binaryClients
+            baseline = None if binary else self._gameBaseline(playerNum)
+            if baseline is not None:
+                key = ('delta', baseline)
+            else:
+                key = binary if self.interestRadius is None else (
+                    binary, playerNum)
+            if key not in snapshots:
+                try:
+                    snapshots[key] = (
+                        self._gameSnapshot(binary, playerNum)
+                        if baseline is None else self._gameDelta(baseline))
+                except (AttributeError, KeyError, OverflowError, TypeError,
+                        ValueError) as e:
+                    self.log('Could not encode the snapshot for player '
+                             '%i: %s' % (playerNum, e))
+                    snapshots[key] = None
+            if snapshots[key] is None:
+                continue
+            queue.replace((snapshots[key], binary, playerNum))
+            self._gameFlush(client)
+
+    """/*
+        Function: _gameFrameSnapshot
+        Adds a client's own section to a snapshot and frames it. Run by the
+        client's <OutboundQueue> as the snapshot is about to be written, so
+        damage taken while earlier snapshots were dropped is still delivered
+
+        Parameters:
+            Socket client - The <Socket> the snapshot is for
+            tuple snapshot - The shared section of the snapshot, whether it
+                             is binary, and the index of the client's player
+
+        Returns:
+            list buffers - The frame header followed by the payload pieces
+    */"""
+    def _gameFrameSnapshot(self, client, snapshot):
+        players, binary, playerNum = snapshot
+        total = attackers = None
+        record = self.damages.get(playerNum)
+        if record is not None and record.total:
+            total, attackers = record.take()
+        sendInterval = self._gameSendInterval(client)
+        if binary:
+            tail = BinaryProtocol.encodeDamages(
+                [] if total is None else [total], sendInterval)
+        else:
+            tail = '[]' if total is None else '[%s], "attackers": %s' % (
+                dumps(total), dumps(attackers))
+            if sendInterval:
+                tail += ', "sendInterval": %i' % sendInterval
+            tail = (tail + '}').encode()
+        opcode = FrameReader.BINARY if binary else FrameReader.TEXT
+        return self._wsFrame(client, [players, tail], opcode)
+
+    """/*
+        Function: _gameSnapshot
+        Encodes the players section of a snapshot of the current
+        <playerObjects>. Without an <interestRadius> the section is the same
+        for every client
+
+        Parameters:
+            boolean binary - True for the <BinaryProtocol> encoding, False
+                             for JSON
+            int playerNum - The index of the player the snapshot is for
+
+        Returns:
+            bytes snapshot - Everything up to the damages of the snapshot.
+                             If a player cannot be encoded, the snapshot is
+                             built from <_gameRecords>, which leaves it out
+    */"""
+    def _gameSnapshot(self, binary, playerNum=None):
+        if self.interestRadius is not None and playerNum is not None:
+            visible = self._gameInterest(playerNum)
+        else:
+            try:
+                if binary:
+                    return BinaryProtocol.encodeSnapshot(
+                        self.playerObjects, self.stateVersion,
+                        self._gameTime())
+                return ('{"sequence": %i, "time": %i, "players": %s, '
+                        '"damages": ' % (self.stateVersion, self._gameTime(),
+                                         dumps(self.playerObjects))).encode()
+            except (TypeError, ValueError):
+                visible = None
+        records = [full if visible is None or playerId in visible
+                   else summary
+                   for playerId, summary, full in self._gameRecords(binary)]
+        if binary:
+            return BinaryProtocol.encodeSnapshotHeader(
+                len(records), self.stateVersion,
+                self._gameTime()) + b''.join(records)
+        return ('{"sequence": %i, "time": %i, "players": [' % (
+            self.stateVersion, self._gameTime())).encode() + (
+            b', '.join(records) + b'], "damages": ')
+
+    """/*
+        Function: _gameTime
+        Finds the server time a snapshot is stamped with, so clients can
+        place it on their timeline when interpolating between snapshots
+
+        Returns:
+            int time - Milliseconds from the start of the game to the current
+                       tick, or 0 if the game loop is not running
+    */"""
+    def _gameTime(self):
+        if self.tickClock is None:
+            return 0
+        return self.tickClock.elapsed()
+
+    """/*
+        Function: _gameRemember
+        Adds a copy of the current <playerObjects> to <snapshotHistory>,
+        dropping the oldest snapshots beyond <deltaHistory>.
+
+        Only the top level of each player is copied, as updates replace a
+        player's dict and its bullets rather than changing them
+
+        Parameters:
+            int version - The <stateVersion> being sent out
+    */"""
+    def _gameRemember(self, version):
+        if not self.deltaHistory or self.interestRadius is not None:
+            return
+        self.snapshotHistory[version] = [
+            None if player is None else dict(player)
+            for player in self.playerObjects]
+        while len(self.snapshotHistory) > self.deltaHistory:
+            self.snapshotHistory.popitem(last=False)
+
+    """/*
+        Function: _gameBaseline
+        Finds the snapshot a client's delta can be built against
+
+        Parameters:
+            int playerNum - The index of the client's player
+
+        Returns:
+            int baseline - The sequence of the last snapshot the client
+                           acknowledged, or None if it has not acknowledged
+                           one still in <snapshotHistory>, in which case it is
+                           sent a full snapshot
+    */"""
+    def _gameBaseline(self, playerNum):
+        baseline = self.snapshotAcks.get(playerNum)
+        if baseline is None or baseline not in self.snapshotHistory:
+            return None
+        return baseline
+
+    """/*
+        Function: _gameDelta
+        Encodes the players section of a JSON snapshot as the changes since
+        a snapshot the client has acknowledged.
+
+        Only players that changed are included, with only the fields that
+        differ from the baseline and their id. A player that was not in the
+        baseline is sent in full. A delta can only add and change fields, so
+        if a player has left or lost a field since the baseline a full
+        snapshot is sent instead
+
+        Parameters:
+            int baseline - The sequence of the snapshot to compare against
+
+        Returns:
+            bytes snapshot - Everything up to the damages of the snapshot
+    */"""
+    def _gameDelta(self, baseline):
+        before = self.snapshotHistory[baseline]
+        changes = []
+        for old, new in zip(before, self.snapshotHistory[self.stateVersion]):
+            if new is None:
+                if old is not None:
+                    return self._gameSnapshot(False)
+                continue
+            if old is None:
+                changes.append(new)
+                continue
+            if any(key not in new for key in old):
+                return self._gameSnapshot(False)
+            changed = {key: value for key, value in new.items()
+                       if key not in old or old[key] != value}
+            if changed:
+                changed['id'] = new['id']
+                changes.append(changed)
+        return ('{"sequence": %i, "time": %i, "baseline": %i, "players": %s, '
+                '"damages": ' % (self.stateVersion, self._gameTime(), baseline,
+                                 dumps(changes))).encode()
+
+    """/*
+        Function: _gameInterest
+        Finds the players a client is sent in full: every player whose tank
+        or bullets are within <interestRadius> of the client's player
+
+        Parameters:
+            int playerNum - The index of the client's player
+
+        Returns:
+            set visible - The ids of the players in range, or None if the
+                          client's player has no usable position yet, in
+                          which case every player is in range. Players that
+                          cannot be placed are never in range
+    */"""
+    def _gameInterest(self, playerNum):
+        viewer = self.playerObjects[playerNum]
+        if viewer is None:
+            return None
+        if self.interestGrid is None:
+            grid = SpatialGrid(self.interestRadius)
+            for player in self.playerObjects:
+                if player is None:
+                    continue
+                try:
+                    grid.insert(player['id'], player['x'], player['y'])
+                    for bullet in player.get('bullets') or []:
+                        if bullet is not None:
+                            grid.insert(player['id'], bullet['x'], bullet['y'])
+                except (AttributeError, KeyError, OverflowError, TypeError,
+                        ValueError):
+                    # Left out of the grid, so only sent as a summary
+                    continue
+            self.interestGrid = grid
+        try:
+            visible = self.interestGrid.near(
+                viewer['x'], viewer['y'], self.interestRadius)
+            visible.add(viewer['id'])
+        except (KeyError, OverflowError, TypeError, ValueError):
+            return None
+        return visible
+
+    """/*
+        Function: _gameRecords
+        Encodes the full and summary record of every player in
+        <playerObjects>, once per <snapshotVersion>
+
+        Parameters:
+            boolean binary - True for the <BinaryProtocol> encoding, False
+                             for JSON
+
+        Returns:
+            list records - (id, summary, full) tuples of encoded records,
+                           leaving out any player that cannot be encoded
+    */"""
+    def _gameRecords(self, binary):
+        records = self.snapshotRecords.get(binary)
+        if records is not None:
+            return records
+        records = []
+        for player in self.playerObjects:
+            if player is None:
+                continue
+            try:
+                if binary:
+                    summary = BinaryProtocol.encodePlayer(player, True)
+                    full = BinaryProtocol.encodePlayer(player)
+                else:
+                    summary = dumps({
+                        'id': player['id'],
+                        'alive': player.get('alive'),
+                        'health': player.get('health'),
+                        'numBullets': player.get('numBullets'),
+                        'summary': True
+                    }).encode()
+                    full = dumps(player).encode()
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                self.log('Could not encode a player: ' + str(e))
+                continue
+            records.append((player['id'], summary, full))
+        self.snapshotRecords[binary] = records
+        return records
 
     """/*
         Function: _gameQuit
@@ -981,25 +2676,33 @@ class ArenaServer:
 
         Parameters:
             Socket client - The <Socket> to send response through
-            string msg - The msg that was sent by the client
-                         Includes the index of the player in the list of
-                         players
+            MessageCodec.Quit message - The message, with the index of the
+                                        player in the list of players
     */"""
-    def _gameQuit(self, client, msg):
+    def _gameQuit(self, client, message):
         # Handles players leaving the lobby
-        playerNum = int(msg.split("=")[1].split()[0])
+        playerNum = message.playerNum
+        self.commands.submit(self._gameRemovePlayer, playerNum)
+
+    """/*
+        Function: _gameRemovePlayer
+        Kills a player who has left the game and closes their socket. Run by
+        the state owner
+
+        Parameters:
+            int playerNum - The index of the player in <players>
+    */"""
+    def _gameRemovePlayer(self, playerNum):
         self.log(self.players[playerNum]['userName'] + ' has left the game')
-        self.playerObjects[playerNum]["health"] = 0
-        self.playerObjects[playerNum]["bullets"] = []
-        self.playerObjects[playerNum]["alive"] = False
+        self._gameKillPlayer(playerNum)
 
-        # Remove the entry from the timeouts dict for this key
-        self.playerStatus.pop(playerNum, None)
+        # Stop the player's timeout
+        self._playerForget(playerNum)
 
         # Close the client for this player
-        for sock in self.playerSockets.keys():
+        for sock in list(self.playerSockets.keys()):
             if self.playerSockets[sock] == playerNum:
-                del self.playerSockets[sock]
+                self._gameDisconnect(sock)
 
     """/*
         Function: _gameOver
@@ -1007,10 +2710,9 @@ class ArenaServer:
 
         Parameters:
             Socket client - The <Socket> to send response through
-            string msg - The msg that was sent by the client
-                         States that the game is over
+            MessageCodec.GameOver message - The message
     */"""
-    def _gameOver(self, client, msg):
+    def _gameOver(self, client, message):
         # Set gameOver to be True, javascript will redirect to game over screen
         # Once game is over server will write to shelve file in the main thread
         # with the data from the game
@@ -1023,14 +2725,34 @@ class ArenaServer:
 
     """/*
         Function: _updateStats
-        Updates the stats for the game. Run after every call of <_gameUpdate>
+        Updates the stats for the game. Run on every <_gameTick>
     */"""
     def _updateStats(self):
         for player in self.playerObjects:
             # Check if player died, and append it to the list of players
-            if player is not None and player['id'] not in self.playerStats and not player['alive']:
+            if player is not None and not player['alive'] and player['id'] not in self.playerStats:
                 self.playerStats.append(player['id'])
 
+    """/*
+        Function: _logGameStats
+        Logs each player's latency, any snapshots dropped for slow clients
+        and the tick accounting once the game is over
+    */"""
+    def _logGameStats(self):
+        for playerNum, latency in sorted(self.getLatency().items()):
+            self.log('%s RTT: %.1fms, jitter: %.1fms' % (
+                self.players[playerNum]['userName'],
+                latency['rtt'], latency['jitter']))
+        for playerNum, stats in sorted(self.getOutboundStats().items()):
+            if stats['dropped']:
+                self.log('%s was sent %i snapshots, %i dropped' % (
+                    self.players[playerNum]['userName'],
+                    stats['sent'], stats['dropped']))
+        if self.tickClock is not None:
+            self.log(self.tickClock.summary())
+        if self.rateController is not None:
+            self.log(self.rateController.summary())
+
     """/*
         Function: _generateStatsFile
         Generates a JSON .ast file, which stores the stats from the
@@ -1079,49 +2801,114 @@ class ArenaServer:
     */"""
 
     """/*
-        Function: _checkTimeouts
-        Loops through the playerStatus dict, checking each flag.
-        If the flag is True it is set to False, if it is False that player is
-        removed from the game
+        Function: _playerSeen
+        Records that a player has been heard from, and starts their timeout
+        if it is not running. A running timeout is left where it is, and
+        moved on by <_timeoutPlayer> when it runs out. Run by the state
+        owner
 
-        Note:
-            This function is called every 10 seconds
+        Parameters:
+            int playerNum - The index of the player in <players>
     */"""
-    def _checkTimeouts(self):
-        removedPlayers = []
-        # There is a chance that because this is threaded people can leave as
-        # this method is running so we wrap in a try block.
-        # It's unlikely but it's a just in case measure
-        try:
-            for playerNum in self.playerStatus:
-                if self.playerStatus[playerNum]:
-                    self.playerStatus[playerNum] = False
-                else:
-                    # Remove the player from the lobby or game depending on the
-                    # state of the server at this time
-                    player = self.players[playerNum]
-                    if not self.started:
-                        # Game is in lobby state
-                        self.coords.append((player['x'], player['y']))
-                        self.players[playerNum] = None
-                        self.lobbySize -= 1
-                        self.tokens.pop(player['userName'], None)
-                    elif not self.gameOver:
-                        # Game is in the game state
-                        # Issue of difference in player numbers between states removed
-                        # So this should work just by playerNum
-                        self.playerObjects[playerNum]["health"] = 0
-                        self.playerObjects[playerNum]["bullets"] = []
-                        self.playerObjects[playerNum]["alive"] = False
-
-                    # Remove the entry from the timeouts dict for this key
-                    removedPlayers.append(playerNum)
-        except Exception as e:
-            # self.log('Check Timeouts Error: ' + str(e))
-            pass
-        finally:
-            for playerNum in removedPlayers:
-                    self.playerStatus.pop(playerNum, None)
-            # Re run this method
-            self.timeoutTimer = Timer(5, self._checkTimeouts)
-            self.timeoutTimer.start()
+    def _playerSeen(self, playerNum):
+        now = monotonic()
+        self.lastSeen[playerNum] = now
+        if ('player', playerNum) not in self.timers:
+            self.timers.schedule(
+                ('player', playerNum), now + self.playerTimeout,
+                self._timeoutPlayer, playerNum)
+
+    """/*
+        Function: _playerForget
+        Stops the timeout of a player who has left. Run by the state owner
+
+        Parameters:
+            int playerNum - The index of the player in <players>
+    */"""
+    def _playerForget(self, playerNum):
+        self.lastSeen.pop(playerNum, None)
+        self.timers.cancel(('player', playerNum))
+
+    """/*
+        Function: _timeoutPlayer
+        Removes a player from the lobby or the game once <playerTimeout>
+        has passed since they were last seen. If they have been seen since
+        the timeout was set, it is set again from that time instead.
+
+        Run by <timers> when the player's timeout runs out
+
+        Parameters:
+            int playerNum - The index of the player in <players>
+    */"""
+    def _timeoutPlayer(self, playerNum):
+        lastSeen = self.lastSeen.get(playerNum)
+        if lastSeen is None:
+            return
+        deadline = lastSeen + self.playerTimeout
+        if deadline > monotonic():
+            self.timers.schedule(
+                ('player', playerNum), deadline, self._timeoutPlayer, playerNum)
+            return
+        del self.lastSeen[playerNum]
+        # Remove the player from the lobby or game depending on the state of
+        # the server at this time
+        player = self.players[playerNum]
+        if player is None:
+            return
+        self.log('%s timed out' % (player['userName']))
+        if not self.started:
+            # Game is in lobby state
+            self.coords.append((player['x'], player['y']))
+            self.players[playerNum] = None
+            self.lobbySize -= 1
+            self.tokens.pop(player['userName'], None)
+            self.playerIndices.pop(player['userName'], None)
+            self._lobbyCloseSockets(playerNum)
+            self._lobbyPublish()
+        elif not self.gameOver:
+            # Game is in the game state
+            self._gameKillPlayer(playerNum)
+
+    """/*
+        Function: _handshakeStart
+        Starts the handshake phase: sets the <handshakeTimeout> deadline,
+        and holds the player timeouts while the players load the game
+
+        Returns:
+            int playersInGame - The number of handshakes to wait for
+    */"""
+    def _handshakeStart(self):
+        for playerNum in self.lastSeen:
+            self.timers.cancel(('player', playerNum))
+        self.handshaking = True
+        playersInGame = len(list(filter(None, self.players)))
+        self.timers.schedule(
+            'handshake', monotonic() + self.handshakeTimeout,
+            self._handshakeDeadline, playersInGame)
+        return playersInGame
+
+    """/*
+        Function: _handshakeDeadline
+        Ends the handshake phase once <handshakeTimeout> has passed, so the
+        game starts without the players still missing.
+
+        Run by <timers> at the deadline
+
+        Parameters:
+            int playersInGame - The number of handshakes waited for
+    */"""
+    def _handshakeDeadline(self, playersInGame):
+        self.log('Handshake deadline passed, starting with '
+                 '%i of %i players' % (len(self.playerSockets), playersInGame))
+        self.handshaking = False
+
+    """/*
+        Function: _handshakeEnd
+        Ends the handshake phase, cancelling the deadline if every player
+        made it, and restarts the timeout of every player from now
+    */"""
+    def _handshakeEnd(self):
+        self.handshaking = False
+        self.timers.cancel('handshake')
+        for playerNum in list(self.lastSeen):
+            self._playerSeen(playerNum)
@@ -0,0 +1,509 @@
+from .ArenaServer import ArenaServer
+from .AsyncConnection import AsyncConnection
+from .TickClock import TickClock
+from .WebSocketHandshake import WebSocketHandshake
+import asyncio
+from concurrent.futures import Future
+from datetime import datetime
+from time import monotonic
+from socket import *
+
+"""/*
+    Class: AsyncArenaServer
+    An <ArenaServer> that runs the lobby, the broadcast responder, the
+    WebSocket handshakes and the game on a single asyncio event loop, rather
+    than on a thread per request.
+
+    Each accepted connection gets its own coroutine. Sockets are wrapped in
+    an <AsyncConnection>, so the lobby and game handlers of <ArenaServer> are
+    reused as they are. The event loop is the owner of the server's state:
+    lobby requests and timeout checks run on it directly, and the
+    <ArenaServer.commands> submitted by game handlers are drained on each
+    tick, so the state is never changed by two handlers at once.
+
+    The wire protocol is the same as <ArenaServer>'s, so the JavaScript
+    client and the CGI scripts work with either server.
+
+    Usage:
+        (start code (bash))
+            python3 Arena.py -c --asyncio
+        (end code)
+*/"""
+class AsyncArenaServer(ArenaServer):
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Initialises the server and binds it to the port specified. Takes the
+        same arguments as <ArenaServer.__init__>
+    */"""
+    def __init__(self, *args, **kwargs):
+        super(AsyncArenaServer, self).__init__(*args, **kwargs)
+
+        """/*
+            Group: Event Loop Variables
+        */"""
+
+        """/*
+            var: loop
+            The event loop the server runs on, created by <listen>
+        */"""
+        self.loop = None
+
+        """/*
+            var: _server
+            The asyncio Server accepting connections on <sock>
+        */"""
+        self._server = None
+
+        """/*
+            var: _broadcastSock
+            The UDP socket of the broadcast service while it is running
+        */"""
+        self._broadcastSock = None
+
+        """/*
+            var: _connections
+            Map of every open <AsyncConnection> to the task handling it
+        */"""
+        self._connections = {}
+
+        """/*
+            var: _handshakes
+            Set of the <AsyncConnection>s that are still handshaking
+        */"""
+        self._handshakes = set()
+
+        """/*
+            var: _lobbyChanged
+            asyncio Event set whenever the lobby changes or the server is
+            closed, so the lobby state can wait without polling
+        */"""
+        self._lobbyChanged = None
+
+        """/*
+            var: _handshakeDone
+            asyncio Event set whenever a player completes their handshake
+        */"""
+        self._handshakeDone = None
+
+        """/*
+            var: _gameStarted
+            asyncio Event set once the game has started. Completed
+            handshakes wait on it before reading game messages
+        */"""
+        self._gameStarted = None
+
+    """/*
+        Group: Server Handler Methods
+    */"""
+
+    """/*
+        Function: close
+        Closes the server. Safe to call from any thread; the listening socket
+        is closed by the event loop once it notices
+    */"""
+    def close(self):
+        self.log('Server Closing')
+        self.closed = True
+        self.closing = True
+        self.started = True
+        if self.frontEnd is not None:
+            self.frontEnd.close()
+        if self.loop is None:
+            if self.sock is not None:
+                self.sock.close()
+        elif self._lobbyChanged is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._lobbyChanged.set)
+            except RuntimeError:
+                # The event loop has already finished
+                pass
+
+    """/*
+        Function: listen
+        Runs the server on a new event loop until the game is over or the
+        server is closed
+    */"""
+    def listen(self):
+        self.loop = asyncio.new_event_loop()
+        if self.frontEnd is not None:
+            self.frontEnd.start()
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            self.log(str(e))
+        finally:
+            if self.frontEnd is not None:
+                self.frontEnd.close()
+            self.loop.close()
+            self.callback("game")
+
+    """/*
+        Group: Event Loop Methods
+    */"""
+
+    """/*
+        Function: _serve
+        Coroutine running each state of the server in turn
+    */"""
+    async def _serve(self):
+        self.log(
+            'Server starting up at %s on port %s' % (self.host, self.port))
+        self.log('Password Protected: ' + str(self.password is not None))
+        self._prepare()
+        self._server = await asyncio.start_server(
+            self._handleConnection, sock=self.sock, backlog=16)
+        self.log('Lobby Open')
+        self._broadcast()
+        try:
+            await self._run()
+        finally:
+            self._endBroadcast()
+            self._server.close()
+
+    """/*
+        Function: _prepare
+        Creates the events the states of the server wait on. Must be called
+        before <_run>
+    */"""
+    def _prepare(self):
+        self._lobbyChanged = asyncio.Event()
+        self._handshakeDone = asyncio.Event()
+        self._gameStarted = asyncio.Event()
+
+    """/*
+        Function: _run
+        Coroutine taking the server through the lobby, handshake and game
+        states, then closing every connection it still has open
+    */"""
+    async def _run(self):
+        timers = self.loop.create_task(self._timersLoop())
+        try:
+            # Lobby state, left when every player is ready or on close
+            while not self.started:
+                self._lobbyChanged.clear()
+                await self._lobbyChanged.wait()
+            self._endBroadcast()
+            self._lobbyCloseSockets()
+
+            if not self.closed:
+                await self._serveHandshakes()
+                await self._serveGame()
+        finally:
+            timers.cancel()
+            for connection, task in list(self._connections.items()):
+                connection.close()
+                task.cancel()
+            await asyncio.gather(
+                *self._connections.values(), return_exceptions=True)
+            self.commands.close()
+
+    """/*
+        Function: _serveHandshakes
+        Coroutine that waits until every player has completed their
+        WebSocket handshake, or <handshakeTimeout> passes
+    */"""
+    async def _serveHandshakes(self):
+        self.log("Awaiting handshakes from all players")
+        playersInGame = self._handshakeStart()
+        while self.handshaking and len(self.playerSockets) < playersInGame:
+            self._handshakeDone.clear()
+            await self._handshakeDone.wait()
+
+        # Drop anyone who didn't finish in time
+        for connection in list(self._handshakes):
+            self._connections[connection].cancel()
+
+    """/*
+        Function: _serveGame
+        Coroutine that starts the game, and runs <ArenaServer._gameTick> at
+        <ArenaServer.tickRate> until the game is over
+    */"""
+    async def _serveGame(self):
+        self.log('Informing players of game starting')
+        self.startTime = datetime.now()
+        for connection, playerNum in list(self.playerSockets.items()):
+            self._gameStartUp(connection, playerNum)
+        self._gameStarted.set()
+
+        self._handshakeEnd()
+        self.log('Beginning Game Loop')
+        self.tickClock = TickClock(self.tickRate, monotonic())
+        while not self.gameOver:
+            await asyncio.sleep(self.tickClock.timeout(monotonic()))
+            if self.tickClock.due(monotonic()):
+                self._gameTick()
+        self._logGameStats()
+        # Build the stats file. Name of the file will just be constant,
+        # server remembers only the latest game for now
+        self._generateStatsFile(datetime.now())
+
+    """/*
+        Function: _timersLoop
+        Coroutine running the <ArenaServer.timers> as they fall due. Once
+        the game starts they are also run by <ArenaServer._gameTick>
+    */"""
+    async def _timersLoop(self):
+        while True:
+            # Timers set while asleep are picked up within a second
+            timeout = self.timers.timeout(monotonic())
+            await asyncio.sleep(1 if timeout is None else min(timeout, 1))
+            self.timers.advance(monotonic())
+
+    """/*
+        Function: _handshakeDeadline
+        Ends the handshake phase at the deadline, waking <_serveHandshakes>
+
+        Parameters:
+            int playersInGame - The number of handshakes waited for
+    */"""
+    def _handshakeDeadline(self, playersInGame):
+        super(AsyncArenaServer, self)._handshakeDeadline(playersInGame)
+        self._handshakeDone.set()
+
+    """/*
+        Group: Connection Handling Methods
+    */"""
+
+    """/*
+        Function: _handleConnection
+        Coroutine run for every accepted connection. Passes the connection
+        to the handler for the state the server is in
+
+        Parameters:
+            StreamReader reader - The stream to read the client's data from
+            StreamWriter writer - The stream to send data to the client
+    */"""
+    async def _handleConnection(self, reader, writer):
+        connection = AsyncConnection(reader, writer)
+        if not self.started:
+            handler = self._handleLobbyRequest
+        elif self._acceptsHandshakes():
+            handler = self._handleHandshake
+        else:
+            connection.close()
+            return
+        await self._serveConnection(connection, handler)
+
+    """/*
+        Function: _serveConnection
+        Coroutine running a connection's handler, keeping track of the
+        connection so that it is closed along with the server
+
+        Parameters:
+            AsyncConnection connection - The connection to handle
+            func handler - <_handleLobbyRequest> or <_handleHandshake>
+            bytes data - Data already read from the connection, or None
+    */"""
+    async def _serveConnection(self, connection, handler, data=None):
+        self._connections[connection] = asyncio.current_task()
+        try:
+            await handler(connection, data)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            connection.close()
+            self._connections.pop(connection, None)
+
+    """/*
+        Function: _acceptsHandshakes
+        Reports whether new connections should be handshaken with, which is
+        for lobby channels until the host starts the game, and for game
+        sockets from then until the game loop begins
+
+        Returns:
+            boolean accepting - True if a WebSocket handshake would be
+                                accepted
+    */"""
+    def _acceptsHandshakes(self):
+        return not self.closed and not self._gameStarted.is_set()
+
+    """/*
+        Function: _handleLobbyRequest
+        Coroutine reading a single lobby request and answering it. A
+        WebSocket upgrade is handshaken with as a lobby channel instead
+
+        Parameters:
+            AsyncConnection connection - The connection the request was sent
+                                         on
+            bytes data - The request, if it has already been read
+    */"""
+    async def _handleLobbyRequest(self, connection, data=None):
+        if data is None:
+            try:
+                data = await asyncio.wait_for(connection.reader.read(256), 5)
+            except (asyncio.TimeoutError, OSError):
+                self.log('Timeout during lobby request')
+                return
+        if data.startswith(b'GET '):
+            await self._handleHandshake(connection, data)
+            return
+        self._handleLobbyMessage(
+            connection, connection.address, data.decode())
+        try:
+            await connection.writer.drain()
+        except OSError:
+            pass
+
+    """/*
+        Function: _lobbyPublish
+        Republishes the lobby, and wakes the lobby state to check whether
+        the game has started
+    */"""
+    def _lobbyPublish(self):
+        super(AsyncArenaServer, self)._lobbyPublish()
+        if self._lobbyChanged is not None:
+            self._lobbyChanged.set()
+
+    """/*
+        Function: _webRequest
+        Answers a lobby request for the <ArenaServer.frontEnd> by running
+        <ArenaServer._webLobby> on the event loop. Run in the front end's
+        connection thread
+
+        Parameters:
+            string msg - The lobby request
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the web client
+
+        Returns:
+            bytes response - What the handler would have sent on a lobby
+                             connection
+
+        Raises:
+            TimeoutError - If the event loop did not answer in 5 seconds
+            RuntimeError - If the event loop is not running
+    */"""
+    def _webRequest(self, msg, address):
+        if self.loop is None:
+            raise RuntimeError("The server is not running")
+        future = Future()
+
+        def answer():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self._webLobby(msg, address))
+                except Exception as e:
+                    future.set_exception(e)
+        self.loop.call_soon_threadsafe(answer)
+        return future.result(5)
+
+    """/*
+        Function: _handleHandshake
+        Coroutine reading a WebSocket handshake. Once the handshake completes,
+        the connection is added to the game or the lobby channels, and its
+        messages are read until it closes
+
+        Parameters:
+            AsyncConnection connection - The connection to handshake with
+            bytes data - The start of the handshake request, if it has
+                         already been read
+    */"""
+    async def _handleHandshake(self, connection, data=None):
+        handshake = WebSocketHandshake(connection)
+        self._handshakes.add(connection)
+        try:
+            while handshake.state == WebSocketHandshake.REQUEST:
+                if data is None:
+                    data = await connection.reader.read(4096)
+                request = handshake.feedRequest(data)
+                data = None
+                if request is not None:
+                    handshake.accept(
+                        self._wsHandshakeResponse(handshake, request))
+            while handshake.state == WebSocketHandshake.READY:
+                handshake.feedMessages(await connection.reader.read(4096))
+        except (ValueError, OSError):
+            self.log("Invalid WebSocket connection received")
+            return
+        finally:
+            self._handshakes.discard(connection)
+        self._wsRegister(handshake)
+        if handshake.protocol == AsyncArenaServer.LOBBY_SUBPROTOCOL:
+            await self._handleGameStream(connection)
+            return
+        self._handshakeDone.set()
+
+        await self._gameStarted.wait()
+        await self._handleGameStream(connection)
+
+    """/*
+        Function: _handleGameStream
+        Coroutine reading a game connection's frames until it closes
+
+        Parameters:
+            AsyncConnection connection - A connection that has been added to
+                                         <playerSockets>
+    */"""
+    async def _handleGameStream(self, connection):
+        while connection in self.frameReaders:
+            try:
+                data = await connection.reader.read(65536)
+            except OSError:
+                data = None
+            reader = self.frameReaders.get(connection)
+            if reader is None:
+                return
+            try:
+                messages = reader.feed(data) if data else None
+            except ValueError:
+                messages = None
+            if messages is None:
+                self._gameClose(connection, reader.closeCode)
+                return
+            self._handleGameFrames(connection, messages)
+
+    """/*
+        Group: Broadcast Handling Methods
+    */"""
+
+    """/*
+        Function: _broadcast
+        Starts answering broadcast requests on the event loop
+    */"""
+    def _broadcast(self):
+        self.closing = False
+        broadcastSock = socket(AF_INET, SOCK_DGRAM)
+        try:
+            broadcastSock.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
+            broadcastSock.bind(('', 44445))
+        except OSError as e:
+            self.log('Broadcast service failed to start: ' + str(e))
+            broadcastSock.close()
+            return
+        broadcastSock.setblocking(False)
+        self._broadcastSock = broadcastSock
+        self.log('Starting up broadcast service')
+        self.loop.add_reader(broadcastSock, self._handleBroadcast)
+
+    """/*
+        Function: _endBroadcast
+        Stops the broadcast service if it is running
+    */"""
+    def _endBroadcast(self):
+        self.closing = True
+        if self._broadcastSock is None:
+            return
+        self.loop.remove_reader(self._broadcastSock)
+        self._broadcastSock.close()
+        self._broadcastSock = None
+        self.log('Broadcast service closing')
+        self.callback("broadcast")
+
+    """/*
+        Function: _handleBroadcast
+        Answers a broadcast request. Called by the event loop whenever the
+        broadcast socket is readable
+    */"""
+    def _handleBroadcast(self):
+        try:
+            data, address = self._broadcastSock.recvfrom(1024)
+            response = self._broadcastResponse(data)
+            if response is not None:
+                self._broadcastSock.sendto(response, address)
+        except OSError:
+            pass
@@ -0,0 +1,113 @@
+"""/*
+    Class: AsyncConnection
+    Adapts an asyncio stream to the parts of the <Socket> interface that the
+    <ArenaServer> handlers use, so that the same handlers can be run on the
+    event loop of an <AsyncArenaServer>.
+
+    Sends never block. The data is queued on the transport, which writes it
+    out as the socket becomes writable. Once more than <WRITE_LIMIT> bytes
+    are waiting, <sendmsg> refuses more in the same way as a full
+    non-blocking socket, so the server's <OutboundQueue> holds on to its
+    snapshots and only the newest is sent. Reads are done by the server
+    through <reader>.
+*/"""
+class AsyncConnection:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: WRITE_LIMIT
+        The most bytes that may be waiting on the transport before
+        <sendmsg> refuses more
+    */"""
+    WRITE_LIMIT = 1 << 16
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Wraps the streams asyncio created for an accepted connection
+
+        Parameters:
+            StreamReader reader - The stream to read the client's data from
+            StreamWriter writer - The stream to send data to the client
+                                  through
+    */"""
+    def __init__(self, reader, writer):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: reader
+            The asyncio StreamReader for the connection
+        */"""
+        self.reader = reader
+
+        """/*
+            var: writer
+            The asyncio StreamWriter for the connection
+        */"""
+        self.writer = writer
+
+        """/*
+            var: address
+            The address and port of the client
+        */"""
+        self.address = writer.get_extra_info('peername')
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: sendall
+        Queues data to be sent to the client
+
+        Parameters:
+            bytes data - The data to send
+
+        Raises:
+            OSError - If the connection has been closed
+    */"""
+    def sendall(self, data):
+        if self.writer.is_closing():
+            raise OSError("Connection closed")
+        self.writer.write(data)
+
+    """/*
+        Function: sendmsg
+        Queues several buffers to be sent to the client without joining
+        them first. Used by <OutboundQueue>
+
+        Parameters:
+            list buffers - The buffers to send, in order
+
+        Returns:
+            int sent - The number of bytes queued, which is always all of
+                       them
+
+        Raises:
+            OSError - If the connection has been closed
+            BlockingIOError - If more than <WRITE_LIMIT> bytes are already
+                              waiting
+    */"""
+    def sendmsg(self, buffers):
+        if self.writer.is_closing():
+            raise OSError("Connection closed")
+        if (self.writer.transport.get_write_buffer_size() >
+                AsyncConnection.WRITE_LIMIT):
+            raise BlockingIOError("Write buffer full")
+        self.writer.writelines(buffers)
+        return sum(len(buffer) for buffer in buffers)
+
+    """/*
+        Function: close
+        Closes the connection once any queued data has been sent
+    */"""
+    def close(self):
+        self.writer.close()
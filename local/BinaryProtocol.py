@@ -0,0 +1,711 @@
+from struct import error, Struct
+
+"""/*
+    Class: BinaryProtocol
+    Compact binary encoding of game updates and snapshots, sent as binary
+    (opcode 2) WebSocket frames to clients that negotiate the
+    <SUBPROTOCOL> during the handshake. Clients that only offer exvo-arena
+    keep using the update= JSON text frames.
+
+    All values are little endian. Coordinates and velocities are quantized
+    to 1/<POSITION_SCALE> of a pixel, and health and damage to hundredths.
+
+    Layout:
+        (start table)
+        Header      version u8, type u8, sequence u32
+        Player      id u8, flags u8 (1 = alive, 2 = summary), x u16, y u16,
+                    xChange i16, yChange i16, health u16, numBullets u8,
+                    bulletCount u8, followed by bulletCount Bullets
+        Bullet      number u8, bounces u8, x i16, y i16, xChange i16,
+                    yChange i16
+        Damage      id u8, damage u16 (client update) or damage u16 (snapshot)
+        (end table)
+
+        (start table)
+        UPDATE      Header, Player, damageCount u8, damageCount Damages
+        SNAPSHOT    Header, time u32, playerCount u8, playerCount Players,
+                    damageCount u8, damageCount damages, sendInterval u16
+        (end table)
+
+    The damages section of a snapshot and the interval the client should
+    send its updates at are per client, so they are encoded separately by
+    <encodeDamages> and appended to the shared section built by
+    <encodeSnapshot>. A sendInterval of 0 leaves the client's rate
+    unchanged. The time of a snapshot is the server tick it was
+    taken on, in milliseconds of game time, which clients interpolate by.
+
+    Players outside a client's area of interest are sent as summary
+    records, with the summary flag set and their position, velocity and
+    bullets zeroed. They carry just enough for the scoreboard.
+*/"""
+class BinaryProtocol:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: SUBPROTOCOL
+        The Sec-WebSocket-Protocol value that selects this encoding
+    */"""
+    SUBPROTOCOL = 'exvo-arena-bin3'
+
+    """/*
+        var: VERSION
+        The version number written into every header
+    */"""
+    VERSION = 3
+
+    """/*
+        var: UPDATE
+        Message type of a client's update of its own player
+    */"""
+    UPDATE = 1
+
+    """/*
+        var: SNAPSHOT
+        Message type of a server snapshot of every player
+    */"""
+    SNAPSHOT = 2
+
+    """/*
+        var: POSITION_SCALE
+        Number of quantization steps per pixel for positions and velocities
+    */"""
+    POSITION_SCALE = 16
+
+    """/*
+        var: HEALTH_SCALE
+        Number of quantization steps per point of health or damage
+    */"""
+    HEALTH_SCALE = 100
+
+    """/*
+        var: ALIVE
+        Player flag set while the player is alive
+    */"""
+    ALIVE = 1
+
+    """/*
+        var: SUMMARY
+        Player flag set on summary records, which carry no position
+    */"""
+    SUMMARY = 2
+
+    """/*
+        var: MAX_PLAYERS
+        The most players a snapshot can hold, as ids and counts are bytes
+    */"""
+    MAX_PLAYERS = 255
+
+    """/*
+        var: MAX_COORDINATE
+        The largest coordinate, in pixels, that bullet positions can hold
+        at <POSITION_SCALE>
+    */"""
+    MAX_COORDINATE = 32767 // POSITION_SCALE
+
+    """/*
+        var: MAX_LAYOUTS
+        The most record layouts whose <Struct>s are kept by <_layout>
+    */"""
+    MAX_LAYOUTS = 1024
+
+    """/*
+        var: HEADER
+        <Struct> for the message header
+    */"""
+    HEADER = Struct('<BBI')
+
+    """/*
+        var: PLAYER
+        <Struct> for a player record
+    */"""
+    PLAYER = Struct('<BBHHhhHBB')
+
+    """/*
+        var: BULLET
+        <Struct> for a bullet record
+    */"""
+    BULLET = Struct('<BBhhhh')
+
+    """/*
+        var: UPDATE_HEAD
+        <Struct> for the header and player record at the start of an update
+    */"""
+    UPDATE_HEAD = Struct('<BBIBBHHhhHBB')
+
+    """/*
+        var: _layouts
+        Cache of the <Struct>s built by <_layout>, by their prefix and
+        bullet counts
+    */"""
+    _layouts = {}
+
+    """/*
+        var: TIME
+        <Struct> for the time of a snapshot
+    */"""
+    TIME = Struct('<I')
+
+    """/*
+        var: INTERVAL
+        <Struct> for the send interval of a snapshot
+    */"""
+    INTERVAL = Struct('<H')
+
+    """/*
+        var: COUNT
+        <Struct> for the player and damage counts
+    */"""
+    COUNT = Struct('<B')
+
+    """/*
+        var: DAMAGE
+        <Struct> for a damage dealt in a client update
+    */"""
+    DAMAGE = Struct('<BH')
+
+    """/*
+        var: DAMAGE_AMOUNT
+        <Struct> for a damage received in a snapshot
+    */"""
+    DAMAGE_AMOUNT = Struct('<H')
+
+    """/*
+        Group: Encoding Methods
+    */"""
+
+    """/*
+        Function: encodeUpdate
+        Encodes a client update. Used by tools and benchmarks; the browser
+        builds these in <Arena JS>
+        Static Method
+
+        Parameters:
+            dict player - The local player's data
+            list damages - Dicts of the id and damage of each hit
+            int sequence - The client's update sequence number
+
+        Returns:
+            bytes message - The encoded update
+
+        Raises:
+            ValueError - As in <encodeSnapshot>
+    */"""
+    def encodeUpdate(player, damages, sequence):
+        damages = damages[:255]
+        parts = [BinaryProtocol.HEADER.pack(
+            BinaryProtocol.VERSION, BinaryProtocol.UPDATE,
+            sequence & 0xFFFFFFFF)]
+        BinaryProtocol._encodePlayer(player, parts)
+        parts.append(BinaryProtocol.COUNT.pack(len(damages)))
+        parts.extend(BinaryProtocol.DAMAGE.pack(
+            BinaryProtocol._clamp(damage['id'], 0, 255),
+            BinaryProtocol._health(damage['damage']))
+            for damage in damages)
+        return b''.join(parts)
+
+    """/*
+        Function: encodeSnapshot
+        Encodes the section of a snapshot that is shared by every client
+        Static Method
+
+        Parameters:
+            list players - <ArenaServer.playerObjects>
+            int sequence - The server's state version
+            int time - The server tick time in milliseconds. Defaults to 0
+
+        Returns:
+            bytes message - The encoded header and players
+
+        Raises:
+            ValueError - If a player is not a dict, or its id is not an int
+                         from 0 to <MAX_PLAYERS>
+    */"""
+    def encodeSnapshot(players, sequence, time=0):
+        players = [player for player in players if player is not None]
+        bullets = [BinaryProtocol._bullets(player) for player in players]
+        struct = BinaryProtocol._layout(
+            'BBIIB', tuple(len(playerBullets) for playerBullets in bullets))
+        head = [BinaryProtocol.VERSION, BinaryProtocol.SNAPSHOT,
+                sequence & 0xFFFFFFFF, time & 0xFFFFFFFF, len(players)]
+        values = list(head)
+        try:
+            for player, playerBullets in zip(players, bullets):
+                BinaryProtocol._playerValues(player, playerBullets, values)
+            return struct.pack(*values)
+        except (AttributeError, KeyError, error, OverflowError, TypeError,
+                ValueError):
+            # Something is out of range, so clamp everything and try again
+            values = head
+            for player, playerBullets in zip(players, bullets):
+                BinaryProtocol._clampedValues(player, playerBullets, values)
+            return struct.pack(*values)
+
+    """/*
+        Function: encodeSnapshotHeader
+        Encodes the header, time and player count of a snapshot, for a
+        snapshot assembled from records built by <encodePlayer>
+        Static Method
+
+        Parameters:
+            int count - The number of player records that will follow
+            int sequence - The snapshot's sequence number
+            int time - The server tick time in milliseconds. Defaults to 0
+
+        Returns:
+            bytes header - The encoded header, time and count
+    */"""
+    def encodeSnapshotHeader(count, sequence, time=0):
+        return (BinaryProtocol.HEADER.pack(
+            BinaryProtocol.VERSION, BinaryProtocol.SNAPSHOT,
+            sequence & 0xFFFFFFFF) +
+            BinaryProtocol.TIME.pack(time & 0xFFFFFFFF) +
+            BinaryProtocol.COUNT.pack(count))
+
+    """/*
+        Function: encodePlayer
+        Encodes a single player record
+        Static Method
+
+        Parameters:
+            dict player - The player's data
+            boolean summary - True to encode a summary record, without the
+                              player's position or bullets
+
+        Returns:
+            bytes record - The encoded player
+
+        Raises:
+            ValueError - As in <encodeSnapshot>
+    */"""
+    def encodePlayer(player, summary=False):
+        if not summary:
+            parts = []
+            BinaryProtocol._encodePlayer(player, parts)
+            return b''.join(parts)
+        playerId = BinaryProtocol._playerId(player)
+        flags = BinaryProtocol.SUMMARY
+        if player.get('alive'):
+            flags |= BinaryProtocol.ALIVE
+        return BinaryProtocol.PLAYER.pack(
+            playerId, flags, 0, 0, 0, 0,
+            BinaryProtocol._health(player.get('health', 0)),
+            BinaryProtocol._clamp(player.get('numBullets', 0), 0, 255), 0)
+
+    """/*
+        Function: encodeDamages
+        Encodes the per client damages and send interval of a snapshot
+        Static Method
+
+        Parameters:
+            list damages - The damage amounts dealt to the client
+            int sendInterval - Milliseconds the client should leave between
+                               its updates, or 0 to leave its rate
+                               unchanged. Defaults to 0
+
+        Returns:
+            bytes tail - The encoded damages and send interval
+    */"""
+    def encodeDamages(damages, sendInterval=0):
+        damages = damages[:255]
+        return BinaryProtocol.COUNT.pack(len(damages)) + b''.join(
+            BinaryProtocol.DAMAGE_AMOUNT.pack(BinaryProtocol._health(damage))
+            for damage in damages) + BinaryProtocol.INTERVAL.pack(
+                min(max(int(sendInterval), 0), 65535))
+
+    """/*
+        Group: Decoding Methods
+    */"""
+
+    """/*
+        Function: decodeHeader
+        Reads the header of a binary message
+        Static Method
+
+        Parameters:
+            bytes message - The binary message
+
+        Returns:
+            int type - The message type
+            int sequence - The message sequence number
+
+        Raises:
+            ValueError - If the message is too short or the version is not
+                         supported
+    */"""
+    def decodeHeader(message):
+        if len(message) < BinaryProtocol.HEADER.size:
+            raise ValueError("Binary message too short")
+        version, messageType, sequence = BinaryProtocol.HEADER.unpack_from(
+            message)
+        if version != BinaryProtocol.VERSION:
+            raise ValueError("Unsupported binary protocol version")
+        return messageType, sequence
+
+    """/*
+        Function: decodeUpdate
+        Decodes a client update into the same shape as the JSON update
+        payload
+        Static Method
+
+        Parameters:
+            bytes message - The binary update
+
+        Returns:
+            dict data - Containing 'player' and 'damages', as sent in the
+                        update= JSON text messages
+            int sequence - The client's update sequence number
+
+        Raises:
+            ValueError - If the message is malformed
+    */"""
+    def decodeUpdate(message):
+        if len(message) < BinaryProtocol.UPDATE_HEAD.size:
+            BinaryProtocol.decodeHeader(message)
+            raise ValueError("Malformed binary update: message too short")
+        fields = BinaryProtocol.UPDATE_HEAD.unpack_from(message)
+        if fields[0] != BinaryProtocol.VERSION:
+            raise ValueError("Unsupported binary protocol version")
+        if fields[1] != BinaryProtocol.UPDATE:
+            raise ValueError("Expected a binary update message")
+        try:
+            offset = BinaryProtocol.UPDATE_HEAD.size
+            player, offset = BinaryProtocol._playerRecord(
+                fields[3:], message, offset)
+            count = message[offset]
+            offset += 1
+            end = offset + count * BinaryProtocol.DAMAGE.size
+            if len(message) < end:
+                raise ValueError("message ends inside a damage")
+            scale = BinaryProtocol.HEALTH_SCALE
+            damages = [{'id': target, 'damage': damage / scale}
+                       for target, damage in BinaryProtocol.DAMAGE.iter_unpack(
+                           message[offset:end])]
+        except (error, IndexError, ValueError) as e:
+            raise ValueError("Malformed binary update: " + str(e))
+        return {'player': player, 'damages': damages}, fields[2]
+
+    """/*
+        Function: decodeSnapshot
+        Decodes a snapshot into the same shape as the JSON snapshot. Used by
+        tools and benchmarks; the browser decodes these in <Arena JS>
+        Static Method
+
+        Parameters:
+            bytes message - The binary snapshot, including the damages
+
+        Returns:
+            dict data - Containing 'players', 'damages', 'time' and
+                        'sendInterval'
+            int sequence - The server's state version
+
+        Raises:
+            ValueError - If the message is malformed
+    */"""
+    def decodeSnapshot(message):
+        messageType, sequence = BinaryProtocol.decodeHeader(message)
+        if messageType != BinaryProtocol.SNAPSHOT:
+            raise ValueError("Expected a binary snapshot message")
+        try:
+            offset = BinaryProtocol.HEADER.size
+            time, = BinaryProtocol.TIME.unpack_from(message, offset)
+            offset += BinaryProtocol.TIME.size
+            count = message[offset]
+            offset += BinaryProtocol.COUNT.size
+            players = []
+            for _ in range(count):
+                fields = BinaryProtocol.PLAYER.unpack_from(message, offset)
+                player, offset = BinaryProtocol._playerRecord(
+                    fields, message, offset + BinaryProtocol.PLAYER.size)
+                players.append(player)
+            count = message[offset]
+            offset += BinaryProtocol.COUNT.size
+            end = offset + count * BinaryProtocol.DAMAGE_AMOUNT.size
+            damages = [amount / BinaryProtocol.HEALTH_SCALE for amount, in
+                       BinaryProtocol.DAMAGE_AMOUNT.iter_unpack(
+                           message[offset:end])]
+            sendInterval, = BinaryProtocol.INTERVAL.unpack_from(message, end)
+        except (error, IndexError) as e:
+            raise ValueError("Malformed binary snapshot: " + str(e))
+        return {'players': players, 'damages': damages, 'time': time,
+                'sendInterval': sendInterval}, sequence
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _encodePlayer
+        Appends a player record and its bullets to a list of parts
+        Static Method
+
+        Parameters:
+            dict player - The player's data
+            list parts - The list of encoded parts to append to
+    */"""
+    def _encodePlayer(player, parts):
+        bullets = BinaryProtocol._bullets(player)
+        struct = BinaryProtocol._layout('', (len(bullets),))
+        values = []
+        try:
+            BinaryProtocol._playerValues(player, bullets, values)
+            parts.append(struct.pack(*values))
+        except (AttributeError, KeyError, error, OverflowError, TypeError,
+                ValueError):
+            # Something is out of range, so clamp everything and try again
+            values = []
+            BinaryProtocol._clampedValues(player, bullets, values)
+            parts.append(struct.pack(*values))
+
+    """/*
+        Function: _layout
+        Finds the <Struct> of a run of player records, built once for each
+        layout so a whole snapshot is packed in a single call
+        Static Method
+
+        Parameters:
+            string prefix - Format of the values before the first player
+            tuple counts - The number of bullets of each player
+
+        Returns:
+            Struct struct - The <Struct> of the prefix and the records
+    */"""
+    def _layout(prefix, counts):
+        key = (prefix, counts)
+        struct = BinaryProtocol._layouts.get(key)
+        if struct is None:
+            if len(BinaryProtocol._layouts) >= BinaryProtocol.MAX_LAYOUTS:
+                BinaryProtocol._layouts.clear()
+            struct = Struct('<' + prefix + ''.join(
+                BinaryProtocol.PLAYER.format[1:] +
+                BinaryProtocol.BULLET.format[1:] * count
+                for count in counts))
+            BinaryProtocol._layouts[key] = struct
+        return struct
+
+    """/*
+        Function: _playerValues
+        Appends the quantized values of a player record and its bullets to
+        a list, without clamping them. Values out of range make the pack
+        fail, and are then clamped by <_clampedValues>
+        Static Method
+
+        Parameters:
+            dict player - The player's data
+            list bullets - The player's bullets in flight
+            list values - The list of values to append to
+    */"""
+    def _playerValues(player, bullets, values):
+        scale = BinaryProtocol.POSITION_SCALE
+        get = player.get
+        values += (
+            player['id'], BinaryProtocol.ALIVE if get('alive') else 0,
+            round(player['x'] * scale), round(player['y'] * scale),
+            round(get('xChange', 0) * scale), round(get('yChange', 0) * scale),
+            round(float(get('health', 0)) * BinaryProtocol.HEALTH_SCALE),
+            int(get('numBullets', 0)), len(bullets))
+        for bullet in bullets:
+            get = bullet.get
+            values += (
+                get('number', 0), get('bounces', 0),
+                round(bullet['x'] * scale), round(bullet['y'] * scale),
+                round(get('xChange', 0) * scale),
+                round(get('yChange', 0) * scale))
+
+    """/*
+        Function: _clampedValues
+        Appends the values of a player record and its bullets to a list as
+        <_playerValues> does, clamping each one into range
+        Static Method
+
+        Parameters:
+            dict player - The player's data
+            list bullets - The player's bullets in flight
+            list values - The list of values to append to
+
+        Raises:
+            ValueError - As in <encodeSnapshot>. Every other value is
+                         coerced into range, with anything that is not a
+                         number sent as 0
+    */"""
+    def _clampedValues(player, bullets, values):
+        position = BinaryProtocol._position
+        clamp = BinaryProtocol._clamp
+        values += (
+            BinaryProtocol._playerId(player),
+            BinaryProtocol.ALIVE if player.get('alive') else 0,
+            position(player.get('x'), 0, 65535),
+            position(player.get('y'), 0, 65535),
+            position(player.get('xChange')), position(player.get('yChange')),
+            BinaryProtocol._health(player.get('health')),
+            clamp(player.get('numBullets'), 0, 255), len(bullets))
+        for bullet in bullets:
+            values += (
+                clamp(bullet.get('number'), 0, 255),
+                clamp(bullet.get('bounces'), 0, 255),
+                position(bullet.get('x')), position(bullet.get('y')),
+                position(bullet.get('xChange')),
+                position(bullet.get('yChange')))
+
+    """/*
+        Function: _playerRecord
+        Builds a player from the values of its record, reading its bullets
+        Static Method
+
+        Parameters:
+            tuple fields - The unpacked values of the player record
+            bytes message - The binary message
+            int offset - Where the player's bullets start
+
+        Returns:
+            dict player - The player's data, with <bullets> padded with None
+                          in the same way as the JSON messages. Summary
+                          records only have their id, alive, health and
+                          numBullets, and summary set to True
+            int offset - Where the next record starts
+
+        Raises:
+            ValueError - If a bullet number is out of range, or the message
+                         ends inside a bullet
+    */"""
+    def _playerRecord(fields, message, offset):
+        (playerId, flags, x, y, xChange, yChange, health, numBullets,
+         bulletCount) = fields
+        if flags & BinaryProtocol.SUMMARY:
+            return {
+                'id': playerId,
+                'alive': bool(flags & BinaryProtocol.ALIVE),
+                'health': health / BinaryProtocol.HEALTH_SCALE,
+                'numBullets': numBullets,
+                'summary': True
+            }, offset
+        scale = BinaryProtocol.POSITION_SCALE
+        bullets = [None] * max(3, bulletCount)
+        end = offset + bulletCount * BinaryProtocol.BULLET.size
+        if len(message) < end:
+            raise ValueError("Message ends inside a bullet")
+        if bulletCount:
+            for number, bounces, bx, by, bxChange, byChange in \
+                    BinaryProtocol.BULLET.iter_unpack(message[offset:end]):
+                if number >= len(bullets):
+                    raise ValueError("Bullet number out of range")
+                bullets[number] = {
+                    'x': bx / scale, 'y': by / scale,
+                    'xChange': bxChange / scale, 'yChange': byChange / scale,
+                    'bounces': bounces, 'owner': playerId, 'number': number
+                }
+        return {
+            'id': playerId,
+            'alive': bool(flags & BinaryProtocol.ALIVE),
+            'x': x / scale, 'y': y / scale,
+            'xChange': xChange / scale, 'yChange': yChange / scale,
+            'health': health / BinaryProtocol.HEALTH_SCALE,
+            'numBullets': numBullets,
+            'bullets': bullets
+        }, end
+
+    """/*
+        Function: _position
+        Quantizes a coordinate or velocity, clamping it into range
+        Static Method
+
+        Parameters:
+            float value - The value in pixels
+            int low - The smallest value allowed. Defaults to -32768
+            int high - The largest value allowed. Defaults to 32767
+
+        Returns:
+            int quantized - The quantized value
+    */"""
+    def _position(value, low=-32768, high=32767):
+        return BinaryProtocol._clamp(
+            value, low, high, BinaryProtocol.POSITION_SCALE)
+
+    """/*
+        Function: _health
+        Quantizes a health or damage value to hundredths, clamping it into
+        the range of an unsigned short
+        Static Method
+
+        Parameters:
+            float value - The health or damage
+
+        Returns:
+            int quantized - The quantized value
+    */"""
+    def _health(value):
+        return BinaryProtocol._clamp(
+            value, 0, 65535, BinaryProtocol.HEALTH_SCALE)
+
+    """/*
+        Function: _clamp
+        Quantizes a value, clamping it into range. Anything that is not a
+        number, NaN included, counts as 0
+        Static Method
+
+        Parameters:
+            value - The value to quantize
+            int low - The smallest value allowed
+            int high - The largest value allowed
+            int scale - What the value is multiplied by first. Defaults to 1
+
+        Returns:
+            int quantized - The quantized value
+    */"""
+    def _clamp(value, low, high, scale=1):
+        try:
+            value = float(value) * scale
+        except (TypeError, ValueError):
+            value = 0.0
+        if value != value:
+            value = 0.0
+        return int(round(min(max(value, low), high)))
+
+    """/*
+        Function: _playerId
+        Checks the id of a player, which cannot be clamped without sending
+        the record as another player's
+        Static Method
+
+        Parameters:
+            dict player - The player's data
+
+        Returns:
+            int id - The player's id
+
+        Raises:
+            ValueError - If the player is not a dict, or its id is not an
+                         int from 0 to <MAX_PLAYERS>
+    */"""
+    def _playerId(player):
+        playerId = player.get('id') if isinstance(player, dict) else None
+        if (not isinstance(playerId, int) or
+                not 0 <= playerId <= BinaryProtocol.MAX_PLAYERS):
+            raise ValueError("Invalid player record")
+        return playerId
+
+    """/*
+        Function: _bullets
+        Finds the bullets of a player that are in flight
+        Static Method
+
+        Parameters:
+            dict player - The player's data
+
+        Returns:
+            list bullets - The player's bullets, skipping the None padding
+                           and anything that is not a dict or whose number
+                           is not an index into the bullets the client
+                           decodes, as those cannot be sent
+    */"""
+    def _bullets(player):
+        bullets = player.get('bullets') if isinstance(player, dict) else None
+        if not isinstance(bullets, list):
+            return []
+        bullets = [bullet for bullet in bullets if isinstance(bullet, dict)]
+        slots = max(3, len(bullets))
+        return [bullet for bullet in bullets
+                if isinstance(bullet.get('number', 0), int) and
+                0 <= bullet.get('number', 0) < slots]
@@ -0,0 +1,529 @@
+from .ArenaMap import ArenaMap
+from math import hypot
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+"""/*
+    Class: BulletPhysics
+    Authoritative simulation of every bullet in a game, following the rules
+    of the Bullet and Obstacle classes in <Arena JS>.
+
+    Bullets are kept as a struct of arrays in NumPy buffers, with a fixed
+    slot for each of every player's bullets, and each frame advances all of
+    them at once with vectorized operations. Bullet-vs-tank and
+    bullet-vs-obstacle tests go through a uniform grid broadphase. Every
+    obstacle and tank is listed in each cell that a bullet touching it
+    could start a frame in, so a bullet is only tested against the few
+    listed in its own cell. The obstacle table comes from the index the
+    <ArenaMap> has already built, and the tank table is built once per
+    <advance>.
+
+    Clients still simulate bullets themselves so they move smoothly, but
+    only report when they fire. Where the bullets are and who they hit is
+    decided here.
+
+    Needs NumPy.
+
+    Usage:
+        (start code (py))
+            physics = BulletPhysics(4, arenaMap)
+            physics.report(owner, bullets, x, y)
+            hits = physics.advance(1 / 30, tanks)
+        (end code)
+*/"""
+class BulletPhysics:
+
+    """/*
+        Group: Constants
+    */"""
+
+    """/*
+        var: FRAME_RATE
+        Frames simulated per second, as in the game loop of <Arena JS>
+    */"""
+    FRAME_RATE = 60
+
+    """/*
+        var: MAX_BULLETS
+        The most bullets a player can have in flight
+    */"""
+    MAX_BULLETS = 3
+
+    """/*
+        var: BULLET_SIZE
+        Width and height of a bullet, in pixels
+    */"""
+    BULLET_SIZE = 5
+
+    """/*
+        var: BULLET_SPEED
+        Pixels a bullet moves per frame
+    */"""
+    BULLET_SPEED = 25
+
+    """/*
+        var: PLAYER_SIZE
+        Width and height of a tank, in pixels
+    */"""
+    PLAYER_SIZE = 20
+
+    """/*
+        var: MAX_BOUNCES
+        The bounces a bullet has before the next wall destroys it
+    */"""
+    MAX_BOUNCES = 3
+
+    """/*
+        var: MAX_DAMAGE
+        Damage dealt by a bullet that has not bounced
+    */"""
+    MAX_DAMAGE = 10
+
+    """/*
+        var: BOUNCE_FALLOFF
+        Factor a bullet's damage and speed are multiplied by on each bounce
+    */"""
+    BOUNCE_FALLOFF = 0.8
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates the buffers and the obstacle table
+
+        Parameters:
+            int capacity - The most players in the game
+            ArenaMap arenaMap - The map, whose walls are the obstacles
+            float cellSize - Width and height of each broadphase cell, in
+                             pixels. Defaults to <ArenaMap.CELL_SIZE>
+    */"""
+    def __init__(self, capacity, arenaMap, cellSize=ArenaMap.CELL_SIZE):
+        if numpy is None:
+            raise ImportError("Server side physics needs NumPy")
+
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: width
+            Width of the arena in pixels
+        */"""
+        self.width = arenaMap.width
+
+        """/*
+            var: height
+            Height of the arena in pixels
+        */"""
+        self.height = arenaMap.height
+
+        """/*
+            var: cellSize
+            Width and height of each broadphase cell, in pixels
+        */"""
+        self.cellSize = cellSize
+
+        """/*
+            var: columns
+            Number of columns of cells covering the arena
+        */"""
+        self.columns = int(self.width // cellSize) + 1
+
+        """/*
+            var: rows
+            Number of rows of cells covering the arena
+        */"""
+        self.rows = int(self.height // cellSize) + 1
+
+        slots = capacity * BulletPhysics.MAX_BULLETS
+
+        """/*
+            var: x
+            x coordinate of the top left corner of each bullet
+        */"""
+        self.x = numpy.zeros(slots)
+
+        """/*
+            var: y
+            y coordinate of the top left corner of each bullet
+        */"""
+        self.y = numpy.zeros(slots)
+
+        """/*
+            var: xChange
+            Pixels each bullet moves along the x axis per frame
+        */"""
+        self.xChange = numpy.zeros(slots)
+
+        """/*
+            var: yChange
+            Pixels each bullet moves along the y axis per frame
+        */"""
+        self.yChange = numpy.zeros(slots)
+
+        """/*
+            var: bounces
+            Bounces each bullet has remaining
+        */"""
+        self.bounces = numpy.zeros(slots, dtype=numpy.int8)
+
+        """/*
+            var: active
+            True for each slot holding a bullet in flight. The bullet in
+            slot i belongs to player i // <MAX_BULLETS>
+        */"""
+        self.active = numpy.zeros(slots, dtype=bool)
+
+        """/*
+            var: reported
+            True for each slot that the owner's last update had a bullet
+            in. A bullet is fired when a slot is first reported full
+        */"""
+        self.reported = numpy.zeros(slots, dtype=bool)
+
+        """/*
+            var: obstacles
+            Array of the x1, y1, x2, y2 and horizontal flag of each obstacle
+        */"""
+        self.obstacles = numpy.array(
+            [(x1, y1, x2, y2, y1 == y2)
+             for x1, y1, x2, y2 in arenaMap.walls],
+            dtype=float).reshape(-1, 5)
+
+        # A bullet can be tested against an obstacle from a full move away
+        # on either side of it
+        index = arenaMap.index(
+            cellSize, BulletPhysics.BULLET_SIZE + BulletPhysics.BULLET_SPEED)
+
+        """/*
+            var: obstacleCells
+            Table of the obstacles listed in each cell, padded with -1
+        */"""
+        self.obstacleCells = self._table(
+            [(column * self.rows + row, i)
+             for (column, row), walls in index.items() for i in walls])
+
+        """/*
+            var: pendingFrames
+            Fraction of a frame left over from the last <advance>
+        */"""
+        self.pendingFrames = 0.0
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: report
+        Handles a player's update of their bullets. A bullet in a slot that
+        was empty in the player's last update has just been fired, and is
+        launched from the centre of their tank, in the direction it was
+        reported moving in. Anything else reported about bullets is ignored
+
+        Parameters:
+            int owner - The index of the player
+            list bullets - The bullets sent by the player, None for each
+                           empty slot
+            float x - x coordinate of the top left corner of the tank
+            float y - y coordinate of the top left corner of the tank
+    */"""
+    def report(self, owner, bullets, x, y):
+        first = owner * BulletPhysics.MAX_BULLETS
+        for number in range(BulletPhysics.MAX_BULLETS):
+            slot = first + number
+            bullet = bullets[number] if number < len(bullets) else None
+            wasReported = self.reported[slot]
+            self.reported[slot] = bullet is not None
+            if bullet is None or wasReported or self.active[slot]:
+                continue
+            try:
+                xChange = float(bullet['xChange'])
+                yChange = float(bullet['yChange'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            speed = hypot(xChange, yChange)
+            if not speed > 0:
+                continue
+            centre = (BulletPhysics.PLAYER_SIZE - BulletPhysics.BULLET_SIZE) / 2
+            self.x[slot] = x + centre
+            self.y[slot] = y + centre
+            self.xChange[slot] = xChange / speed * BulletPhysics.BULLET_SPEED
+            self.yChange[slot] = yChange / speed * BulletPhysics.BULLET_SPEED
+            self.bounces[slot] = BulletPhysics.MAX_BOUNCES
+            self.active[slot] = True
+
+    """/*
+        Function: clear
+        Removes every bullet a player has in flight
+
+        Parameters:
+            int owner - The index of the player
+    */"""
+    def clear(self, owner):
+        first = owner * BulletPhysics.MAX_BULLETS
+        self.active[first:first + BulletPhysics.MAX_BULLETS] = False
+
+    """/*
+        Function: advance
+        Simulates the frames that fit in a length of time, carrying any
+        fraction of a frame over to the next call
+
+        Parameters:
+            float seconds - The time to simulate
+            list tanks - (x, y) of the top left corner of each player's
+                         tank, or None for players that are not alive
+
+        Returns:
+            list hits - (owner, target, damage) of every bullet that hit a
+                        tank. The bullets are removed
+    */"""
+    def advance(self, seconds, tanks):
+        self.pendingFrames += seconds * BulletPhysics.FRAME_RATE
+        frames = int(self.pendingFrames)
+        self.pendingFrames -= frames
+        hits = []
+        if not self.active.any():
+            return hits
+
+        # A bullet touches a tank if its top left corner is within the
+        # tank, or up to a bullet's size above or to the left of it
+        reach = BulletPhysics.BULLET_SIZE
+        pairs = []
+        positions = []
+        for i, tank in enumerate(tanks):
+            if tank is None:
+                positions.append((0, 0))
+                continue
+            x, y = tank
+            positions.append((x, y))
+            left, top = self._cell(x - reach, y - reach)
+            right, bottom = self._cell(x + BulletPhysics.PLAYER_SIZE,
+                                       y + BulletPhysics.PLAYER_SIZE)
+            for column in range(left, right + 1):
+                for row in range(top, bottom + 1):
+                    pairs.append((column * self.rows + row, i))
+        tankCells = self._table(pairs)
+        positions = numpy.array(positions, dtype=float).reshape(-1, 2)
+
+        for frame in range(frames):
+            self._frame(tankCells, positions, hits)
+        return hits
+
+    """/*
+        Function: bullets
+        Lists a player's bullets in the form <Arena JS> sends them
+
+        Parameters:
+            int owner - The index of the player
+
+        Returns:
+            list bullets - A dict for each bullet in flight, and None for
+                           each empty slot
+    */"""
+    def bullets(self, owner):
+        first = owner * BulletPhysics.MAX_BULLETS
+        end = first + BulletPhysics.MAX_BULLETS
+        bullets = []
+        for number, (active, x, y, xChange, yChange, bounces) in enumerate(
+                zip(self.active[first:end].tolist(), self.x[first:end].tolist(),
+                    self.y[first:end].tolist(),
+                    self.xChange[first:end].tolist(),
+                    self.yChange[first:end].tolist(),
+                    self.bounces[first:end].tolist())):
+            if not active:
+                bullets.append(None)
+                continue
+            bullets.append({
+                'size': BulletPhysics.BULLET_SIZE, 'x': x, 'y': y,
+                'speed': BulletPhysics.BULLET_SPEED *
+                BulletPhysics.BOUNCE_FALLOFF ** (
+                    BulletPhysics.MAX_BOUNCES - bounces),
+                'xChange': xChange, 'yChange': yChange, 'bounces': bounces,
+                'owner': owner, 'number': number
+            })
+        return bullets
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _frame
+        Simulates a single frame for every bullet in flight: bounces off the
+        walls and obstacles, hits on tanks, then movement
+
+        Parameters:
+            array tankCells - Table of the tanks listed in each cell
+            array positions - (x, y) of each player's tank
+            list hits - List the (owner, target, damage) of each hit is
+                        added to
+    */"""
+    def _frame(self, tankCells, positions, hits):
+        size = BulletPhysics.BULLET_SIZE
+
+        # The arena walls. Only the first wall hit counts, as in Arena JS
+        live = numpy.flatnonzero(self.active)
+        if not live.size:
+            return
+        x = self.x[live]
+        y = self.y[live]
+        left = x < 0
+        right = ~left & (x + size > self.width)
+        top = ~left & ~right & (y < 0)
+        bottom = ~left & ~right & ~top & (y + size > self.height)
+        self._bounce(live[left], False, 0)
+        self._bounce(live[right], False, self.width - size)
+        self._bounce(live[top], True, 0)
+        self._bounce(live[bottom], True, self.height - size)
+
+        # The obstacles listed in each bullet's cell
+        live = numpy.flatnonzero(self.active)
+        if live.size and self.obstacles.size:
+            x = self.x[live, None]
+            y = self.y[live, None]
+            xChange = self.xChange[live, None]
+            yChange = self.yChange[live, None]
+            candidates = self.obstacleCells[self._cells(self.x[live],
+                                                        self.y[live])]
+            x1, y1, x2, y2, horizontal = (
+                self.obstacles[candidates].transpose(2, 0, 1))
+            horizontal = horizontal.astype(bool)
+            alongX = horizontal & (x >= x1) & (x <= x2)
+            alongY = ~horizontal & (y >= y1) & (y <= y2)
+            fromBelow = alongX & (y >= y1) & (y + yChange < y1)
+            fromAbove = alongX & (y + size <= y1) & (y + size + yChange > y1)
+            fromRight = alongY & (x >= x1) & (x + xChange < x1)
+            fromLeft = alongY & (x + size <= x1) & (x + size + xChange > x1)
+            hit = (candidates >= 0) & (fromBelow | fromAbove | fromRight |
+                                       fromLeft)
+            rows = numpy.flatnonzero(hit.any(axis=1))
+            if rows.size:
+                first = hit[rows].argmax(axis=1)
+                wall = (rows, first)
+                pos = numpy.where(
+                    fromBelow[wall], y1[wall], numpy.where(
+                        fromAbove[wall], y1[wall] - size, numpy.where(
+                            fromRight[wall], x1[wall], x1[wall] - size)))
+                flat = horizontal[wall]
+                self._bounce(live[rows[flat]], True, pos[flat])
+                self._bounce(live[rows[~flat]], False, pos[~flat])
+
+        # The tanks listed in each bullet's cell, other than the owner's
+        live = numpy.flatnonzero(self.active)
+        if live.size and tankCells.shape[1]:
+            candidates = tankCells[self._cells(self.x[live], self.y[live])]
+            owners = live // BulletPhysics.MAX_BULLETS
+            tankX = positions[candidates, 0]
+            tankY = positions[candidates, 1]
+            x = self.x[live, None]
+            y = self.y[live, None]
+            player = BulletPhysics.PLAYER_SIZE
+            hit = ((candidates >= 0) & (candidates != owners[:, None]) &
+                   (x + size >= tankX) & (x <= tankX + player) &
+                   (y + size >= tankY) & (y <= tankY + player))
+            rows = numpy.flatnonzero(hit.any(axis=1))
+            if rows.size:
+                targets = candidates[rows, hit[rows].argmax(axis=1)]
+                slots = live[rows]
+                damages = BulletPhysics.MAX_DAMAGE * (
+                    BulletPhysics.BOUNCE_FALLOFF ** (
+                        BulletPhysics.MAX_BOUNCES - self.bounces[slots]))
+                hits.extend(zip(
+                    (slots // BulletPhysics.MAX_BULLETS).tolist(),
+                    targets.tolist(), damages.tolist()))
+                self.active[slots] = False
+
+        live = numpy.flatnonzero(self.active)
+        self.x[live] += self.xChange[live]
+        self.y[live] += self.yChange[live]
+
+    """/*
+        Function: _bounce
+        Bounces bullets off a wall, destroying those with no bounces left
+
+        Parameters:
+            array slots - The slots of the bullets that hit the wall
+            boolean horizontal - Whether the wall is horizontal
+            pos - The coordinate each bullet is put back at, across the
+                  wall's axis
+    */"""
+    def _bounce(self, slots, horizontal, pos):
+        if not slots.size:
+            return
+        spent = self.bounces[slots] <= 0
+        self.active[slots[spent]] = False
+        keep = ~spent
+        slots = slots[keep]
+        if numpy.ndim(pos):
+            pos = pos[keep]
+        if horizontal:
+            self.yChange[slots] *= -1
+            self.y[slots] = pos
+        else:
+            self.xChange[slots] *= -1
+            self.x[slots] = pos
+        self.bounces[slots] -= 1
+
+    """/*
+        Function: _cell
+        Finds the cell a point falls in. Points outside the arena belong to
+        the nearest cell
+
+        Parameters:
+            float x - x coordinate of the point
+            float y - y coordinate of the point
+
+        Returns:
+            tuple cell - The (column, row) of the cell
+    */"""
+    def _cell(self, x, y):
+        return (min(max(int(x // self.cellSize), 0), self.columns - 1),
+                min(max(int(y // self.cellSize), 0), self.rows - 1))
+
+    """/*
+        Function: _cells
+        Finds the cell each of a set of points falls in
+
+        Parameters:
+            array x - x coordinates of the points
+            array y - y coordinates of the points
+
+        Returns:
+            array cells - The index of each point's cell in a cell table
+    */"""
+    def _cells(self, x, y):
+        columns = numpy.clip((x // self.cellSize).astype(int),
+                             0, self.columns - 1)
+        rows = numpy.clip((y // self.cellSize).astype(int), 0, self.rows - 1)
+        return columns * self.rows + rows
+
+    """/*
+        Function: _table
+        Builds a cell table from the cells each index is listed in
+
+        Parameters:
+            list pairs - (cell, index) for every cell each index is listed
+                         in, with the cell numbered as by <_cells>
+
+        Returns:
+            array table - The indices listed in each cell, one row per cell,
+                          padded with -1
+    */"""
+    def _table(self, pairs):
+        size = self.columns * self.rows
+        if not pairs:
+            return numpy.full((size, 0), -1, dtype=int)
+        # Sort the pairs by cell, so each index's column in the table is its
+        # rank among the indices listed in the same cell
+        cells, indices = numpy.array(pairs, dtype=int).T
+        order = numpy.argsort(cells, kind='stable')
+        cells = cells[order]
+        counts = numpy.bincount(cells, minlength=size)
+        ranks = numpy.arange(len(cells)) - (numpy.cumsum(counts) - counts)[cells]
+        table = numpy.full((size, counts.max()), -1, dtype=int)
+        table[cells, ranks] = indices[order]
+        return table
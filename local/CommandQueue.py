@@ -0,0 +1,153 @@
+from collections import deque
+from concurrent.futures import Future
+from socket import socketpair
+from threading import Lock
+
+"""/*
+    Class: CommandQueue
+    Queue of state changes for the <ArenaServer>, so that all of its state is
+    only ever changed by a single owner thread.
+
+    Any thread may <submit> a command, which is one of the server's mutation
+    methods and the arguments to call it with. The owner calls <drain> to
+    run every queued command as a batch, in the order they were submitted.
+    Each submission returns a Future, so a handler thread that needs the
+    result of its command can wait for it.
+
+    The queue has a file descriptor that becomes readable when commands are
+    waiting, so the owner can wait for commands in the same select call
+    as its sockets.
+
+    Usage:
+        (start code (py))
+            # In a handler thread
+            index = queue.submit(server._lobbyAddPlayer, name).result(5)
+
+            # In the owner thread
+            readable, _, _ = select([sock, queue], [], [], timeout)
+            if queue in readable:
+                queue.drain()
+        (end code)
+*/"""
+class CommandQueue:
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates an empty queue
+    */"""
+    def __init__(self):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: _commands
+            The queued (function, args, future) tuples
+        */"""
+        self._commands = deque()
+
+        """/*
+            var: _lock
+            Lock held while adding to or taking from <_commands>
+        */"""
+        self._lock = Lock()
+
+        wakeRead, wakeWrite = socketpair()
+        wakeRead.setblocking(False)
+        wakeWrite.setblocking(False)
+
+        """/*
+            var: _wakeRead
+            The end of the wakeup socket pair the owner waits on
+        */"""
+        self._wakeRead = wakeRead
+
+        """/*
+            var: _wakeWrite
+            The end of the wakeup socket pair written to when the queue
+            stops being empty
+        */"""
+        self._wakeWrite = wakeWrite
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: fileno
+        Returns the file descriptor that is readable while commands are
+        waiting, so the queue can be passed to select
+
+        Returns:
+            int fd - The file descriptor
+    */"""
+    def fileno(self):
+        return self._wakeRead.fileno()
+
+    """/*
+        Function: submit
+        Queues a command to be run by the owner. Safe to call from any
+        thread
+
+        Parameters:
+            func function - The mutation to run
+            args - The arguments to pass to it
+
+        Returns:
+            Future result - Resolved with the function's return value, or
+                            the exception it raised, once it has run
+    */"""
+    def submit(self, function, *args):
+        future = Future()
+        with self._lock:
+            wake = not self._commands
+            self._commands.append((function, args, future))
+        if wake:
+            try:
+                self._wakeWrite.send(b'\0')
+            except OSError:
+                # Either the owner already has a wakeup waiting, or the
+                # queue has been closed
+                pass
+        return future
+
+    """/*
+        Function: drain
+        Runs every command that has been queued so far. Must only be called
+        by the owner
+
+        Returns:
+            int count - The number of commands run
+    */"""
+    def drain(self):
+        try:
+            while self._wakeRead.recv(4096):
+                pass
+        except OSError:
+            pass
+        with self._lock:
+            commands = self._commands
+            self._commands = deque()
+        for function, args, future in commands:
+            try:
+                future.set_result(function(*args))
+            except Exception as e:
+                future.set_exception(e)
+        return len(commands)
+
+    """/*
+        Function: close
+        Cancels any commands still waiting, and releases the wakeup sockets
+    */"""
+    def close(self):
+        with self._lock:
+            commands = self._commands
+            self._commands = deque()
+        for function, args, future in commands:
+            future.cancel()
+        self._wakeRead.close()
+        self._wakeWrite.close()
@@ -0,0 +1,83 @@
+"""/*
+    Class: DamageRecord
+    The damage a player has taken since it was last sent to them, merged
+    into a single record.
+
+    Every hit on the player adds to the <total>, and the first
+    <MAX_ATTACKERS> different players to land a hit are remembered, so the
+    record stays the same size however many hits arrive before it is
+    delivered. <take> empties the record once it has gone out in a
+    snapshot.
+*/"""
+class DamageRecord:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: MAX_ATTACKERS
+        The most attackers remembered in a record
+    */"""
+    MAX_ATTACKERS = 8
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates an empty record
+    */"""
+    def __init__(self):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: total
+            The total damage taken
+        */"""
+        self.total = 0.0
+
+        """/*
+            var: attackers
+            The ids of the players that dealt the damage, in the order of
+            their first hit
+        */"""
+        self.attackers = []
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: add
+        Adds a hit to the record
+
+        Parameters:
+            int attacker - The id of the player that dealt the damage
+            float damage - The damage dealt. Negative damage is ignored
+    */"""
+    def add(self, attacker, damage):
+        damage = float(damage)
+        if not damage > 0:
+            return
+        self.total += damage
+        if (attacker not in self.attackers and
+                len(self.attackers) < DamageRecord.MAX_ATTACKERS):
+            self.attackers.append(attacker)
+
+    """/*
+        Function: take
+        Empties the record, returning what was in it
+
+        Returns:
+            float total - The total damage taken, or 0 if there was none
+            list attackers - The ids of the players that dealt it
+    */"""
+    def take(self):
+        total, attackers = self.total, self.attackers
+        self.total = 0.0
+        self.attackers = []
+        return total, attackers
@@ -0,0 +1,464 @@
+from zlib import decompressobj, error as zlibError
+
+"""/*
+    Class: FrameReader
+    Incremental WebSocket frame parser for a single client connection.
+
+    Data is read from the socket with recv_into into a buffer that is
+    allocated once per connection, and appended to a pending buffer that
+    holds any partial frame. Every call to <read> returns all of the
+    messages that were completed by that read, so multiple frames coalesced
+    into one TCP segment are never dropped, and frames split across reads
+    are kept until the rest of the frame arrives.
+
+    Fragmented messages are reassembled from their continuation frames.
+    Control frames (ping, pong and close) may arrive in the middle of a
+    fragmented message, and are returned as soon as they are complete.
+
+    If permessage-deflate was negotiated during the handshake, <enableDeflate>
+    must be called so that compressed messages can be inflated.
+
+    Anything that breaks the protocol raises a ValueError, after setting
+    <closeCode> to the code the connection should be closed with.
+
+    Usage:
+        (start code (py))
+            reader = FrameReader(client)
+            for opcode, payload in reader.read():
+                if opcode == FrameReader.TEXT:
+                    handle(payload)
+        (end code)
+*/"""
+class FrameReader:
+
+    """/*
+        Group: Class Constants
+        Opcodes defined by RFC 6455
+    */"""
+
+    """/*
+        var: CONTINUATION
+        Opcode for a continuation of a fragmented message
+    */"""
+    CONTINUATION = 0
+
+    """/*
+        var: TEXT
+        Opcode for a UTF-8 text message
+    */"""
+    TEXT = 1
+
+    """/*
+        var: BINARY
+        Opcode for a binary message
+    */"""
+    BINARY = 2
+
+    """/*
+        var: CLOSE
+        Opcode for a close control frame
+    */"""
+    CLOSE = 8
+
+    """/*
+        var: PING
+        Opcode for a ping control frame
+    */"""
+    PING = 9
+
+    """/*
+        var: PONG
+        Opcode for a pong control frame
+    */"""
+    PONG = 10
+
+    """/*
+        var: DEFLATE_TAIL
+        The empty stored block that permessage-deflate strips from the end
+        of every compressed message (RFC 7692)
+    */"""
+    DEFLATE_TAIL = b'\x00\x00\xff\xff'
+
+    """/*
+        var: OPCODES
+        Every opcode that is not reserved
+    */"""
+    OPCODES = frozenset((CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG))
+
+    """/*
+        Group: Close Codes
+        Status codes defined by RFC 6455 for closing a connection that
+        broke the protocol
+    */"""
+
+    """/*
+        var: PROTOCOL_ERROR
+        Close code for a malformed or unexpected frame
+    */"""
+    PROTOCOL_ERROR = 1002
+
+    """/*
+        var: INVALID_DATA
+        Close code for a message whose data is not valid for its type
+    */"""
+    INVALID_DATA = 1007
+
+    """/*
+        var: MESSAGE_TOO_BIG
+        Close code for a message larger than <maxMessageSize>
+    */"""
+    MESSAGE_TOO_BIG = 1009
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates a reader for the passed socket
+
+        Parameters:
+            socket sock - The client socket to read frames from
+            int bufferSize - The size of the reusable receive buffer.
+                             Defaults to 64KiB
+            int maxMessageSize - The largest message the reader will
+                                 buffer before giving up on the connection.
+                                 Defaults to 1MiB
+    */"""
+    def __init__(self, sock, bufferSize=65536, maxMessageSize=1048576):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: sock
+            The socket this reader reads from
+        */"""
+        self.sock = sock
+
+        """/*
+            var: maxMessageSize
+            The largest frame or reassembled message accepted
+        */"""
+        self.maxMessageSize = maxMessageSize
+
+        """/*
+            var: closed
+            True once the client has closed the TCP connection
+        */"""
+        self.closed = False
+
+        """/*
+            var: closeCode
+            The close code the connection should be closed with once the
+            client has broken the protocol, or None
+        */"""
+        self.closeCode = None
+
+        """/*
+            var: _chunk
+            Preallocated buffer that recv_into writes into
+        */"""
+        self._chunk = bytearray(bufferSize)
+
+        """/*
+            var: _view
+            memoryview over <_chunk>, so reads do not allocate
+        */"""
+        self._view = memoryview(self._chunk)
+
+        """/*
+            var: _pending
+            Bytes received that do not yet make up a complete frame
+        */"""
+        self._pending = bytearray()
+
+        """/*
+            var: _fragments
+            Payloads of the fragments of the message currently being
+            reassembled
+        */"""
+        self._fragments = []
+
+        """/*
+            var: _fragmentsLength
+            Total length of the payloads in <_fragments>
+        */"""
+        self._fragmentsLength = 0
+
+        """/*
+            var: _fragmentOpcode
+            Opcode of the first frame of the fragmented message currently
+            being reassembled, or None if there isn't one
+        */"""
+        self._fragmentOpcode = None
+
+        """/*
+            var: _fragmentsCompressed
+            True if the message currently being reassembled had the RSV1
+            bit set on its first frame
+        */"""
+        self._fragmentsCompressed = False
+
+        """/*
+            var: _decompressor
+            zlib decompressor for permessage-deflate, or None if the
+            extension was not negotiated
+        */"""
+        self._decompressor = None
+
+        """/*
+            var: _contextTakeover
+            False if the client agreed not to reuse its LZ77 window between
+            messages, in which case a new <_decompressor> is made for each
+        */"""
+        self._contextTakeover = True
+
+    """/*
+        Group: Static Helper Methods
+    */"""
+
+    """/*
+        Function: unmask
+        XORs the passed payload with the 4 byte client mask in a single
+        operation rather than byte by byte
+        Static Method
+
+        The mask is repeated out to the length of the payload, and both are
+        converted to integers so that the XOR is done in C over machine words
+
+        Parameters:
+            bytes mask - The 4 byte masking key from the frame header
+            bytes payload - The masked payload data
+
+        Returns:
+            bytes data - The unmasked payload data
+    */"""
+    def unmask(mask, payload):
+        dataLength = len(payload)
+        if dataLength == 0:
+            return b''
+        key = (bytes(mask) * ((dataLength >> 2) + 1))[:dataLength]
+        data = (int.from_bytes(payload, 'little') ^
+                int.from_bytes(key, 'little'))
+        return data.to_bytes(dataLength, 'little')
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: enableDeflate
+        Allows this reader to inflate messages compressed with
+        permessage-deflate
+
+        Parameters:
+            boolean contextTakeover - False if client_no_context_takeover
+                                      was negotiated. Defaults to True
+    */"""
+    def enableDeflate(self, contextTakeover=True):
+        self._decompressor = decompressobj(-15)
+        self._contextTakeover = contextTakeover
+
+    """/*
+        Function: read
+        Performs a single recv_into on the socket and parses everything that
+        has arrived so far
+
+        Returns:
+            list messages - A list of (opcode, payload) tuples, one for every
+                            message completed by this read. Text payloads are
+                            decoded to strings, all others are bytes.
+                            Empty if the read completed no messages, or the
+                            connection was closed
+
+        Raises:
+            ValueError - If the client sent a malformed frame, a reserved
+                         opcode, invalid UTF-8 or a message larger than
+                         <maxMessageSize>. <closeCode> is set first
+    */"""
+    def read(self):
+        received = self.sock.recv_into(self._view)
+        if received == 0:
+            self.closed = True
+            return []
+        return self.feed(self._view[:received])
+
+    """/*
+        Function: feed
+        Adds data that has already been received to the pending buffer and
+        parses it
+
+        Parameters:
+            bytes data - Raw data received from the client
+
+        Returns:
+            list messages - As in <read>
+    */"""
+    def feed(self, data):
+        self._pending += data
+        messages = []
+        frame = self._parseFrame()
+        while frame is not None:
+            message = self._handleFrame(*frame)
+            if message is not None:
+                messages.append(message)
+            frame = self._parseFrame()
+        return messages
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _parseFrame
+        Removes one complete frame from the front of <_pending>
+
+        Returns:
+            tuple frame - (fin, rsv1, opcode, payload) for the frame, or None
+                          if the pending buffer does not hold a complete
+                          frame
+    */"""
+    def _parseFrame(self):
+        pending = self._pending
+        available = len(pending)
+        if available < 2:
+            return None
+        fin = pending[0] & 128
+        rsv1 = pending[0] & 64
+        opcode = pending[0] & 15
+        masked = pending[1] & 128
+        length = pending[1] & 127
+        headerLength = 2
+        if length == 126:
+            headerLength = 4
+            if available < headerLength:
+                return None
+            length = int.from_bytes(pending[2:4], 'big')
+        elif length == 127:
+            headerLength = 10
+            if available < headerLength:
+                return None
+            length = int.from_bytes(pending[2:10], 'big')
+        if length > self.maxMessageSize:
+            raise self._fail(FrameReader.MESSAGE_TOO_BIG,
+                             "WebSocket frame too large")
+        maskStart = headerLength
+        if masked:
+            headerLength += 4
+        frameLength = headerLength + length
+        if available < frameLength:
+            return None
+        payload = bytes(pending[headerLength:frameLength])
+        if masked:
+            payload = FrameReader.unmask(
+                pending[maskStart:headerLength], payload)
+        del pending[:frameLength]
+        return bool(fin), bool(rsv1), opcode, payload
+
+    """/*
+        Function: _handleFrame
+        Reassembles fragmented messages and passes control frames straight
+        through
+
+        Parameters:
+            boolean fin - True if this is the final frame of a message
+            boolean rsv1 - True if the frame has the RSV1 (compressed) bit
+                           set
+            int opcode - The opcode of the frame
+            bytes payload - The unmasked payload of the frame
+
+        Returns:
+            tuple message - (opcode, payload) if this frame completed a
+                            message, else None
+    */"""
+    def _handleFrame(self, fin, rsv1, opcode, payload):
+        if opcode not in FrameReader.OPCODES:
+            raise self._fail(FrameReader.PROTOCOL_ERROR,
+                             "Reserved WebSocket opcode %i" % (opcode))
+        if opcode >= FrameReader.CLOSE:
+            # Control frames are never fragmented or compressed
+            if not fin or rsv1 or len(payload) > 125:
+                raise self._fail(FrameReader.PROTOCOL_ERROR,
+                                 "Invalid WebSocket control frame")
+            return opcode, payload
+
+        if opcode == FrameReader.CONTINUATION:
+            if self._fragmentOpcode is None or rsv1:
+                raise self._fail(FrameReader.PROTOCOL_ERROR,
+                                 "Unexpected WebSocket continuation frame")
+        elif self._fragmentOpcode is not None:
+            raise self._fail(FrameReader.PROTOCOL_ERROR,
+                             "WebSocket message interrupted by a new message")
+        elif rsv1 and self._decompressor is None:
+            raise self._fail(FrameReader.PROTOCOL_ERROR,
+                             "Compressed WebSocket message not negotiated")
+        else:
+            self._fragmentOpcode = opcode
+            self._fragmentsCompressed = rsv1
+
+        self._fragments.append(payload)
+        self._fragmentsLength += len(payload)
+        if self._fragmentsLength > self.maxMessageSize:
+            raise self._fail(FrameReader.MESSAGE_TOO_BIG,
+                             "WebSocket message too large")
+        if not fin:
+            return None
+
+        opcode = self._fragmentOpcode
+        payload = b''.join(self._fragments)
+        self._fragments = []
+        self._fragmentsLength = 0
+        self._fragmentOpcode = None
+        if self._fragmentsCompressed:
+            payload = self._inflate(payload)
+        if opcode == FrameReader.TEXT:
+            try:
+                payload = payload.decode('utf-8')
+            except UnicodeDecodeError:
+                raise self._fail(FrameReader.INVALID_DATA,
+                                 "Invalid UTF-8 in WebSocket message")
+        return opcode, payload
+
+    """/*
+        Function: _inflate
+        Decompresses a complete permessage-deflate message
+
+        Parameters:
+            bytes payload - The compressed message
+
+        Returns:
+            bytes data - The decompressed message
+
+        Raises:
+            ValueError - If the message is not valid deflate data, or
+                         inflates to more than <maxMessageSize>
+    */"""
+    def _inflate(self, payload):
+        if not self._contextTakeover:
+            self._decompressor = decompressobj(-15)
+        try:
+            data = self._decompressor.decompress(
+                payload + FrameReader.DEFLATE_TAIL, self.maxMessageSize)
+        except zlibError:
+            raise self._fail(FrameReader.INVALID_DATA,
+                             "Invalid compressed WebSocket message")
+        if self._decompressor.unconsumed_tail:
+            raise self._fail(FrameReader.MESSAGE_TOO_BIG,
+                             "WebSocket message too large")
+        return data
+
+    """/*
+        Function: _fail
+        Records the close code for a protocol error
+
+        Parameters:
+            int closeCode - One of the close codes
+            string reason - What the client did wrong
+
+        Returns:
+            ValueError error - The error to raise
+    */"""
+    def _fail(self, closeCode, reason):
+        self.closeCode = closeCode
+        return ValueError(reason)
@@ -0,0 +1,195 @@
+from struct import Struct
+
+"""/*
+    Class: Heartbeat
+    Tracks the liveness and latency of a single WebSocket connection.
+
+    The server sends a ping frame carrying a sequence number every
+    <interval> seconds, and the browser echoes the payload back in a pong.
+    Matching pongs give a round trip time sample, which is smoothed into
+    <rtt> and <jitter> in the same way as TCP's SRTT and RTTVAR (RFC 6298).
+
+    A connection is <expired> once nothing at all, pongs included, has been
+    received from it for <timeout> seconds.
+
+    All times are in seconds from time.monotonic
+*/"""
+class Heartbeat:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: PAYLOAD
+        <Struct> for the ping payload, a 32 bit sequence number
+    */"""
+    PAYLOAD = Struct('!I')
+
+    """/*
+        var: MAX_OUTSTANDING
+        How many unanswered pings are remembered before the oldest are
+        forgotten
+    */"""
+    MAX_OUTSTANDING = 8
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Starts tracking a connection
+
+        Parameters:
+            float now - The current time
+            float interval - Seconds between pings. Defaults to 1
+            float timeout - Seconds of silence before the connection is
+                            considered dead. Defaults to 3
+    */"""
+    def __init__(self, now, interval=1.0, timeout=3.0):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: interval
+            Seconds between pings
+        */"""
+        self.interval = interval
+
+        """/*
+            var: timeout
+            Seconds of silence before the connection is <expired>
+        */"""
+        self.timeout = timeout
+
+        """/*
+            var: rtt
+            Smoothed round trip time in seconds, or None before the first
+            pong arrives
+        */"""
+        self.rtt = None
+
+        """/*
+            var: jitter
+            Smoothed mean deviation of the round trip time in seconds
+        */"""
+        self.jitter = 0.0
+
+        """/*
+            var: lastSeen
+            The time anything was last received on the connection
+        */"""
+        self.lastSeen = now
+
+        """/*
+            var: nextPing
+            The time the next ping is due
+        */"""
+        self.nextPing = now
+
+        """/*
+            var: _sequence
+            Sequence number of the last ping sent
+        */"""
+        self._sequence = 0
+
+        """/*
+            var: _outstanding
+            Dict of sequence numbers of unanswered pings to the time they
+            were sent
+        */"""
+        self._outstanding = {}
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: due
+        Reports whether it is time to send a ping
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            boolean due - True if <ping> should be called
+    */"""
+    def due(self, now):
+        return now >= self.nextPing
+
+    """/*
+        Function: ping
+        Records that a ping is being sent
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            bytes payload - The payload to put in the ping frame
+    */"""
+    def ping(self, now):
+        self._sequence = (self._sequence + 1) & 0xFFFFFFFF
+        self._outstanding[self._sequence] = now
+        if len(self._outstanding) > Heartbeat.MAX_OUTSTANDING:
+            del self._outstanding[min(self._outstanding)]
+        self.nextPing = now + self.interval
+        return Heartbeat.PAYLOAD.pack(self._sequence)
+
+    """/*
+        Function: pong
+        Matches a pong against the outstanding pings and updates the
+        latency estimates
+
+        Parameters:
+            bytes payload - The payload of the pong frame
+            float now - The current time
+
+        Returns:
+            float sample - The round trip time of this ping, or None if the
+                           pong did not match an outstanding ping
+    */"""
+    def pong(self, payload, now):
+        self.lastSeen = now
+        if len(payload) != Heartbeat.PAYLOAD.size:
+            return None
+        sequence, = Heartbeat.PAYLOAD.unpack(payload)
+        sent = self._outstanding.pop(sequence, None)
+        if sent is None:
+            return None
+        # Pongs arrive in order, so anything older was lost
+        for older in [key for key in self._outstanding if key < sequence]:
+            del self._outstanding[older]
+        sample = now - sent
+        if self.rtt is None:
+            self.rtt = sample
+            self.jitter = sample / 2
+        else:
+            self.jitter += (abs(sample - self.rtt) - self.jitter) / 4
+            self.rtt += (sample - self.rtt) / 8
+        return sample
+
+    """/*
+        Function: seen
+        Records that data was received on the connection
+
+        Parameters:
+            float now - The current time
+    */"""
+    def seen(self, now):
+        self.lastSeen = now
+
+    """/*
+        Function: expired
+        Reports whether the connection has been silent for longer than
+        <timeout>
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            boolean expired - True if the connection should be dropped
+    */"""
+    def expired(self, now):
+        return now - self.lastSeen > self.timeout
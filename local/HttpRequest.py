@@ -0,0 +1,183 @@
+"""/*
+    Class: HttpRequest
+    A parsed HTTP/1.1 request, and an incremental parser for reading one out
+    of a buffer of received data.
+
+    Header names are stored in lower case. Repeated headers are joined with
+    commas, as allowed by RFC 7230.
+
+    Usage:
+        (start code (py))
+            parsed = HttpRequest.parse(buffer)
+            if parsed is not None:
+                request, consumed = parsed
+                del buffer[:consumed]
+                if 'websocket' in request.headerTokens('upgrade'):
+                    ...
+        (end code)
+*/"""
+class HttpRequest:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: MAX_HEADER_SIZE
+        The largest request line and headers accepted, in bytes
+    */"""
+    MAX_HEADER_SIZE = 8192
+
+    """/*
+        var: MAX_BODY_SIZE
+        The largest request body accepted, in bytes
+    */"""
+    MAX_BODY_SIZE = 65536
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates a request from its already parsed parts
+
+        Parameters:
+            string method - The request method, eg. GET
+            string target - The request target, eg. /cgi-bin/lobby.py?format=json
+            string version - The HTTP version, eg. HTTP/1.1
+            dict headers - Map of lower case header names to values
+            bytes body - The request body. Defaults to b''
+    */"""
+    def __init__(self, method, target, version, headers, body=b''):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: method
+            The request method
+        */"""
+        self.method = method
+
+        """/*
+            var: target
+            The request target, including any query string
+        */"""
+        self.target = target
+
+        """/*
+            var: version
+            The HTTP version of the request
+        */"""
+        self.version = version
+
+        """/*
+            var: headers
+            Map of lower case header names to their values
+        */"""
+        self.headers = headers
+
+        """/*
+            var: body
+            The body of the request
+        */"""
+        self.body = body
+
+    """/*
+        Group: Static Methods
+    */"""
+
+    """/*
+        Function: parse
+        Parses a complete request from the start of a buffer
+        Static Method
+
+        Parameters:
+            bytes buffer - Data received from the client so far
+
+        Returns:
+            tuple parsed - (request, consumed), where consumed is the number
+                           of bytes of the buffer used by the request, or
+                           None if the buffer does not yet hold a complete
+                           request
+
+        Raises:
+            ValueError - If the request is malformed or too large
+    */"""
+    def parse(buffer):
+        end = buffer.find(b'\r\n\r\n')
+        if end == -1:
+            if len(buffer) > HttpRequest.MAX_HEADER_SIZE:
+                raise ValueError("HTTP headers too large")
+            return None
+        if end > HttpRequest.MAX_HEADER_SIZE:
+            raise ValueError("HTTP headers too large")
+
+        lines = bytes(buffer[:end]).decode('iso-8859-1').split('\r\n')
+        requestLine = lines[0].split(' ')
+        if len(requestLine) != 3 or not requestLine[2].startswith('HTTP/'):
+            raise ValueError("Malformed HTTP request line")
+        method, target, version = requestLine
+
+        headers = {}
+        for line in lines[1:]:
+            name, separator, value = line.partition(':')
+            name = name.strip().lower()
+            if not separator or not name:
+                raise ValueError("Malformed HTTP header")
+            value = value.strip()
+            if name in headers:
+                headers[name] += ', ' + value
+            else:
+                headers[name] = value
+
+        start = end + 4
+        try:
+            length = int(headers.get('content-length', 0))
+        except ValueError:
+            raise ValueError("Malformed Content-Length header")
+        if not 0 <= length <= HttpRequest.MAX_BODY_SIZE:
+            raise ValueError("HTTP request body too large")
+        if len(buffer) < start + length:
+            return None
+        body = bytes(buffer[start:start + length])
+        return HttpRequest(method, target, version, headers, body), \
+            start + length
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: header
+        Returns the value of a header
+
+        Parameters:
+            string name - The header name, in any case
+            string default - Returned if the header is missing.
+                             Defaults to None
+
+        Returns:
+            string value - The header's value
+    */"""
+    def header(self, name, default=None):
+        return self.headers.get(name.lower(), default)
+
+    """/*
+        Function: headerTokens
+        Splits a comma separated header into its elements
+
+        Parameters:
+            string name - The header name, in any case
+            boolean lower - Lower case the elements. Defaults to True
+
+        Returns:
+            list tokens - The elements of the header, stripped of whitespace.
+                          Empty if the header is missing
+    */"""
+    def headerTokens(self, name, lower=True):
+        value = self.header(name, '')
+        if lower:
+            value = value.lower()
+        return [token.strip() for token in value.split(',') if token.strip()]
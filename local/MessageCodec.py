@@ -0,0 +1,314 @@
+from .BinaryProtocol import BinaryProtocol
+from collections import namedtuple
+from json import JSONDecoder
+
+"""/*
+    Class: MessageCodec
+    Parses the requests sent to the lobby and the messages sent during the
+    game into typed messages, so the server can pick a handler with a single
+    lookup on the type of the message.
+
+    Text messages are of the form name=arguments. The name is split off in
+    one pass, looked up in a table of parsers, and the parser builds the
+    message from the arguments. The JSON of an update is decoded straight
+    from the arguments, ignoring anything after the end of the object.
+    Binary messages are <BinaryProtocol> updates. Lobby requests that only
+    carry a player number are cached once decoded, as the lobby is polled
+    with the same few requests over and over.
+
+    Every message is checked against the length limit for where it was
+    received before it is parsed.
+
+    Lobby requests:
+        (start table)
+        join=userName;password      <Join>
+        query=playerNum             <Query>
+        token=playerNum             <Token>
+        quit=playerNum              <Quit>
+        start=playerNum             <Start>
+        (end table)
+
+    Game messages:
+        (start table)
+        update={JSON}               <Update>
+        binary update               <BinaryUpdate>
+        gameOver=1                  <GameOver>
+        quit=playerNum              <Quit>
+        (end table)
+
+    Usage:
+        (start code (py))
+            message = MessageCodec.decodeLobby(msg)
+            handler = handlers.get(type(message))
+            if handler is not None:
+                handler(client, address, message)
+        (end code)
+*/"""
+class MessageCodec:
+
+    """/*
+        Group: Message Types
+    */"""
+
+    """/*
+        var: Join
+        A request to join the lobby, with the 'userName' chosen and the
+        'password', which is 'None' for a lobby without one
+    */"""
+    Join = namedtuple('Join', ('userName', 'password'))
+
+    """/*
+        var: Query
+        A request for the players in the lobby, from 'playerNum'
+    */"""
+    Query = namedtuple('Query', ('playerNum',))
+
+    """/*
+        var: Token
+        A request for the token of 'playerNum', from a returning player
+    */"""
+    Token = namedtuple('Token', ('playerNum',))
+
+    """/*
+        var: Quit
+        'playerNum' leaving the lobby or the game
+    */"""
+    Quit = namedtuple('Quit', ('playerNum',))
+
+    """/*
+        var: Start
+        'playerNum' being ready to start the game
+    */"""
+    Start = namedtuple('Start', ('playerNum',))
+
+    """/*
+        var: Update
+        A JSON update, with the decoded 'data' holding the 'player' and
+        'damages', and optionally the 'ack' and 'sequence'
+    */"""
+    Update = namedtuple('Update', ('data',))
+
+    """/*
+        var: BinaryUpdate
+        A <BinaryProtocol> update, with the decoded 'data' and the
+        'sequence' number from its header
+    */"""
+    BinaryUpdate = namedtuple('BinaryUpdate', ('data', 'sequence'))
+
+    """/*
+        var: GameOver
+        A client reporting that the game is over
+    */"""
+    GameOver = namedtuple('GameOver', ())
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: MAX_LOBBY_LENGTH
+        The longest lobby request accepted, in characters
+    */"""
+    MAX_LOBBY_LENGTH = 256
+
+    """/*
+        var: MAX_GAME_LENGTH
+        The longest game message accepted, in characters or bytes
+    */"""
+    MAX_GAME_LENGTH = 65536
+
+    """/*
+        var: MAX_CACHED
+        The most decoded lobby requests kept in <_lobbyCache>
+    */"""
+    MAX_CACHED = 1024
+
+    """/*
+        var: _decoder
+        The JSONDecoder used for updates
+    */"""
+    _decoder = JSONDecoder()
+
+    """/*
+        var: _lobbyCache
+        Map of the lobby requests that only carry a player number, such as
+        the query= sent every second by each waiting player, to their
+        decoded messages. The messages are immutable, so a repeated request
+        is answered with a single lookup
+    */"""
+    _lobbyCache = {}
+
+    """/*
+        Group: Static Methods
+    */"""
+
+    """/*
+        Function: decodeLobby
+        Parses a lobby request
+        Static Method
+
+        Parameters:
+            string msg - The request
+
+        Returns:
+            message - The typed message, or None if the request is not one
+                      the lobby handles
+
+        Raises:
+            ValueError - If the request is too long or its arguments are
+                         malformed
+    */"""
+    def decodeLobby(msg):
+        message = MessageCodec._lobbyCache.get(msg)
+        if message is not None:
+            return message
+        if len(msg) > MessageCodec.MAX_LOBBY_LENGTH:
+            raise ValueError("Message of %i characters is too long" % (
+                len(msg)))
+        name, _, arguments = msg.partition('=')
+        messageType = MessageCodec._PLAYER_NUM_TYPES.get(name)
+        if messageType is None:
+            return MessageCodec._parseJoin(arguments) if name == 'join' \
+                else None
+        try:
+            message = messageType(int(arguments))
+        except ValueError:
+            message = messageType(MessageCodec._parsePlayerNum(arguments))
+        if len(MessageCodec._lobbyCache) >= MessageCodec.MAX_CACHED:
+            MessageCodec._lobbyCache.clear()
+        MessageCodec._lobbyCache[msg] = message
+        return message
+
+    """/*
+        Function: decodeGame
+        Parses a message received on a game socket
+        Static Method
+
+        Parameters:
+            msg - The message, as a string for text frames or bytes for
+                  binary frames
+
+        Returns:
+            message - The typed message, or None if the message is not one
+                      the game handles
+
+        Raises:
+            ValueError - If the message is too long or malformed
+    */"""
+    def decodeGame(msg):
+        if isinstance(msg, bytes):
+            if len(msg) > MessageCodec.MAX_GAME_LENGTH:
+                raise ValueError("Message of %i bytes is too long" % (
+                    len(msg)))
+            return MessageCodec.BinaryUpdate(*BinaryProtocol.decodeUpdate(msg))
+        return MessageCodec._decode(
+            msg, MessageCodec.MAX_GAME_LENGTH, MessageCodec._GAME)
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _decode
+        Splits the name off a text message and passes the arguments to its
+        parser
+        Static Method
+
+        Parameters:
+            string msg - The message
+            int maxLength - The longest message accepted
+            dict parsers - Map of message names to their parsers
+
+        Returns:
+            message - The typed message, or None if the name has no parser
+
+        Raises:
+            ValueError - If the message is too long or its arguments are
+                         malformed
+    */"""
+    def _decode(msg, maxLength, parsers):
+        if len(msg) > maxLength:
+            raise ValueError("Message of %i characters is too long" % (
+                len(msg)))
+        name, _, arguments = msg.partition('=')
+        parser = parsers.get(name)
+        if parser is None:
+            return None
+        return parser(arguments)
+
+    """/*
+        Function: _parseJoin
+        Parses the arguments of a join request
+        Static Method
+
+        Parameters:
+            string arguments - userName;password
+
+        Returns:
+            Join message - The request
+    */"""
+    def _parseJoin(arguments):
+        userName, separator, password = arguments.partition(';')
+        if not separator:
+            raise ValueError("Join request without a password")
+        return MessageCodec.Join(userName, password)
+
+    """/*
+        Function: _parsePlayerNum
+        Parses the player number that is the only argument of most
+        requests, ignoring anything after it. Only used once int() has
+        failed on the whole of the arguments
+        Static Method
+
+        Parameters:
+            string arguments - The arguments of the request
+
+        Returns:
+            int playerNum - The player number
+    */"""
+    def _parsePlayerNum(arguments):
+        words = arguments.split(None, 1)
+        return int(words[0] if words else arguments)
+
+    """/*
+        Function: _parseUpdate
+        Parses the arguments of a JSON update. Only the first JSON value is
+        decoded, so anything after the end of the object is ignored
+        Static Method
+
+        Parameters:
+            string arguments - The JSON of the update
+
+        Returns:
+            Update message - The update
+    */"""
+    def _parseUpdate(arguments):
+        data, end = MessageCodec._decoder.raw_decode(arguments)
+        if not isinstance(data, dict):
+            raise ValueError("Update is not a JSON object")
+        return MessageCodec.Update(data)
+
+    """/*
+        var: _PLAYER_NUM_TYPES
+        Map of the names of the lobby requests whose only argument is a
+        player number to their message types. join is the only other
+        lobby request
+    */"""
+    _PLAYER_NUM_TYPES = {
+        'query': Query,
+        'token': Token,
+        'quit': Quit,
+        'start': Start
+    }
+
+    """/*
+        var: _GAME
+        Map of game message names to their parsers
+    */"""
+    _GAME = {
+        'update': _parseUpdate,
+        'gameOver': lambda arguments: MessageCodec.GameOver(),
+        'quit': lambda arguments: MessageCodec.Quit(
+            int(arguments) if arguments.isdigit()
+            else MessageCodec._parsePlayerNum(arguments))
+    }
@@ -0,0 +1,204 @@
+from collections import deque
+
+"""/*
+    Class: OutboundQueue
+    Non-blocking writer for a game socket, so a client on a slow link can
+    never hold up the game loop or the other clients.
+
+    Messages are queued in two ways. Reliable frames, such as the start up
+    payload and control frames, are queued by <send> and always delivered
+    in order. Snapshots are queued by <replace>, which keeps only the newest
+    one: a snapshot that is still waiting when the next arrives is dropped
+    and counted in <dropped>, as the client only needs the latest state.
+
+    <flush> writes as much as the socket accepts without blocking, and
+    leaves the rest for when it becomes writable again. A snapshot is only
+    framed once it is about to be written, so per client state such as the
+    damage a player has taken or a permessage-deflate compressor is only
+    used for the snapshots that are actually sent.
+
+    Usage:
+        (start code (py))
+            queue = OutboundQueue(sock)
+            queue.send([header, payload])
+            queue.replace(snapshot)
+            if not queue.flush(frameSnapshot):
+                # Wait for the socket to become writable and flush again
+        (end code)
+*/"""
+class OutboundQueue:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: MAX_BYTES
+        The most bytes of reliable frames that may be waiting before the
+        client is considered too slow to keep
+    */"""
+    MAX_BYTES = 1 << 20
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates an empty queue for a socket
+
+        Parameters:
+            Socket sock - The non-blocking socket to write to
+    */"""
+    def __init__(self, sock):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: sock
+            The socket written to
+        */"""
+        self.sock = sock
+
+        """/*
+            var: frames
+            The reliable frames waiting to be written, each a list of
+            buffers
+        */"""
+        self.frames = deque()
+
+        """/*
+            var: latest
+            The newest snapshot waiting to be framed and written, or None
+        */"""
+        self.latest = None
+
+        """/*
+            var: queuedBytes
+            The number of bytes in <frames>
+        */"""
+        self.queuedBytes = 0
+
+        """/*
+            var: sent
+            The number of snapshots written
+        */"""
+        self.sent = 0
+
+        """/*
+            var: dropped
+            The number of snapshots replaced before they could be written
+        */"""
+        self.dropped = 0
+
+        """/*
+            var: _partial
+            Memoryviews of what is left of the frame being written, which
+            must be finished before anything else is written
+        */"""
+        self._partial = []
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: send
+        Queues a frame that must be delivered
+
+        Parameters:
+            list buffers - The frame header followed by the payload pieces
+
+        Returns:
+            boolean queued - False if the queue is over <MAX_BYTES>, in which
+                             case the client should be disconnected
+    */"""
+    def send(self, buffers):
+        self.frames.append(buffers)
+        self.queuedBytes += sum(len(buffer) for buffer in buffers)
+        return self.queuedBytes <= OutboundQueue.MAX_BYTES
+
+    """/*
+        Function: replace
+        Queues a snapshot, dropping any snapshot still waiting
+
+        Parameters:
+            snapshot - The snapshot, in whatever form the frame function
+                       passed to <flush> takes
+    */"""
+    def replace(self, snapshot):
+        if self.latest is not None:
+            self.dropped += 1
+        self.latest = snapshot
+
+    """/*
+        Function: pending
+        Reports whether anything is waiting to be written
+
+        Returns:
+            boolean pending - True if the socket should be flushed once it is
+                              writable
+    */"""
+    def pending(self):
+        return bool(self._partial or self.frames or self.latest is not None)
+
+    """/*
+        Function: flush
+        Writes as much as the socket will take without blocking
+
+        Parameters:
+            func frame - Called with the waiting snapshot when it is about to
+                         be written, returning the list of buffers of its
+                         frame
+
+        Returns:
+            boolean flushed - True if everything has been written
+
+        Raises:
+            OSError - If the socket fails
+    */"""
+    def flush(self, frame):
+        while True:
+            if not self._partial:
+                if self.frames:
+                    buffers = self.frames.popleft()
+                    self.queuedBytes -= sum(len(buffer) for buffer in buffers)
+                elif self.latest is not None:
+                    buffers = frame(self.latest)
+                    self.latest = None
+                    self.sent += 1
+                else:
+                    return True
+                self._partial = [memoryview(buffer) for buffer in buffers]
+            try:
+                sent = self._write(self._partial)
+            except (BlockingIOError, InterruptedError):
+                return False
+            # Drop whatever was fully sent and keep the remainder
+            while self._partial and sent >= len(self._partial[0]):
+                sent -= len(self._partial[0])
+                self._partial.pop(0)
+            if self._partial:
+                self._partial[0] = self._partial[0][sent:]
+                return False
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _write
+        Writes buffers to the socket, using scatter-gather I/O where the
+        platform supports it
+
+        Parameters:
+            list buffers - Memoryviews of the data to write
+
+        Returns:
+            int sent - The number of bytes written
+    */"""
+    def _write(self, buffers):
+        if hasattr(self.sock, 'sendmsg'):
+            return self.sock.sendmsg(buffers)
+        return self.sock.send(b''.join(buffers))
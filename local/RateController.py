@@ -0,0 +1,258 @@
+"""/*
+    Class: RateController
+    Chooses how often clients should send updates, and how often the server
+    should broadcast snapshots, from how hard the server and the network
+    are working.
+
+    The controller steps through <LEVELS>, from the full rate at level 0 to
+    the lowest rate at the last level. After each tick the server reports
+    the fraction of the tick period that passed between the tick's deadline
+    and the end of its work, and the number of commands it drained. Either one being too high means the server is
+    under pressure, and it steps down a level, at most once every
+    <STEP_DOWN_DELAY> seconds so a step has time to take effect. Once both
+    have been low for <STEP_UP_DELAY> seconds it steps back up, one level
+    at a time.
+
+    Each client is sent the send interval of the server's level, or of a
+    lower level if its round trip time says its connection is congested.
+
+    All times are in seconds from time.monotonic
+
+    Usage:
+        (start code (py))
+            controller = RateController(monotonic())
+            commands = queue.drain()
+            ...
+            controller.sample((monotonic() - deadline) / period,
+                              commands / clients, monotonic())
+            if controller.shouldBroadcast(ticks):
+                broadcast()
+        (end code)
+*/"""
+class RateController:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: LEVELS
+        (send interval in milliseconds, ticks per broadcast) of each level,
+        from the full rate down
+    */"""
+    LEVELS = ((33, 1), (50, 1), (66, 2), (100, 3))
+
+    """/*
+        var: HIGH_LOAD
+        Smoothed fraction of the tick period spent working above which the
+        server is under pressure
+    */"""
+    HIGH_LOAD = 0.75
+
+    """/*
+        var: LOW_LOAD
+        Smoothed fraction of the tick period spent working below which the
+        server has headroom
+    */"""
+    LOW_LOAD = 0.35
+
+    """/*
+        var: HIGH_BACKLOG
+        Commands drained per client in a tick above which updates are
+        arriving faster than the server uses them
+    */"""
+    HIGH_BACKLOG = 4
+
+    """/*
+        var: LOW_BACKLOG
+        Commands drained per client in a tick below which the server is
+        keeping up
+    */"""
+    LOW_BACKLOG = 2
+
+    """/*
+        var: RTT_LEVELS
+        Round trip times in seconds at or above which a client is held to
+        each level after the first
+    */"""
+    RTT_LEVELS = (0.15, 0.25, 0.4)
+
+    """/*
+        var: STEP_DOWN_DELAY
+        Least seconds between steps down
+    */"""
+    STEP_DOWN_DELAY = 1.0
+
+    """/*
+        var: STEP_UP_DELAY
+        Seconds the server must have headroom for before stepping up
+    */"""
+    STEP_UP_DELAY = 5.0
+
+    """/*
+        var: SMOOTHING
+        Weight of each new load sample in <load>
+    */"""
+    SMOOTHING = 0.125
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Starts the controller at the full rate
+
+        Parameters:
+            float now - The current time
+    */"""
+    def __init__(self, now):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: level
+            Index in <LEVELS> of the server's current rate
+        */"""
+        self.level = 0
+
+        """/*
+            var: load
+            Smoothed fraction of the tick period spent working
+        */"""
+        self.load = 0.0
+
+        """/*
+            var: changes
+            The number of times the level has changed
+        */"""
+        self.changes = 0
+
+        """/*
+            var: lowestLevel
+            The lowest rate the server has stepped down to
+        */"""
+        self.lowestLevel = 0
+
+        """/*
+            var: _lastChange
+            The time the level last changed
+        */"""
+        self._lastChange = now
+
+        """/*
+            var: _headroomSince
+            The time the server last started having headroom, or None while
+            it has none
+        */"""
+        self._headroomSince = None
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: sample
+        Records how a tick went, and steps the level down or up if needed
+
+        Parameters:
+            float load - Fraction of the tick period between the tick's
+                         deadline and the end of its work
+            float backlog - Commands drained per client in the tick
+            float now - The current time
+
+        Returns:
+            boolean changed - True if the level changed
+    */"""
+    def sample(self, load, backlog, now):
+        self.load += (load - self.load) * RateController.SMOOTHING
+        if (self.load > RateController.HIGH_LOAD or
+                backlog > RateController.HIGH_BACKLOG):
+            self._headroomSince = None
+            if (self.level < len(RateController.LEVELS) - 1 and
+                    now - self._lastChange >= RateController.STEP_DOWN_DELAY):
+                return self._setLevel(self.level + 1, now)
+            return False
+        if (self.load >= RateController.LOW_LOAD or
+                backlog >= RateController.LOW_BACKLOG):
+            self._headroomSince = None
+            return False
+        if self._headroomSince is None:
+            self._headroomSince = now
+        if (self.level > 0 and
+                now - self._headroomSince >= RateController.STEP_UP_DELAY):
+            return self._setLevel(self.level - 1, now)
+        return False
+
+    """/*
+        Function: sendInterval
+        Finds the interval a client should send its updates at
+
+        Parameters:
+            float rtt - The client's smoothed round trip time in seconds, or
+                        None if it is not known yet
+
+        Returns:
+            int interval - Milliseconds between the client's updates
+    */"""
+    def sendInterval(self, rtt=None):
+        level = self.level
+        if rtt is not None:
+            for i, threshold in enumerate(RateController.RTT_LEVELS):
+                if rtt >= threshold:
+                    level = max(level, i + 1)
+        return RateController.LEVELS[level][0]
+
+    """/*
+        Function: shouldBroadcast
+        Reports whether a tick should broadcast the state, so that under
+        pressure the server sheds the work of building and sending
+        snapshots on some ticks
+
+        Parameters:
+            int tick - The number of the tick
+
+        Returns:
+            boolean broadcast - True if snapshots should be sent this tick
+    */"""
+    def shouldBroadcast(self, tick):
+        return tick % RateController.LEVELS[self.level][1] == 0
+
+    """/*
+        Function: summary
+        Describes how the rate was adapted, for the server log
+
+        Returns:
+            string summary - The current and lowest send intervals, the
+                             number of changes and the smoothed load
+    */"""
+    def summary(self):
+        return ('Send interval %ims (lowest rate %ims), %i rate changes, '
+                'load %.0f%%' % (
+                    RateController.LEVELS[self.level][0],
+                    RateController.LEVELS[self.lowestLevel][0],
+                    self.changes, self.load * 100))
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _setLevel
+        Moves to a new level
+
+        Parameters:
+            int level - Index in <LEVELS> of the new level
+            float now - The current time
+
+        Returns:
+            boolean changed - True
+    */"""
+    def _setLevel(self, level, now):
+        self.level = level
+        self.lowestLevel = max(self.lowestLevel, level)
+        self.changes += 1
+        self._lastChange = now
+        self._headroomSince = None
+        return True
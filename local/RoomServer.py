@@ -0,0 +1,536 @@
+from .ArenaRoom import ArenaRoom
+from .AsyncConnection import AsyncConnection
+from .HttpRequest import HttpRequest
+from .MessageCodec import MessageCodec
+import asyncio
+from json import dumps
+import re
+from socket import *
+from urllib.parse import urlsplit
+
+"""/*
+    Class: RoomServer
+    Hosts many independent games on a single port, each in an <ArenaRoom>.
+
+    The server owns the listening socket, the broadcast service and a single
+    asyncio event loop that every room runs on. Each accepted connection is
+    passed to the room it names, and a room is created the first time a
+    player joins it. Rooms are forgotten once their game is over or their
+    lobby empties, so the server can keep running for as many games as are
+    played on it.
+
+    Protocol:
+        Rooms are named by an ID of up to 32 letters, digits, '-' or '_'.
+        The empty ID is the default room, which is also where clients that
+        do not know about rooms end up, so a <RoomServer> can stand in for an
+        <ArenaServer>.
+
+        (start table)
+        room=[id] [msg] - A lobby request, as handled by <ArenaServer>, for
+                          the room *id*. A join= creates the room if it does
+                          not exist yet. Requests without the prefix are
+                          for the default room
+
+        GET /[id] - A WebSocket handshake for the game in room *id*. GET
+                    requests without an Upgrade header are treated as the
+                    lobby request in their query string, eg.
+                    GET /[id]?quit=[player_num]
+        (end table)
+
+        Broadcast requests are answered with one datagram per room that is
+        still in its lobby, each with a 'room' key holding the room ID. The
+        default room is listed as an empty lobby while it is not open, but
+        is only created by a join=.
+
+    Usage:
+        (start code (bash))
+            python3 Arena.py -c --rooms
+        (end code)
+*/"""
+class RoomServer:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: ROOMID
+        Pattern a room ID must match
+    */"""
+    ROOMID = re.compile(r'[A-Za-z0-9_-]{0,32}$')
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Initialises the server and binds it to the port specified
+
+        Parameters:
+            int port - The port that the server will listen on
+            str password - A password required to join any room. Defaults
+                           to None
+            func log - A function to log messages into the <LogPanel>
+            func callback - A function to be called when the server closes
+            int maxRooms - The most rooms that can be open at once.
+                           Defaults to 64
+            boolean reusePort - Whether other processes may listen on the
+                                same port, as the workers of a
+                                <RoomSupervisor> do. Defaults to False
+            kwargs - Any other arguments taken by <ArenaServer.__init__>,
+                     passed on to every room
+    */"""
+    def __init__(self, port=44444, password=None, log=print,
+                 callback=lambda x: x, maxRooms=64, reusePort=False,
+                 **kwargs):
+        """/*
+            Group: Server Socket Variables
+        */"""
+
+        """/*
+            var: host
+            The address of the host.
+        */"""
+        self.host = 'localhost'
+
+        """/*
+            var: port
+            The port number the socket will bind to.
+        */"""
+        self.port = port
+
+        sock = socket()
+        sock.setblocking(0)
+        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        if reusePort:
+            sock.setsockopt(SOL_SOCKET, SO_REUSEPORT, 1)
+        sock.bind(('', self.port))
+
+        """/*
+            var: sock
+            The <Socket> every room is served on
+        */"""
+        self.sock = sock
+
+        """/*
+            var: reusePort
+            Whether other processes share the port, and the broadcast
+            service's port
+        */"""
+        self.reusePort = reusePort
+
+        """/*
+            Group: Room Variables
+        */"""
+
+        """/*
+            var: rooms
+            Map of room ID to the open <ArenaRoom> with that ID
+        */"""
+        self.rooms = {}
+
+        """/*
+            var: maxRooms
+            The most rooms that can be open at once
+        */"""
+        self.maxRooms = maxRooms
+
+        """/*
+            var: roomOptions
+            The arguments every <ArenaRoom> is created with
+        */"""
+        self.roomOptions = dict(kwargs, password=password)
+
+        """/*
+            var: password
+            Whether a password is needed to join a room, for the log
+        */"""
+        self.password = password
+
+        """/*
+            Group: Event Loop Variables
+        */"""
+
+        """/*
+            var: loop
+            The event loop the server runs on, created by <listen>
+        */"""
+        self.loop = None
+
+        """/*
+            var: closed
+            Flag for whether the server has been closed
+        */"""
+        self.closed = False
+
+        """/*
+            var: _closedEvent
+            asyncio Event set when the server is closed
+        */"""
+        self._closedEvent = None
+
+        """/*
+            var: _tasks
+            Map of each <ArenaRoom> to the task running it
+        */"""
+        self._tasks = {}
+
+        """/*
+            var: _connections
+            Set of the tasks reading the first request of a connection
+        */"""
+        self._connections = set()
+
+        """/*
+            var: _broadcastSock
+            The UDP socket of the broadcast service while it is running
+        */"""
+        self._broadcastSock = None
+
+        """/*
+            var: log
+            Callable passed from the GUI to handle message outputs
+        */"""
+        self.log = log
+
+        """/*
+            var: callback
+            Callback method to be run when a service closes down
+        */"""
+        self.callback = callback
+
+        self.log("Localhost IP: " + str(gethostbyname(gethostname())))
+
+    """/*
+        Group: Server Handler Methods
+    */"""
+
+    """/*
+        Function: close
+        Closes the server and every room on it. Safe to call from any thread
+    */"""
+    def close(self):
+        self.log('Server Closing')
+        self.closed = True
+        if self.loop is None:
+            self.sock.close()
+        elif self._closedEvent is not None:
+            try:
+                self.loop.call_soon_threadsafe(self._closedEvent.set)
+            except RuntimeError:
+                # The event loop has already finished
+                pass
+
+    """/*
+        Function: inGame
+        Reports whether any room on this server has a game running
+
+        Returns:
+            boolean started - True if a room's game has started
+    */"""
+    def inGame(self):
+        return any(room.inGame() and not room.closed
+                   for room in list(self.rooms.values()))
+
+    """/*
+        Function: listen
+        Runs the server on a new event loop until it is closed
+    */"""
+    def listen(self):
+        self.loop = asyncio.new_event_loop()
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            self.log(str(e))
+        finally:
+            self.loop.close()
+            self.callback("game")
+
+    """/*
+        Group: Event Loop Methods
+    */"""
+
+    """/*
+        Function: _serve
+        Coroutine accepting connections until the server is closed, then
+        closing every room
+    */"""
+    async def _serve(self):
+        self.log(
+            'Server starting up at %s on port %s' % (self.host, self.port))
+        self.log('Password Protected: ' + str(self.password is not None))
+        self._closedEvent = asyncio.Event()
+        if self.closed:
+            self._closedEvent.set()
+        server = await asyncio.start_server(
+            self._handleConnection, sock=self.sock, backlog=128)
+        self._broadcast()
+        try:
+            await self._closedEvent.wait()
+        finally:
+            self._endBroadcast()
+            server.close()
+            for task in list(self._connections):
+                task.cancel()
+            for room, task in list(self._tasks.items()):
+                room.close()
+                task.cancel()
+            await asyncio.gather(
+                *(list(self._connections) + list(self._tasks.values())),
+                return_exceptions=True)
+
+    """/*
+        Function: _room
+        Finds an open room, creating it if asked to
+
+        Parameters:
+            string roomId - The ID of the room
+            boolean create - Whether to create the room if it is not open
+
+        Returns:
+            ArenaRoom room - The room, or None if it is not open and was not
+                             created
+    */"""
+    def _room(self, roomId, create=False):
+        room = self.rooms.get(roomId)
+        if room is not None and not room.closed:
+            return room
+        if not create:
+            return None
+        if room is None and len(self.rooms) >= self.maxRooms:
+            return None
+        room = ArenaRoom(roomId, self.loop, log=self.log,
+                         **self.roomOptions)
+        self.rooms[roomId] = room
+        task = self.loop.create_task(room.run())
+        self._tasks[room] = task
+        task.add_done_callback(lambda task: self._roomFinished(room))
+        return room
+
+    """/*
+        Function: _roomFinished
+        Forgets a room once its task has finished
+
+        Parameters:
+            ArenaRoom room - The room that has finished
+    */"""
+    def _roomFinished(self, room):
+        self._tasks.pop(room, None)
+        if self.rooms.get(room.roomId) is room:
+            del self.rooms[room.roomId]
+
+    """/*
+        Group: Connection Handling Methods
+    */"""
+
+    """/*
+        Function: _handleConnection
+        Coroutine run for every accepted connection. Reads the first request
+        and passes the connection to the room it is for
+
+        Parameters:
+            StreamReader reader - The stream to read the client's data from
+            StreamWriter writer - The stream to send data to the client
+            bytes data - The first request, if it has already been read
+    */"""
+    async def _handleConnection(self, reader, writer, data=None):
+        connection = AsyncConnection(reader, writer)
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            if data is None:
+                data = await asyncio.wait_for(reader.read(4096), 5)
+            if data.startswith(b'GET '):
+                await self._routeHttp(connection, bytearray(data))
+            else:
+                await self._routeLobby(connection, data)
+        except (asyncio.TimeoutError, OSError, ValueError):
+            self.log('Invalid request received')
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._connections.discard(task)
+            connection.close()
+
+    """/*
+        Function: _routeLobby
+        Coroutine passing a lobby request to the room it names
+
+        Parameters:
+            AsyncConnection connection - The connection the request was sent
+                                         on
+            bytes data - The request, including any room= prefix
+    */"""
+    async def _routeLobby(self, connection, data):
+        raw = data
+        roomId = ''
+        if data.startswith(b'room='):
+            prefix, _, data = data.partition(b' ')
+            roomId = prefix[len(b'room='):].decode('utf-8', 'replace')
+        if not RoomServer.ROOMID.match(roomId):
+            connection.sendall(b'invalid room')
+            return
+        try:
+            message = MessageCodec.decodeLobby(data.decode('utf-8', 'replace'))
+        except ValueError:
+            # Left for the room to reject, if it is open
+            message = None
+        join = isinstance(message, MessageCodec.Join)
+        if self._forward(connection, roomId, raw, join):
+            return
+        room = self._room(roomId, create=join)
+        if room is None:
+            if join:
+                connection.sendall(b'server full')
+            return
+        self._connections.discard(asyncio.current_task())
+        await room._serveConnection(connection, room._handleLobbyRequest,
+                                    data)
+
+    """/*
+        Function: _routeHttp
+        Coroutine passing a GET request to the room named by its path.
+        WebSocket handshakes go to the room's game, and anything else to its
+        lobby
+
+        Parameters:
+            AsyncConnection connection - The connection the request was sent
+                                         on
+            bytearray buffer - The data read from the connection so far
+    */"""
+    async def _routeHttp(self, connection, buffer):
+        parsed = HttpRequest.parse(buffer)
+        while parsed is None:
+            data = await asyncio.wait_for(connection.reader.read(4096), 5)
+            if not data:
+                return
+            buffer += data
+            parsed = HttpRequest.parse(buffer)
+        request, _ = parsed
+        target = urlsplit(request.target)
+        roomId = target.path.strip('/')
+        if not RoomServer.ROOMID.match(roomId):
+            return
+        if self._forward(connection, roomId, bytes(buffer), False):
+            return
+        room = self._room(roomId)
+        if room is None:
+            return
+        self._connections.discard(asyncio.current_task())
+        if 'websocket' in request.headerTokens('upgrade'):
+            if room._acceptsHandshakes():
+                await room._serveConnection(
+                    connection, room._handleHandshake, bytes(buffer))
+        elif not room.started:
+            await room._serveConnection(
+                connection, room._handleLobbyRequest, target.query.encode())
+
+    """/*
+        Function: _forward
+        Passes a connection on to another server, if the room it is for is
+        hosted elsewhere. A lone <RoomServer> hosts every room itself
+
+        Parameters:
+            AsyncConnection connection - The connection to pass on
+            string roomId - The room the connection is for
+            bytes data - Everything read from the connection so far
+            boolean create - Whether the request would create the room
+
+        Returns:
+            boolean forwarded - True if the connection has been passed on, and
+                                should no longer be used here
+    */"""
+    def _forward(self, connection, roomId, data, create):
+        return False
+
+    """/*
+        Group: Broadcast Handling Methods
+    */"""
+
+    """/*
+        Function: _broadcast
+        Starts answering broadcast requests on the event loop
+    */"""
+    def _broadcast(self):
+        broadcastSock = socket(AF_INET, SOCK_DGRAM)
+        try:
+            broadcastSock.setsockopt(SOL_SOCKET, SO_BROADCAST, 1)
+            if self.reusePort:
+                # Every process answers for its own rooms
+                broadcastSock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+            broadcastSock.bind(('', 44445))
+        except OSError as e:
+            self.log('Broadcast service failed to start: ' + str(e))
+            broadcastSock.close()
+            return
+        broadcastSock.setblocking(False)
+        self._broadcastSock = broadcastSock
+        self.log('Starting up broadcast service')
+        self.loop.add_reader(broadcastSock, self._handleBroadcast)
+
+    """/*
+        Function: _endBroadcast
+        Stops the broadcast service if it is running
+    */"""
+    def _endBroadcast(self):
+        if self._broadcastSock is None:
+            return
+        self.loop.remove_reader(self._broadcastSock)
+        self._broadcastSock.close()
+        self._broadcastSock = None
+        self.log('Broadcast service closing')
+        self.callback("broadcast")
+
+    """/*
+        Function: _handleBroadcast
+        Answers a broadcast request with the state of every room still in
+        its lobby. The default room is listed even while it is not open, so
+        there is a room to join when none are, but it is not created until
+        someone joins it
+    */"""
+    def _handleBroadcast(self):
+        try:
+            data, address = self._broadcastSock.recvfrom(1024)
+            if data != b'arena_broadcast_req':
+                return
+            states = {roomId: room._broadcastState()
+                      for roomId, room in list(self.rooms.items())
+                      if not room.closed and not room.started}
+            if self._room('') is None and self._listsDefaultRoom():
+                states[''] = self._emptyRoomState()
+            for roomId, serverState in states.items():
+                serverState['port'] = self.port
+                serverState['room'] = roomId
+                self._broadcastSock.sendto(
+                    dumps(serverState).encode(), address)
+        except OSError:
+            pass
+
+    """/*
+        Function: _listsDefaultRoom
+        Whether this server answers broadcasts for the default room while
+        it is not open
+
+        Returns:
+            boolean lists - True, as a lone <RoomServer> is the only one to
+                            answer
+    */"""
+    def _listsDefaultRoom(self):
+        return True
+
+    """/*
+        Function: _emptyRoomState
+        Describes a room that is not open as the empty lobby a join= would
+        create, in the form of <ArenaServer._broadcastState>
+
+        Returns:
+            dict serverState - The state of the empty room, without its port
+    */"""
+    def _emptyRoomState(self):
+        return {
+            'data': {
+                'players': [None] * self.roomOptions.get('capacity', 4),
+                'password': self.password is not None
+            }
+        }
@@ -0,0 +1,162 @@
+from .RoomWorker import RoomWorker
+from multiprocessing import Event, Manager, Process, Queue
+from multiprocessing.connection import wait
+import os
+from socket import *
+from threading import Thread
+
+"""/*
+    Class: RoomSupervisor
+    Runs rooms across several worker processes, so that busy games are not
+    all held back by a single interpreter lock.
+
+    Starts a <RoomWorker> per process, each listening on the same port, and
+    the shared directory they use to find which worker hosts each room.
+    Log messages from the workers are passed back to the supervisor's log.
+    Closing the supervisor closes every worker.
+
+    Needs SO_REUSEPORT and the passing of file descriptors between
+    processes, so is only available on Unix.
+
+    Usage:
+        (start code (bash))
+            python3 Arena.py -c --workers 4
+        (end code)
+*/"""
+class RoomSupervisor:
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Initialises the supervisor. The workers are started by <listen>
+
+        Parameters:
+            int workers - The number of worker processes. Defaults to the
+                          number of CPUs
+            func log - A function to log messages into the <LogPanel>
+            func callback - A function to be called when the server closes
+            kwargs - Any other arguments taken by <RoomServer.__init__>,
+                     passed on to every worker
+    */"""
+    def __init__(self, workers=None, log=print, callback=lambda x: x,
+                 **kwargs):
+        if not hasattr(socket, 'sendmsg') or 'SO_REUSEPORT' not in globals():
+            raise OSError("Worker processes are not supported here")
+
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: workers
+            The number of worker processes
+        */"""
+        self.workers = workers or os.cpu_count() or 1
+
+        """/*
+            var: options
+            The arguments every worker is created with
+        */"""
+        self.options = kwargs
+
+        """/*
+            var: log
+            Callable passed from the GUI to handle message outputs
+        */"""
+        self.log = log
+
+        """/*
+            var: callback
+            Callback method to be run when a service closes down
+        */"""
+        self.callback = callback
+
+        """/*
+            var: processes
+            The running worker processes
+        */"""
+        self.processes = []
+
+        """/*
+            var: _logs
+            Queue of log messages from the workers. None marks the end
+        */"""
+        self._logs = Queue()
+
+        """/*
+            var: _stopping
+            Event set to close every worker
+        */"""
+        self._stopping = Event()
+
+    """/*
+        Group: Server Handler Methods
+    */"""
+
+    """/*
+        Function: close
+        Closes every worker. Safe to call from any thread
+    */"""
+    def close(self):
+        self.log('Server Closing')
+        self._stopping.set()
+
+    """/*
+        Function: listen
+        Starts the workers, and logs their messages until they have all
+        closed
+    */"""
+    def listen(self):
+        manager = Manager()
+        inboxes = [socketpair(AF_UNIX, SOCK_DGRAM)
+                   for i in range(self.workers)]
+        senders = [sender for _, sender in inboxes]
+        try:
+            directory = manager.dict()
+            loads = manager.list([0] * self.workers)
+            self.log('Starting %i workers' % (self.workers))
+            for index, (inbox, _) in enumerate(inboxes):
+                process = Process(
+                    target=RoomWorker.run,
+                    args=(index, directory, loads, senders, inbox,
+                          self._logs, self._stopping, self.options),
+                    daemon=True)
+                process.start()
+                self.processes.append(process)
+            Thread(target=self._waitForWorkers, daemon=True).start()
+
+            for msg in iter(self._logs.get, None):
+                self.log(msg)
+        finally:
+            self._stopping.set()
+            for process in self.processes:
+                process.join()
+            for inbox, sender in inboxes:
+                inbox.close()
+                sender.close()
+            manager.shutdown()
+            self.callback("game")
+
+    """/*
+        Function: _waitForWorkers
+        Method run in a separate thread that ends <listen> once every worker
+        has exited
+    */"""
+    def _waitForWorkers(self):
+        running = {process.sentinel: index
+                   for index, process in enumerate(self.processes)}
+        while running:
+            for sentinel in wait(list(running)):
+                index = running.pop(sentinel)
+                self.processes[index].join()
+                exitcode = self.processes[index].exitcode
+                if exitcode:
+                    self.log('Worker %i exited with code %i' % (
+                        index, exitcode))
+            # Any worker stopping takes the rest down with it, as the rooms
+            # it hosted can no longer be reached
+            self._stopping.set()
+        self._logs.put(None)
@@ -0,0 +1,299 @@
+from .RoomServer import RoomServer
+from array import array
+import asyncio
+from socket import *
+from threading import Thread
+
+"""/*
+    Class: RoomWorker
+    A <RoomServer> run in one of the worker processes of a
+    <RoomSupervisor>.
+
+    Every worker listens on the same port with SO_REUSEPORT, so the kernel
+    spreads new connections across them. Which worker hosts a room is
+    recorded in a directory shared by all the workers. A connection that
+    arrives at the wrong worker is handed off to the right one, along with
+    the data already read from it, by passing its file descriptor over the
+    owner's inbox socket. A new room is given to whichever worker has the
+    fewest rooms open.
+
+    The directory is only consulted for the first request of a connection,
+    and only for rooms this worker does not host itself. Game traffic never
+    crosses between processes.
+*/"""
+class RoomWorker(RoomServer):
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: MAX_HANDOFF
+        The most bytes of a connection's data that can be handed off with
+        it, as read by <_receiveHandOff>
+    */"""
+    MAX_HANDOFF = 65536
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Initialises the worker and binds it to the shared port
+
+        Parameters:
+            int index - The number of this worker
+            DictProxy directory - Shared map of room ID to the index of the
+                                  worker hosting it
+            ListProxy loads - Shared list of the number of rooms open on
+                              each worker
+            list inboxes - The sending end of each worker's inbox
+            Socket inbox - The receiving end of this worker's inbox
+            kwargs - Any other arguments taken by <RoomServer.__init__>
+    */"""
+    def __init__(self, index, directory, loads, inboxes, inbox, **kwargs):
+        super(RoomWorker, self).__init__(reusePort=True, **kwargs)
+
+        """/*
+            Group: Worker Variables
+        */"""
+
+        """/*
+            var: index
+            The number of this worker
+        */"""
+        self.index = index
+
+        """/*
+            var: directory
+            Shared map of room ID to the index of the worker hosting it
+        */"""
+        self.directory = directory
+
+        """/*
+            var: loads
+            Shared list of the number of rooms open on each worker
+        */"""
+        self.loads = loads
+
+        """/*
+            var: inboxes
+            The sending end of each worker's inbox, by index
+        */"""
+        self.inboxes = inboxes
+
+        """/*
+            var: inbox
+            The receiving end of this worker's inbox
+        */"""
+        self.inbox = inbox
+        inbox.setblocking(False)
+
+    """/*
+        Group: Static Methods
+    */"""
+
+    """/*
+        Function: run
+        Entry point of a worker process. Runs a worker until the supervisor
+        sets the stopping event
+
+        Parameters:
+            int index - The number of this worker
+            DictProxy directory - Shared map of room ID to worker index
+            ListProxy loads - Shared list of the rooms open on each worker
+            list inboxes - The sending end of each worker's inbox
+            Socket inbox - The receiving end of this worker's inbox
+            Queue logs - Queue the worker's log messages are put on
+            Event stopping - Set by the supervisor to close the worker
+            dict options - Any other arguments taken by <RoomServer.__init__>
+    */"""
+    def run(index, directory, loads, inboxes, inbox, logs, stopping,
+            options):
+        def log(msg):
+            logs.put('(worker %i) %s' % (index, msg))
+        try:
+            worker = RoomWorker(index, directory, loads, inboxes, inbox,
+                                log=log, **options)
+        except OSError as e:
+            log('Failed to start: ' + str(e))
+            return
+
+        def waitForStop():
+            stopping.wait()
+            worker.close()
+        Thread(target=waitForStop, daemon=True).start()
+
+        try:
+            worker.listen()
+        except KeyboardInterrupt:
+            # The supervisor closes the workers on interrupt
+            pass
+
+    """/*
+        Group: Event Loop Methods
+    */"""
+
+    """/*
+        Function: _serve
+        Coroutine accepting connections and hand-offs until the worker is
+        closed
+    */"""
+    async def _serve(self):
+        self.loop.add_reader(self.inbox, self._receiveHandOff)
+        try:
+            await super(RoomWorker, self)._serve()
+        finally:
+            self.loop.remove_reader(self.inbox)
+
+    """/*
+        Function: _room
+        Finds an open room. A room is only created here if the directory
+        gives it to this worker
+
+        Parameters:
+            string roomId - The ID of the room
+            boolean create - Whether to create the room if it is not open
+
+        Returns:
+            ArenaRoom room - The room, or None if it is not open here and was
+                             not created
+    */"""
+    def _room(self, roomId, create=False):
+        room = super(RoomWorker, self)._room(roomId)
+        if room is not None or not create:
+            return room
+        if self._owner(roomId, True) != self.index:
+            return None
+        room = super(RoomWorker, self)._room(roomId, True)
+        self.loads[self.index] = len(self.rooms)
+        return room
+
+    """/*
+        Function: _roomFinished
+        Forgets a room once its task has finished, removing it from the
+        directory
+    */"""
+    def _roomFinished(self, room):
+        super(RoomWorker, self)._roomFinished(room)
+        try:
+            if (room.roomId not in self.rooms and
+                    self.directory.get(room.roomId) == self.index):
+                self.directory.pop(room.roomId, None)
+            self.loads[self.index] = len(self.rooms)
+        except (OSError, EOFError):
+            # The supervisor has already shut the directory down
+            pass
+
+    """/*
+        Function: _owner
+        Looks a room up in the directory, claiming it for the least loaded
+        worker if asked to
+
+        Parameters:
+            string roomId - The ID of the room
+            boolean create - Whether to claim the room if it has no owner
+
+        Returns:
+            int index - The worker hosting the room, or None
+    */"""
+    def _owner(self, roomId, create):
+        owner = self.directory.get(roomId)
+        if owner is None and create:
+            loads = list(self.loads)
+            owner = self.directory.setdefault(
+                roomId, loads.index(min(loads)))
+        return owner
+
+    """/*
+        Function: _listsDefaultRoom
+        Whether this worker answers broadcasts for the default room while
+        it is not open. Every worker answers for its own rooms, so only the
+        first lists the default room, and only while no worker hosts it
+
+        Returns:
+            boolean lists - True if this worker lists the default room
+    */"""
+    def _listsDefaultRoom(self):
+        try:
+            return self.index == 0 and self._owner('', False) is None
+        except (OSError, EOFError):
+            return False
+
+    """/*
+        Group: Hand-off Methods
+    */"""
+
+    """/*
+        Function: _forward
+        Hands a connection off to the worker hosting its room
+
+        Parameters:
+            AsyncConnection connection - The connection to pass on
+            string roomId - The room the connection is for
+            bytes data - Everything read from the connection so far
+            boolean create - Whether the request would create the room
+
+        Returns:
+            boolean forwarded - True if the connection was handed off
+
+        Raises:
+            ValueError - If the data is longer than <MAX_HANDOFF>, so would
+                         be cut short by the owner
+    */"""
+    def _forward(self, connection, roomId, data, create):
+        room = self.rooms.get(roomId)
+        if room is not None and not room.closed:
+            return False
+        owner = self._owner(roomId, create)
+        if owner is None or owner == self.index:
+            return False
+        if len(data) > RoomWorker.MAX_HANDOFF:
+            raise ValueError("Request too long to hand off")
+        fd = connection.writer.get_extra_info('socket').fileno()
+        try:
+            self.inboxes[owner].sendmsg(
+                [data], [(SOL_SOCKET, SCM_RIGHTS, array('i', [fd]))])
+        except OSError as e:
+            self.log('Hand-off to worker %i failed: %s' % (owner, e))
+            return False
+        return True
+
+    """/*
+        Function: _receiveHandOff
+        Accepts a connection handed off by another worker. Called by the
+        event loop whenever the inbox is readable
+    */"""
+    def _receiveHandOff(self):
+        fds = array('i')
+        try:
+            data, ancdata, _, _ = self.inbox.recvmsg(
+                RoomWorker.MAX_HANDOFF, CMSG_LEN(fds.itemsize))
+        except OSError:
+            return
+        for level, kind, payload in ancdata:
+            if level == SOL_SOCKET and kind == SCM_RIGHTS:
+                fds.frombytes(
+                    payload[:len(payload) - len(payload) % fds.itemsize])
+        for fd in fds:
+            sock = socket(fileno=fd)
+            sock.setblocking(False)
+            self.loop.create_task(self._serveHandOff(sock, data))
+
+    """/*
+        Function: _serveHandOff
+        Coroutine handling a connection handed off by another worker as if
+        it had been accepted here
+
+        Parameters:
+            Socket sock - The handed off connection
+            bytes data - The data the other worker read from it
+    */"""
+    async def _serveHandOff(self, sock, data):
+        try:
+            reader, writer = await asyncio.open_connection(sock=sock)
+        except OSError:
+            sock.close()
+            return
+        await self._handleConnection(reader, writer, data)
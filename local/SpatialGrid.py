@@ -0,0 +1,115 @@
+from collections import defaultdict
+from math import ceil
+
+"""/*
+    Class: SpatialGrid
+    Uniform grid spatial index over points in the arena, each tagged with a
+    key.
+
+    Points are bucketed into square cells. With cells as large as the
+    query radius, a query only looks at the 3x3 cells around its centre,
+    so its cost depends on how crowded the area is rather than on the
+    number of points in the arena. Building the grid is a single pass over
+    the points, so it is cheap to rebuild from scratch whenever they move.
+
+    Usage:
+        (start code (py))
+            grid = SpatialGrid(300)
+            grid.insert(playerId, x, y)
+            nearby = grid.near(x, y, 300)
+        (end code)
+*/"""
+class SpatialGrid:
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates an empty grid
+
+        Parameters:
+            float cellSize - Width and height of each cell, in pixels
+    */"""
+    def __init__(self, cellSize):
+        if cellSize <= 0:
+            raise ValueError("Cell size must be positive")
+
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: cellSize
+            Width and height of each cell, in pixels
+        */"""
+        self.cellSize = cellSize
+
+        """/*
+            var: cells
+            Map of (column, row) to a list of the (key, x, y) points in that
+            cell
+        */"""
+        self.cells = defaultdict(list)
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: insert
+        Adds a point to the grid
+
+        Parameters:
+            key - The key returned by <near> when the point is found
+            float x - x coordinate of the point
+            float y - y coordinate of the point
+    */"""
+    def insert(self, key, x, y):
+        self.cells[self._cell(x, y)].append((key, x, y))
+
+    """/*
+        Function: near
+        Finds the keys of every point within a radius of a position
+
+        Parameters:
+            float x - x coordinate of the centre
+            float y - y coordinate of the centre
+            float radius - The distance to search, in pixels
+
+        Returns:
+            set keys - The keys of the points found
+    */"""
+    def near(self, x, y, radius):
+        column, row = self._cell(x, y)
+        reach = int(ceil(radius / self.cellSize))
+        radiusSquared = radius * radius
+        keys = set()
+        for i in range(column - reach, column + reach + 1):
+            for j in range(row - reach, row + reach + 1):
+                cell = self.cells.get((i, j))
+                if cell is None:
+                    continue
+                for key, pointX, pointY in cell:
+                    if (pointX - x) ** 2 + (pointY - y) ** 2 <= radiusSquared:
+                        keys.add(key)
+        return keys
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _cell
+        Finds the cell a point falls in
+
+        Parameters:
+            float x - x coordinate of the point
+            float y - y coordinate of the point
+
+        Returns:
+            tuple cell - The (column, row) of the cell
+    */"""
+    def _cell(self, x, y):
+        return int(x // self.cellSize), int(y // self.cellSize)
@@ -0,0 +1,209 @@
+"""/*
+    Class: TickClock
+    Schedules the server's fixed rate game ticks and keeps account of how
+    well it kept to them.
+
+    Tick deadlines are spaced exactly 1 / <rate> seconds apart, so the rate
+    does not drift with the time each tick takes. A tick that starts more
+    than a whole period late has missed one or more deadlines. The missed
+    ticks are skipped rather than run back to back, and counted in
+    <missed>. A tick whose work takes longer than a period is counted in
+    <overruns>.
+
+    All times are in seconds from time.monotonic
+
+    Usage:
+        (start code (py))
+            clock = TickClock(30, monotonic())
+            while running:
+                wait(clock.timeout(monotonic()))
+                if clock.due(monotonic()):
+                    clock.advance(monotonic())
+                    tick()
+                    clock.finish(monotonic())
+        (end code)
+*/"""
+class TickClock:
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Starts the clock, with the first tick due immediately
+
+        Parameters:
+            float rate - Ticks per second
+            float now - The current time
+    */"""
+    def __init__(self, rate, now):
+        if rate <= 0:
+            raise ValueError("Tick rate must be positive")
+
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: rate
+            Ticks per second
+        */"""
+        self.rate = rate
+
+        """/*
+            var: period
+            Seconds between tick deadlines
+        */"""
+        self.period = 1 / rate
+
+        """/*
+            var: nextTick
+            The deadline of the next tick
+        */"""
+        self.nextTick = now
+
+        """/*
+            var: start
+            The time the clock was started
+        */"""
+        self.start = now
+
+        """/*
+            var: deadline
+            The deadline of the current tick
+        */"""
+        self.deadline = now
+
+        """/*
+            var: ticks
+            The number of ticks run
+        */"""
+        self.ticks = 0
+
+        """/*
+            var: missed
+            The number of tick deadlines that passed without a tick
+        */"""
+        self.missed = 0
+
+        """/*
+            var: overruns
+            The number of ticks that took longer than <period> to run
+        */"""
+        self.overruns = 0
+
+        """/*
+            var: maxLateness
+            The latest any tick started after its deadline, in seconds
+        */"""
+        self.maxLateness = 0.0
+
+        """/*
+            var: busy
+            Total seconds spent running ticks
+        */"""
+        self.busy = 0.0
+
+        """/*
+            var: _tickStart
+            The time the current tick started
+        */"""
+        self._tickStart = now
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: timeout
+        Reports how long the server can wait for input before the next tick
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            float timeout - Seconds until the next tick is due, or 0 if it is
+                            already due
+    */"""
+    def timeout(self, now):
+        return max(self.nextTick - now, 0)
+
+    """/*
+        Function: due
+        Reports whether it is time to run a tick
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            boolean due - True if <advance> should be called
+    */"""
+    def due(self, now):
+        return now >= self.nextTick
+
+    """/*
+        Function: advance
+        Records the start of a tick, and sets the deadline of the next
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            int missed - The number of deadlines missed since the last tick
+    */"""
+    def advance(self, now):
+        lateness = max(now - self.nextTick, 0)
+        missed = int(lateness // self.period)
+        self.deadline = self.nextTick + missed * self.period
+        self.nextTick = self.deadline + self.period
+        self.ticks += 1
+        self.missed += missed
+        self.maxLateness = max(self.maxLateness, lateness)
+        self._tickStart = now
+        return missed
+
+    """/*
+        Function: elapsed
+        Reports the time of the current tick on the game clock. Ticks are
+        timed by their deadline rather than when they actually ran, so the
+        times are exactly <period> apart unless a deadline was missed
+
+        Returns:
+            int elapsed - Milliseconds from the start of the clock to the
+                          deadline of the current tick
+    */"""
+    def elapsed(self):
+        return int(round((self.deadline - self.start) * 1000))
+
+    """/*
+        Function: finish
+        Records the end of the tick started by <advance>
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            float duration - Seconds the tick took to run
+    */"""
+    def finish(self, now):
+        duration = now - self._tickStart
+        self.busy += duration
+        if duration > self.period:
+            self.overruns += 1
+        return duration
+
+    """/*
+        Function: summary
+        Describes the clock's accounting, for the server log
+
+        Returns:
+            string summary - The tick rate, number of ticks, missed deadlines,
+                             overruns, worst lateness and mean tick time
+    */"""
+    def summary(self):
+        meanTime = self.busy / self.ticks if self.ticks else 0
+        return ('%i ticks at %gHz, %i deadlines missed, %i overruns, '
+                'worst lateness %.1fms, mean tick time %.2fms' % (
+                    self.ticks, self.rate, self.missed, self.overruns,
+                    self.maxLateness * 1000, meanTime * 1000))
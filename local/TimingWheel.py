@@ -0,0 +1,193 @@
+from math import ceil
+
+"""/*
+    Class: TimingWheel
+    Runs callbacks at their deadlines from the server's own loop, without
+    any timer threads.
+
+    Time is cut into ticks of <resolution> seconds, and the wheel is a ring
+    of <slots>, one per tick. A timer is put in the slot of the first tick
+    at or after its deadline, so scheduling and cancelling a timer are a
+    single dict operation each. <advance> visits the slots of the ticks
+    that have passed since it was last called, and runs the timers that
+    are due in them. Timers more than a full turn of the wheel away share
+    a slot with nearer ones, and are left in it until their own tick comes
+    round.
+
+    Every timer has a key, and scheduling a key that already has a timer
+    moves it, so a connection needs no more than one timer per purpose.
+
+    All times are in seconds from time.monotonic
+
+    Usage:
+        (start code (py))
+            timers = TimingWheel(monotonic())
+            timers.schedule(('ping', client), monotonic() + 1, ping, client)
+            while running:
+                wait(timers.timeout(monotonic()))
+                timers.advance(monotonic())
+        (end code)
+*/"""
+class TimingWheel:
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Creates an empty wheel
+
+        Parameters:
+            float now - The current time
+            float resolution - Seconds per tick, the most a timer may run
+                               after its deadline. Defaults to 0.05
+            int slots - The number of ticks in a turn of the wheel.
+                        Defaults to 512
+    */"""
+    def __init__(self, now, resolution=0.05, slots=512):
+        if resolution <= 0:
+            raise ValueError("Resolution must be positive")
+
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: resolution
+            Seconds per tick
+        */"""
+        self.resolution = resolution
+
+        """/*
+            var: slots
+            List with a dict per tick of the turn, of keys against the
+            (tick, callback, args) of their timers
+        */"""
+        self.slots = [{} for i in range(slots)]
+
+        """/*
+            var: tick
+            The last tick that <advance> ran the timers of
+        */"""
+        self.tick = int(now / resolution)
+
+        """/*
+            var: _timers
+            Dict of the keys of every pending timer against their tick
+        */"""
+        self._timers = {}
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: schedule
+        Sets a timer, replacing any timer the key already has
+
+        Parameters:
+            key - Any hashable value naming the timer
+            float deadline - The time the timer is due. A deadline that has
+                             already passed is due on the next tick
+            func callback - The function to run once the timer is due
+            args - The arguments to pass to it
+    */"""
+    def schedule(self, key, deadline, callback, *args):
+        self.cancel(key)
+        tick = max(int(ceil(deadline / self.resolution)), self.tick + 1)
+        self.slots[tick % len(self.slots)][key] = (tick, callback, args)
+        self._timers[key] = tick
+
+    """/*
+        Function: cancel
+        Removes a timer
+
+        Parameters:
+            key - The name of the timer
+
+        Returns:
+            boolean cancelled - False if the key had no timer
+    */"""
+    def cancel(self, key):
+        tick = self._timers.pop(key, None)
+        if tick is None:
+            return False
+        del self.slots[tick % len(self.slots)][key]
+        return True
+
+    """/*
+        Function: advance
+        Runs every timer that is due, in the order of their ticks. A
+        callback may schedule or cancel timers, including its own
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            int fired - The number of timers run
+    */"""
+    def advance(self, now):
+        target = int(now / self.resolution)
+        # After more than a turn every slot only needs visiting once
+        self.tick = max(self.tick, target - len(self.slots))
+        fired = 0
+        while self.tick < target:
+            self.tick += 1
+            slot = self.slots[self.tick % len(self.slots)]
+            for key in list(slot):
+                timer = slot.get(key)
+                if timer is None or timer[0] > target:
+                    continue  # Cancelled, or due on a later turn
+                del slot[key]
+                del self._timers[key]
+                timer[1](*timer[2])
+                fired += 1
+        return fired
+
+    """/*
+        Function: timeout
+        Finds how long the owner can wait before it next needs to
+        <advance> the wheel
+
+        Parameters:
+            float now - The current time
+
+        Returns:
+            float timeout - Seconds until the next tick with a timer in its
+                            slot, at most a turn of the wheel, or None if
+                            there are no timers
+    */"""
+    def timeout(self, now):
+        if not self._timers:
+            return None
+        tick = self.tick + 1
+        while tick <= self.tick + len(self.slots):
+            if self.slots[tick % len(self.slots)]:
+                break
+            tick += 1
+        return max(tick * self.resolution - now, 0)
+
+    """/*
+        Function: __contains__
+        Reports whether a key has a pending timer
+
+        Parameters:
+            key - The name of the timer
+
+        Returns:
+            boolean pending - True if the timer has not run or been
+                              cancelled yet
+    */"""
+    def __contains__(self, key):
+        return key in self._timers
+
+    """/*
+        Function: __len__
+        Counts the pending timers
+
+        Returns:
+            int count - The number of pending timers
+    */"""
+    def __len__(self):
+        return len(self._timers)
@@ -0,0 +1,592 @@
+from .ArenaPages import ArenaPages
+from .HttpRequest import HttpRequest
+from concurrent.futures import CancelledError, TimeoutError as FutureTimeout
+from http.cookies import CookieError, SimpleCookie
+from json import dumps, loads
+import os
+from socket import *
+from threading import Thread
+from time import monotonic
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+"""/*
+    Class: WebFrontEnd
+    HTTP/1.1 server for the Arena web pages, run alongside an <ArenaServer>
+    so that no web server with CGI is needed.
+
+    Serves the static pages, scripts, styles and images, the saved game
+    stats, and the pages and AJAX endpoints of the cgi-bin scripts at the
+    same paths, so every relative link keeps working:
+
+        (start table)
+        /cgi-bin/lobby.py        The lobby page, or its state as JSON
+        /cgi-bin/join_game.py    Joins a lobby, setting the game cookies
+        /cgi-bin/start_game.py   Readies the player to start the game
+        /cgi-bin/list_games.py   Lists this server and the others found
+        /cgi-bin/game_stats.py   Lists the saved game stats
+        (end table)
+
+    Each connection is handled in its own thread and kept open between
+    requests. Lobby requests for the server the front end belongs to are
+    passed straight to its state owner by <ArenaServer._webRequest>.
+    Requests for any other server, or for a room, are sent to it over TCP
+    as the cgi-bin scripts do.
+
+    Usage:
+        (start code (py))
+            frontEnd = WebFrontEnd(server, 8080, log=server.log)
+            frontEnd.start()
+            ...
+            frontEnd.close()
+        (end code)
+*/"""
+class WebFrontEnd:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: KEEP_ALIVE
+        Seconds an idle connection is kept open for its next request
+    */"""
+    KEEP_ALIVE = 15
+
+    """/*
+        var: SEARCH_INTERVAL
+        Seconds the servers found by a broadcast are listed for before
+        another broadcast is sent
+    */"""
+    SEARCH_INTERVAL = 10
+
+    """/*
+        var: STATIC_FILES
+        Paths of the single files served from the root directory
+    */"""
+    STATIC_FILES = ('index.html', 'cgi-bin/game.html')
+
+    """/*
+        var: STATIC_DIRECTORIES
+        Paths of the directories whose files are served from the root
+        directory
+    */"""
+    STATIC_DIRECTORIES = ('images/', 'scripts/', 'styles/')
+
+    """/*
+        var: CONTENT_TYPES
+        Map of file extensions to the Content-Type they are served with
+    */"""
+    CONTENT_TYPES = {
+        '.ast': 'application/json',
+        '.css': 'text/css',
+        '.gif': 'image/gif',
+        '.html': 'text/html; charset=utf-8',
+        '.ico': 'image/x-icon',
+        '.jpg': 'image/jpeg',
+        '.js': 'application/javascript',
+        '.json': 'application/json',
+        '.png': 'image/png',
+        '.svg': 'image/svg+xml'
+    }
+
+    """/*
+        var: REASONS
+        Map of the status codes sent to their reason phrases
+    */"""
+    REASONS = {
+        200: 'OK',
+        303: 'See Other',
+        400: 'Bad Request',
+        404: 'Not Found',
+        405: 'Method Not Allowed',
+        500: 'Internal Server Error'
+    }
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Binds the front end to its port
+
+        Parameters:
+            ArenaServer server - The server whose lobby the pages show
+            int port - The port to serve the pages on
+            string root - The directory holding index.html and the other
+                          static files. Defaults to the directory above
+                          this package
+            func log - A function to log messages into the <LogPanel>
+    */"""
+    def __init__(self, server, port, root=None, log=print):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: server
+            The <ArenaServer> lobby requests are passed to
+        */"""
+        self.server = server
+
+        """/*
+            var: port
+            The port the pages are served on
+        */"""
+        self.port = port
+
+        """/*
+            var: root
+            The directory static files are served from
+        */"""
+        self.root = os.path.abspath(
+            root or os.path.dirname(os.path.dirname(__file__)))
+
+        """/*
+            var: statsDirectory
+            The directory the server saves game stats in
+        */"""
+        self.statsDirectory = os.path.abspath('stats')
+
+        """/*
+            var: log
+            Callable passed from the GUI to handle message outputs
+        */"""
+        self.log = log
+
+        """/*
+            var: closed
+            Flag for whether the front end has been closed
+        */"""
+        self.closed = False
+
+        """/*
+            var: endpoints
+            Map of the paths of the cgi-bin scripts to the methods serving
+            them
+        */"""
+        self.endpoints = {
+            '/cgi-bin/lobby.py': self._lobbyPage,
+            '/cgi-bin/join_game.py': self._joinGame,
+            '/cgi-bin/start_game.py': self._startGame,
+            '/cgi-bin/list_games.py': self._listGames,
+            '/cgi-bin/game_stats.py': self._gameStats
+        }
+
+        """/*
+            var: localAddresses
+            Host names the server the front end belongs to is known by
+        */"""
+        self.localAddresses = {'', 'localhost', '127.0.0.1', '0.0.0.0'}
+        try:
+            self.localAddresses.add(gethostbyname(gethostname()))
+        except OSError:
+            pass
+
+        """/*
+            var: otherServers
+            The other servers found by the last broadcast, as returned by
+            <ArenaPages.findServers>. Replaced whole by <_searchServers>
+        */"""
+        self.otherServers = {}
+
+        """/*
+            var: searchError
+            Any error met by the last broadcast, or None
+        */"""
+        self.searchError = None
+
+        """/*
+            var: searchedAt
+            The time.monotonic time the last broadcast was sent, or None
+            if no broadcast has been sent
+        */"""
+        self.searchedAt = None
+
+        sock = socket()
+        sock.setsockopt(SOL_SOCKET, SO_REUSEADDR, 1)
+        sock.bind(('', port))
+
+        """/*
+            var: sock
+            The <Socket> the front end listens on
+        */"""
+        self.sock = sock
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: start
+        Starts accepting connections in a new thread
+    */"""
+    def start(self):
+        self.sock.listen(64)
+        self.log('Serving web pages on port %s' % (self.port))
+        Thread(target=self._accept, daemon=True).start()
+        self._searchServers()
+
+    """/*
+        Function: close
+        Stops accepting connections. Safe to call from any thread
+    */"""
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.sock.shutdown(SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    """/*
+        Group: Connection Handling Methods
+    */"""
+
+    """/*
+        Function: _accept
+        Accepts connections until the front end is closed, handling each in
+        a new thread
+    */"""
+    def _accept(self):
+        while not self.closed:
+            try:
+                client, address = self.sock.accept()
+            except OSError:
+                break
+            Thread(
+                target=self._handleConnection,
+                args=(client, address),
+                daemon=True
+            ).start()
+
+    """/*
+        Function: _handleConnection
+        Answers the requests sent on a connection, until the client closes
+        it, asks for it to be closed, or leaves it idle for <KEEP_ALIVE>
+        seconds
+
+        Parameters:
+            Socket client - The <Socket> of the connection
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the client
+    */"""
+    def _handleConnection(self, client, address):
+        client.settimeout(WebFrontEnd.KEEP_ALIVE)
+        buffer = bytearray()
+        try:
+            while not self.closed:
+                try:
+                    parsed = HttpRequest.parse(buffer)
+                except ValueError:
+                    client.sendall(WebFrontEnd._response(400, (), b'', False))
+                    return
+                if parsed is None:
+                    data = client.recv(65536)
+                    if not data:
+                        return
+                    buffer += data
+                    continue
+                request, consumed = parsed
+                del buffer[:consumed]
+                keepAlive = WebFrontEnd._keepAlive(request)
+                status, headers, body = self._respond(request, address)
+                if request.method == 'HEAD':
+                    body = b''
+                client.sendall(WebFrontEnd._response(
+                    status, headers, body, keepAlive))
+                if not keepAlive:
+                    return
+        except OSError:
+            pass
+        finally:
+            client.close()
+
+    """/*
+        Function: _respond
+        Finds the endpoint or file a request is for and builds the response
+
+        Parameters:
+            HttpRequest request - The request
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the client
+
+        Returns:
+            int status - The status code
+            list headers - (name, value) tuples of the response headers
+            bytes body - The response body
+    */"""
+    def _respond(self, request, address):
+        if request.method not in ('GET', 'HEAD', 'POST'):
+            return 405, [('Allow', 'GET, HEAD, POST')], b''
+        target = urlsplit(request.target)
+        path = unquote(target.path)
+        endpoint = self.endpoints.get(path)
+        if endpoint is None:
+            return self._serveFile(path)
+        fields = parse_qs(target.query, keep_blank_values=True)
+        if (request.method == 'POST' and request.header(
+                'content-type', '').startswith(
+                    'application/x-www-form-urlencoded')):
+            for name, values in parse_qs(request.body.decode(
+                    'utf-8', 'replace'), keep_blank_values=True).items():
+                fields.setdefault(name, []).extend(values)
+        cookie = SimpleCookie()
+        try:
+            cookie.load(request.header('cookie', ''))
+        except CookieError:
+            pass
+        status, headers, body = endpoint(request, address, fields, cookie)
+        return status, [('Cache-Control', 'no-cache')] + headers, body
+
+    """/*
+        Function: _serveFile
+        Reads a static file, or a saved game's stats
+
+        Parameters:
+            string path - The decoded path of the request
+
+        Returns:
+            As in <_respond>
+    */"""
+    def _serveFile(self, path):
+        path = path.lstrip('/') or 'index.html'
+        segments = path.split('/')
+        if '' in segments or '..' in segments or '\\' in path:
+            return 404, [], b''
+        if path.startswith('stats/') and path.endswith('.ast'):
+            directory = self.statsDirectory
+            path = path[len('stats/'):]
+        elif (path in WebFrontEnd.STATIC_FILES or
+                path.startswith(WebFrontEnd.STATIC_DIRECTORIES)):
+            directory = self.root
+        else:
+            return 404, [], b''
+        # Links may point anywhere, so check where the path really leads
+        directory = os.path.realpath(directory)
+        filename = os.path.realpath(os.path.join(directory, path))
+        if not filename.startswith(directory + os.sep):
+            return 404, [], b''
+        try:
+            with open(filename, 'rb') as staticFile:
+                body = staticFile.read()
+        except OSError:
+            return 404, [], b''
+        contentType = WebFrontEnd.CONTENT_TYPES.get(
+            os.path.splitext(filename)[1].lower(), 'application/octet-stream')
+        return 200, [('Content-Type', contentType)], body
+
+    """/*
+        Function: _lobbyRequest
+        Sends a request to the lobby of a server and returns its response.
+        The server the front end belongs to is asked directly, and any other
+        server over a new connection
+
+        Parameters:
+            HttpRequest request - The request being answered
+            Tuple[string, int] address - <Tuple> containing address and port
+                                         of the client
+            string gameAddress - ip:port of the server
+            string room - The room on the server, or '' for the default room
+            string msg - The lobby request
+
+        Returns:
+            string response - The server's response
+
+        Raises:
+            OSError - If the server could not be reached
+            ValueError - If the address is malformed, or the server did not
+                         answer in time
+    */"""
+    def _lobbyRequest(self, request, address, gameAddress, room, msg):
+        host, _, port = gameAddress.rpartition(':')
+        port = int(port)
+        hostName = request.header('host', '').rpartition(':')[0]
+        if (not room and port == self.server.port and
+                (host in self.localAddresses or host == hostName)):
+            try:
+                return self.server._webRequest(msg, address).decode()
+            except (CancelledError, FutureTimeout, RuntimeError):
+                raise ValueError("The server did not answer")
+        return ArenaPages.lobbyRequest(gameAddress, room, msg)
+
+    """/*
+        Group: Endpoint Methods
+        Each takes the request, the client's address, the fields of the
+        query string and form, and the cookies sent, and returns the
+        response as in <_respond>
+    */"""
+
+    """/*
+        Function: _lobbyPage
+        Serves lobby.py: the lobby page, or with format=json the state of
+        the lobby
+    */"""
+    def _lobbyPage(self, request, address, fields, cookie):
+        asJson = fields.get('format', [''])[0] == 'json'
+        try:
+            playerNum = int(cookie['playerNum'].value)
+            room = cookie['gameRoom'].value if 'gameRoom' in cookie else ''
+            data = loads(self._lobbyRequest(
+                request, address, cookie['gameAddress'].value, room,
+                'query=' + str(playerNum)))
+            players, started = data['players'], data['started']
+        except (KeyError, TypeError, ValueError, OSError) as e:
+            # Redirect home
+            if asJson:
+                return 500, [], b''
+            return 303, [('Location', '../?' + quote(str(e)))], b''
+        if asJson:
+            return 200, [('Content-Type', 'application/json')], dumps(
+                {'players': players, 'started': started}).encode()
+        return WebFrontEnd._page(ArenaPages.lobbyPage(players, playerNum))
+
+    """/*
+        Function: _joinGame
+        Serves join_game.py: joins the lobby of the server in the form with
+        <ArenaPages.joinGame>. Sets the game cookies on success, or responds
+        with the error
+    */"""
+    def _joinGame(self, request, address, fields, cookie):
+        if not fields:
+            return 200, [('Content-Type', 'text/html')], b''
+        field = lambda name, default: fields.get(name, [default])[0]
+        error = ArenaPages.joinGame(
+            cookie,
+            field('username', 'Guest'),
+            field('ipAddress', '') + ':' + field('port', '44444'),
+            field('password', 'None'),
+            field('room', ''),
+            lambda gameAddress, room, msg: self._lobbyRequest(
+                request, address, gameAddress, room, msg))
+        if error:
+            return 200, [('Content-Type', 'text/html')], error.encode()
+        return 200, [('Content-Type', 'text/html')] + [
+            ('Set-Cookie', morsel.OutputString())
+            for morsel in cookie.values()], b''
+
+    """/*
+        Function: _startGame
+        Serves start_game.py: tells the server the player is ready to start
+        and responds with whether they are
+    */"""
+    def _startGame(self, request, address, fields, cookie):
+        try:
+            room = cookie['gameRoom'].value if 'gameRoom' in cookie else ''
+            response = loads(self._lobbyRequest(
+                request, address, cookie['gameAddress'].value, room,
+                'start=' + cookie['playerNum'].value))
+        except (KeyError, ValueError, OSError) as e:
+            return 200, [('Content-Type', 'text/plain')], str(e).encode()
+        return 200, [('Content-Type', 'application/json')], dumps(
+            response).encode()
+
+    """/*
+        Function: _listGames
+        Serves list_games.py: lists this server from its own state, and the
+        other servers found by the last broadcast. A new broadcast is sent
+        in the background once the last one is <SEARCH_INTERVAL> seconds
+        old, so the page never waits for one
+    */"""
+    def _listGames(self, request, address, fields, cookie):
+        if (self.searchedAt is None or monotonic() - self.searchedAt >
+                WebFrontEnd.SEARCH_INTERVAL):
+            self._searchServers()
+        servers = dict(self.otherServers)
+        if not self.server.started:
+            # Listed under the address the browser reached the front end on
+            host = request.header('host', '').rpartition(':')[0]
+            state = self.server._broadcastState()
+            servers[host or gethostbyname(gethostname()),
+                    state['port'], None] = state['data']
+        return WebFrontEnd._page(
+            ArenaPages.serverListPage(servers, self.searchError or ''))
+
+    """/*
+        Function: _searchServers
+        Starts a broadcast for other servers in a new thread, which stores
+        the servers that answer in <otherServers>
+    */"""
+    def _searchServers(self):
+        self.searchedAt = monotonic()
+        Thread(target=self._findServers, daemon=True).start()
+
+    """/*
+        Function: _findServers
+        Broadcasts for servers with <ArenaPages.findServers>, leaving out
+        the server the front end belongs to. Run in its own thread
+    */"""
+    def _findServers(self):
+        servers, self.searchError = ArenaPages.findServers()
+        self.otherServers = {
+            (host, port, room): data
+            for (host, port, room), data in servers.items()
+            if not (port == self.server.port and room is None and
+                    host in self.localAddresses)}
+
+    """/*
+        Function: _gameStats
+        Serves game_stats.py: lists the saved game stats, latest first
+    */"""
+    def _gameStats(self, request, address, fields, cookie):
+        return WebFrontEnd._page(ArenaPages.statsPage(self.statsDirectory))
+
+    """/*
+        Group: Static Methods
+    */"""
+
+    """/*
+        Function: _page
+        Builds the response for a page
+        Static Method
+
+        Parameters:
+            string page - The HTML of the page
+
+        Returns:
+            As in <_respond>
+    */"""
+    def _page(page):
+        return 200, [('Content-Type', 'text/html; charset=utf-8')], \
+            page.encode()
+
+    """/*
+        Function: _keepAlive
+        Reports whether a connection should be kept open after a request
+        Static Method
+
+        Parameters:
+            HttpRequest request - The request
+
+        Returns:
+            boolean keepAlive - True if the client did not ask to close it.
+                                HTTP/1.0 clients have to ask to keep it
+    */"""
+    def _keepAlive(request):
+        connection = request.headerTokens('connection')
+        if request.version == 'HTTP/1.0':
+            return 'keep-alive' in connection
+        return 'close' not in connection
+
+    """/*
+        Function: _response
+        Builds an HTTP/1.1 response
+        Static Method
+
+        Parameters:
+            int status - The status code
+            list headers - (name, value) tuples of the response headers
+            bytes body - The response body
+            boolean keepAlive - Whether the connection is kept open
+
+        Returns:
+            bytes response - The status line, headers and body
+    */"""
+    def _response(status, headers, body, keepAlive):
+        head = ['HTTP/1.1 %i %s' % (status, WebFrontEnd.REASONS[status])]
+        head.extend('%s: %s' % header for header in headers)
+        head.append('Content-Length: %i' % (len(body)))
+        head.append('Connection: ' + ('keep-alive' if keepAlive else 'close'))
+        return ('\r\n'.join(head) + '\r\n\r\n').encode('iso-8859-1') + body
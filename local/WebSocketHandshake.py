@@ -0,0 +1,225 @@
+from .FrameReader import FrameReader
+from .HttpRequest import HttpRequest
+
+"""/*
+    Class: WebSocketHandshake
+    Non-blocking state machine for a single game WebSocket handshake, driven
+    by the server's event loop.
+
+    The connection moves through three states:
+
+        (start table)
+        REQUEST     Reading the HTTP upgrade request
+        READY       The 101 response has been sent, waiting for the
+                    client's exvo-arena-ready message
+        COMPLETE    The client is ready to join the game
+        (end table)
+
+    The server decides whether to accept the request, so this class only
+    handles the buffering and parsing. Each call to <readRequest> or
+    <readMessages> does at most one recv, so it never blocks the loop as
+    long as the socket is non-blocking. Servers that read the data
+    themselves pass it to <feedRequest> and <feedMessages> instead.
+*/"""
+class WebSocketHandshake:
+
+    """/*
+        Group: Class Constants
+    */"""
+
+    """/*
+        var: REQUEST
+        State while the upgrade request is being read
+    */"""
+    REQUEST = 0
+
+    """/*
+        var: READY
+        State while waiting for the client's ready message
+    */"""
+    READY = 1
+
+    """/*
+        var: COMPLETE
+        State once the client has sent its ready message
+    */"""
+    COMPLETE = 2
+
+    """/*
+        Group: Constructors
+    */"""
+
+    """/*
+        Constructor: __init__
+        Starts a handshake on a newly accepted socket
+
+        Parameters:
+            socket sock - The accepted client socket
+    */"""
+    def __init__(self, sock):
+        """/*
+            Group: Variables
+        */"""
+
+        """/*
+            var: sock
+            The client socket
+        */"""
+        self.sock = sock
+
+        """/*
+            var: state
+            One of <REQUEST>, <READY> or <COMPLETE>
+        */"""
+        self.state = WebSocketHandshake.REQUEST
+
+        """/*
+            var: request
+            The parsed <HttpRequest>, once it has been read
+        */"""
+        self.request = None
+
+        """/*
+            var: reader
+            The <FrameReader> for the connection, created by <accept>
+        */"""
+        self.reader = None
+
+        """/*
+            var: playerNum
+            The index of the player the connection belongs to, set by the
+            server when it accepts the request
+        */"""
+        self.playerNum = None
+
+        """/*
+            var: protocol
+            The subprotocol chosen by the server
+        */"""
+        self.protocol = None
+
+        """/*
+            var: deflate
+            The negotiated permessage-deflate options, or None
+        */"""
+        self.deflate = None
+
+        """/*
+            var: _buffer
+            Data received before the end of the upgrade request
+        */"""
+        self._buffer = bytearray()
+
+    """/*
+        Group: Public Methods
+    */"""
+
+    """/*
+        Function: readRequest
+        Reads what is available of the upgrade request
+
+        Returns:
+            HttpRequest request - The parsed request once it is complete,
+                                  otherwise None
+
+        Raises:
+            ValueError - If the request is malformed, too large, or the
+                         client closed the connection
+    */"""
+    def readRequest(self):
+        return self.feedRequest(self.sock.recv(4096))
+
+    """/*
+        Function: feedRequest
+        Adds data that has already been received to the upgrade request
+
+        Parameters:
+            bytes data - Raw data received from the client. Empty if the
+                         client closed the connection
+
+        Returns:
+            HttpRequest request - As in <readRequest>
+    */"""
+    def feedRequest(self, data):
+        if not data:
+            raise ValueError("Connection closed during WebSocket handshake")
+        self._buffer += data
+        parsed = HttpRequest.parse(self._buffer)
+        if parsed is None:
+            return None
+        self.request, consumed = parsed
+        del self._buffer[:consumed]
+        return self.request
+
+    """/*
+        Function: accept
+        Sends the 101 response and starts reading frames
+
+        Parameters:
+            bytes response - The handshake response to send
+
+        Returns:
+            list messages - Any messages that arrived along with the request
+    */"""
+    def accept(self, response):
+        self.sock.sendall(response)
+        self.reader = FrameReader(self.sock)
+        if self.deflate:
+            self.reader.enableDeflate(self.deflate['clientContextTakeover'])
+        self.state = WebSocketHandshake.READY
+        remainder = bytes(self._buffer)
+        self._buffer = bytearray()
+        return self._checkReady(self.reader.feed(remainder))
+
+    """/*
+        Function: readMessages
+        Reads what is available of the client's frames
+
+        Returns:
+            list messages - The messages completed by this read
+
+        Raises:
+            ValueError - If the client sent an invalid frame or closed the
+                         connection
+    */"""
+    def readMessages(self):
+        messages = self.reader.read()
+        if self.reader.closed:
+            raise ValueError("Connection closed during WebSocket handshake")
+        return self._checkReady(messages)
+
+    """/*
+        Function: feedMessages
+        Adds frame data that has already been received
+
+        Parameters:
+            bytes data - Raw data received from the client. Empty if the
+                         client closed the connection
+
+        Returns:
+            list messages - As in <readMessages>
+    */"""
+    def feedMessages(self, data):
+        if not data:
+            raise ValueError("Connection closed during WebSocket handshake")
+        return self._checkReady(self.reader.feed(data))
+
+    """/*
+        Group: Private Methods
+    */"""
+
+    """/*
+        Function: _checkReady
+        Moves to <COMPLETE> if the ready message is among the messages
+
+        Parameters:
+            list messages - (opcode, payload) tuples from the <reader>
+
+        Returns:
+            list messages - The same messages
+    */"""
+    def _checkReady(self, messages):
+        for opcode, payload in messages:
+            if opcode == FrameReader.TEXT and payload == 'exvo-arena-ready':
+                self.state = WebSocketHandshake.COMPLETE
+        return messages
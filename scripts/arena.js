@@ -167,6 +167,13 @@ handles updating data by sending and receiving from the <ArenaServer>
     */
     var ajaxInterval;
 
+    /*
+        var: sendInterval
+        Milliseconds between updates sent to the server. Remote players are interpolated between snapshots, so updates don't need to go out every frame.
+        The server lowers the rate when it is under pressure, see <setSendInterval>
+    */
+    var sendInterval = 33;
+
     /*
         var: maxSocketFailures
         The maximum number of consecutive crashes that are allowed to happen before the server is considered closed
@@ -191,6 +198,105 @@ handles updating data by sending and receiving from the <ArenaServer>
     */
     var damages = [];
 
+    /*
+        Group: Binary Protocol Variables
+        Constants for the binary message format described in the server's BinaryProtocol class
+    */
+
+    /*
+        var: binaryProtocol
+        The WebSocket subprotocol that selects binary updates and snapshots
+    */
+    var binaryProtocol = 'exvo-arena-bin3';
+
+    /*
+        var: binaryVersion
+        The version number written into every binary message header
+    */
+    var binaryVersion = 3;
+
+    /*
+        var: binaryUpdate
+        Message type of the local player's update
+    */
+    var binaryUpdate = 1;
+
+    /*
+        var: binarySnapshot
+        Message type of a snapshot from the server
+    */
+    var binarySnapshot = 2;
+
+    /*
+        var: positionScale
+        Number of quantization steps per pixel for positions and velocities
+    */
+    var positionScale = 16;
+
+    /*
+        var: healthScale
+        Number of quantization steps per point of health or damage
+    */
+    var healthScale = 100;
+
+    /*
+        var: updateSequence
+        Sequence number of the next update sent to the server, which ignores updates that arrive after a newer one
+    */
+    var updateSequence = 0;
+
+    /*
+        Group: Delta Snapshot Variables
+        State kept to rebuild the JSON snapshots the server sends as the changes since an acknowledged snapshot
+    */
+
+    /*
+        var: snapshotHistory
+        Object of snapshot sequence numbers to the players received in that snapshot, used as baselines for deltas
+    */
+    var snapshotHistory = {};
+
+    /*
+        var: maxSnapshotHistory
+        The most snapshots kept in <snapshotHistory>
+    */
+    var maxSnapshotHistory = 64;
+
+    /*
+        var: snapshotSequence
+        Sequence number of the last JSON snapshot received, sent back to the server as an acknowledgement
+    */
+    var snapshotSequence;
+
+    /*
+        Group: Interpolation Variables
+        State kept to draw remote <Player>s moving smoothly between the snapshots the server sends
+    */
+
+    /*
+        var: snapshotBuffer
+        Array of the most recent snapshots, oldest first, each holding its server time and the positions of the players in it
+    */
+    var snapshotBuffer = [];
+
+    /*
+        var: maxSnapshotBuffer
+        The most snapshots kept in <snapshotBuffer>
+    */
+    var maxSnapshotBuffer = 16;
+
+    /*
+        var: interpolationDelay
+        Milliseconds behind the server's time that remote <Player>s are drawn, so there is usually a snapshot either side of the time drawn
+    */
+    var interpolationDelay = 100;
+
+    /*
+        var: serverOffset
+        Milliseconds to add to the local clock to get the server's time, estimated from the snapshots received
+    */
+    var serverOffset;
+
     /*
         Class: Bullet
         A Bullet is fired by a <Player>, bounces off walls and damages Players other than the one who fired it
@@ -368,7 +474,7 @@ handles updating data by sending and receiving from the <ArenaServer>
                 for(var i = 0; i < players.length; i ++){
                     if(i !== local){
                         var player = players[i];
-                        if(player !== null && player.isAlive() && collisionBetween(this, player)){
+                        if(player !== null && player.isAlive() && player.inRange && collisionBetween(this, player)){
                             players[local].hit(this, i);
                             this.destroy();
                             break;
@@ -582,6 +688,12 @@ handles updating data by sending and receiving from the <ArenaServer>
             */
             alive : true,
 
+            /*
+                boolean: inRange
+                False while this Player is outside the local Player's area of interest, and the server only sends a summary of it
+            */
+            inRange : true,
+
             /*
                 Group: Methods
             */
@@ -849,7 +961,7 @@ handles updating data by sending and receiving from the <ArenaServer>
                 for(var i = 0;i< players.length;i++){
                     if(i !== local){
                         var other = players[i];
-                        if(other === null) continue;
+                        if(other === null || !other.inRange) continue;
                         if(((this.x + this.size) >= other.x) &&
                             (this.x <=(other.x + other.size)) &&
                             ((this.y + this.size)>= other.y) &&
@@ -911,8 +1023,18 @@ handles updating data by sending and receiving from the <ArenaServer>
                     obj data - JavaScript object containing all of this Player's updated variables from the server
             */
             update : function(data){
+                //Out of range players only have their scoreboard fields sent
+                if(data.summary){
+                    this.alive = data.alive;
+                    this.health = data.health;
+                    this.numBullets = data.numBullets;
+                    this.bullets = [null, null, null];
+                    this.inRange = false;
+                    return;
+                }
                 //Update this player with the data that was sent
                 $.extend(this, data);
+                this.inRange = true;
                 //Update bullets for this player
                 if(this.alive){
                     var player = this;
@@ -1164,7 +1286,7 @@ handles updating data by sending and receiving from the <ArenaServer>
         height = canvas.height;
         width = canvas.width;
         displayRows = $('tbody tr');
-        server = 'ws://' + getCookie('gameAddress');
+        server = 'ws://' + getCookie('gameAddress') + '/' + getCookie('gameRoom');
 
         //Set up socket
         createSocket();
@@ -1188,7 +1310,9 @@ handles updating data by sending and receiving from the <ArenaServer>
     function createSocket(){
         //Set up the websocket and prepare for handshaking
         //Sends the current player num so the server can associate the socket to the player number
-        sock = new WebSocket(server, ['exvo-arena', getCookie('playerNum')]);
+        //Offer the binary protocol first; the server falls back to JSON text if it doesn't support it
+        sock = new WebSocket(server, [binaryProtocol, 'exvo-arena', getCookie('playerNum')]);
+        sock.binaryType = 'arraybuffer';
         //Attach listener to socket for playerSetup method
 
         //Socket will be sent the details for the start of the game
@@ -1224,11 +1348,22 @@ handles updating data by sending and receiving from the <ArenaServer>
     function startGame(){
         //Replace the onmessage for the socket
         sock.onmessage = function(message){
-            var json = JSON.parse(message.data);
+            var json;
+            if(message.data instanceof ArrayBuffer){
+                json = decodeSnapshot(message.data);
+            }
+            else{
+                json = applyDelta(JSON.parse(message.data));
+                if(json === null){
+                    return;
+                }
+            }
+            setSendInterval(json.sendInterval);
+            bufferSnapshot(json);
             updatePlayers(json);
         };
-        //Run the ajax update every 16ms, just before the update method
-        ajaxInterval = window.setInterval(sendUpdate, 16);
+        //Send updates at a lower rate than the frame rate; remote players are interpolated in between
+        ajaxInterval = window.setInterval(sendUpdate, sendInterval);
         //Run the countdown and then start the game
         updateInterval = setInterval(countdown, 1000);
     }
@@ -1266,7 +1401,7 @@ handles updating data by sending and receiving from the <ArenaServer>
         Create some <Obstacle>s for the default map
     */
     function createObstacles(){
-        //Later on will be sent by JSON from pre-designed maps
+        //Replaced by the walls of the server's map once it sends them
         obstacles.push(
             new Obstacle(width/8, height/2, width/2, height/2));
         obstacles.push(
@@ -1295,9 +1430,187 @@ handles updating data by sending and receiving from the <ArenaServer>
         });
         var data = {
             player : players[local],
-            damages : damageData
+            damages : damageData,
+            sequence : updateSequence
+        };
+        updateSequence = (updateSequence + 1) % 4294967296;
+        if(sock.protocol === binaryProtocol){
+            sock.send(encodeUpdate(data));
+        }
+        else{
+            data.ack = snapshotSequence;
+            sock.send('update=' + JSON.stringify(data));
+        }
+    }
+
+    /*
+        Function: setSendInterval
+        Changes how often <sendUpdate> runs to the interval the server asked for
+
+        Parameters:
+            int interval - Milliseconds between updates, or 0 or undefined to keep the current rate
+    */
+    function setSendInterval(interval){
+        if(!interval || interval === sendInterval || ajaxInterval === undefined){
+            return;
+        }
+        sendInterval = interval;
+        clearInterval(ajaxInterval);
+        ajaxInterval = window.setInterval(sendUpdate, sendInterval);
+    }
+
+    /*
+        Group: Binary Protocol Functions
+    */
+
+    /*
+        Function: encodeUpdate
+        Encodes the local player's update in the binary format
+
+        Parameters:
+            obj data - The player, damages and sequence number that would otherwise be sent as JSON
+
+        Returns:
+            ArrayBuffer buffer - The encoded update
+    */
+    function encodeUpdate(data){
+        var bullets = data.player.bullets.filter(function(bullet){
+            return bullet !== null;
+        });
+        var view = new DataView(new ArrayBuffer(
+            6 + 14 + (bullets.length * 10) + 1 + (data.damages.length * 3)));
+        view.setUint8(0, binaryVersion);
+        view.setUint8(1, binaryUpdate);
+        view.setUint32(2, data.sequence, true);
+        var offset = writePlayer(view, 6, data.player, bullets);
+        view.setUint8(offset, data.damages.length);
+        offset += 1;
+        data.damages.forEach(function(damage){
+            view.setUint8(offset, damage.id);
+            view.setUint16(offset + 1, quantize(damage.damage, healthScale, 0, 65535), true);
+            offset += 3;
+        });
+        return view.buffer;
+    }
+
+    /*
+        Function: writePlayer
+        Writes a <Player> and its <Bullet>s into a binary message
+
+        Parameters:
+            DataView view - The message being built
+            int offset - Where the player record starts
+            Player player - The player to write
+            array bullets - The player's bullets that are in flight
+
+        Returns:
+            int offset - Where the next record starts
+    */
+    function writePlayer(view, offset, player, bullets){
+        view.setUint8(offset, player.id);
+        view.setUint8(offset + 1, player.alive ? 1 : 0);
+        view.setUint16(offset + 2, quantize(player.x, positionScale, 0, 65535), true);
+        view.setUint16(offset + 4, quantize(player.y, positionScale, 0, 65535), true);
+        view.setInt16(offset + 6, quantize(player.xChange, positionScale, -32768, 32767), true);
+        view.setInt16(offset + 8, quantize(player.yChange, positionScale, -32768, 32767), true);
+        view.setUint16(offset + 10, quantize(player.health, healthScale, 0, 65535), true);
+        view.setUint8(offset + 12, player.numBullets);
+        view.setUint8(offset + 13, bullets.length);
+        offset += 14;
+        bullets.forEach(function(bullet){
+            view.setUint8(offset, bullet.number);
+            view.setUint8(offset + 1, bullet.bounces);
+            view.setInt16(offset + 2, quantize(bullet.x, positionScale, -32768, 32767), true);
+            view.setInt16(offset + 4, quantize(bullet.y, positionScale, -32768, 32767), true);
+            view.setInt16(offset + 6, quantize(bullet.xChange, positionScale, -32768, 32767), true);
+            view.setInt16(offset + 8, quantize(bullet.yChange, positionScale, -32768, 32767), true);
+            offset += 10;
+        });
+        return offset;
+    }
+
+    /*
+        Function: decodeSnapshot
+        Decodes a binary snapshot from the server into the same shape as the JSON snapshots
+
+        Parameters:
+            ArrayBuffer buffer - The binary snapshot
+
+        Returns:
+            obj json - JavaScript object containing the players and the damages for the local player
+    */
+    function decodeSnapshot(buffer){
+        var view = new DataView(buffer);
+        var json = {
+            players : [],
+            damages : [],
+            sequence : view.getUint32(2, true),
+            time : view.getUint32(6, true)
         };
-        sock.send('update=' + JSON.stringify(data));
+        var offset = 11;
+        for(var i = view.getUint8(10); i > 0; i --){
+            if(view.getUint8(offset + 1) & 2){
+                //Summary of a player outside the area of interest
+                json.players.push({
+                    id : view.getUint8(offset),
+                    alive : (view.getUint8(offset + 1) & 1) === 1,
+                    health : view.getUint16(offset + 10, true) / healthScale,
+                    numBullets : view.getUint8(offset + 12),
+                    summary : true
+                });
+                offset += 14;
+                continue;
+            }
+            var player = {
+                id : view.getUint8(offset),
+                alive : (view.getUint8(offset + 1) & 1) === 1,
+                x : view.getUint16(offset + 2, true) / positionScale,
+                y : view.getUint16(offset + 4, true) / positionScale,
+                xChange : view.getInt16(offset + 6, true) / positionScale,
+                yChange : view.getInt16(offset + 8, true) / positionScale,
+                health : view.getUint16(offset + 10, true) / healthScale,
+                numBullets : view.getUint8(offset + 12),
+                bullets : [null, null, null]
+            };
+            var bullets = view.getUint8(offset + 13);
+            offset += 14;
+            for(var j = 0; j < bullets; j ++){
+                player.bullets[view.getUint8(offset)] = {
+                    bounces : view.getUint8(offset + 1),
+                    x : view.getInt16(offset + 2, true) / positionScale,
+                    y : view.getInt16(offset + 4, true) / positionScale,
+                    xChange : view.getInt16(offset + 6, true) / positionScale,
+                    yChange : view.getInt16(offset + 8, true) / positionScale
+                };
+                offset += 10;
+            }
+            json.players.push(player);
+        }
+        var damageCount = view.getUint8(offset);
+        offset += 1;
+        for(var k = 0; k < damageCount; k ++){
+            json.damages.push(view.getUint16(offset, true) / healthScale);
+            offset += 2;
+        }
+        json.sendInterval = view.getUint16(offset, true);
+        return json;
+    }
+
+    /*
+        Function: quantize
+        Scales a value to an integer and clamps it into the range of its binary field
+
+        Parameters:
+            float value - The value to quantize
+            int scale - The number of steps per unit
+            int low - The smallest value the field can hold
+            int high - The largest value the field can hold
+
+        Returns:
+            int quantized - The quantized value
+    */
+    function quantize(value, scale, low, high){
+        return Math.min(Math.max(Math.round(parseFloat(value) * scale), low), high);
     }
 
     /*
@@ -1321,11 +1634,142 @@ handles updating data by sending and receiving from the <ArenaServer>
         players[local].damagingBullets = [];
     }
 
+    /*
+        Function: applyDelta
+        Rebuilds a full snapshot from one sent as the changes since an earlier snapshot, and keeps it as a baseline for later ones
+
+        Parameters:
+            obj json - The snapshot sent by the server
+
+        Returns:
+            obj json - The snapshot with every player in full, or null if its baseline is no longer kept
+    */
+    function applyDelta(json){
+        if(json.sequence === undefined){
+            return json;
+        }
+        if(json.baseline !== undefined){
+            var baseline = snapshotHistory[json.baseline];
+            if(baseline === undefined){
+                return null;
+            }
+            var players = baseline.slice();
+            json.players.forEach(function(player){
+                players[player.id] = $.extend({}, players[player.id], player);
+            });
+            json.players = players;
+        }
+        snapshotHistory[json.sequence] = json.players;
+        snapshotSequence = json.sequence;
+        //The server only builds deltas against the latest acknowledgement, so older snapshots are no longer needed
+        var sequences = Object.keys(snapshotHistory);
+        sequences.forEach(function(sequence, i){
+            if(sequence < json.baseline || i < sequences.length - maxSnapshotHistory){
+                delete snapshotHistory[sequence];
+            }
+        });
+        //Players take on their data's bullets, so give them copies and keep the baseline intact
+        json.players = json.players.map(function(player){
+            return player === null ? null : $.extend(true, {}, player);
+        });
+        return json;
+    }
+
+    /*
+        Function: bufferSnapshot
+        Adds a snapshot's time and player positions to <snapshotBuffer>, and updates <serverOffset>
+
+        Parameters:
+            obj json - The snapshot, with every player in full
+    */
+    function bufferSnapshot(json){
+        if(json.time === undefined){
+            return;
+        }
+        var offset = json.time - Date.now();
+        //The smallest delay seen is the best estimate of the offset
+        if(serverOffset === undefined || offset > serverOffset){
+            serverOffset = offset;
+        }
+        var positions = {};
+        json.players.forEach(function(player){
+            if(player !== null && !player.summary){
+                positions[player.id] = {x : player.x, y : player.y};
+            }
+        });
+        snapshotBuffer.push({time : json.time, positions : positions});
+        if(snapshotBuffer.length > maxSnapshotBuffer){
+            snapshotBuffer.shift();
+        }
+    }
+
+    /*
+        Function: interpolatePlayers
+        Places each remote <Player> in range between its positions in the two buffered snapshots either side of <interpolationDelay> behind the server's time
+    */
+    function interpolatePlayers(){
+        var renderTime = Date.now() + serverOffset - interpolationDelay;
+        var i = snapshotBuffer.length - 1;
+        while(i > 0 && snapshotBuffer[i - 1].time > renderTime){
+            i --;
+        }
+        if(i < 1){
+            return;
+        }
+        var from = snapshotBuffer[i - 1];
+        var to = snapshotBuffer[i];
+        var span = to.time - from.time;
+        var t = span > 0 ? Math.min(Math.max((renderTime - from.time) / span, 0), 1) : 1;
+        players.forEach(function(player){
+            if(player === null || player.id === local || !player.inRange){
+                return;
+            }
+            var start = from.positions[player.id];
+            var end = to.positions[player.id];
+            if(start !== undefined && end !== undefined){
+                player.x = start.x + ((end.x - start.x) * t);
+                player.y = start.y + ((end.y - start.y) * t);
+            }
+        });
+    }
+
+    /*
+        Function: setupArena
+        Sizes the canvas, scoreboard and <players> to the arena and player capacity sent by the server, and builds the <Obstacle>s from the walls of its map
+    */
+    function setupArena(json){
+        if(json.arena){
+            canvas.width = json.arena.width;
+            canvas.height = json.arena.height;
+            width = canvas.width;
+            height = canvas.height;
+            obstacles = [];
+            if(json.arena.walls){
+                json.arena.walls.forEach(function(wall){
+                    obstacles.push(new Obstacle(wall[0], wall[1], wall[2], wall[3]));
+                });
+            }
+            else{
+                createObstacles();
+            }
+        }
+        //Add a scoreboard row for every player slot
+        var body = $('#player-data tbody');
+        while(body.children('tr').length < json.players.length){
+            body.append(body.children('tr').first().clone());
+        }
+        displayRows = body.children('tr');
+        players = json.players.map(function(){
+            return null;
+        });
+    }
+
     /*
         Function: playersSetup
         Get the lobby data from the server for all the players in the game, create new <Player> objects using that data and populate <players> with these objects
     */
     function playersSetup(json){
+        setupArena(json);
         playersAlive = 0;
         //Update the players array with the json data
         json.players.forEach(function(player, index){
@@ -1378,8 +1822,8 @@ handles updating data by sending and receiving from the <ArenaServer>
 
         First checks if the game is over using <isGameOver>.
 
-        If not, it updates the scoreboard with <updateDisplays>, and draws all the objects on
-        screen with <draw>
+        If not, it updates the scoreboard with <updateDisplays>, moves the remote players with <interpolatePlayers>,
+        and draws all the objects on screen with <draw>
     */
     function update(){
         //Main Game Loop
@@ -1387,6 +1831,7 @@ handles updating data by sending and receiving from the <ArenaServer>
         isGameOver();
         //If it's not, update the field
         updateDisplays();
+        interpolatePlayers();
         draw();
     }
 
@@ -1406,7 +1851,7 @@ handles updating data by sending and receiving from the <ArenaServer>
         });
         //Draw the players, which draw their own bullets
         players.forEach(function(player){
-            if(player !== null && player.isAlive()){
+            if(player !== null && player.isAlive() && player.inRange){
                 player.draw();
             }
         });
@@ -1506,6 +1951,7 @@ handles updating data by sending and receiving from the <ArenaServer>
         clearInterval(updateInterval);
         context.clearRect(0, 0, width, height);
         clearInterval(ajaxInterval);
+        ajaxInterval = undefined;
         //Get the remaining player
         var player;
         for(var i = 0; i < players.length; i ++){
@@ -19,6 +19,20 @@
     */
     var playerNum;
 
+    /*
+        var: lobbySocket
+        WebSocket the server pushes the state of the lobby through, or
+        undefined once it has failed and the lobby is polled instead
+    */
+    var lobbySocket;
+
+    /*
+        var: pollInterval
+        The <Interval> polling the lobby, or undefined while the lobby is
+        pushed through <lobbySocket>
+    */
+    var pollInterval;
+
     window.addEventListener('DOMContentLoaded', init, false);
 
     /*
@@ -30,15 +44,15 @@
         Initialises the program.
         Sets the value for <players>, and adds event listeners to the
         nodes that require them.
-        Creates an <Interval> to check for updates every second
+        Opens the <lobbySocket> to be sent updates as they happen
     */
     function init(){
         playerNum = parseInt(getCookie('playerNum'));
         players = document.querySelector('table tbody');
         document.querySelector('#startbtn').addEventListener('click', startGame, false);
 
-        //Check for updates every second
-        window.setInterval(checkUpdates, 1000);
+        //Have the server push updates, polling only if it can't
+        connectLobby();
 
         window.onbeforeunload = function(e){
             console.log(e);
@@ -50,18 +64,101 @@
             $.ajax({
                 type: 'GET',
                 async: false,
-                url: 'http://' + serverAddress,
+                url: 'http://' + serverAddress + '/' + getCookie('gameRoom'),
                 data: 'quit=' + playerNum
             });
         }
     }
 
+    /*
+        Function: connectLobby
+        Opens the <lobbySocket>, through which the server sends the state of
+        the lobby whenever it changes. If the socket can't be opened, or
+        closes before the game starts, falls back to polling with
+        <checkUpdates> every second
+    */
+    function connectLobby(){
+        try{
+            lobbySocket = new WebSocket('ws://' + getCookie('gameAddress') + '/' + getCookie('gameRoom'),
+                                        ['exvo-arena-lobby', String(playerNum)]);
+        }
+        catch(e){
+            pollLobby();
+            return;
+        }
+        lobbySocket.onopen = function(){
+            lobbySocket.send('exvo-arena-ready');
+        };
+        lobbySocket.onmessage = function(message){
+            var json = JSON.parse(message.data);
+            if(json.started){
+                //The server closes the socket once the game starts
+                lobbySocket.onclose = null;
+            }
+            showLobby(json);
+        };
+        lobbySocket.onclose = function(){
+            lobbySocket = undefined;
+            pollLobby();
+        };
+    }
+
+    /*
+        Function: pollLobby
+        Starts polling the lobby every second with <checkUpdates>
+    */
+    function pollLobby(){
+        if(pollInterval === undefined){
+            pollInterval = window.setInterval(checkUpdates, 1000);
+        }
+    }
+
+    /*
+        Function: showLobby
+        Shows the state of the lobby received from the server.
+        Updates the table, or runs <startGame> if the host has started the
+        game.
+
+        Parameters:
+            Object json - The 'players' in the lobby and whether the game has
+                          'started'
+    */
+    function showLobby(json){
+        if(!json.started){
+            //Only sent when things change, so just remove and redraw every row in the table
+            $(players).empty();
+            var numPlayers = 0;
+            $('#startbtn').prop('disabled', true);
+            json.players.forEach(function(player, index){
+                if(player !== null){
+                    numPlayers ++;
+                    var hostIcon = 'times';
+                    var youIcon = 'times';
+                    if(playerNum === index){
+                        youIcon = 'check';
+                    }
+                    if(player.host){
+                        hostIcon = 'check';
+                    }
+                    $(players).append('<tr style="color: ' + player.colour + ';"><td class="text-center col-xs-2"><span class="fa fa-' + hostIcon + '"></span></td><td class="text-center col-xs-8">' + player.userName + '</td><td class="text-center col-xs-2"><span class="fa fa-' + youIcon + '"></span></td></tr>');
+                }
+            });
+            if(numPlayers > 1 && json.players[playerNum].host){
+                $('#startbtn').prop('disabled', false);
+            }
+        }
+        else{
+            //Other players get an onclick
+            startGame();
+        }
+    }
+
     /*
         Function: checkUpdates
         Queries the server through the <Lobby> by receiving JSON data
         through an AJAX request.
-        If the data received has changed since the last request, update the table.
-        If the host has started the game, run <startGame>.
+        If the data received has changed since the last request, run
+        <showLobby> with it.
     */
     function checkUpdates(){
         $.ajax({
@@ -71,35 +168,7 @@
                     query: playerNum
                 },
                 ifModified : true,
-                success : function(json){
-                    if(!json.started){
-                        //Since it only succeeds if modified, just remove and redraw every row in the table any time things change
-                        $(players).empty();
-                        var numPlayers = 0;
-                        $('#startbtn').prop('disabled', true);
-                        json.players.forEach(function(player, index){
-                            if(player !== null){
-                                numPlayers ++;
-                                var hostIcon = 'times';
-                                var youIcon = 'times';
-                                if(playerNum === index){
-                                    youIcon = 'check';
-                                }
-                                if(player.host){
-                                    hostIcon = 'check';
-                                }
-                                $(players).append('<tr style="color: ' + player.colour + ';"><td class="text-center col-xs-2"><span class="fa fa-' + hostIcon + '"></span></td><td class="text-center col-xs-8">' + player.userName + '</td><td class="text-center col-xs-2"><span class="fa fa-' + youIcon + '"></span></td></tr>');
-                            }
-                        });
-                        if(numPlayers > 1 && json.players[playerNum].host){
-                            $('#startbtn').prop('disabled', false);
-                        }
-                    }
-                    else{
-                        //Other players get an onclick
-                        startGame();
-                    }
-                },
+                success : showLobby,
                 error : function(req, error){
                     console.log(req.responseText);
                     checkIfServerCrashed(req);
@@ -0,0 +1,101 @@
+from json import dumps
+import os
+
+from pytest import mark, raises
+
+from local.ArenaMap import ArenaMap
+
+"""/*
+    Script: ArenaMap Tests
+    Checks that <ArenaMap> loads the bundled maps, rejects malformed map
+    files with ValueError, and finds the walls near a point.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_arena_map.py
+        (end code)
+*/"""
+
+"""/*
+    var: MAPS
+    The directory of the bundled maps
+*/"""
+MAPS = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), 'maps')
+
+"""/*
+    var: MALFORMED
+    Contents of map files that are not valid maps
+*/"""
+MALFORMED = [
+    '{"width": 650, "height": 650, "spawns": [[1, 1]]',
+    '[650, 650]',
+    '"map"',
+    '{"height": 650, "spawns": [[1, 1]]}',
+    '{"width": 650, "height": 650}',
+    '{"width": "650", "height": 650, "spawns": [[1, 1]]}',
+    '{"width": 0, "height": 650, "spawns": [[1, 1]]}',
+    '{"width": 650, "height": 650, "spawns": 4}',
+    '{"width": 650, "height": 650, "spawns": [[1]]}',
+    '{"width": 650, "height": 650, "spawns": [[1, "1"]]}',
+    '{"width": 650, "height": 650, "spawns": [[700, 1]]}',
+    '{"width": 650, "height": 650, "spawns": [[1, 1]], "walls": null}',
+    '{"width": 650, "height": 650, "spawns": [[1, 1]], '
+    '"walls": [[0, 0, 10]]}',
+    '{"width": 650, "height": 650, "spawns": [[1, 1]], '
+    '"walls": [[0, 0, 10, 10]]}',
+    '{"width": 650, "height": 650, "spawns": [[1, 1]], '
+    '"walls": [[0, 0, 0, 651]]}'
+]
+
+"""/*
+    Group: Tests
+*/"""
+
+@mark.parametrize('name', ['default.json', 'bunkers.json'])
+def test_bundled_maps(name):
+    arenaMap = ArenaMap.load(os.path.join(MAPS, name))
+    assert len(arenaMap.spawns) >= 4
+    assert arenaMap.describe()['walls']
+
+@mark.parametrize('contents', MALFORMED)
+def test_malformed_map_file(tmp_path, contents):
+    path = tmp_path / 'map.json'
+    path.write_text(contents)
+    with raises(ValueError):
+        ArenaMap.load(str(path))
+
+def test_missing_map_file(tmp_path):
+    with raises(OSError):
+        ArenaMap.load(str(tmp_path / 'missing.json'))
+
+def test_load_is_cached_until_modified(tmp_path):
+    path = tmp_path / 'map.json'
+    path.write_text(dumps({'width': 100, 'height': 100, 'spawns': [[1, 1]]}))
+    first = ArenaMap.load(str(path))
+    assert ArenaMap.load(str(path)) is first
+    assert first.name == 'map.json'
+    path.write_text(dumps({'name': 'Changed', 'width': 100, 'height': 100,
+                           'spawns': [[1, 1]]}))
+    os.utime(str(path), (1, 1))
+    assert ArenaMap.load(str(path)).name == 'Changed'
+
+def test_wall_ends_are_ordered():
+    arenaMap = ArenaMap(100, 100, [(90, 50, 10, 50)], [(1, 1)])
+    assert arenaMap.walls == [(10, 50, 90, 50)]
+
+def test_walls_near():
+    arenaMap = ArenaMap.default(4, 650, 650)
+    # The gap in the top wall keeps it out of the middle cell
+    assert set(arenaMap.wallsNear(325, 325)) == {
+        arenaMap.walls[0], arenaMap.walls[1], arenaMap.walls[3]}
+    assert arenaMap.wallsNear(325, 200) == (arenaMap.walls[2],)
+    assert arenaMap.wallsNear(10, 10) == ()
+    # Points outside the arena use the nearest cell
+    assert arenaMap.wallsNear(325, -100) == arenaMap.wallsNear(325, 0)
+
+def test_default_spawns_visit_every_quarter():
+    arenaMap = ArenaMap.default(6, 600, 400)
+    assert len(arenaMap.spawns) == 8
+    assert [(x < 300, y < 200) for x, y in arenaMap.spawns[:4]] == [
+        (True, True), (False, True), (True, False), (False, False)]
@@ -0,0 +1,65 @@
+from local.ArenaPages import ArenaPages
+
+"""/*
+    Script: ArenaPages Tests
+    Checks that <ArenaPages> escapes what players send before putting it
+    in a page.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_arena_pages.py
+        (end code)
+*/"""
+
+"""/*
+    var: NAME
+    A user name that would inject a script if it were not escaped
+*/"""
+NAME = '<script>alert("x")</script>'
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_text_is_escaped_once():
+    assert ArenaPages.text('<b>&</b>') == '&lt;b&gt;&amp;&lt;/b&gt;'
+    assert ArenaPages.text('&lt;b&gt;') == '&lt;b&gt;'
+    assert ArenaPages.text(44444) == '44444'
+
+def test_lobby_page_escapes_names():
+    page = ArenaPages.lobbyPage([
+        {'colour': '#4AC38D', 'host': True, 'userName': NAME},
+        None,
+        {'colour': '"red', 'host': False, 'userName': 'Bob'}], 2)
+    assert NAME not in page
+    assert ArenaPages.text(NAME) in page
+    assert '&quot;red' in page
+    assert 'Bob' in page
+
+def test_server_list_page_escapes_names():
+    page = ArenaPages.serverListPage({
+        ('10.0.0.1', 44444, None): {'players': [
+            {'colour': '#4AC38D', 'userName': NAME}, None],
+            'password': False},
+        ('10.0.0.2', 44444, '<room>'): {'players': [None],
+                                        'password': True}
+    }, '<error>')
+    assert NAME not in page
+    assert ArenaPages.text(NAME) in page
+    assert '<room>' not in page and '&lt;room&gt;' in page
+    assert '<error>' not in page and '&lt;error&gt;' in page
+    assert 'No Players in Lobby' in page
+
+def test_server_list_page_without_servers():
+    page = ArenaPages.serverListPage({})
+    assert 'No Games Found' in page
+    assert 'alert-danger' not in page
+
+def test_stats_page(tmp_path):
+    assert 'There are no stats yet' in ArenaPages.statsPage(
+        str(tmp_path / 'missing'))
+    for name in ('01022016120000.ast', '03022016120000.ast', 'notes.txt'):
+        (tmp_path / name).write_text('{}')
+    page = ArenaPages.statsPage(str(tmp_path))
+    assert page.index('03/02/2016') < page.index('01/02/2016')
+    assert 'notes' not in page
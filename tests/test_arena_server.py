@@ -0,0 +1,291 @@
+from json import loads
+from types import SimpleNamespace
+
+from pytest import fixture, importorskip, mark
+
+from local.ArenaServer import ArenaServer
+from local.BinaryProtocol import BinaryProtocol
+from local.BulletPhysics import BulletPhysics
+from local.MessageCodec import MessageCodec
+from local.OutboundQueue import OutboundQueue
+
+"""/*
+    Script: ArenaServer Tests
+    Checks the game state handling of an <ArenaServer> without opening any
+    sockets: the updates it accepts from clients and the snapshots it
+    broadcasts to them.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_arena_server.py
+        (end code)
+*/"""
+
+"""/*
+    Class: RecordingSocket
+    Stand in for a game socket that takes everything written to it
+*/"""
+class RecordingSocket:
+
+    """/*
+        Constructor: __init__
+        Creates a socket with nothing written to it
+    */"""
+    def __init__(self):
+        self.data = bytearray()
+
+    """/*
+        Function: send
+        Takes all of the data
+
+        Parameters:
+            bytes data - The data to write
+
+        Returns:
+            int sent - The number of bytes taken
+    */"""
+    def send(self, data):
+        self.data += data
+        return len(data)
+
+    """/*
+        Function: messages
+        Splits what was written into the payloads of unmasked, uncompressed
+        WebSocket frames, and forgets it
+
+        Returns:
+            list payloads - The payload of each frame
+    */"""
+    def messages(self):
+        data = bytes(self.data)
+        self.data = bytearray()
+        payloads = []
+        while data:
+            length = data[1] & 0x7F
+            start = 2
+            if length == 126:
+                length = int.from_bytes(data[2:4], 'big')
+                start = 4
+            elif length == 127:
+                length = int.from_bytes(data[2:10], 'big')
+                start = 10
+            payloads.append(data[start:start + length])
+            data = data[start + length:]
+        return payloads
+
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: player
+    Builds a player shaped like <ArenaServer.playerObjects>
+
+    Parameters:
+        int playerId - The id of the player
+
+    Returns:
+        dict player - The player's data
+*/"""
+def player(playerId):
+    return {
+        'id': playerId, 'alive': True, 'x': 100.0 + playerId, 'y': 200.0,
+        'xChange': 0.0, 'yChange': 0.0, 'health': 100, 'numBullets': 3,
+        'userName': 'Guest', 'colour': '#4AC38D', 'bullets': [None] * 3
+    }
+
+"""/*
+    Function: server
+    Fixture of a server with no sockets and three players in the game, each
+    with a client taking its snapshots. Clients 0 and 2 are binary
+*/"""
+@fixture
+def server():
+    logged = []
+    server = ArenaServer(None, log=logged.append, capacity=3,
+                         adaptiveRate=False)
+    server.logged = logged
+    server.lobbySnapshot = tuple(
+        {'userName': 'Player %i' % playerNum, 'colour': '#4AC38D'}
+        for playerNum in range(3))
+    server.playerObjects = [player(0), player(1), player(2)]
+    server.clients = []
+    for playerNum in range(3):
+        client = RecordingSocket()
+        server.playerSockets[client] = playerNum
+        server.outboundQueues[client] = OutboundQueue(client)
+        if playerNum != 1:
+            server.binaryClients.add(client)
+        server.clients.append(client)
+    yield server
+    server.commands.close()
+
+"""/*
+    Function: update
+    Sends a JSON update from a client, and applies it as the next tick does
+
+    Parameters:
+        ArenaServer server - The server
+        client - The client sending the update
+        dict sent - The player sent in the update
+
+    Returns:
+        boolean applied - True if the update changed the game state
+*/"""
+def update(server, client, sent):
+    version = server.stateVersion
+    server._gameUpdate(client, MessageCodec.Update(
+        {'player': sent, 'damages': []}))
+    server.commands.drain()
+    return server.stateVersion != version
+
+"""/*
+    Function: broadcast
+    Broadcasts a new version of the game state
+
+    Parameters:
+        ArenaServer server - The server
+
+    Returns:
+        list messages - The payloads each client received
+*/"""
+def broadcast(server):
+    server.stateVersion += 1
+    server._gameBroadcast()
+    return [client.messages() for client in server.clients]
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_broadcast(server):
+    binary, json, other = broadcast(server)
+    assert binary == other
+    data, sequence = BinaryProtocol.decodeSnapshot(binary[0])
+    assert sequence == 1
+    assert [decoded['id'] for decoded in data['players']] == [0, 1, 2]
+    snapshot = loads(json[0].decode())
+    assert snapshot['players'] == server.playerObjects
+
+def test_bad_record_drops_only_that_player(server):
+    server.playerObjects[1] = dict(player(1), x='far', bullets=[
+        {'x': 1, 'y': 2, 'number': 300, 'bounces': 1}, 'bullet',
+        {'x': 1, 'y': 2, 'number': 2, 'bounces': 300}])
+    server.playerObjects[2] = dict(player(2), id=999)
+    binary, json, other = broadcast(server)
+    data, sequence = BinaryProtocol.decodeSnapshot(binary[0])
+    assert [decoded['id'] for decoded in data['players']] == [0, 1]
+    decoded = data['players'][1]
+    assert decoded['x'] == 0
+    assert decoded['bullets'][:2] == [None, None]
+    assert decoded['bullets'][2]['bounces'] == 255
+    # JSON clients get the player as it was stored
+    assert len(loads(json[0].decode())['players']) == 3
+    assert server.logged
+
+def test_bad_record_with_interest_radius(server):
+    server.interestRadius = 50
+    server.playerObjects[1] = dict(player(1), x='far')
+    server.playerObjects[2] = [2]
+    binary, json, other = broadcast(server)
+    data, sequence = BinaryProtocol.decodeSnapshot(binary[0])
+    assert [decoded['id'] for decoded in data['players']] == [0, 1]
+    # The player that cannot be placed is only sent as a summary
+    assert data['players'][1]['summary']
+    # The client of that player has no position to judge range from, so is
+    # sent every player in full
+    players = loads(json[0].decode())['players']
+    assert [decoded['id'] for decoded in players] == [0, 1]
+    assert players[1]['x'] == 'far'
+
+def test_unencodable_snapshot_is_skipped(server, monkeypatch):
+    encode = server._gameSnapshot
+
+    def snapshot(binary, playerNum=None):
+        if not binary:
+            raise TypeError('Not JSON serializable')
+        return encode(binary, playerNum)
+
+    monkeypatch.setattr(server, '_gameSnapshot', snapshot)
+    binary, json, other = broadcast(server)
+    assert binary and other and json == []
+    assert server.logged
+
+def test_update(server):
+    sent = dict(player(1), x=5, health='87.50', userName='Someone else',
+                bullets=[{'x': 1, 'y': 2, 'number': 0}, None, None])
+    assert update(server, server.clients[1], sent)
+    stored = server.playerObjects[1]
+    assert (stored['x'], stored['health']) == (5.0, 87.5)
+    assert type(stored['x']) is float
+    assert stored['userName'] == 'Player 1'
+    assert stored['bullets'][0]['x'] == 1.0
+
+def test_binary_update(server):
+    message = MessageCodec.decodeGame(
+        BinaryProtocol.encodeUpdate(player(2), [], 1))
+    server._gameBinaryUpdate(server.clients[2], message)
+    server.commands.drain()
+    assert server.playerObjects[2]['userName'] == 'Player 2'
+    assert server.updateSequences[2] == 1
+
+@mark.parametrize('change', [
+    {'id': 0}, {'id': 5}, {'id': '1'}, {'id': True}, {'id': None},
+    {'x': 'far'}, {'x': float('nan')}, {'y': float('inf')}, {'y': None},
+    {'x': False}, {'health': 'full'}, {'health': [100]},
+    {'health': float('nan')}, {'bullets': 'none'},
+    {'bullets': [None, 'bullet']}, {'bullets': [{'x': 1, 'y': 'y'}]}
+])
+def test_invalid_update_is_dropped(server, change):
+    stored = server.playerObjects[1]
+    assert not update(server, server.clients[1], dict(player(1), **change))
+    assert server.playerObjects[1] is stored
+
+def test_update_for_player_not_in_lobby(server):
+    server.lobbySnapshot = (server.lobbySnapshot[0], None, None)
+    assert not update(server, server.clients[1], player(1))
+
+def test_update_from_unknown_socket(server):
+    assert not update(server, RecordingSocket(), player(1))
+
+def test_delta(server):
+    broadcast(server)
+    server.snapshotAcks[1] = 1
+    server.playerObjects[0] = dict(player(0), x=5.0)
+    server.playerObjects[1] = dict(player(1), shield=True)
+    snapshot = loads(broadcast(server)[1][0].decode())
+    assert snapshot['baseline'] == 1
+    assert snapshot['players'] == [{'id': 0, 'x': 5.0},
+                                   {'id': 1, 'shield': True}]
+
+@mark.parametrize('change', ['left', 'removed'])
+def test_full_snapshot_when_delta_cannot_say(server, change):
+    broadcast(server)
+    server.snapshotAcks[1] = 1
+    if change == 'left':
+        server.playerObjects[2] = None
+    else:
+        server.playerObjects[2] = dict(player(2))
+        del server.playerObjects[2]['colour']
+    snapshot = loads(broadcast(server)[1][0].decode())
+    assert 'baseline' not in snapshot
+    assert snapshot['sequence'] == 2
+    assert snapshot['players'] == server.playerObjects
+
+def test_server_physics_update(server):
+    importorskip('numpy')
+    server.physics = BulletPhysics(3, server.arenaMap)
+    server.tickClock = SimpleNamespace(period=1 / 30)
+    for other in server.playerObjects[1:]:
+        other['y'] = 600.0
+    assert update(server, server.clients[0], dict(player(0), x=100, bullets=[
+        {'x': 0, 'y': 0, 'xChange': 1, 'yChange': 0, 'number': 0}, None,
+        None]))
+    stored = server.playerObjects[0]
+    assert type(stored['x']) is float
+    # The bullet is fired from the tank, wherever the client said it was
+    assert stored['bullets'][0]['x'] == 107.5
+    assert stored['numBullets'] == 2
+    server._gameSimulate()
+    assert server.playerObjects[0]['bullets'][0]['x'] == 157.5
@@ -0,0 +1,185 @@
+from pytest import raises
+
+from local.BinaryProtocol import BinaryProtocol
+
+"""/*
+    Script: BinaryProtocol Tests
+    Checks that <BinaryProtocol> messages decode to what was encoded, that
+    out of range values are clamped, and that truncated or malformed
+    messages raise ValueError.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_binary_protocol.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: player
+    Builds a player shaped like <ArenaServer.playerObjects>
+
+    Parameters:
+        int playerId - The id of the player
+        int bullets - The number of bullets in flight. Defaults to 2
+
+    Returns:
+        dict player - The player's data
+*/"""
+def player(playerId, bullets=2):
+    return {
+        'id': playerId, 'alive': True, 'x': 100.5, 'y': 200.25,
+        'xChange': -1.5, 'yChange': 2.0, 'health': 87.5, 'numBullets': 3,
+        'userName': 'Guest', 'colour': '#4AC38D',
+        'bullets': [{'x': 10.0 * number, 'y': 5.0, 'xChange': 3.0,
+                     'yChange': -3.0, 'bounces': 1, 'number': number}
+                    for number in range(bullets)] + [None]
+    }
+
+"""/*
+    Function: snapshot
+    Encodes a whole snapshot, as <ArenaServer> sends it to one client
+
+    Returns:
+        bytes message - The encoded snapshot
+*/"""
+def snapshot():
+    return (BinaryProtocol.encodeSnapshot(
+        [player(0), None, player(2, 0)], 7, 1234) +
+        BinaryProtocol.encodeDamages([12.5, 3], 50))
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_update_round_trip():
+    message = BinaryProtocol.encodeUpdate(
+        player(1), [{'id': 2, 'damage': 12.5}], 42)
+    data, sequence = BinaryProtocol.decodeUpdate(message)
+    assert sequence == 42
+    assert data['damages'] == [{'id': 2, 'damage': 12.5}]
+    decoded = data['player']
+    assert (decoded['x'], decoded['y'], decoded['health']) == (
+        100.5, 200.25, 87.5)
+    assert decoded['bullets'][1] == {
+        'x': 10.0, 'y': 5.0, 'xChange': 3.0, 'yChange': -3.0,
+        'bounces': 1, 'owner': 1, 'number': 1}
+    assert decoded['bullets'][2] is None
+
+def test_snapshot_round_trip():
+    data, sequence = BinaryProtocol.decodeSnapshot(snapshot())
+    assert sequence == 7
+    assert data['time'] == 1234
+    assert data['damages'] == [12.5, 3.0]
+    assert data['sendInterval'] == 50
+    assert [decoded['id'] for decoded in data['players']] == [0, 2]
+    assert data['players'][1]['bullets'] == [None, None, None]
+
+def test_snapshot_from_player_records():
+    message = (BinaryProtocol.encodeSnapshotHeader(2, 7, 1234) +
+               BinaryProtocol.encodePlayer(player(0)) +
+               BinaryProtocol.encodePlayer(player(2, 0)) +
+               BinaryProtocol.encodeDamages([12.5, 3], 50))
+    assert message == snapshot()
+
+def test_summary_record():
+    message = (BinaryProtocol.encodeSnapshotHeader(1, 1) +
+               BinaryProtocol.encodePlayer(player(3), True) +
+               BinaryProtocol.encodeDamages([]))
+    data, sequence = BinaryProtocol.decodeSnapshot(message)
+    assert data['players'] == [{'id': 3, 'alive': True, 'health': 87.5,
+                                'numBullets': 3, 'summary': True}]
+
+def test_out_of_range_values_are_clamped():
+    wild = player(0)
+    wild.update(x=-50, y=1e9, xChange=1e9, health=1000, numBullets=300)
+    data, sequence = BinaryProtocol.decodeSnapshot(
+        BinaryProtocol.encodeSnapshot([wild], 1) +
+        BinaryProtocol.encodeDamages([], 70000))
+    decoded = data['players'][0]
+    assert decoded['x'] == 0
+    assert decoded['y'] == 65535 / BinaryProtocol.POSITION_SCALE
+    assert decoded['xChange'] == 32767 / BinaryProtocol.POSITION_SCALE
+    assert decoded['health'] == 655.35
+    assert decoded['numBullets'] == 255
+    assert data['sendInterval'] == 65535
+
+def test_sequence_wraps():
+    message = BinaryProtocol.encodeUpdate(player(0), [], 1 << 32 | 5)
+    assert BinaryProtocol.decodeHeader(message) == (BinaryProtocol.UPDATE, 5)
+
+def test_truncated_update():
+    message = BinaryProtocol.encodeUpdate(
+        player(1), [{'id': 2, 'damage': 1}, {'id': 3, 'damage': 2}], 1)
+    for length in range(len(message)):
+        with raises(ValueError):
+            BinaryProtocol.decodeUpdate(message[:length])
+
+def test_truncated_snapshot():
+    message = snapshot()
+    for length in range(len(message)):
+        with raises(ValueError):
+            BinaryProtocol.decodeSnapshot(message[:length])
+
+def test_unsupported_version():
+    message = bytearray(BinaryProtocol.encodeUpdate(player(0), [], 1))
+    message[0] = BinaryProtocol.VERSION + 1
+    with raises(ValueError):
+        BinaryProtocol.decodeUpdate(bytes(message))
+    with raises(ValueError):
+        BinaryProtocol.decodeHeader(bytes(message))
+
+def test_wrong_message_type():
+    with raises(ValueError):
+        BinaryProtocol.decodeUpdate(snapshot())
+    with raises(ValueError):
+        BinaryProtocol.decodeSnapshot(
+            BinaryProtocol.encodeUpdate(player(0), [], 1))
+
+def test_bullet_number_out_of_range():
+    message = bytearray(BinaryProtocol.encodeUpdate(player(0, 1), [], 1))
+    message[BinaryProtocol.UPDATE_HEAD.size] = 200
+    with raises(ValueError):
+        BinaryProtocol.decodeUpdate(bytes(message))
+
+def test_malformed_values_are_coerced():
+    bad = player(0, 2)
+    bad.update(x='abc', y=float('nan'), xChange=None, health='50',
+               numBullets=float('inf'))
+    bad['bullets'][0].update(number=300, bounces=-4, x='x')
+    bad['bullets'][1] = {'number': 1}
+    bad['bullets'].append([1, 2])
+    for message in (BinaryProtocol.encodeSnapshot([bad, player(1)], 1),
+                    BinaryProtocol.encodeSnapshotHeader(2, 1) +
+                    BinaryProtocol.encodePlayer(bad) +
+                    BinaryProtocol.encodePlayer(player(1))):
+        data, sequence = BinaryProtocol.decodeSnapshot(
+            message + BinaryProtocol.encodeDamages([]))
+        decoded = data['players'][0]
+        assert (decoded['x'], decoded['y'], decoded['xChange']) == (0, 0, 0)
+        assert (decoded['health'], decoded['numBullets']) == (50, 255)
+        # Bullets that cannot be decoded by number are left out
+        assert decoded['bullets'] == [None, {
+            'x': 0, 'y': 0, 'xChange': 0, 'yChange': 0, 'bounces': 0,
+            'owner': 0, 'number': 1}, None]
+        assert data['players'][1] == BinaryProtocol.decodeSnapshot(
+            BinaryProtocol.encodeSnapshot([player(1)], 1) +
+            BinaryProtocol.encodeDamages([]))[0]['players'][0]
+    bad['bullets'][0]['number'] = 0
+    data, sequence = BinaryProtocol.decodeSnapshot(
+        BinaryProtocol.encodeSnapshot([bad], 1) +
+        BinaryProtocol.encodeDamages([]))
+    assert data['players'][0]['bullets'][0]['bounces'] == 0
+
+def test_invalid_player_records():
+    for bad in ([1, 2], {'x': 1, 'y': 2}, dict(player(0), id=300),
+                dict(player(0), id='1')):
+        with raises(ValueError):
+            BinaryProtocol.encodeSnapshot([player(1), bad], 1)
+        with raises(ValueError):
+            BinaryProtocol.encodePlayer(bad)
+        with raises(ValueError):
+            BinaryProtocol.encodePlayer(bad, True)
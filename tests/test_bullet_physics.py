@@ -0,0 +1,171 @@
+from pytest import approx, fixture, importorskip
+
+from local.ArenaMap import ArenaMap
+from local.BulletPhysics import BulletPhysics
+
+importorskip('numpy')
+
+"""/*
+    Script: BulletPhysics Tests
+    Checks that <BulletPhysics> fires a bullet when a player first reports
+    it, bounces bullets off the arena walls and the map's obstacles, and
+    damages the first tank other than its owner's that a bullet hits, less
+    for each bounce.
+
+    Bullets move <BulletPhysics.BULLET_SPEED> pixels a frame, so every test
+    is worked through a frame at a time.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_bullet_physics.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: physics
+    Fixture of the physics of a two player game in a 650 pixel arena, with
+    a single horizontal obstacle along y = 300 from x = 100 to 500
+*/"""
+@fixture
+def physics():
+    arenaMap = ArenaMap(650, 650, [(100, 300, 500, 300)],
+                        [(50, 50), (600, 600)])
+    return BulletPhysics(2, arenaMap)
+
+"""/*
+    Function: fire
+    Reports a player firing their first bullet from a tank
+
+    Parameters:
+        BulletPhysics physics - The physics
+        int owner - The index of the player
+        float x - x coordinate of the top left corner of the tank
+        float y - y coordinate of the top left corner of the tank
+        float xChange - Direction the bullet moves in along the x axis
+        float yChange - Direction the bullet moves in along the y axis
+*/"""
+def fire(physics, owner, x, y, xChange, yChange):
+    physics.report(owner, [{'xChange': xChange, 'yChange': yChange}, None,
+                           None], x, y)
+
+"""/*
+    Function: run
+    Simulates a number of frames
+
+    Parameters:
+        BulletPhysics physics - The physics
+        int frames - The number of frames
+        list tanks - The position of each tank. Defaults to no live tanks
+
+    Returns:
+        list hits - The hits in those frames
+*/"""
+def run(physics, frames, tanks=(None, None)):
+    return physics.advance(frames / BulletPhysics.FRAME_RATE, list(tanks))
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_report_fires_from_centre_of_tank(physics):
+    fire(physics, 1, 100, 200, 3, 4)
+    bullet = physics.bullets(1)[0]
+    assert (bullet['x'], bullet['y']) == (107.5, 207.5)
+    assert (bullet['xChange'], bullet['yChange']) == (15, 20)
+    assert bullet['bounces'] == BulletPhysics.MAX_BOUNCES
+    assert (bullet['owner'], bullet['number']) == (1, 0)
+    assert physics.bullets(1)[1:] == [None, None]
+    assert physics.bullets(0) == [None, None, None]
+
+def test_report_only_fires_new_bullets(physics):
+    fire(physics, 0, 100, 200, 1, 0)
+    run(physics, 1)
+    # Still reported, so not fired again from the tank
+    fire(physics, 0, 300, 300, 0, 1)
+    assert physics.bullets(0)[0]['x'] == 132.5
+    physics.clear(0)
+    fire(physics, 0, 300, 300, 0, 1)
+    assert physics.bullets(0)[0] is None
+    # Fired again once the slot has been reported empty
+    physics.report(0, [None, None, None], 300, 300)
+    fire(physics, 0, 300, 300, 0, 1)
+    assert physics.bullets(0)[0]['y'] == 307.5
+
+def test_report_ignores_bullets_without_direction(physics):
+    for bullet in ({'xChange': 0, 'yChange': 0}, {'xChange': 1},
+                   {'xChange': 'left', 'yChange': 0}):
+        physics.report(0, [bullet], 100, 100)
+        physics.report(0, [], 100, 100)
+    assert not physics.active.any()
+
+def test_wall_bounce(physics):
+    fire(physics, 0, 10, 100, -1, 0)
+    run(physics, 1)
+    assert physics.bullets(0)[0]['x'] == -7.5
+    run(physics, 1)
+    bullet = physics.bullets(0)[0]
+    # Put back at the wall, then moved away from it
+    assert (bullet['x'], bullet['xChange']) == (25, 25)
+    assert bullet['bounces'] == BulletPhysics.MAX_BOUNCES - 1
+    assert bullet['speed'] == approx(
+        BulletPhysics.BULLET_SPEED * BulletPhysics.BOUNCE_FALLOFF)
+
+def test_bullet_destroyed_without_bounces(physics):
+    fire(physics, 0, 10, 100, -1, 0)
+    physics.bounces[0] = 0
+    run(physics, 2)
+    assert physics.bullets(0)[0] is None
+
+def test_obstacle_bounce(physics):
+    fire(physics, 0, 290, 250, 0, 1)
+    run(physics, 1)
+    assert physics.bullets(0)[0]['y'] == 282.5
+    run(physics, 1)
+    bullet = physics.bullets(0)[0]
+    assert (bullet['y'], bullet['yChange']) == (270, -25)
+    assert bullet['bounces'] == BulletPhysics.MAX_BOUNCES - 1
+
+def test_obstacle_missed_past_its_end(physics):
+    fire(physics, 0, 590, 250, 0, 1)
+    run(physics, 3)
+    bullet = physics.bullets(0)[0]
+    assert (bullet['y'], bullet['yChange']) == (332.5, 25)
+
+def test_tank_hit(physics):
+    tanks = [(100, 100), (150, 100)]
+    fire(physics, 0, 100, 100, 1, 0)
+    assert run(physics, 2, tanks) == []
+    assert run(physics, 1, tanks) == [(0, 1, BulletPhysics.MAX_DAMAGE)]
+    assert physics.bullets(0)[0] is None
+
+def test_hit_damage_falls_off_with_bounces(physics):
+    tanks = [(100, 100), (150, 100)]
+    fire(physics, 0, 100, 100, 1, 0)
+    physics.bounces[0] = BulletPhysics.MAX_BOUNCES - 2
+    (hit,) = run(physics, 3, tanks)
+    assert hit[2] == approx(BulletPhysics.MAX_DAMAGE *
+                            BulletPhysics.BOUNCE_FALLOFF ** 2)
+
+def test_owner_and_dead_tanks_are_not_hit(physics):
+    fire(physics, 0, 100, 100, 1, 0)
+    assert run(physics, 3, [(100, 100), None]) == []
+    assert physics.bullets(0)[0] is not None
+
+def test_clear(physics):
+    fire(physics, 0, 100, 100, 1, 0)
+    fire(physics, 1, 300, 100, 1, 0)
+    physics.clear(0)
+    assert physics.bullets(0) == [None, None, None]
+    assert physics.bullets(1)[0] is not None
+    assert run(physics, 1) == []
+
+def test_partial_frames_carry_over(physics):
+    fire(physics, 0, 100, 200, 1, 0)
+    physics.advance(0.5 / BulletPhysics.FRAME_RATE, [None, None])
+    assert physics.bullets(0)[0]['x'] == 107.5
+    physics.advance(0.5 / BulletPhysics.FRAME_RATE, [None, None])
+    assert physics.bullets(0)[0]['x'] == 132.5
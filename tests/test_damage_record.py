@@ -0,0 +1,49 @@
+from pytest import raises
+
+from local.DamageRecord import DamageRecord
+
+"""/*
+    Script: DamageRecord Tests
+    Checks that a <DamageRecord> merges hits into one total, remembers a
+    bounded number of attackers, and is emptied by <DamageRecord.take>.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_damage_record.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_hits_are_merged():
+    record = DamageRecord()
+    record.add(1, 10)
+    record.add(2, '2.5')
+    record.add(1, 5)
+    assert record.take() == (17.5, [1, 2])
+
+def test_take_empties_the_record():
+    record = DamageRecord()
+    record.add(1, 10)
+    record.take()
+    assert record.take() == (0.0, [])
+
+def test_no_damage_is_ignored():
+    record = DamageRecord()
+    for damage in (0, -5, float('nan')):
+        record.add(1, damage)
+    assert record.take() == (0.0, [])
+
+def test_attackers_are_bounded():
+    record = DamageRecord()
+    for attacker in range(DamageRecord.MAX_ATTACKERS + 4):
+        record.add(attacker, 1)
+    total, attackers = record.take()
+    assert total == DamageRecord.MAX_ATTACKERS + 4
+    assert attackers == list(range(DamageRecord.MAX_ATTACKERS))
+
+def test_damage_must_be_a_number():
+    with raises(ValueError):
+        DamageRecord().add(1, 'lots')
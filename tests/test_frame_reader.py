@@ -0,0 +1,233 @@
+from zlib import compressobj, DEFLATED
+
+from pytest import mark, raises
+
+from local.FrameReader import FrameReader
+
+"""/*
+    Script: FrameReader Tests
+    Checks that <FrameReader> reassembles frames split across reads and
+    fragmented messages, unmasks and inflates payloads, and rejects
+    malformed or oversized frames.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_frame_reader.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: clientFrame
+    Builds a client to server frame, masked the way a browser would
+
+    Parameters:
+        bytes payload - The payload of the frame
+        int opcode - The opcode of the frame. Defaults to <FrameReader.TEXT>
+        boolean fin - False to leave the message unfinished. Defaults to True
+        boolean rsv1 - True to mark the frame compressed. Defaults to False
+        bytes mask - The 4 byte masking key, or None to send the payload
+                     unmasked. Defaults to a fixed key
+
+    Returns:
+        bytes frame - The encoded frame
+*/"""
+def clientFrame(payload, opcode=FrameReader.TEXT, fin=True, rsv1=False,
+                mask=b'\x01\x02\x03\x04'):
+    frame = bytearray([(128 if fin else 0) | (64 if rsv1 else 0) | opcode])
+    maskBit = 128 if mask is not None else 0
+    length = len(payload)
+    if length < 126:
+        frame.append(maskBit | length)
+    elif length < 65536:
+        frame.append(maskBit | 126)
+        frame += length.to_bytes(2, 'big')
+    else:
+        frame.append(maskBit | 127)
+        frame += length.to_bytes(8, 'big')
+    if mask is None:
+        return bytes(frame + payload)
+    return bytes(frame + mask + FrameReader.unmask(mask, payload))
+
+"""/*
+    Function: deflate
+    Compresses a message the way permessage-deflate does, without the empty
+    block that ends each message
+
+    Parameters:
+        bytes data - The message to compress
+
+    Returns:
+        bytes payload - The compressed payload
+*/"""
+def deflate(data):
+    compressor = compressobj(6, DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush(2)
+    return payload[:-len(FrameReader.DEFLATE_TAIL)]
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_unmask_round_trips():
+    payload = bytes(range(256)) * 3 + b'odd'
+    masked = FrameReader.unmask(b'\xde\xad\xbe\xef', payload)
+    assert masked != payload
+    assert FrameReader.unmask(b'\xde\xad\xbe\xef', masked) == payload
+    assert FrameReader.unmask(b'\xde\xad\xbe\xef', b'') == b''
+
+def test_masked_text_frame():
+    reader = FrameReader(None)
+    assert reader.feed(clientFrame('update=1'.encode())) == [
+        (FrameReader.TEXT, 'update=1')]
+
+def test_unmasked_binary_frame():
+    reader = FrameReader(None)
+    assert reader.feed(clientFrame(b'\x00\xff', FrameReader.BINARY,
+                                   mask=None)) == [
+        (FrameReader.BINARY, b'\x00\xff')]
+
+def test_frame_split_across_reads():
+    reader = FrameReader(None)
+    frame = clientFrame(b'x' * 300)
+    for i in range(len(frame) - 1):
+        assert reader.feed(frame[i:i + 1]) == []
+    assert reader.feed(frame[-1:]) == [(FrameReader.TEXT, 'x' * 300)]
+
+def test_several_frames_in_one_read():
+    reader = FrameReader(None)
+    data = (clientFrame(b'a') + clientFrame(b'', FrameReader.PING) +
+            clientFrame(b'b'))
+    assert reader.feed(data) == [
+        (FrameReader.TEXT, 'a'), (FrameReader.PING, b''),
+        (FrameReader.TEXT, 'b')]
+
+def test_extended_lengths():
+    reader = FrameReader(None, maxMessageSize=1 << 17)
+    medium = b'm' * 1000
+    large = b'l' * 70000
+    assert reader.feed(clientFrame(medium, FrameReader.BINARY)) == [
+        (FrameReader.BINARY, medium)]
+    assert reader.feed(clientFrame(large, FrameReader.BINARY)) == [
+        (FrameReader.BINARY, large)]
+
+def test_fragmented_message_with_control_frame_between():
+    reader = FrameReader(None)
+    assert reader.feed(clientFrame(b'hel', fin=False)) == []
+    assert reader.feed(clientFrame(b'', FrameReader.PING)) == [
+        (FrameReader.PING, b'')]
+    assert reader.feed(clientFrame(b'lo', FrameReader.CONTINUATION)) == [
+        (FrameReader.TEXT, 'hello')]
+
+def test_continuation_without_message():
+    with raises(ValueError):
+        FrameReader(None).feed(clientFrame(b'x', FrameReader.CONTINUATION))
+
+def test_new_message_inside_fragmented_message():
+    reader = FrameReader(None)
+    reader.feed(clientFrame(b'a', fin=False))
+    with raises(ValueError):
+        reader.feed(clientFrame(b'b'))
+
+def test_fragmented_control_frame():
+    with raises(ValueError):
+        FrameReader(None).feed(clientFrame(b'', FrameReader.PING, fin=False))
+
+def test_oversized_control_frame():
+    with raises(ValueError):
+        FrameReader(None).feed(clientFrame(b'p' * 126, FrameReader.PING))
+
+@mark.parametrize('opcode', [3, 4, 5, 6, 7, 11, 12, 13, 14, 15])
+def test_reserved_opcode(opcode):
+    reader = FrameReader(None)
+    with raises(ValueError):
+        reader.feed(clientFrame(b'', opcode))
+    assert reader.closeCode == FrameReader.PROTOCOL_ERROR
+
+def test_protocol_errors_set_close_code():
+    reader = FrameReader(None)
+    assert reader.feed(clientFrame(b'fine')) == [(FrameReader.TEXT, 'fine')]
+    assert reader.closeCode is None
+    with raises(ValueError):
+        reader.feed(clientFrame(b'x', FrameReader.CONTINUATION))
+    assert reader.closeCode == FrameReader.PROTOCOL_ERROR
+
+def test_oversized_frame_rejected_from_header():
+    reader = FrameReader(None, maxMessageSize=100)
+    with raises(ValueError):
+        # Only the header has arrived
+        reader.feed(clientFrame(b'x' * 101)[:8])
+    assert reader.closeCode == FrameReader.MESSAGE_TOO_BIG
+
+def test_oversized_fragmented_message():
+    reader = FrameReader(None, maxMessageSize=100)
+    reader.feed(clientFrame(b'x' * 60, fin=False))
+    with raises(ValueError):
+        reader.feed(clientFrame(b'x' * 60, FrameReader.CONTINUATION))
+
+def test_invalid_utf8():
+    reader = FrameReader(None)
+    with raises(ValueError):
+        reader.feed(clientFrame(b'\xff\xfe'))
+    assert reader.closeCode == FrameReader.INVALID_DATA
+
+def test_compressed_message():
+    reader = FrameReader(None)
+    reader.enableDeflate()
+    message = b'update=' + b'{"x": 1}' * 50
+    assert reader.feed(clientFrame(deflate(message), rsv1=True)) == [
+        (FrameReader.TEXT, message.decode())]
+
+def test_compressed_message_fragmented():
+    reader = FrameReader(None)
+    reader.enableDeflate(False)
+    payload = deflate(b'abc' * 40)
+    assert reader.feed(clientFrame(payload[:5], fin=False, rsv1=True)) == []
+    assert reader.feed(clientFrame(
+        payload[5:], FrameReader.CONTINUATION)) == [
+        (FrameReader.TEXT, 'abc' * 40)]
+
+def test_compression_context_takeover():
+    compressor = compressobj(6, DEFLATED, -15)
+    first = compressor.compress(b'repeated text') + compressor.flush(2)
+    second = compressor.compress(b'repeated text') + compressor.flush(2)
+    reader = FrameReader(None)
+    reader.enableDeflate()
+    assert reader.feed(clientFrame(first[:-4], rsv1=True) +
+                       clientFrame(second[:-4], rsv1=True)) == [
+        (FrameReader.TEXT, 'repeated text'),
+        (FrameReader.TEXT, 'repeated text')]
+
+def test_compressed_message_not_negotiated():
+    with raises(ValueError):
+        FrameReader(None).feed(clientFrame(deflate(b'x'), rsv1=True))
+
+def test_compressed_continuation_frame():
+    reader = FrameReader(None)
+    reader.enableDeflate()
+    reader.feed(clientFrame(b'', fin=False, rsv1=True))
+    with raises(ValueError):
+        reader.feed(clientFrame(b'', FrameReader.CONTINUATION, rsv1=True))
+
+def test_invalid_compressed_data():
+    reader = FrameReader(None)
+    reader.enableDeflate()
+    with raises(ValueError):
+        reader.feed(clientFrame(b'\xff\xff\xff\xff', rsv1=True))
+
+def test_compression_bomb():
+    reader = FrameReader(None, maxMessageSize=1000)
+    reader.enableDeflate()
+    with raises(ValueError):
+        reader.feed(clientFrame(deflate(b'\x00' * 100000), rsv1=True))
+
+def test_read_closed_socket():
+    class ClosedSocket:
+        def recv_into(self, view):
+            return 0
+    reader = FrameReader(ClosedSocket())
+    assert reader.read() == []
+    assert reader.closed
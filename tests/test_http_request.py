@@ -0,0 +1,80 @@
+from pytest import raises
+
+from local.HttpRequest import HttpRequest
+
+"""/*
+    Script: HttpRequest Tests
+    Checks that <HttpRequest.parse> waits for partial requests and rejects
+    malformed or oversized ones.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_http_request.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_complete_request():
+    data = (b'GET /lobby HTTP/1.1\r\nHost: arena\r\n'
+            b'Connection: keep-alive, Upgrade\r\n\r\n')
+    request, consumed = HttpRequest.parse(data)
+    assert consumed == len(data)
+    assert (request.method, request.target, request.version) == (
+        'GET', '/lobby', 'HTTP/1.1')
+    assert request.header('HOST') == 'arena'
+    assert request.header('Missing', 'none') == 'none'
+    assert request.headerTokens('connection') == ['keep-alive', 'upgrade']
+    assert request.headerTokens('Missing') == []
+    assert request.body == b''
+
+def test_partial_headers():
+    data = b'GET / HTTP/1.1\r\nHost: arena\r\n\r\n'
+    for length in range(len(data)):
+        assert HttpRequest.parse(data[:length]) is None
+
+def test_partial_body():
+    data = b'POST / HTTP/1.1\r\nContent-Length: 9\r\n\r\njoin=Ann;'
+    assert HttpRequest.parse(data[:-1]) is None
+    request, consumed = HttpRequest.parse(data)
+    assert request.body == b'join=Ann;'
+
+def test_pipelined_requests():
+    first = b'POST / HTTP/1.1\r\nContent-Length: 5\r\n\r\nquery'
+    second = b'GET / HTTP/1.1\r\n\r\n'
+    request, consumed = HttpRequest.parse(bytearray(first + second))
+    assert request.body == b'query'
+    assert consumed == len(first)
+
+def test_repeated_headers_are_joined():
+    request, consumed = HttpRequest.parse(
+        b'GET / HTTP/1.1\r\nSec-WebSocket-Protocol: a\r\n'
+        b'sec-websocket-protocol: b\r\n\r\n')
+    assert request.headerTokens('Sec-WebSocket-Protocol') == ['a', 'b']
+
+def test_malformed_request_line():
+    for line in (b'GET /', b'GET / FTP/1.0', b'GET  / HTTP/1.1', b''):
+        with raises(ValueError):
+            HttpRequest.parse(line + b'\r\nHost: arena\r\n\r\n')
+
+def test_malformed_header():
+    for header in (b'Host arena', b': arena'):
+        with raises(ValueError):
+            HttpRequest.parse(b'GET / HTTP/1.1\r\n' + header + b'\r\n\r\n')
+
+def test_headers_too_large():
+    with raises(ValueError):
+        # Never ends, so is rejected before it is complete
+        HttpRequest.parse(b'GET / HTTP/1.1\r\nX: ' +
+                          b'x' * HttpRequest.MAX_HEADER_SIZE)
+    with raises(ValueError):
+        HttpRequest.parse(b'GET / HTTP/1.1\r\nX: ' +
+                          b'x' * HttpRequest.MAX_HEADER_SIZE + b'\r\n\r\n')
+
+def test_malformed_content_length():
+    for length in (b'ten', b'-1', str(HttpRequest.MAX_BODY_SIZE + 1).encode()):
+        with raises(ValueError):
+            HttpRequest.parse(
+                b'POST / HTTP/1.1\r\nContent-Length: ' + length + b'\r\n\r\n')
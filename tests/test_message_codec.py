@@ -0,0 +1,90 @@
+from pytest import mark, raises
+
+from local.BinaryProtocol import BinaryProtocol
+from local.MessageCodec import MessageCodec
+
+"""/*
+    Script: MessageCodec Tests
+    Checks that <MessageCodec> decodes every lobby request and game message
+    into its typed message, and rejects malformed or oversized ones.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_message_codec.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Tests
+*/"""
+
+@mark.parametrize('msg, message', [
+    ('query=1', MessageCodec.Query(1)),
+    ('token=2', MessageCodec.Token(2)),
+    ('quit=3', MessageCodec.Quit(3)),
+    ('start=0', MessageCodec.Start(0)),
+    ('query=1\n', MessageCodec.Query(1)),
+    ('query=1 trailing', MessageCodec.Query(1)),
+    ('join=Ann;None', MessageCodec.Join('Ann', 'None')),
+    ('join=Ann;pass;word', MessageCodec.Join('Ann', 'pass;word')),
+    ('join=;', MessageCodec.Join('', '')),
+    ('update={}', None),
+    ('hello', None),
+    ('', None)
+])
+def test_lobby_requests(msg, message):
+    assert MessageCodec.decodeLobby(msg) == message
+
+@mark.parametrize('msg', [
+    'query=', 'query=one', 'start= ', 'join=Ann',
+    'query=1' + ' ' * MessageCodec.MAX_LOBBY_LENGTH
+])
+def test_malformed_lobby_requests(msg):
+    with raises(ValueError):
+        MessageCodec.decodeLobby(msg)
+
+def test_lobby_requests_are_cached():
+    first = MessageCodec.decodeLobby('query=3')
+    assert MessageCodec.decodeLobby('query=3') is first
+    for playerNum in range(MessageCodec.MAX_CACHED * 2):
+        MessageCodec.decodeLobby('query=%i' % playerNum)
+    assert len(MessageCodec._lobbyCache) <= MessageCodec.MAX_CACHED
+
+def test_join_requests_are_not_cached():
+    MessageCodec.decodeLobby('join=Ann;None')
+    assert 'join=Ann;None' not in MessageCodec._lobbyCache
+
+def test_json_update():
+    message = MessageCodec.decodeGame(
+        'update={"player": {"id": 1}, "damages": []}\x00garbage')
+    assert message == MessageCodec.Update({'player': {'id': 1},
+                                           'damages': []})
+
+@mark.parametrize('msg', [
+    'update=', 'update={"player": ', 'update=[1, 2]', 'quit=', 'quit=x',
+    'update={}' + ' ' * MessageCodec.MAX_GAME_LENGTH
+])
+def test_malformed_game_messages(msg):
+    with raises(ValueError):
+        MessageCodec.decodeGame(msg)
+
+def test_other_game_messages():
+    assert MessageCodec.decodeGame('gameOver=1') == MessageCodec.GameOver()
+    assert MessageCodec.decodeGame('quit=2') == MessageCodec.Quit(2)
+    assert MessageCodec.decodeGame('quit=2 ') == MessageCodec.Quit(2)
+    assert MessageCodec.decodeGame('query=2') is None
+
+def test_binary_update():
+    player = {'id': 1, 'alive': True, 'x': 10, 'y': 20, 'health': 100,
+              'numBullets': 3, 'bullets': [None] * 3}
+    message = MessageCodec.decodeGame(BinaryProtocol.encodeUpdate(
+        player, [{'id': 2, 'damage': 5}], 9))
+    assert isinstance(message, MessageCodec.BinaryUpdate)
+    assert message.sequence == 9
+    assert message.data['damages'] == [{'id': 2, 'damage': 5.0}]
+
+def test_malformed_binary_update():
+    with raises(ValueError):
+        MessageCodec.decodeGame(b'\x03\x01')
+    with raises(ValueError):
+        MessageCodec.decodeGame(b'\x00' * (MessageCodec.MAX_GAME_LENGTH + 1))
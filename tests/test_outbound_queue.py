@@ -0,0 +1,167 @@
+from pytest import raises
+
+from local.OutboundQueue import OutboundQueue
+
+"""/*
+    Script: OutboundQueue Tests
+    Checks that an <OutboundQueue> delivers reliable frames in order across
+    partial writes, keeps only the newest snapshot, and only frames the
+    snapshots it writes.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_outbound_queue.py
+        (end code)
+*/"""
+
+"""/*
+    Class: SlowSocket
+    Stand in for a non-blocking socket that takes a limited number of bytes
+    before its buffer is full
+*/"""
+class SlowSocket:
+
+    """/*
+        Constructor: __init__
+        Creates a socket with room for some bytes
+
+        Parameters:
+            int room - The bytes it takes before blocking. Defaults to 0
+    */"""
+    def __init__(self, room=0):
+        self.room = room
+        self.data = bytearray()
+
+    """/*
+        Function: send
+        Takes as much of the data as there is room for
+
+        Parameters:
+            bytes data - The data to write
+
+        Returns:
+            int sent - The number of bytes taken
+
+        Raises:
+            BlockingIOError - If there is no room
+    */"""
+    def send(self, data):
+        if not self.room:
+            raise BlockingIOError()
+        sent = min(self.room, len(data))
+        self.data += data[:sent]
+        self.room -= sent
+        return sent
+
+
+"""/*
+    Class: SlowScatterSocket
+    <SlowSocket> with scatter-gather writes
+*/"""
+class SlowScatterSocket(SlowSocket):
+
+    """/*
+        Function: sendmsg
+        Takes as much of the buffers as there is room for
+
+        Parameters:
+            list buffers - The data to write
+
+        Returns:
+            int sent - The number of bytes taken
+    */"""
+    def sendmsg(self, buffers):
+        return self.send(b''.join(buffers))
+
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: frame
+    Frames a snapshot by wrapping it in brackets
+
+    Parameters:
+        bytes snapshot - The snapshot
+
+    Returns:
+        list buffers - The buffers of the frame
+*/"""
+def frame(snapshot):
+    return [b'[', snapshot, b']']
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_everything_written():
+    for sock in (SlowSocket(100), SlowScatterSocket(100)):
+        queue = OutboundQueue(sock)
+        queue.send([b'ab', b'cd'])
+        queue.replace(b'snap')
+        assert queue.pending()
+        assert queue.flush(frame)
+        assert not queue.pending()
+        assert sock.data == b'abcd[snap]'
+        assert (queue.sent, queue.dropped, queue.queuedBytes) == (1, 0, 0)
+
+def test_partial_writes_resume_mid_frame():
+    sock = SlowScatterSocket(3)
+    queue = OutboundQueue(sock)
+    queue.send([b'ab', b'cd'])
+    queue.send([b'ef'])
+    assert not queue.flush(frame)
+    assert sock.data == b'abc'
+    queue.replace(b'snap')
+    sock.room = 2
+    assert not queue.flush(frame)
+    # The rest of a started frame goes before anything else
+    assert sock.data == b'abcde'
+    sock.room = 100
+    assert queue.flush(frame)
+    assert sock.data == b'abcdef[snap]'
+
+def test_waiting_snapshot_is_replaced():
+    sock = SlowSocket()
+    queue = OutboundQueue(sock)
+    framed = []
+    queue.replace(b'one')
+    queue.replace(b'two')
+    queue.replace(b'three')
+    assert not queue.flush(lambda snapshot: framed.append(snapshot) or
+                           frame(snapshot))
+    sock.room = 100
+    assert queue.flush(lambda snapshot: framed.append(snapshot) or
+                       frame(snapshot))
+    assert sock.data == b'[three]'
+    # The newest snapshot was framed once, even though it took two flushes
+    assert framed == [b'three']
+    assert (queue.sent, queue.dropped) == (1, 2)
+
+def test_snapshot_framed_only_when_written():
+    sock = SlowSocket()
+    queue = OutboundQueue(sock)
+    framed = []
+    queue.send([b'reliable'])
+    queue.replace(b'snap')
+    queue.flush(lambda snapshot: framed.append(snapshot) or frame(snapshot))
+    assert framed == []
+    sock.room = 100
+    queue.flush(lambda snapshot: framed.append(snapshot) or frame(snapshot))
+    assert framed == [b'snap']
+
+def test_too_much_queued():
+    queue = OutboundQueue(SlowSocket())
+    assert queue.send([b'x' * OutboundQueue.MAX_BYTES])
+    assert not queue.send([b'x'])
+    assert queue.queuedBytes == OutboundQueue.MAX_BYTES + 1
+
+def test_socket_errors_are_raised():
+    class BrokenSocket:
+        def send(self, data):
+            raise ConnectionResetError()
+    queue = OutboundQueue(BrokenSocket())
+    queue.send([b'x'])
+    with raises(OSError):
+        queue.flush(frame)
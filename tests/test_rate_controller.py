@@ -0,0 +1,96 @@
+from local.RateController import RateController
+
+"""/*
+    Script: RateController Tests
+    Checks that a <RateController> steps down under load or backlog, no
+    faster than <RateController.STEP_DOWN_DELAY>, and only steps back up
+    after <RateController.STEP_UP_DELAY> seconds of headroom.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_rate_controller.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: run
+    Samples a controller once every 50ms between two times
+
+    Parameters:
+        RateController controller - The controller to sample
+        float start - The time of the first sample
+        float end - The time after the last sample
+        float load - The load of every sample
+        float backlog - The backlog of every sample
+
+    Returns:
+        float now - The time after the last sample
+*/"""
+def run(controller, start, end, load, backlog):
+    now = start
+    while now < end:
+        controller.sample(load, backlog, now)
+        now += 0.05
+    return now
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_starts_at_full_rate():
+    controller = RateController(0)
+    assert controller.sendInterval() == RateController.LEVELS[0][0]
+    assert all(controller.shouldBroadcast(tick) for tick in range(10))
+
+def test_backlog_steps_down_once_per_delay():
+    controller = RateController(0)
+    assert not controller.sample(0, RateController.HIGH_BACKLOG + 1, 0.5)
+    assert controller.sample(0, RateController.HIGH_BACKLOG + 1, 1.0)
+    assert controller.level == 1
+    assert not controller.sample(0, RateController.HIGH_BACKLOG + 1, 1.5)
+    assert controller.sample(0, RateController.HIGH_BACKLOG + 1, 2.0)
+    assert controller.level == 2
+
+def test_load_is_smoothed():
+    controller = RateController(0)
+    # One slow tick is not enough to step down
+    assert not controller.sample(2, 0, 5)
+    run(controller, 5, 10, 1.0, 0)
+    assert controller.level > 0
+
+def test_lowest_level_is_the_floor():
+    controller = RateController(0)
+    run(controller, 0, 20, 1.0, 10)
+    assert controller.level == len(RateController.LEVELS) - 1
+    assert controller.changes == len(RateController.LEVELS) - 1
+    assert [controller.shouldBroadcast(tick) for tick in range(4)] == [
+        True, False, False, True]
+
+def test_steps_up_after_headroom():
+    controller = RateController(0)
+    now = run(controller, 0, 1.01, 0, 10)
+    assert controller.level == 1
+    # Middling load is neither pressure nor headroom
+    now = run(controller, now, now + 10, 0, RateController.LOW_BACKLOG)
+    assert controller.level == 1
+    start = now
+    while controller.level:
+        controller.sample(0, 0, now)
+        now += 0.05
+    assert now - start >= RateController.STEP_UP_DELAY
+    assert controller.lowestLevel == 1
+    assert 'lowest rate %ims' % RateController.LEVELS[1][0] in (
+        controller.summary())
+
+def test_send_interval_follows_round_trip_time():
+    controller = RateController(0)
+    intervals = [controller.sendInterval(rtt) for rtt in (
+        None, 0.1, RateController.RTT_LEVELS[0], RateController.RTT_LEVELS[2],
+        10)]
+    assert intervals == [33, 33, 50, 100, 100]
+    controller.level = 2
+    assert controller.sendInterval(RateController.RTT_LEVELS[0]) == 66
@@ -0,0 +1,151 @@
+import asyncio
+from json import loads
+
+from pytest import fixture, mark
+
+from local.RoomServer import RoomServer
+
+"""/*
+    Script: RoomServer Tests
+    Checks that a <RoomServer> only creates a room for a join request, and
+    answers broadcast requests without creating any.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_room_server.py
+        (end code)
+*/"""
+
+"""/*
+    Class: RecordingConnection
+    Stand in for an <AsyncConnection> that keeps everything sent on it
+*/"""
+class RecordingConnection:
+
+    """/*
+        Constructor: __init__
+        Creates a connection with nothing sent on it
+    */"""
+    def __init__(self):
+        self.sent = []
+
+    """/*
+        Function: sendall
+        Keeps the data
+
+        Parameters:
+            bytes data - The data to send
+    */"""
+    def sendall(self, data):
+        self.sent.append(data)
+
+
+"""/*
+    Class: BroadcastSocket
+    Stand in for the UDP socket of the broadcast service, holding one
+    request and keeping the replies
+*/"""
+class BroadcastSocket:
+
+    """/*
+        Constructor: __init__
+        Creates a socket with a request waiting
+
+        Parameters:
+            bytes request - The datagram waiting to be read
+    */"""
+    def __init__(self, request):
+        self.request = request
+        self.replies = []
+
+    """/*
+        Function: recvfrom
+        Reads the waiting request
+
+        Parameters:
+            int size - The most bytes to read
+
+        Returns:
+            tuple datagram - The request and the address it came from
+    */"""
+    def recvfrom(self, size):
+        return self.request, ('127.0.0.1', 50000)
+
+    """/*
+        Function: sendto
+        Keeps a reply
+
+        Parameters:
+            bytes data - The reply
+            tuple address - Where the reply is sent
+    */"""
+    def sendto(self, data, address):
+        self.replies.append(loads(data.decode()))
+
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: server
+    Fixture of a server on a free port that is never started, with its own
+    event loop and no room to spare, so a room is never actually created
+*/"""
+@fixture
+def server():
+    server = RoomServer(0, log=lambda msg: None, maxRooms=0, capacity=3)
+    server.loop = asyncio.new_event_loop()
+    yield server
+    server.loop.close()
+    server.sock.close()
+
+"""/*
+    Function: route
+    Routes a lobby request on the server's event loop
+
+    Parameters:
+        RoomServer server - The server
+        bytes data - The request
+
+    Returns:
+        list sent - What was sent back
+*/"""
+def route(server, data):
+    connection = RecordingConnection()
+    server.loop.run_until_complete(server._routeLobby(connection, data))
+    return connection.sent
+
+"""/*
+    Group: Tests
+*/"""
+
+@mark.parametrize('data', [
+    b'join=Ann;None', b'room=a join=Ann;None', b'join=Ann;pass;word'
+])
+def test_join_creates_room(server, data):
+    assert route(server, data) == [b'server full']
+
+@mark.parametrize('data', [
+    b'query=0', b'room=a quit=0', b'xjoinx', b'query=0 join=Ann;None',
+    b'room=a join', b'hello'
+])
+def test_other_requests_do_not_create_room(server, data):
+    assert route(server, data) == []
+    assert server.rooms == {}
+
+def test_invalid_room(server):
+    assert route(server, b'room=../a join=Ann;None') == [b'invalid room']
+
+def test_broadcast_does_not_create_room(server):
+    server._broadcastSock = BroadcastSocket(b'arena_broadcast_req')
+    server._handleBroadcast()
+    assert server.rooms == {}
+    assert server._broadcastSock.replies == [{
+        'data': {'players': [None, None, None], 'password': False},
+        'port': 0, 'room': ''}]
+
+def test_other_datagrams_are_ignored(server):
+    server._broadcastSock = BroadcastSocket(b'hello')
+    server._handleBroadcast()
+    assert server._broadcastSock.replies == []
@@ -0,0 +1,198 @@
+import asyncio
+from array import array
+import socket as sockets
+from socket import AF_UNIX, SOCK_DGRAM, SOL_SOCKET, socketpair
+from types import SimpleNamespace
+
+from pytest import fixture, mark, raises, skip
+
+from local.RoomWorker import RoomWorker
+
+"""/*
+    Script: RoomWorker Tests
+    Checks how the <RoomWorker> processes of a <RoomSupervisor> share rooms:
+    claiming rooms for the least loaded worker, handing connections for a
+    room hosted elsewhere to its owner over its inbox, and clearing the
+    directory once a room is finished.
+
+    The workers run in this process, with a plain dict and list standing in
+    for the shared directory and loads.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_room_worker.py
+        (end code)
+*/"""
+
+"""/*
+    var: HANDSHAKE
+    The start of a WebSocket handshake for the game in room a
+*/"""
+HANDSHAKE = (b'GET /a HTTP/1.1\r\nHost: localhost\r\n'
+             b'Upgrade: websocket\r\nConnection: Upgrade\r\n'
+             b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n'
+             b'Sec-WebSocket-Version: 13\r\n\r\n')
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: workers
+    Fixture of two workers on free ports, each with its own event loop
+    that is never started. Room a is hosted by worker 1
+*/"""
+@fixture
+def workers():
+    if not hasattr(sockets, 'SO_REUSEPORT') or not hasattr(
+            sockets.socket, 'sendmsg'):
+        skip('Worker processes are not supported here')
+    inboxes = [socketpair(AF_UNIX, SOCK_DGRAM) for index in range(2)]
+    senders = [sender for _, sender in inboxes]
+    directory = {'a': 1}
+    loads = [0, 1]
+    workers = [RoomWorker(index, directory, loads, senders, inbox, port=0,
+                          log=lambda msg: None)
+               for index, (inbox, _) in enumerate(inboxes)]
+    for worker in workers:
+        worker.loop = asyncio.new_event_loop()
+    yield workers
+    for worker in workers:
+        worker.loop.close()
+        worker.sock.close()
+    for inbox, sender in inboxes:
+        inbox.close()
+        sender.close()
+
+"""/*
+    Function: handOffs
+    Replaces a worker's handling of the connections handed to it with a
+    list of them
+
+    Parameters:
+        RoomWorker worker - The worker
+
+    Returns:
+        list received - Filled with the socket and data of each connection
+                        the worker is handed, once its loop has run
+*/"""
+def handOffs(worker):
+    received = []
+
+    async def serveHandOff(sock, data):
+        received.append((sock, data))
+
+    worker._serveHandOff = serveHandOff
+    return received
+
+"""/*
+    Function: connect
+    Passes a connection to a worker as if it had just been accepted, and
+    runs the worker's loop until it is done with it
+
+    Parameters:
+        RoomWorker worker - The worker accepting the connection
+        bytes data - The first request sent on the connection
+
+    Returns:
+        Socket client - The client's end of the connection
+*/"""
+def connect(worker, data):
+    client, accepted = socketpair()
+
+    async def accept():
+        reader, writer = await asyncio.open_connection(sock=accepted)
+        await worker._handleConnection(reader, writer, data)
+
+    worker.loop.run_until_complete(accept())
+    return client
+
+"""/*
+    Group: Tests
+*/"""
+
+@mark.parametrize('data', [b'room=a join=Ann;None', HANDSHAKE])
+def test_connection_reaches_owner(workers, data):
+    received = handOffs(workers[1])
+    client = connect(workers[0], data)
+    workers[1]._receiveHandOff()
+    workers[1].loop.run_until_complete(asyncio.sleep(0))
+    assert len(received) == 1
+    sock, forwarded = received[0]
+    assert forwarded == data
+    # The owner has the client's connection itself, not a copy of its data
+    with sock:
+        sock.setblocking(True)
+        sock.sendall(b'joined')
+        assert client.recv(100) == b'joined'
+    client.close()
+    assert workers[0].rooms == {} and workers[1].rooms == {}
+
+def test_receive_hand_off(workers):
+    received = handOffs(workers[0])
+    client, handedOff = socketpair()
+    workers[1].inboxes[0].sendmsg(
+        [b'query=0'],
+        [(SOL_SOCKET, sockets.SCM_RIGHTS, array('i', [handedOff.fileno()]))])
+    handedOff.close()
+    workers[0]._receiveHandOff()
+    # Nothing waiting, and a datagram without a descriptor, are ignored
+    workers[0]._receiveHandOff()
+    workers[1].inboxes[0].send(b'query=0')
+    workers[0]._receiveHandOff()
+    workers[0].loop.run_until_complete(asyncio.sleep(0))
+    assert [data for sock, data in received] == [b'query=0']
+    with received[0][0] as sock:
+        sock.setblocking(True)
+        client.sendall(b'ping')
+        assert sock.recv(100) == b'ping'
+    client.close()
+
+def test_oversized_hand_off_is_rejected(workers):
+    with raises(ValueError):
+        workers[0]._forward(None, 'a', b'x' * (RoomWorker.MAX_HANDOFF + 1),
+                            False)
+    workers[1].inbox.setblocking(False)
+    with raises(BlockingIOError):
+        workers[1].inbox.recv(RoomWorker.MAX_HANDOFF)
+
+def test_own_rooms_are_not_forwarded(workers):
+    assert not workers[1]._forward(None, 'a', b'query=0', False)
+    # Rooms with no owner are only claimed by a join
+    assert not workers[0]._forward(None, 'b', b'query=0', False)
+    assert 'b' not in workers[0].directory
+
+def test_owner_claims_least_loaded(workers):
+    worker = workers[0]
+    worker.loads[:] = [2, 0]
+    assert worker._owner('b', False) is None
+    assert worker._owner('b', True) == 1
+    assert worker.directory['b'] == 1
+    # A room keeps its owner, however loaded
+    worker.loads[:] = [0, 5]
+    assert worker._owner('b', True) == 1
+    assert worker._owner('c', True) == 0
+
+def test_room_finished_cleans_directory(workers):
+    worker = workers[1]
+    room = SimpleNamespace(roomId='a', closed=True)
+    worker.rooms['a'] = room
+    worker.loads[1] = 1
+    worker._roomFinished(room)
+    assert 'a' not in worker.rooms
+    assert 'a' not in worker.directory
+    assert worker.loads[1] == 0
+
+def test_room_finished_keeps_other_owners(workers):
+    worker = workers[0]
+    room = SimpleNamespace(roomId='a', closed=True)
+    worker._roomFinished(room)
+    assert worker.directory['a'] == 1
+    # A room reopened under the same ID keeps its entry
+    newer = SimpleNamespace(roomId='b', closed=False)
+    worker.rooms['b'] = newer
+    worker.directory['b'] = 0
+    worker._roomFinished(SimpleNamespace(roomId='b', closed=True))
+    assert worker.rooms['b'] is newer
+    assert worker.directory['b'] == 0
+    assert worker.loads[0] == 1
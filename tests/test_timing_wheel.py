@@ -0,0 +1,173 @@
+from pytest import raises
+
+from local.TimingWheel import TimingWheel
+
+"""/*
+    Script: TimingWheel Tests
+    Checks that a <TimingWheel> runs timers at their deadlines, keeps timers
+    more than a turn away until they are due, and copes with timers being
+    cancelled or rescheduled by the callbacks run during
+    <TimingWheel.advance>.
+
+    The wheels use one second ticks and a turn of 8 slots, so every
+    deadline is a whole tick.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_timing_wheel.py
+        (end code)
+*/"""
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: wheel
+    Creates a small wheel starting at time 0
+
+    Returns:
+        TimingWheel timers - The wheel
+*/"""
+def wheel():
+    return TimingWheel(0, 1, 8)
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_runs_at_deadline():
+    timers = wheel()
+    fired = []
+    timers.schedule('a', 3, fired.append, 'a')
+    assert timers.advance(2.9) == 0
+    assert 'a' in timers
+    assert timers.advance(3) == 1
+    assert fired == ['a']
+    assert 'a' not in timers and len(timers) == 0
+
+def test_past_deadline_runs_on_next_tick():
+    timers = wheel()
+    timers.advance(5)
+    fired = []
+    timers.schedule('late', 1, fired.append, 'late')
+    assert timers.advance(5.5) == 0
+    assert timers.advance(6) == 1
+
+def test_schedule_moves_existing_timer():
+    timers = wheel()
+    fired = []
+    timers.schedule('a', 2, fired.append, 1)
+    timers.schedule('a', 4, fired.append, 2)
+    assert len(timers) == 1
+    timers.advance(3)
+    assert fired == []
+    timers.advance(4)
+    assert fired == [2]
+
+def test_cancel():
+    timers = wheel()
+    timers.schedule('a', 2, lambda: None)
+    assert timers.cancel('a')
+    assert not timers.cancel('a')
+    assert timers.advance(10) == 0
+
+def test_runs_in_order_of_ticks():
+    timers = wheel()
+    fired = []
+    for deadline in (5, 2, 4, 3):
+        timers.schedule(deadline, deadline, fired.append, deadline)
+    timers.advance(6)
+    assert fired == [2, 3, 4, 5]
+
+def test_timers_more_than_a_turn_away():
+    timers = wheel()
+    fired = []
+    # Tick 10 shares the slot of tick 2
+    timers.schedule('far', 10, fired.append, 'far')
+    timers.schedule('near', 2, fired.append, 'near')
+    timers.advance(2)
+    assert fired == ['near']
+    timers.advance(9)
+    assert fired == ['near']
+    timers.advance(10)
+    assert fired == ['near', 'far']
+
+def test_jump_of_several_turns():
+    timers = wheel()
+    fired = []
+    for deadline in (1, 7, 12, 30):
+        timers.schedule(deadline, deadline, fired.append, deadline)
+    assert timers.advance(29) == 3
+    assert sorted(fired) == [1, 7, 12]
+    assert timers.advance(30) == 1
+
+def test_callback_cancels_timer_in_same_slot():
+    timers = wheel()
+    fired = []
+    timers.schedule('first', 2, lambda: fired.append('first') or
+                    timers.cancel('second'))
+    timers.schedule('second', 2, fired.append, 'second')
+    assert timers.advance(2) == 1
+    assert fired == ['first']
+    assert len(timers) == 0
+
+def test_callback_reschedules_timer_in_same_slot():
+    timers = wheel()
+    fired = []
+    timers.schedule('first', 2, lambda: fired.append('first') or
+                    timers.schedule('second', 4, fired.append, 'moved'))
+    timers.schedule('second', 2, fired.append, 'second')
+    timers.advance(3)
+    assert fired == ['first']
+    timers.advance(4)
+    assert fired == ['first', 'moved']
+
+def test_callback_reschedules_timer_a_turn_later_in_same_slot():
+    timers = wheel()
+    fired = []
+    timers.schedule('first', 2, lambda: fired.append('first') or
+                    timers.schedule('second', 10, fired.append, 'moved'))
+    timers.schedule('second', 2, fired.append, 'second')
+    timers.advance(9)
+    assert fired == ['first']
+    timers.advance(10)
+    assert fired == ['first', 'moved']
+
+def test_callback_reschedules_itself():
+    timers = wheel()
+    fired = []
+
+    def repeat():
+        fired.append(timers.tick)
+        timers.schedule('repeat', timers.tick + 2, repeat)
+
+    timers.schedule('repeat', 1, repeat)
+    # Due again within the same advance, so runs each time it comes round
+    assert timers.advance(7) == 4
+    assert fired == [1, 3, 5, 7]
+    assert 'repeat' in timers
+
+def test_callback_reschedules_itself_for_now():
+    timers = wheel()
+    fired = []
+    timers.schedule('now', 1, lambda: fired.append(timers.tick) or
+                    timers.schedule('now', 0, lambda: None))
+    # A deadline already passed is due on the next tick, not this one
+    assert timers.advance(1) == 1
+    assert 'now' in timers
+    assert timers.advance(2) == 1
+
+def test_timeout():
+    timers = wheel()
+    assert timers.timeout(0) is None
+    timers.schedule('a', 3, lambda: None)
+    assert timers.timeout(0.5) == 2.5
+    assert timers.timeout(4) == 0
+    timers.schedule('a', 100, lambda: None)
+    # Never waits more than a turn of the wheel
+    assert timers.timeout(0) <= 8
+
+def test_resolution_must_be_positive():
+    with raises(ValueError):
+        TimingWheel(0, 0)
@@ -0,0 +1,95 @@
+import os
+
+from pytest import fixture, mark, skip
+
+from local.WebFrontEnd import WebFrontEnd
+
+"""/*
+    Script: WebFrontEnd Tests
+    Checks that <WebFrontEnd> only serves the whitelisted static files and
+    the saved game stats, whatever path it is asked for.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_web_front_end.py
+        (end code)
+*/"""
+
+"""/*
+    var: OUTSIDE_PATHS
+    Requested paths that must not be served
+*/"""
+OUTSIDE_PATHS = [
+    '/stats//%s/secret.ast',
+    '/stats/../secret.ast',
+    '/stats/%s/secret.ast',
+    '/scripts/../secret.txt',
+    '/scripts/..\\secret.txt',
+    '/scripts\\..\\secret.txt',
+    '//secret.txt',
+    '/secret.txt',
+    '/scripts/',
+    '/scripts//game.js',
+    '/stats/game.json',
+    '/local/ArenaServer.py',
+    '/scripts/missing.js',
+    '/scripts/link.js'
+]
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: frontEnd
+    Fixture of a front end serving a root directory with a script and a
+    saved game, next to a secret file that must never be served. Its
+    server is never started
+*/"""
+@fixture
+def frontEnd(tmp_path):
+    root = tmp_path / 'root'
+    (root / 'scripts').mkdir(parents=True)
+    (root / 'stats').mkdir()
+    (root / 'index.html').write_bytes(b'index')
+    (root / 'scripts' / 'game.js').write_bytes(b'game')
+    (root / 'stats' / 'game.ast').write_bytes(b'{}')
+    (tmp_path / 'secret.txt').write_bytes(b'secret')
+    (tmp_path / 'secret.ast').write_bytes(b'secret')
+    try:
+        os.symlink(str(tmp_path / 'secret.txt'),
+                   str(root / 'scripts' / 'link.js'))
+    except (OSError, NotImplementedError):
+        pass
+    frontEnd = WebFrontEnd(None, 0, str(root))
+    frontEnd.statsDirectory = str(root / 'stats')
+    yield frontEnd
+    frontEnd.sock.close()
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_index(frontEnd):
+    assert frontEnd._serveFile('/') == (
+        200, [('Content-Type', 'text/html; charset=utf-8')], b'index')
+
+def test_static_file(frontEnd):
+    assert frontEnd._serveFile('/scripts/game.js') == (
+        200, [('Content-Type', 'application/javascript')], b'game')
+
+def test_stats_file(frontEnd):
+    assert frontEnd._serveFile('/stats/game.ast') == (
+        200, [('Content-Type', 'application/json')], b'{}')
+
+@mark.parametrize('path', OUTSIDE_PATHS)
+def test_paths_outside_are_not_served(frontEnd, tmp_path, path):
+    if '%s' in path:
+        path = path % str(tmp_path).strip('/')
+    assert frontEnd._serveFile(path) == (404, [], b'')
+
+def test_link_out_of_root(frontEnd):
+    link = os.path.join(frontEnd.root, 'scripts', 'link.js')
+    if not os.path.islink(link):
+        skip('Links are not supported')
+    assert frontEnd._serveFile('/scripts/link.js') == (404, [], b'')
@@ -0,0 +1,124 @@
+from socket import socketpair
+
+from pytest import fixture, raises
+
+from local.FrameReader import FrameReader
+from local.WebSocketHandshake import WebSocketHandshake
+from .test_frame_reader import clientFrame
+
+"""/*
+    Script: WebSocketHandshake Tests
+    Checks that a <WebSocketHandshake> reads an upgrade request sent in
+    pieces, keeps frames that arrive along with it, and only completes on
+    the exvo-arena-ready message.
+
+    Usage:
+        (start code (bash))
+            python3 -m pytest tests/test_websocket_handshake.py
+        (end code)
+*/"""
+
+"""/*
+    var: REQUEST
+    An upgrade request, as sent by <Arena JS>
+*/"""
+REQUEST = (b'GET / HTTP/1.1\r\nHost: arena\r\nUpgrade: websocket\r\n'
+           b'Connection: Upgrade\r\nSec-WebSocket-Version: 13\r\n'
+           b'Sec-WebSocket-Key: dGhlIHNhbXBsZSBub25jZQ==\r\n\r\n')
+
+"""/*
+    Group: Functions
+*/"""
+
+"""/*
+    Function: sockets
+    Fixture of a connected pair of sockets, the first for the server and
+    the second for the client
+*/"""
+@fixture
+def sockets():
+    server, client = socketpair()
+    yield server, client
+    server.close()
+    client.close()
+
+"""/*
+    Group: Tests
+*/"""
+
+def test_request_in_pieces(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    assert handshake.feedRequest(REQUEST[:20]) is None
+    client.sendall(REQUEST[20:])
+    request = handshake.readRequest()
+    assert request is handshake.request
+    assert request.header('Sec-WebSocket-Version') == '13'
+    assert handshake.state == WebSocketHandshake.REQUEST
+
+def test_accept_then_ready(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    handshake.feedRequest(REQUEST)
+    assert handshake.accept(b'HTTP/1.1 101 Switching Protocols\r\n\r\n') == []
+    assert client.recv(100).startswith(b'HTTP/1.1 101')
+    assert handshake.state == WebSocketHandshake.READY
+
+    client.sendall(clientFrame(b'', FrameReader.PING))
+    assert handshake.readMessages() == [(FrameReader.PING, b'')]
+    assert handshake.state == WebSocketHandshake.READY
+    assert handshake.feedMessages(clientFrame(b'exvo-arena-ready')) == [
+        (FrameReader.TEXT, 'exvo-arena-ready')]
+    assert handshake.state == WebSocketHandshake.COMPLETE
+
+def test_ready_sent_with_request(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    handshake.feedRequest(REQUEST + clientFrame(b'exvo-arena-ready'))
+    handshake.accept(b'HTTP/1.1 101 Switching Protocols\r\n\r\n')
+    assert handshake.state == WebSocketHandshake.COMPLETE
+
+def test_deflate_negotiated(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    handshake.feedRequest(REQUEST)
+    handshake.deflate = {'clientContextTakeover': False}
+    handshake.accept(b'HTTP/1.1 101 Switching Protocols\r\n\r\n')
+    assert handshake.reader._decompressor is not None
+    assert not handshake.reader._contextTakeover
+
+def test_other_text_is_not_ready(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    handshake.feedRequest(REQUEST)
+    handshake.accept(b'HTTP/1.1 101 Switching Protocols\r\n\r\n')
+    handshake.feedMessages(clientFrame(b'exvo-arena-ready ',
+                                       FrameReader.TEXT))
+    handshake.feedMessages(clientFrame(b'exvo-arena-ready',
+                                       FrameReader.BINARY))
+    assert handshake.state == WebSocketHandshake.READY
+
+def test_closed_during_request(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    handshake.feedRequest(REQUEST[:10])
+    client.close()
+    with raises(ValueError):
+        handshake.readRequest()
+
+def test_closed_before_ready(sockets):
+    server, client = sockets
+    handshake = WebSocketHandshake(server)
+    handshake.feedRequest(REQUEST)
+    handshake.accept(b'HTTP/1.1 101 Switching Protocols\r\n\r\n')
+    with raises(ValueError):
+        handshake.feedMessages(b'')
+    client.recv(100)
+    client.close()
+    with raises(ValueError):
+        handshake.readMessages()
+
+def test_malformed_request(sockets):
+    server, client = sockets
+    with raises(ValueError):
+        WebSocketHandshake(server).feedRequest(b'HELLO\r\n\r\n')